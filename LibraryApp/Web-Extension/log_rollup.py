@@ -0,0 +1,382 @@
+"""
+Access-log retention and rollups for the Student Portal
+
+Raw request rows in access_logs are folded incrementally (by id watermark) into
+access_logs_hourly and access_logs_daily: request counts per endpoint and status
+class, latency sums and latency buckets. Raw rows are then pruned after
+RAW_RETENTION_DAYS while the rollups keep months of history, so dashboards query
+a bounded number of rows no matter how busy the portal is.
+
+Used by both processes:
+  - student_portal.py runs the periodic scheduler (start_rollup_scheduler)
+  - the desktop admin dashboards fold in the latest rows and read the rollups
+
+Works on SQLite and on the Postgres connection wrapper from database.py.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+RAW_RETENTION_DAYS = 7
+HOURLY_RETENTION_DAYS = 90
+DAILY_RETENTION_DAYS = 730
+ROLLUP_INTERVAL_SECONDS = 300
+ROLLUP_BATCH_SIZE = 50000
+
+# Upper bounds (ms) of the latency histogram columns; the last bucket is open-ended
+LATENCY_BUCKETS = (
+    ('latency_le_50', 50),
+    ('latency_le_200', 200),
+    ('latency_le_1000', 1000),
+    ('latency_gt_1000', None),
+)
+
+_METRIC_COLUMNS = ['request_count', 'latency_count', 'latency_sum_ms'] + [c for c, _ in LATENCY_BUCKETS]
+
+
+def _rollup_table_sql(table, key_column, postgres):
+    int_type = 'BIGINT' if postgres else 'INTEGER'
+    buckets = ',\n'.join(f'            {col} {int_type} DEFAULT 0' for col, _ in LATENCY_BUCKETS)
+    return f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            {key_column} TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            status_class TEXT NOT NULL,
+            request_count {int_type} DEFAULT 0,
+            latency_count {int_type} DEFAULT 0,
+            latency_sum_ms REAL DEFAULT 0,
+{buckets},
+            PRIMARY KEY ({key_column}, endpoint, status_class)
+        )
+    '''
+
+
+# (table_name, pg_sql, sqlite_sql) in the shape create_table_safe() expects
+ROLLUP_TABLES = [
+    ('access_logs_hourly',
+     _rollup_table_sql('access_logs_hourly', 'bucket', True),
+     _rollup_table_sql('access_logs_hourly', 'bucket', False)),
+    ('access_logs_daily',
+     _rollup_table_sql('access_logs_daily', 'day', True),
+     _rollup_table_sql('access_logs_daily', 'day', False)),
+    ('access_logs_rollup_state', '''
+        CREATE TABLE IF NOT EXISTS access_logs_rollup_state (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''', '''
+        CREATE TABLE IF NOT EXISTS access_logs_rollup_state (
+            name TEXT PRIMARY KEY,
+            value TEXT
+        )
+    '''),
+]
+
+ACCESS_LOG_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_access_logs_timestamp ON access_logs (timestamp)',
+]
+
+_rollup_lock = threading.Lock()
+
+STATUS_CATEGORIES = (
+    ('2xx', '2xx Success'),
+    ('3xx', '3xx Redirect'),
+    ('4xx', '4xx Client Error'),
+    ('5xx', '5xx Server Error'),
+    ('other', 'Other'),
+)
+
+# Immutable result of collect_dashboard_snapshot(); safe to hand from a worker
+# thread to the Tk thread. Sequences are tuples so snapshots compare by value.
+DashboardSnapshot = namedtuple('DashboardSnapshot', [
+    'total_24h', 'total_7d', 'success_24h', 'errors_24h', 'success_rate',
+    'peak_hour', 'peak_count',
+    'hourly',               # 24 request counts, index = hour of day (UTC, like the raw timestamps)
+    'top_endpoints',        # ((endpoint, count), ...) busiest first, at most 8
+    'status_distribution',  # ((category label, count), ...) non-zero categories only
+    'trend',                # ((YYYY-MM-DD, count), ...) last 7 days
+    'avg_latency_ms',       # None when no latency was recorded
+    'generated_at',
+])
+
+
+def is_sqlite(conn):
+    return isinstance(conn, sqlite3.Connection)
+
+
+def ensure_rollup_tables(conn):
+    """Create rollup tables and the raw timestamp index if missing"""
+    postgres = not is_sqlite(conn)
+    cursor = conn.cursor()
+    for _, pg_sql, sqlite_sql in ROLLUP_TABLES:
+        cursor.execute(pg_sql if postgres else sqlite_sql)
+    for sql in ACCESS_LOG_INDEXES:
+        try:
+            cursor.execute(sql)
+        except Exception as e:
+            # access_logs may not exist yet on a fresh desktop install
+            print(f"Access log index warning: {e}")
+    conn.commit()
+
+
+def status_class(status):
+    """Map an HTTP status code to its class label ('2xx', '4xx', ...)"""
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return 'other'
+    if 100 <= status < 600:
+        return f"{status // 100}xx"
+    return 'other'
+
+
+def _latency_bucket(duration_ms):
+    for col, upper in LATENCY_BUCKETS:
+        if upper is None or duration_ms <= upper:
+            return col
+    return LATENCY_BUCKETS[-1][0]
+
+
+def _get_state(cursor, name, default=None):
+    cursor.execute("SELECT value FROM access_logs_rollup_state WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+
+def _set_state(cursor, name, value):
+    cursor.execute("UPDATE access_logs_rollup_state SET value = ? WHERE name = ?", (str(value), name))
+    if cursor.rowcount == 0:
+        cursor.execute("INSERT INTO access_logs_rollup_state (name, value) VALUES (?, ?)", (name, str(value)))
+
+
+def _merge_rows(cursor, table, key_column, aggregates):
+    """Add aggregated metrics into a rollup table (update existing rows, insert new ones)"""
+    set_clause = ', '.join(f'{col} = {col} + ?' for col in _METRIC_COLUMNS)
+    insert_cols = ', '.join([key_column, 'endpoint', 'status_class'] + _METRIC_COLUMNS)
+    placeholders = ', '.join(['?'] * (3 + len(_METRIC_COLUMNS)))
+    for (key, endpoint, cls), metrics in aggregates.items():
+        values = [metrics[col] for col in _METRIC_COLUMNS]
+        cursor.execute(
+            f"UPDATE {table} SET {set_clause} WHERE {key_column} = ? AND endpoint = ? AND status_class = ?",
+            values + [key, endpoint, cls])
+        if cursor.rowcount == 0:
+            cursor.execute(f"INSERT INTO {table} ({insert_cols}) VALUES ({placeholders})",
+                           [key, endpoint, cls] + values)
+
+
+def _has_duration_column(cursor, postgres):
+    try:
+        if postgres:
+            cursor.execute("SELECT column_name FROM information_schema.columns "
+                           "WHERE table_name='access_logs' AND column_name='duration_ms'")
+            return bool(cursor.fetchone())
+        cursor.execute("PRAGMA table_info(access_logs)")
+        return 'duration_ms' in [col[1] for col in cursor.fetchall()]
+    except Exception:
+        return False
+
+
+def rollup_access_logs(conn, batch_size=ROLLUP_BATCH_SIZE):
+    """Fold raw access_logs rows newer than the watermark into the rollup tables.
+
+    Runs inside a single write transaction (BEGIN IMMEDIATE on SQLite) so the
+    portal and the desktop app can both call it without double counting. Only
+    rows up to a committed id are read, so the watermark never passes a row that
+    is still being inserted. Returns the number of raw rows rolled up.
+    """
+    postgres = not is_sqlite(conn)
+    with _rollup_lock:
+        cursor = conn.cursor()
+        if postgres:
+            max_id = _stable_max_log_id(conn)
+        else:
+            if conn.in_transaction:
+                conn.commit()
+            cursor.execute('BEGIN IMMEDIATE')
+        try:
+            if postgres:
+                # Serialize concurrent rollups across processes on the state row
+                _set_state(cursor, 'lock', 'rollup')
+                cursor.execute("SELECT value FROM access_logs_rollup_state WHERE name = 'lock' FOR UPDATE")
+            last_id = int(_get_state(cursor, 'last_log_id', 0) or 0)
+            if not postgres:
+                # Writers are serialized, so every id up to MAX(id) is committed
+                cursor.execute('SELECT COALESCE(MAX(id), 0) FROM access_logs')
+                max_id = cursor.fetchone()[0]
+            duration_expr = 'duration_ms' if _has_duration_column(cursor, postgres) else 'NULL'
+            total = 0
+            while True:
+                cursor.execute(f"""
+                    SELECT id, endpoint, status, timestamp, {duration_expr}
+                    FROM access_logs WHERE id > ? AND id <= ? ORDER BY id LIMIT ?
+                """, (last_id, max_id, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                hourly = {}
+                daily = {}
+                for row in rows:
+                    row_id, endpoint, status, ts, duration = row[0], row[1], row[2], row[3], row[4]
+                    last_id = row_id
+                    if ts is None:
+                        continue
+                    ts = str(ts)
+                    endpoint = endpoint or ''
+                    cls = status_class(status)
+                    for aggregates, key in ((hourly, ts[:13] + ':00:00'), (daily, ts[:10])):
+                        metrics = aggregates.get((key, endpoint, cls))
+                        if metrics is None:
+                            metrics = dict.fromkeys(_METRIC_COLUMNS, 0)
+                            aggregates[(key, endpoint, cls)] = metrics
+                        metrics['request_count'] += 1
+                        if duration is not None:
+                            metrics['latency_count'] += 1
+                            metrics['latency_sum_ms'] += float(duration)
+                            metrics[_latency_bucket(float(duration))] += 1
+                _merge_rows(cursor, 'access_logs_hourly', 'bucket', hourly)
+                _merge_rows(cursor, 'access_logs_daily', 'day', daily)
+                total += len(rows)
+                if len(rows) < batch_size:
+                    break
+            _set_state(cursor, 'last_log_id', last_id)
+            _set_state(cursor, 'last_rollup', datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+            conn.commit()
+            return total
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+
+
+def _stable_max_log_id(conn):
+    """Highest access_logs id with no uncommitted row at or below it (Postgres).
+
+    SERIAL ids are handed out at INSERT, not COMMIT, so while the threaded portal
+    logs requests a lower id can still commit after a higher one. SHARE mode
+    waits for every transaction still inserting into access_logs; rows inserted
+    after the lock is released get higher ids.
+    """
+    cursor = conn.cursor()
+    cursor.execute('LOCK TABLE access_logs IN SHARE MODE')
+    cursor.execute('SELECT COALESCE(MAX(id), 0) FROM access_logs')
+    max_id = cursor.fetchone()[0]
+    conn.commit()
+    return max_id
+
+
+def collect_dashboard_snapshot(conn, now=None):
+    """Compute every observability KPI from the rollups in one pass.
+
+    One scan over the last 24 hourly buckets yields totals, success/error counts,
+    peak hour, the hourly series, top endpoints, status mix and average latency;
+    one small query over access_logs_daily yields the 7-day total and trend.
+    Call rollup_access_logs() first to include the newest raw rows.
+    """
+    now = now or datetime.utcnow()
+    hour_cutoff = (now - timedelta(hours=23)).strftime('%Y-%m-%d %H:00:00')
+    day_cutoff = (now - timedelta(days=6)).strftime('%Y-%m-%d')
+    cursor = conn.cursor()
+
+    hourly = [0] * 24
+    endpoints = {}
+    statuses = {}
+    total = success = errors = latency_count = 0
+    latency_sum = 0.0
+    cursor.execute("""
+        SELECT bucket, endpoint, status_class, request_count, latency_count, latency_sum_ms
+        FROM access_logs_hourly WHERE bucket >= ?
+    """, (hour_cutoff,))
+    for bucket, endpoint, cls, count, lat_count, lat_sum in cursor.fetchall():
+        count = count or 0
+        total += count
+        try:
+            hourly[int(str(bucket)[11:13])] += count
+        except ValueError:
+            pass
+        endpoints[endpoint] = endpoints.get(endpoint, 0) + count
+        statuses[cls] = statuses.get(cls, 0) + count
+        if cls == '2xx':
+            success += count
+        elif cls in ('4xx', '5xx'):
+            errors += count
+        latency_count += lat_count or 0
+        latency_sum += lat_sum or 0.0
+
+    cursor.execute("""
+        SELECT day, SUM(request_count) FROM access_logs_daily
+        WHERE day >= ? GROUP BY day ORDER BY day
+    """, (day_cutoff,))
+    trend = tuple((str(day), int(count or 0)) for day, count in cursor.fetchall())
+
+    peak_count = max(hourly) if total else 0
+    peak_hour = f"{hourly.index(peak_count):02d}:00" if peak_count else "N/A"
+    top_endpoints = tuple(sorted(endpoints.items(), key=lambda item: (-item[1], item[0]))[:8])
+    status_distribution = tuple((label, statuses[cls]) for cls, label in STATUS_CATEGORIES if statuses.get(cls))
+
+    return DashboardSnapshot(
+        total_24h=total,
+        total_7d=sum(count for _, count in trend),
+        success_24h=success,
+        errors_24h=errors,
+        success_rate=(success / total * 100) if total else 0,
+        peak_hour=peak_hour,
+        peak_count=peak_count,
+        hourly=tuple(hourly),
+        top_endpoints=top_endpoints,
+        status_distribution=status_distribution,
+        trend=trend,
+        avg_latency_ms=(latency_sum / latency_count) if latency_count else None,
+        generated_at=datetime.now().strftime('%H:%M:%S'),
+    )
+
+
+def prune_access_logs(conn, raw_days=RAW_RETENTION_DAYS, hourly_days=HOURLY_RETENTION_DAYS,
+                      daily_days=DAILY_RETENTION_DAYS):
+    """Apply retention: raw rows (only those already rolled up), hourly and daily rollups"""
+    cursor = conn.cursor()
+    now = datetime.utcnow()
+    last_id = int(_get_state(cursor, 'last_log_id', 0) or 0)
+    raw_cutoff = (now - timedelta(days=raw_days)).strftime('%Y-%m-%d %H:%M:%S')
+    cursor.execute("DELETE FROM access_logs WHERE timestamp < ? AND id <= ?", (raw_cutoff, last_id))
+    raw_deleted = cursor.rowcount
+    hourly_cutoff = (now - timedelta(days=hourly_days)).strftime('%Y-%m-%d %H:00:00')
+    cursor.execute("DELETE FROM access_logs_hourly WHERE bucket < ?", (hourly_cutoff,))
+    daily_cutoff = (now - timedelta(days=daily_days)).strftime('%Y-%m-%d')
+    cursor.execute("DELETE FROM access_logs_daily WHERE day < ?", (daily_cutoff,))
+    _set_state(cursor, 'last_prune', now.strftime('%Y-%m-%d %H:%M:%S'))
+    conn.commit()
+    return raw_deleted
+
+
+def run_rollup_cycle(conn_factory):
+    """One scheduled pass: roll up new rows, then apply retention"""
+    conn = conn_factory()
+    try:
+        ensure_rollup_tables(conn)
+        rolled = rollup_access_logs(conn)
+        pruned = prune_access_logs(conn)
+        return rolled, pruned
+    finally:
+        conn.close()
+
+
+def start_rollup_scheduler(conn_factory, interval_seconds=ROLLUP_INTERVAL_SECONDS):
+    """Run run_rollup_cycle now and then every interval_seconds on a daemon thread"""
+    def _loop():
+        while True:
+            try:
+                rolled, pruned = run_rollup_cycle(conn_factory)
+                if rolled or pruned:
+                    print(f"System: Access logs rolled up ({rolled} new, {pruned} pruned).")
+            except Exception as e:
+                print(f"Access log rollup failed: {e}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=_loop, daemon=True, name='access-log-rollup')
+    thread.start()
+    return thread
@@ -1,4 +1,4 @@
-from flask import Flask, session, jsonify, request, send_from_directory, send_file
+from flask import Flask, session, jsonify, request, send_from_directory, send_file, g
 import sqlite3
 import os
 import sys
@@ -32,6 +32,10 @@ except ImportError:
     RealDictCursor = None
     POSTGRES_AVAILABLE = False
 
+import log_rollup
+# Shared with the desktop app: one fine rate (library_settings.json) and one overdue rule
+from fines import compute_fines, days_until_due, NO_DATE
+
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -221,6 +225,11 @@ def set_csrf_cookie(response):
 
 
 # --- Observability: Logging Middleware ---
+@app.before_request
+def start_request_timer():
+    """Remember when the request started so its latency can be logged"""
+    g.request_started = time.time()
+
 @app.after_request
 def log_request(response):
     """Log every request to the access_logs table"""
@@ -228,34 +237,33 @@ def log_request(response):
         return response
     
     try:
+        started = getattr(g, 'request_started', None)
+        duration_ms = round((time.time() - started) * 1000, 2) if started else None
+
         # Use a separate thread to avoid slowing down the response
-        def write_log(endpoint, method, status):
+        def write_log(endpoint, method, status, duration_ms):
             try:
                 conn = get_portal_db()
                 cursor = conn.cursor()
-                cursor.execute("INSERT INTO access_logs (endpoint, method, status) VALUES (?, ?, ?)",
-                               (endpoint, method, status))
+                cursor.execute("INSERT INTO access_logs (endpoint, method, status, duration_ms) VALUES (?, ?, ?, ?)",
+                               (endpoint, method, status, duration_ms))
                 conn.commit()
                 conn.close()
             except Exception as e:
                 print(f"Logging failed: {e}")
 
-        threading.Thread(target=write_log, args=(request.path, request.method, response.status_code)).start()
+        threading.Thread(target=write_log, args=(request.path, request.method, response.status_code, duration_ms)).start()
     except Exception:
         pass
         
     return response
 
 def cleanup_logs():
-    """Delete logs older than 7 days"""
+    """Roll raw access logs up into hourly/daily tables and apply retention.
+    Raw rows are kept for log_rollup.RAW_RETENTION_DAYS, rollups for months."""
     try:
-        conn = get_portal_db()
-        cursor = conn.cursor()
-        cutoff_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-        cursor.execute("DELETE FROM access_logs WHERE timestamp < ?", (cutoff_date,))
-        conn.commit()
-        conn.close()
-        print("System: Cleaned up old access logs.")
+        rolled, pruned = log_rollup.run_rollup_cycle(get_portal_db)
+        print(f"System: Access logs rolled up ({rolled} new, {pruned} old raw rows pruned).")
     except Exception as e:
         print(f"Log cleanup failed: {e}")
 
@@ -463,7 +471,8 @@ def init_portal_db():
             endpoint TEXT,
             method TEXT,
             status INTEGER,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms REAL
         )
     ''', '''
         CREATE TABLE IF NOT EXISTS access_logs (
@@ -471,7 +480,8 @@ def init_portal_db():
             endpoint TEXT,
             method TEXT,
             status INTEGER,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            duration_ms REAL
         )
     ''')
 
@@ -529,15 +539,42 @@ def init_portal_db():
         )
     ''')
 
-    
+    # Access log rollups (hourly/daily aggregates kept beyond raw retention)
+    for table_name, pg_sql, sqlite_sql in log_rollup.ROLLUP_TABLES:
+        create_table_safe(cursor, table_name, pg_sql, sqlite_sql)
+
+    conn.commit()
+
+    # Migration: latency column on access_logs created by older versions
+    try:
+        if os.getenv('DATABASE_URL'):
+            cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name='access_logs' AND column_name='duration_ms'")
+            has_duration = bool(cursor.fetchone())
+        else:
+            cursor.execute("PRAGMA table_info(access_logs)")
+            has_duration = 'duration_ms' in [col[1] for col in cursor.fetchall()]
+        if not has_duration:
+            cursor.execute("ALTER TABLE access_logs ADD COLUMN duration_ms REAL")
+            conn.commit()
+            print("Migration: Added 'duration_ms' column to access_logs table")
+    except Exception as e:
+        print(f"Migration check warning: {e}")
+
+    for index_sql in log_rollup.ACCESS_LOG_INDEXES:
+        try:
+            cursor.execute(index_sql)
+        except Exception as e:
+            print(f"Index creation warning: {e}")
+
     conn.commit()
     conn.close()
 
 # Initialize on Import
 init_portal_db()
 
-# Run cleanup on startup (after all functions are defined)
-threading.Thread(target=cleanup_logs, daemon=True).start()
+# Roll up and prune access logs on startup and then periodically
+# (after all functions are defined)
+log_rollup.start_rollup_scheduler(get_portal_db)
 
 # --- Helper Functions for Email ---
 
@@ -933,39 +970,38 @@ def api_loan_history():
     returned_late = []
     currently_overdue = []
     
-    today = datetime.now()
+    # Days left, days late and fines for the whole history in one pass
+    days_left = days_until_due([r['due_date'] for r in all_records])
+    late_days, fine_values = compute_fines(
+        [r['due_date'] for r in all_records],
+        [r['return_date'] for r in all_records],
+        open_loans=[r['status'] == 'borrowed' for r in all_records]
+    )
     
-    for record in all_records:
+    for record, left, late, fine in zip(all_records, days_left, late_days, fine_values):
+        left, late, fine = int(left), int(late), int(fine)
         # Determine actual status
         if record['status'] == 'borrowed':
             if record['due_date']:
-                try:
-                    due_dt = datetime.strptime(record['due_date'], '%Y-%m-%d')
-                    if due_dt < today:
-                        record['actual_status'] = 'Currently Overdue'
-                        record['overdue_days'] = (today - due_dt).days
-                        currently_overdue.append(record)
-                    else:
-                        record['actual_status'] = 'Currently Borrowed'
-                        record['days_left'] = (due_dt - today).days
-                        currently_borrowed.append(record)
-                except:
+                if left != NO_DATE and left < 0:
+                    record['actual_status'] = 'Currently Overdue'
+                    record['overdue_days'] = late
+                    record['fine'] = fine
+                    currently_overdue.append(record)
+                else:
                     record['actual_status'] = 'Currently Borrowed'
+                    if left != NO_DATE:
+                        record['days_left'] = left
                     currently_borrowed.append(record)
         elif record['status'] == 'returned':
             if record['due_date'] and record['return_date']:
-                try:
-                    due_dt = datetime.strptime(record['due_date'], '%Y-%m-%d')
-                    return_dt = datetime.strptime(record['return_date'], '%Y-%m-%d')
-                    if return_dt > due_dt:
-                        record['actual_status'] = 'Returned Late'
-                        record['fine_paid'] = record.get('fine', 0) > 0
-                        returned_late.append(record)
-                    else:
-                        record['actual_status'] = 'Returned On Time'
-                        returned_on_time.append(record)
-                except:
-                    record['actual_status'] = 'Returned'
+                if late > 0:
+                    record['actual_status'] = 'Returned Late'
+                    record['fine'] = fine
+                    record['fine_paid'] = fine > 0
+                    returned_late.append(record)
+                else:
+                    record['actual_status'] = 'Returned On Time'
                     returned_on_time.append(record)
     
     return jsonify({
@@ -1299,23 +1335,17 @@ def api_alerts():
     borrows = cursor.fetchall()
     conn.close()
     
-    today = datetime.now()
     overdue_count = 0
     total_fine = 0
     overdue_titles = []
     
-    for row in borrows:
-        if row['due_date']:
-            try:
-                due_dt = datetime.strptime(row['due_date'], '%Y-%m-%d')
-                delta = (due_dt - today).days
-                if delta < 0:
-                    overdue_count += 1
-                    days_late = abs(delta)
-                    total_fine += days_late * 10 # 10 INR per day
-                    overdue_titles.append(row['title'])
-            except:
-                pass
+    # Fines at the library's configured rate (shared fines engine)
+    late_days, fine_values = compute_fines([row['due_date'] for row in borrows])
+    for row, late, fine in zip(borrows, late_days, fine_values):
+        if late > 0:
+            overdue_count += 1
+            total_fine += int(fine)
+            overdue_titles.append(row['title'])
                 
     return jsonify({
         'has_alert': overdue_count > 0,
@@ -1415,21 +1445,24 @@ def api_dashboard():
             'msg': "You are using the default password. Please change it immediately."
         })
 
-    today = datetime.now()
+    # Days left and fines for all active loans in one pass (shared fines engine)
+    days_left = days_until_due([row['due_date'] for row in raw_borrows])
+    _late_days, fine_values = compute_fines([row['due_date'] for row in raw_borrows])
     
-    for row in raw_borrows:
+    for row, delta, fine in zip(raw_borrows, days_left, fine_values):
         item = dict(row)
+        delta = int(delta)
         if item['due_date']:
-            try:
-                due_dt = datetime.strptime(item['due_date'], '%Y-%m-%d')
-                delta = (due_dt - today).days
-                
-                # Logic: Green (3+), Yellow (1-2), Red (<0)
+            if delta == NO_DATE:
+                item['status'] = 'unknown'
+                item['days_msg'] = '-'
+            else:
+                # Logic: Green (3+), Yellow (0-2), Red (<0)
                 if delta < 0:
                     item['status'] = 'overdue'
                     overdue_days = abs(delta)
                     item['days_msg'] = f"Overdue by {overdue_days} days"
-                    item['fine'] = overdue_days * 5 # ₹5 per day per logic in create_demo_data
+                    item['fine'] = int(fine)
                     notifications.append({
                         'type': 'danger',
                         'msg': f"'{item['title']}' is OVERDUE! Fine: ₹{item['fine']}"
@@ -1444,9 +1477,6 @@ def api_dashboard():
                 else:
                     item['status'] = 'safe'
                     item['days_msg'] = f"{delta} days left"
-            except:
-                item['status'] = 'unknown'
-                item['days_msg'] = '-'
         borrows.append(item)
 
     # 3. Fetch Sandbox Data (Requests Status)
@@ -1459,7 +1489,7 @@ def api_dashboard():
     # 4. Analytics & Gamification (Computed on Read-Only Data)
     stats = {
         'total_books': len(raw_history) + len(borrows),
-        'total_fines': sum([10 for x in borrows if x.get('status') == 'overdue']), # Estimated current fines
+        'total_fines': sum(x.get('fine', 0) for x in borrows if x.get('status') == 'overdue'), # Estimated current fines
         'fav_category': 'General',
         'categories': {}
     }
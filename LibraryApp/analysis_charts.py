@@ -0,0 +1,185 @@
+"""
+Persistent matplotlib charts for the Analysis tab
+Each chart keeps one Figure + FigureCanvasTkAgg for the life of its frame and
+updates its artists in place (wedge angles, bar sizes, texts) between refreshes.
+"""
+
+import math
+import tkinter as tk
+
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+
+class ChartSlot:
+    """
+    One reusable chart canvas inside a Tk frame.
+
+    Parameters:
+    - parent: Frame the canvas (or a no-data message) is packed into
+    - figsize/dpi: Figure size, fixed for the life of the slot
+    - pack_options: pack() options for the canvas widget
+    - on_canvas_created: Called with the Tk widget once, when the canvas is built
+    - message_bg: Background for the no-data label
+
+    `state` is free-form storage for the chart's artists; `layout` records what
+    the artists were built for, so callers can tell an in-place update from a rebuild.
+    """
+
+    def __init__(self, parent, figsize=(6, 4), dpi=100, pack_options=None,
+                 on_canvas_created=None, message_bg='white'):
+        self.parent = parent
+        self.figsize = figsize
+        self.dpi = dpi
+        self.pack_options = pack_options or {'fill': tk.BOTH, 'expand': True, 'padx': 10, 'pady': 10}
+        self.on_canvas_created = on_canvas_created
+        self.message_bg = message_bg
+        self.fig = None
+        self.canvas = None
+        self.message = None
+        self.state = {}
+        self.layout = None
+        self.click_handler = None
+        self._drawn = None
+
+    def alive(self):
+        """True while the canvas widget exists (frames may be destroyed by a tab rebuild)"""
+        try:
+            return self.canvas is not None and bool(self.canvas.get_tk_widget().winfo_exists())
+        except tk.TclError:
+            return False
+
+    def figure(self):
+        """Return the Figure, building the canvas on first use and making it visible"""
+        if not self.alive():
+            self.fig = Figure(figsize=self.figsize, dpi=self.dpi)
+            self.fig.patch.set_facecolor('white')
+            self.canvas = FigureCanvasTkAgg(self.fig, self.parent)
+            self.canvas.mpl_connect('button_press_event', self._on_click)
+            self.state = {}
+            self.layout = None
+            self._drawn = None
+            if self.on_canvas_created:
+                try:
+                    self.on_canvas_created(self.canvas.get_tk_widget())
+                except Exception:
+                    pass
+        self._hide_message()
+        widget = self.canvas.get_tk_widget()
+        if not widget.winfo_manager():
+            widget.pack(**self.pack_options)
+        return self.fig
+
+    def needs_rebuild(self, layout):
+        """True when the artists must be rebuilt for `layout`; clears the figure in that case"""
+        fig = self.figure()
+        if self.layout == layout and self.state:
+            return False
+        fig.clear()
+        self.state = {}
+        self.layout = layout
+        return True
+
+    def is_current(self, snapshot):
+        """True if `snapshot` (any comparable value) is exactly what is on screen already"""
+        return self.alive() and self._drawn is not None and self._drawn == snapshot and self.message_hidden()
+
+    def draw(self, snapshot=None):
+        """Schedule a redraw; Tk coalesces repeated calls into one paint"""
+        self._drawn = snapshot
+        if self.alive():
+            self.canvas.draw_idle()
+
+    def show_message(self, text, pack_options=None, **label_options):
+        """Hide the chart and show a text label instead (no-data and hidden states)"""
+        if self.alive():
+            self.canvas.get_tk_widget().pack_forget()
+        self._drawn = None
+        options = {'font': ('Segoe UI', 12), 'bg': self.message_bg, 'fg': '#666666', 'justify': 'center'}
+        options.update(label_options)
+        try:
+            exists = self.message is not None and self.message.winfo_exists()
+        except tk.TclError:
+            exists = False
+        if not exists:
+            self.message = tk.Label(self.parent)
+        self.message.config(text=text, **options)
+        self.message.pack_forget()
+        self.message.pack(**(pack_options or {'expand': True, 'pady': 20}))
+
+    def hide(self):
+        """Hide both the chart and any message"""
+        if self.alive():
+            self.canvas.get_tk_widget().pack_forget()
+        self._hide_message()
+        self._drawn = None
+
+    def message_hidden(self):
+        try:
+            return self.message is None or not self.message.winfo_exists() or not self.message.winfo_manager()
+        except tk.TclError:
+            return True
+
+    def _hide_message(self):
+        try:
+            if self.message is not None and self.message.winfo_exists():
+                self.message.pack_forget()
+        except tk.TclError:
+            self.message = None
+
+    def _on_click(self, event):
+        if self.click_handler:
+            self.click_handler(event)
+
+
+def update_pie(wedges, sizes, texts=None, labels=None, autotexts=None, autopct=None, startangle=90,
+               radius=1.0, labeldistance=1.1, pctdistance=0.6, explode=None):
+    """Move existing pie wedges (and their label/percentage texts) to new sizes.
+
+    Mirrors the geometry of Axes.pie (counter-clockwise from startangle) so a pie
+    built once can be updated without clearing the axes. The number of wedges
+    must match the original call.
+    """
+    total = float(sum(sizes))
+    fracs = [s / total for s in sizes] if total > 0 else [0.0] * len(sizes)
+    theta1 = startangle / 360.0
+    for i, frac in enumerate(fracs):
+        theta2 = theta1 + frac
+        thetam = 2 * math.pi * 0.5 * (theta1 + theta2)
+        offset = explode[i] if explode else 0
+        x, y = offset * math.cos(thetam), offset * math.sin(thetam)
+
+        wedge = wedges[i]
+        wedge.set_center((x, y))
+        wedge.set_theta1(360.0 * theta1)
+        wedge.set_theta2(360.0 * theta2)
+
+        if texts:
+            xt = x + labeldistance * radius * math.cos(thetam)
+            yt = y + labeldistance * radius * math.sin(thetam)
+            texts[i].set_position((xt, yt))
+            texts[i].set_horizontalalignment('left' if xt > 0 else 'right')
+            if labels is not None:
+                texts[i].set_text(labels[i])
+        if autotexts and autopct is not None:
+            xt = x + pctdistance * radius * math.cos(thetam)
+            yt = y + pctdistance * radius * math.sin(thetam)
+            autotexts[i].set_position((xt, yt))
+            autotexts[i].set_text(autopct(100.0 * frac))
+        theta1 = theta2
+
+
+def update_bars(ax, bars, values, tick_labels=None, horizontal=False):
+    """Set new heights (or widths for barh) on existing bars and rescale the value axis"""
+    for bar, value in zip(bars, values):
+        if horizontal:
+            bar.set_width(value)
+        else:
+            bar.set_height(value)
+    if tick_labels is not None:
+        if horizontal:
+            ax.set_yticklabels(tick_labels)
+        else:
+            ax.set_xticklabels(tick_labels)
+    ax.relim()
+    ax.autoscale_view()
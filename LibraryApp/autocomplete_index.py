@@ -0,0 +1,275 @@
+"""
+In-memory prefix index for the borrow/return autocomplete fields
+Enrollment numbers, student names, book IDs, titles and authors are kept in
+sorted term lists and searched with bisect, so a suggestion lookup never touches
+the database. The index is loaded on a worker thread and kept current from
+Database change events: rows named in the event are re-read and re-indexed,
+other changes re-sync the table (only rows that actually changed are re-indexed).
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+# Match tiers, searched in this order until the suggestion limit is reached
+TIER_ID = 0          # ID starts with the query
+TIER_TEXT = 1        # Name/title/author (or one of its words onwards) starts with the query
+TIER_ID_INFIX = 2    # Query appears inside the ID
+TIER_COUNT = 3
+
+DEFAULT_LIMIT = 10
+# Row keys per query when re-reading changed rows
+KEY_FETCH_CHUNK = 500
+
+
+def normalize(text):
+    """Lower-case and collapse whitespace so 'Harry  Potter' and 'harry potter' index alike"""
+    return ' '.join(str(text or '').lower().split())
+
+
+def _word_suffixes(text):
+    """'harry potter' -> ['harry potter', 'potter'] (prefix match on any word start)"""
+    words = text.split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class PrefixIndex:
+    """
+    Sorted-term index answering "top N records whose fields start with / contain this text".
+
+    Parameters:
+    - id_field: Record field holding the unique key (matched as prefix, then as infix)
+    - text_fields: Fields matched from the start of any word
+
+    Each tier is a sorted list of (term, key) tuples; a query is a bisect to the
+    first term >= text followed by a scan that stops at the first non-matching term
+    or once `limit` distinct keys are found. Updates insert/remove single tuples,
+    so keeping the index current costs O(changed rows), not a rebuild.
+    """
+
+    def __init__(self, id_field, text_fields):
+        self.id_field = id_field
+        self.text_fields = tuple(text_fields)
+        self._tiers = [[] for _ in range(TIER_COUNT)]
+        self._records = {}
+        self._terms = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def _terms_for(self, record):
+        key = normalize(record.get(self.id_field))
+        terms = []
+        if key:
+            terms.append((TIER_ID, key))
+            terms.extend((TIER_ID_INFIX, key[i:]) for i in range(1, len(key)))
+        for field in self.text_fields:
+            value = normalize(record.get(field))
+            if value:
+                terms.extend((TIER_TEXT, suffix) for suffix in _word_suffixes(value))
+        return terms
+
+    def _remove_locked(self, key):
+        for tier, term in self._terms.pop(key, ()):
+            entries = self._tiers[tier]
+            position = bisect_left(entries, (term, key))
+            if position < len(entries) and entries[position] == (term, key):
+                del entries[position]
+        self._records.pop(key, None)
+
+    def load(self, records):
+        """Replace the whole index with `records` (dicts)"""
+        tiers = [[] for _ in range(TIER_COUNT)]
+        indexed = {}
+        terms_by_key = {}
+        for record in records:
+            key = record.get(self.id_field)
+            if key in (None, ''):
+                continue
+            terms = self._terms_for(record)
+            indexed[key] = record
+            terms_by_key[key] = terms
+            for tier, term in terms:
+                tiers[tier].append((term, key))
+        for entries in tiers:
+            entries.sort()
+        with self._lock:
+            self._tiers = tiers
+            self._records = indexed
+            self._terms = terms_by_key
+
+    def upsert(self, record):
+        """Add or replace one record"""
+        key = record.get(self.id_field)
+        if key in (None, ''):
+            return
+        terms = self._terms_for(record)
+        with self._lock:
+            self._remove_locked(key)
+            self._records[key] = record
+            self._terms[key] = terms
+            for tier, term in terms:
+                insort(self._tiers[tier], (term, key))
+
+    def remove(self, key):
+        with self._lock:
+            self._remove_locked(key)
+
+    def sync(self, records):
+        """Bring the index in line with a fresh snapshot, touching only changed records.
+        Returns the number of records added, updated or removed.
+        """
+        fresh = {}
+        for record in records:
+            key = record.get(self.id_field)
+            if key not in (None, ''):
+                fresh[key] = record
+        with self._lock:
+            current = dict(self._records)
+        removed = [key for key in current if key not in fresh]
+        updated = [record for key, record in fresh.items() if current.get(key) != record]
+        changed = len(removed) + len(updated)
+        if changed > len(fresh) // 4 + 100:
+            # Bulk import/delete: one sorted rebuild beats thousands of list inserts
+            self.load(fresh.values())
+            return changed
+        for key in removed:
+            self.remove(key)
+        for record in updated:
+            self.upsert(record)
+        return changed
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """Up to `limit` records matching `text`, best tier first, alphabetical within a tier"""
+        query = normalize(text)
+        if not query:
+            return []
+        found = []
+        seen = set()
+        with self._lock:
+            for entries in self._tiers:
+                position = bisect_left(entries, (query,))
+                while position < len(entries) and len(found) < limit:
+                    term, key = entries[position]
+                    if not term.startswith(query):
+                        break
+                    if key not in seen:
+                        seen.add(key)
+                        found.append(self._records[key])
+                    position += 1
+                if len(found) >= limit:
+                    break
+        return found
+
+
+class LibraryAutocompleteIndex:
+    """
+    Student and book indexes for the Transactions tab, fed from a Database.
+
+    Call start() once; the initial load runs on a daemon thread and later writes
+    to the students/books tables update the matching index in the background
+    (just the written rows when the change event names them, e.g. a borrow).
+    Searches before the first load completes simply return no suggestions.
+    """
+
+    STUDENT_SQL = 'SELECT enrollment_no, name, department, year FROM students'
+    BOOK_SQL = 'SELECT book_id, title, author, available_copies FROM books'
+
+    def __init__(self, db):
+        self.db = db
+        self.students = PrefixIndex('enrollment_no', ('name',))
+        self.books = PrefixIndex('book_id', ('title', 'author'))
+        self._loaders = {
+            'students': (self.students, self.STUDENT_SQL, ('enrollment_no', 'name', 'department', 'year')),
+            'books': (self.books, self.BOOK_SQL, ('book_id', 'title', 'author', 'available_copies')),
+        }
+        self._loaded = set()
+        self._running = set()
+        # table -> set of row keys to re-read, or None for the whole table
+        self._pending = {}
+        self._state_lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        self.db.add_change_listener(self._on_database_changed, with_keys=True)
+        self.refresh(*self._loaders)
+
+    def stop(self):
+        self.db.remove_change_listener(self._on_database_changed)
+        self._started = False
+
+    def is_ready(self, table):
+        return table in self._loaded
+
+    def _on_database_changed(self, tables, keys):
+        # Empty set = unknown change, re-sync both
+        self.refresh(*[table for table in self._loaders if not tables or table in tables], keys=keys)
+
+    def refresh(self, *tables, keys=None):
+        """Re-read the given tables on a worker thread (only the rows in keys[table] when
+        given); calls made while one runs are merged"""
+        for table in tables:
+            requested = (keys or {}).get(table)
+            with self._state_lock:
+                if table in self._pending:
+                    queued = self._pending[table]
+                    self._pending[table] = None if queued is None or requested is None else queued | requested
+                else:
+                    self._pending[table] = None if requested is None else set(requested)
+                if table in self._running:
+                    continue
+                self._running.add(table)
+            threading.Thread(target=self._refresh_worker, args=(table,), daemon=True).start()
+
+    def _refresh_worker(self, table):
+        index, sql, columns = self._loaders[table]
+        while True:
+            with self._state_lock:
+                if table not in self._pending:
+                    self._running.discard(table)
+                    return
+                row_keys = self._pending.pop(table)
+            try:
+                if row_keys is not None and table in self._loaded:
+                    # Changed rows only: a borrow/return re-reads one book, not the table
+                    found = {record[index.id_field]: record
+                             for record in self._fetch(sql, columns, index.id_field, sorted(row_keys))}
+                    for key in row_keys:
+                        if key in found:
+                            index.upsert(found[key])
+                        else:
+                            index.remove(key)
+                else:
+                    records = self._fetch(sql, columns)
+                    if table in self._loaded:
+                        index.sync(records)
+                    else:
+                        index.load(records)
+                        self._loaded.add(table)
+            except Exception as e:
+                print(f"Autocomplete index load failed for {table}: {e}")
+
+    def _fetch(self, sql, columns, key_column=None, keys=None):
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            if keys is None:
+                cursor.execute(sql)
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            records = []
+            for start in range(0, len(keys), KEY_FETCH_CHUNK):
+                chunk = keys[start:start + KEY_FETCH_CHUNK]
+                cursor.execute(f"{sql} WHERE {key_column} IN ({', '.join('?' * len(chunk))})", chunk)
+                records.extend(dict(zip(columns, row)) for row in cursor.fetchall())
+            return records
+        finally:
+            conn.close()
+
+    def suggest_students(self, query, limit=DEFAULT_LIMIT):
+        return self.students.search(query, limit)
+
+    def suggest_books(self, query, limit=DEFAULT_LIMIT):
+        return self.books.search(query, limit)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Headless micro-benchmark and regression suite for the Library Management System
+
+Times the hot paths of Database and the desktop worker functions against
+generated datasets (see create_demo_data.generate_synthetic_data) without
+opening a Tk window.
+
+Usage:
+    python benchmark_suite.py                         # run 'small' and compare with baseline
+    python benchmark_suite.py --sizes small,medium    # several dataset sizes
+    python benchmark_suite.py --save-baseline         # store results as the new baseline
+    python benchmark_suite.py --threshold 0.25        # fail if >25% slower than baseline
+
+Exit code is 1 when any benchmark raised an error or regressed above the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from database import Database
+from create_demo_data import generate_synthetic_data
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(BENCH_DIR, 'bench_data')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'benchmark_baseline.json')
+
+# Dataset sizes: (students, books, loans)
+DATASET_SIZES = {
+    'tiny': (200, 500, 5000),
+    'small': (2000, 5000, 100000),
+    'medium': (10000, 25000, 1000000),
+    'large': (50000, 100000, 5000000),
+}
+DATASET_SEED = 42
+DATASET_END_DATE = '2026-06-30'
+
+
+def ensure_dataset(size, data_dir=DEFAULT_DATA_DIR):
+    """Generate (once) and return (library_db, portal_db) paths for a dataset size"""
+    students, books, loans = DATASET_SIZES[size]
+    target = os.path.join(data_dir, f"{size}-{DATASET_SEED}")
+    library_db = os.path.join(target, 'library.db')
+    portal_db = os.path.join(target, 'portal.db')
+    if not os.path.exists(library_db):
+        os.makedirs(target, exist_ok=True)
+        print(f"Generating '{size}' dataset ({students} students, {books} books, {loans} loans)...")
+        generate_synthetic_data(students=students, books=books, loans=loans, years=5,
+                                seed=DATASET_SEED, library_db=library_db, portal_db=portal_db,
+                                end_date=DATASET_END_DATE, verbose=False)
+    return library_db, portal_db
+
+
+def make_headless_app(db):
+    """Build a LibraryApp instance without running __init__ (no Tk root, no login).
+
+    Only the state used by the worker functions is attached. Returns None when
+    main.py cannot be imported (e.g. optional GUI dependencies missing).
+    """
+    try:
+        import main
+    except Exception as e:
+        print(f"LibraryApp benchmarks skipped: cannot import main.py ({e})")
+        return None
+    app = main.LibraryApp.__new__(main.LibraryApp)
+    app.root = None
+    app.db = db
+    app.library_settings = {'fine_per_day': 5, 'loan_period_days': 7, 'max_books_per_student': 5}
+    return app
+
+
+def time_call(func, repeat=5, warmup=1):
+    """Run func warmup+repeat times; return timing summary in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.mean(samples), 3),
+        'runs': repeat,
+    }
+
+
+def _pick_borrow_candidates(db):
+    """A current (non Pass Out) student with few loans and a book with a free copy"""
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT s.enrollment_no FROM students s
+        WHERE s.year != 'Pass Out' AND NOT EXISTS (
+            SELECT 1 FROM borrow_records br WHERE br.enrollment_no = s.enrollment_no AND br.status = 'borrowed')
+        LIMIT 1
+    """)
+    student = cursor.fetchone()
+    cursor.execute("SELECT book_id FROM books WHERE available_copies > 0 LIMIT 1")
+    book = cursor.fetchone()
+    conn.close()
+    if not student or not book:
+        return None, None
+    return student[0], book[0]
+
+
+def build_benchmarks(db, app):
+    """Return list of (name, callable) for one dataset"""
+    benches = []
+    enrollment_no, book_id = _pick_borrow_candidates(db)
+    if enrollment_no:
+        today = datetime.now()
+        borrow_date = today.strftime('%Y-%m-%d')
+        due_date = (today + timedelta(days=7)).strftime('%Y-%m-%d')
+
+        def borrow_and_return():
+            ok, msg = db.borrow_book(enrollment_no, book_id, borrow_date, due_date)
+            if not ok:
+                raise RuntimeError(f"borrow_book failed: {msg}")
+            ok, msg = db.return_book(enrollment_no, book_id, borrow_date)
+            if not ok:
+                raise RuntimeError(f"return_book failed: {msg}")
+        benches.append(('db.borrow_book+return_book', borrow_and_return))
+
+    benches.extend([
+        ('db.get_students(search)', lambda: db.get_students('sharma')),
+        ('db.get_books(search)', lambda: db.get_books('python')),
+        ('db.get_borrowed_books', db.get_borrowed_books),
+        ('db.verify_data_integrity', db.verify_data_integrity),
+    ])
+    if app is not None:
+        app_benches = [
+            ('app.get_all_records', app.get_all_records),
+            ('app._search_records_worker', lambda: app._search_records_worker(
+                search_term='sharma', type_filter='All', from_date='', to_date='', academic_year_filter='All')),
+            ('app._fetch_analysis_data(30)', lambda: app._fetch_analysis_data(days=30)),
+            ('app._fetch_analysis_data(365)', lambda: app._fetch_analysis_data(days=365)),
+            ('app.get_current_overdue_records', app.get_current_overdue_records),
+            ('app.get_library_statistics', app.get_library_statistics),
+        ]
+        # Analytics are cached per data version; clear them so every run times the queries
+        benches.extend((name, _uncached(app, func)) for name, func in app_benches)
+    return benches
+
+
+def _uncached(app, func):
+    def run():
+        app.clear_analytics_cache()
+        return func()
+    return run
+
+
+def run_suite(sizes, repeat=5, data_dir=DEFAULT_DATA_DIR, only=None):
+    """Run every benchmark for every dataset size; returns the results document"""
+    results = {}
+    for size in sizes:
+        library_db, portal_db = ensure_dataset(size, data_dir)
+        db = Database(db_path=library_db, portal_db_path=portal_db)
+        app = make_headless_app(db)
+        size_results = {}
+        for name, func in build_benchmarks(db, app):
+            if only and only not in name:
+                continue
+            try:
+                size_results[name] = time_call(func, repeat=repeat)
+                print(f"  [{size}] {name:<36} median {size_results[name]['median_ms']:>10.2f} ms")
+            except Exception as e:
+                size_results[name] = {'error': str(e)}
+                print(f"  [{size}] {name:<36} ERROR {e}")
+        results[size] = size_results
+    return {
+        'meta': {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': DATASET_SEED,
+        },
+        'results': results,
+    }
+
+
+def failed_benchmarks(current):
+    """Return list of messages for benchmarks that raised instead of producing timings"""
+    return [f"[{size}] {name}: ERROR {stats['error']}"
+            for size, benches in current['results'].items()
+            for name, stats in benches.items() if 'error' in stats]
+
+
+def compare_with_baseline(current, baseline, threshold):
+    """Return list of failure messages: benchmarks that raised, and medians slower than
+    baseline by > threshold"""
+    regressions = failed_benchmarks(current)
+    for size, benches in current['results'].items():
+        base_size = baseline.get('results', {}).get(size, {})
+        for name, stats in benches.items():
+            base = base_size.get(name)
+            if not base or 'median_ms' not in base or 'median_ms' not in stats:
+                continue
+            if base['median_ms'] <= 0:
+                continue
+            ratio = stats['median_ms'] / base['median_ms']
+            if ratio > 1.0 + threshold:
+                regressions.append(f"[{size}] {name}: {base['median_ms']:.2f} ms -> {stats['median_ms']:.2f} ms "
+                                   f"(+{(ratio - 1.0) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless performance regression suite")
+    parser.add_argument('--sizes', default='small', help=f"Comma separated: {', '.join(DATASET_SIZES)}")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs per benchmark (default 5)")
+    parser.add_argument('--only', help="Run only benchmarks whose name contains this text")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="Where generated datasets are cached")
+    parser.add_argument('--output', help="Write results JSON to this file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown before failing, as a fraction (default 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in DATASET_SIZES]
+    if unknown:
+        parser.error(f"Unknown dataset size(s): {', '.join(unknown)}")
+
+    current = run_suite(sizes, repeat=args.repeat, data_dir=args.data_dir, only=args.only)
+    errors = failed_benchmarks(current)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=4)
+        print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        return _report_errors(errors)
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found - run with --save-baseline to create one")
+        return _report_errors(errors)
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(current, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} failure(s) ({len(errors)} error(s), "
+              f"{len(regressions) - len(errors)} regression(s) above {args.threshold * 100:.0f}%):")
+        for line in regressions:
+            print(f"  • {line}")
+        return 1
+    print(f"\n✅ No regressions above {args.threshold * 100:.0f}%")
+    return 0
+
+
+def _report_errors(errors):
+    """Print benchmarks that raised; returns the exit code (1 if any)"""
+    if not errors:
+        return 0
+    print(f"\n❌ {len(errors)} benchmark(s) failed:")
+    for line in errors:
+        print(f"  • {line}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
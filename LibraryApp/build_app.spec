@@ -12,6 +12,7 @@ a = Analysis(
         ('requirements.txt', '.'),
         ('logo.png', '.'),
         ('Web-Extension/student_portal.py', 'Web-Extension'),
+        ('Web-Extension/log_rollup.py', 'Web-Extension'),
         ('Web-Extension/portal.db', 'Web-Extension'),
         ('Web-Extension/frontend/dist', 'Web-Extension/frontend/dist'),
     ],
@@ -20,7 +21,10 @@ a = Analysis(
         'tkinter', 'tkinter.ttk', 'tkinter.messagebox', 'tkinter.filedialog',
         'matplotlib', 'matplotlib.pyplot', 'matplotlib.backends.backend_tkagg',
         'matplotlib.figure', 'matplotlib.patches', 'numpy', 'xlsxwriter',
-        'flask', 'werkzeug', 'jinja2', 'click', 'itsdangerous', 'markupsafe'
+        'flask', 'werkzeug', 'jinja2', 'click', 'itsdangerous', 'markupsafe',
+        # Imported lazily (lazy_imports), so not visible to the import scanner
+        'analysis_charts', 'qrcode', 'PIL.Image', 'PIL.ImageTk', 'docx.shared', 'docx.enum.text',
+        'waitress'
     ],
     hookspath=[],
     hooksconfig={},
@@ -2,11 +2,21 @@
 """
 Demo Database Populator for Library Management System
 Creates realistic test data including students, books, and various transaction types
+
+Two modes:
+    python create_demo_data.py
+        Small hand-written demo dataset (16 students, 24 books) via Database calls.
+    python create_demo_data.py --students 50000 --books 100000 --loans 5000000 --years 5 --seed 42
+        Scalable, deterministic synthetic dataset bulk-loaded into library.db and
+        portal.db for benchmarking (see generate_synthetic_data).
 """
 
+import argparse
+import bisect
 import sqlite3
 import os
 import sys
+import time
 from datetime import datetime, timedelta
 import random
 
@@ -226,9 +236,457 @@ def create_demo_data():
     print("\n💡 You can now test all features with this realistic data!")
     print("=" * 60)
 
+# ---------------------------------------------------------------------------
+# Synthetic dataset generator (benchmark scale)
+# ---------------------------------------------------------------------------
+
+DEPARTMENTS = ["Computer", "Computer", "Computer", "IT", "Electronics", "Mechanical", "Civil"]
+FIRST_NAMES = [
+    "Aarav", "Diya", "Arjun", "Ananya", "Vihaan", "Ishaan", "Saanvi", "Aditya", "Myra", "Reyansh",
+    "Vivaan", "Kiara", "Ayaan", "Navya", "Kabir", "Zara", "Rohan", "Priya", "Sai", "Meera",
+    "Krishna", "Aditi", "Om", "Sneha", "Yash", "Pooja", "Rahul", "Neha", "Siddharth", "Tanvi",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Reddy", "Singh", "Kumar", "Gupta", "Verma", "Joshi", "Desai", "Mehta",
+    "Agarwal", "Kapoor", "Shah", "Rao", "Malhotra", "Khan", "Kulkarni", "Patil", "Jadhav", "Pawar",
+    "Deshmukh", "Nair", "Iyer", "Chavan", "More", "Shinde", "Bhosale", "Gaikwad", "Naik", "Date",
+]
+BOOK_SUBJECTS = {
+    "Programming": ["Python", "Java", "C++", "C Programming", "Rust", "Go", "Kotlin"],
+    "Web Development": ["HTML and CSS", "JavaScript", "React", "Node.js", "Web Design"],
+    "Algorithms": ["Algorithms", "Data Structures", "Graph Theory", "Dynamic Programming"],
+    "Database": ["Database Systems", "SQL", "NoSQL", "Data Warehousing"],
+    "Operating Systems": ["Operating Systems", "Linux Internals", "System Programming"],
+    "Networks": ["Computer Networks", "TCP/IP", "Network Security", "Wireless Networks"],
+    "AI/ML": ["Machine Learning", "Deep Learning", "Artificial Intelligence", "Data Mining"],
+    "Software Engineering": ["Software Engineering", "Clean Code", "Software Testing", "Agile Methods"],
+    "Mathematics": ["Discrete Mathematics", "Linear Algebra", "Probability", "Numerical Methods"],
+}
+BOOK_PREFIXES = ["Introduction to", "Fundamentals of", "Advanced", "Practical", "Mastering",
+                 "Principles of", "Handbook of", "Applied", "Essentials of", "Modern"]
+AUTHORS = ["Mark Lutz", "Kathy Sierra", "Joshua Bloch", "Stanley Lippman", "Jon Duckett",
+           "Douglas Crockford", "Cormen", "Reema Thareja", "Steven Skiena", "Silberschatz",
+           "Ben Forta", "Tanenbaum", "Stevens", "Russell & Norvig", "Tom Mitchell",
+           "Ian Goodfellow", "Pressman", "Robert Martin", "Kenneth Rosen", "Gilbert Strang",
+           "E. Balagurusamy", "Yashavant Kanetkar", "Sumita Arora", "Herbert Schildt"]
+
+# Portal endpoints weighted roughly by real traffic (dashboard/catalogue dominate)
+PORTAL_ENDPOINTS = [
+    ("/api/me", 30), ("/api/dashboard", 25), ("/api/books", 18), ("/api/notifications", 10),
+    ("/api/loan-history", 6), ("/api/login", 5), ("/api/alerts", 4), ("/api/study-materials", 3),
+    ("/api/services", 2), ("/api/request", 1), ("/api/admin/stats", 1), ("/api/admin/all-requests", 1),
+]
+PORTAL_STATUSES = [(200, 90), (304, 4), (401, 3), (404, 2), (500, 1)]
+# Relative portal traffic per hour of day (college hours peak around noon)
+HOURLY_TRAFFIC = [1, 1, 1, 1, 1, 2, 4, 8, 14, 20, 24, 26, 25, 22, 24, 22, 18, 14, 12, 10, 8, 5, 3, 2]
+
+# Subset of the portal schema (init_portal_db in Web-Extension/student_portal.py) that the
+# generator fills. Duplicated here so the generator does not need Flask installed.
+PORTAL_TABLES = [
+    '''CREATE TABLE IF NOT EXISTS user_notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        enrollment_no TEXT,
+        type TEXT,
+        title TEXT,
+        message TEXT,
+        link TEXT,
+        is_read INTEGER DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS book_waitlist (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        enrollment_no TEXT NOT NULL,
+        book_id INTEGER NOT NULL,
+        book_title TEXT,
+        notified INTEGER DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(enrollment_no, book_id)
+    )''',
+    '''CREATE TABLE IF NOT EXISTS access_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        endpoint TEXT,
+        method TEXT,
+        status INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+    '''CREATE TABLE IF NOT EXISTS book_ratings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        book_id TEXT NOT NULL,
+        enrollment_no TEXT NOT NULL,
+        rating INTEGER NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(book_id, enrollment_no)
+    )''',
+]
+
+
+def _default_portal_db_path(library_db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(library_db_path)), 'Web-Extension', 'portal.db')
+
+
+def _year_label(cohort, academic_start_year):
+    """Student year label for an admission cohort in a given academic year"""
+    diff = academic_start_year - cohort
+    if diff <= 0:
+        return "1st Year"
+    if diff == 1:
+        return "2nd Year"
+    if diff == 2:
+        return "3rd Year"
+    return "Pass Out"
+
+
+def _academic_start_year(date_obj):
+    """Academic years run June-May, e.g. 2025-06-01 .. 2026-05-31 is '2025-2026'"""
+    return date_obj.year if date_obj.month >= 6 else date_obj.year - 1
+
+
+def _weighted_picker(rng, weights):
+    """Return a zero-arg function picking an index with the given relative weights (O(log n))"""
+    cum = []
+    total = 0.0
+    for w in weights:
+        total += w
+        cum.append(total)
+    rand = rng.random
+    bisect_right = bisect.bisect_right
+    last = len(cum) - 1
+
+    def pick():
+        i = bisect_right(cum, rand() * total)
+        return i if i <= last else last
+    return pick
+
+
+def _insert_batches(conn, sql, rows, batch_size):
+    """executemany in fixed-size batches, one transaction per batch. Returns row count."""
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(sql, batch)
+            conn.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        conn.commit()
+        count += len(batch)
+    return count
+
+
+def _open_bulk_connection(path):
+    """Connection tuned for bulk loading; pragmas are per-connection and not persisted"""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute('PRAGMA cache_size = -65536')
+    return conn
+
+
+def generate_synthetic_data(students=5000, books=10000, loans=200000, years=5, seed=42,
+                            library_db=None, portal_db=None, access_logs=None,
+                            end_date=None, reset=False, batch_size=10000,
+                            fine_per_day=5, loan_period_days=7,
+                            late_return_rate=0.15, overdue_rate=0.25, verbose=True):
+    """Bulk-load a deterministic, production-scale dataset into library.db and portal.db.
+
+    Distributions:
+      - book popularity follows a Zipf-like long tail (a few titles get most loans)
+      - students belong to yearly admission cohorts and only borrow while enrolled
+      - a fraction of returns are late (fined) and a fraction of recent loans are overdue
+      - portal tables get overdue/system notifications, ratings, waitlists for fully
+        issued books and access logs over the last 7 days with a daytime peak
+
+    The same arguments (including seed and end_date) always produce the same data.
+    Returns a dict of row counts per table.
+    """
+    def log(msg):
+        if verbose:
+            print(msg)
+
+    started = time.time()
+    rng = random.Random(seed)
+    end = datetime.strptime(end_date, '%Y-%m-%d') if end_date else datetime.now()
+    end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+    if access_logs is None:
+        access_logs = max(1000, loans // 10)
+
+    # Schema comes from the application itself so the dataset always matches it
+    db = Database(db_path=library_db) if library_db else Database()
+    library_db = db.db_path
+    portal_db = portal_db or _default_portal_db_path(library_db)
+
+    lib = _open_bulk_connection(library_db)
+    existing = lib.execute('SELECT COUNT(*) FROM students').fetchone()[0]
+    if existing and not reset:
+        lib.close()
+        raise RuntimeError(f"{library_db} already has {existing} students; pass --reset to replace them")
+    if reset:
+        for table in ('borrow_records', 'promotion_history', 'books', 'students', 'academic_years'):
+            lib.execute(f'DELETE FROM {table}')
+        lib.commit()
+
+    # --- Dates -------------------------------------------------------------
+    span_days = years * 365
+    start = end - timedelta(days=span_days)
+    # Pre-format every date once; loans only ever index into this table
+    date_strs = [(start + timedelta(days=d)).strftime('%Y-%m-%d') for d in range(span_days + 60)]
+    day_academic_year = [_academic_start_year(start + timedelta(days=d)) for d in range(span_days + 1)]
+    current_ay = _academic_start_year(end)
+    first_ay = _academic_start_year(start)
+
+    # --- Academic years ----------------------------------------------------
+    ay_rows = [(f"{y}-{y + 1}", 1 if y == current_ay else 0, f"{y}-06-01 00:00:00")
+               for y in range(first_ay, current_ay + 1)]
+    _insert_batches(lib, 'INSERT INTO academic_years (year_name, is_active, created_date) VALUES (?, ?, ?)',
+                    ay_rows, batch_size)
+
+    # --- Students (year cohorts) ------------------------------------------
+    # Cohorts admitted up to 2 years before the first academic year still borrow in it
+    cohorts = list(range(first_ay - 2, current_ay + 1))
+    per_cohort = max(1, students // len(cohorts))
+    cohort_ranges = {}
+    enrollments = []
+    for ci, cohort in enumerate(cohorts):
+        n = per_cohort if ci < len(cohorts) - 1 else max(1, students - per_cohort * (len(cohorts) - 1))
+        cohort_ranges[cohort] = (len(enrollments), n)
+        for k in range(1, n + 1):
+            enrollments.append((f"{cohort}CS{k:05d}", cohort))
+
+    def student_rows():
+        for enrollment_no, cohort in enrollments:
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            domain = "alumni.gpa.edu" if current_ay - cohort >= 3 else "student.gpa.edu"
+            yield (enrollment_no, f"{first} {last}",
+                   f"{first.lower()}.{last.lower()}.{enrollment_no.lower()}@{domain}",
+                   f"9{rng.randint(100000000, 999999999)}", rng.choice(DEPARTMENTS),
+                   _year_label(cohort, current_ay), f"{cohort}-07-{rng.randint(1, 28):02d}")
+
+    log(f"\n📝 Generating {len(enrollments)} students in {len(cohorts)} cohorts...")
+    n_students = _insert_batches(
+        lib, 'INSERT INTO students (enrollment_no, name, email, phone, department, year, date_registered) '
+             'VALUES (?, ?, ?, ?, ?, ?, ?)', student_rows(), batch_size)
+
+    # --- Books (popularity long tail) -------------------------------------
+    categories = list(BOOK_SUBJECTS)
+    copies = [0] * books
+    titles = [''] * books
+
+    def book_rows():
+        for i in range(books):
+            category = rng.choice(categories)
+            title = f"{rng.choice(BOOK_PREFIXES)} {rng.choice(BOOK_SUBJECTS[category])}"
+            if rng.random() < 0.6:
+                title += f" Vol. {rng.randint(1, 9)}"
+            n_copies = rng.choice((1, 1, 2, 2, 3, 3, 4, 5))
+            copies[i] = n_copies
+            titles[i] = title
+            isbn = f"978{rng.randint(0, 9999999999):010d}"
+            added = date_strs[rng.randint(0, span_days // 2)]
+            yield (str(i + 1), title, rng.choice(AUTHORS), isbn, category, n_copies, n_copies, added)
+
+    log(f"📚 Generating {books} books...")
+    n_books = _insert_batches(
+        lib, 'INSERT INTO books (book_id, title, author, isbn, category, total_copies, available_copies, date_added) '
+             'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', book_rows(), batch_size)
+
+    # Zipf-like popularity; ranks are shuffled so popular titles are spread across IDs
+    ranks = list(range(books))
+    rng.shuffle(ranks)
+    pick_book = _weighted_picker(rng, [1.0 / ((ranks[i] + 1) ** 1.1) for i in range(books)])
+
+    # --- Loans ------------------------------------------------------------
+    on_loan = [0] * books
+    active_per_student = {}
+    active_loans = []  # (enrollment_no, book index, due offset) for overdue notifications
+    stats = {'returned_on_time': 0, 'returned_late': 0, 'borrowed': 0, 'overdue': 0}
+    recent_window = 30  # loans younger than this may still be out
+    max_active = 5
+
+    def loan_rows():
+        rand = rng.random
+        randint = rng.randint
+        for _ in range(loans):
+            day = randint(0, span_days)
+            ay = day_academic_year[day]
+            lo = max(cohorts[0], ay - 2)
+            cohort = randint(lo, ay) if lo <= ay else ay
+            base, n = cohort_ranges.get(cohort, cohort_ranges[cohorts[-1]])
+            # Skewed student activity: a minority of students borrow most books
+            enrollment_no = enrollments[base + int(n * (rand() ** 1.8))][0]
+            b = pick_book()
+            due = day + loan_period_days
+            age = span_days - day
+            fine = 0
+            keep_out = False
+            if age <= recent_window:
+                if due >= span_days:
+                    keep_out = rand() < 0.85
+                else:
+                    keep_out = rand() < overdue_rate
+            elif rand() < 0.002:
+                keep_out = True  # long-lost copies
+            if keep_out and on_loan[b] < copies[b] and active_per_student.get(enrollment_no, 0) < max_active:
+                on_loan[b] += 1
+                active_per_student[enrollment_no] = active_per_student.get(enrollment_no, 0) + 1
+                stats['borrowed'] += 1
+                if due < span_days:
+                    stats['overdue'] += 1
+                    active_loans.append((enrollment_no, b, due))
+                yield (enrollment_no, str(b + 1), date_strs[day], date_strs[due], None,
+                       'borrowed', 0, f"{ay}-{ay + 1}")
+                continue
+            if rand() < late_return_rate:
+                late = 1 + int(30 * (rand() ** 2))
+                ret = min(due + late, span_days)
+                fine = (ret - due) * fine_per_day
+                stats['returned_late'] += 1
+            else:
+                ret = min(day + randint(1, loan_period_days), span_days)
+                stats['returned_on_time'] += 1
+            yield (enrollment_no, str(b + 1), date_strs[day], date_strs[due], date_strs[ret],
+                   'returned', fine, f"{ay}-{ay + 1}")
+
+    log(f"📋 Generating {loans} loans over {years} years...")
+    n_loans = _insert_batches(
+        lib, 'INSERT INTO borrow_records (enrollment_no, book_id, borrow_date, due_date, return_date, status, fine, academic_year) '
+             'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', loan_rows(), batch_size)
+
+    _insert_batches(lib, 'UPDATE books SET available_copies = total_copies - ? WHERE book_id = ?',
+                    ((on_loan[i], str(i + 1)) for i in range(books) if on_loan[i]), batch_size)
+    lib.close()
+    ok, message = db.rebuild_circulation_stats()
+    log(f"📈 {message}")
+
+    # --- Portal -----------------------------------------------------------
+    log(f"🌐 Generating portal data in {portal_db}...")
+    os.makedirs(os.path.dirname(os.path.abspath(portal_db)), exist_ok=True)
+    portal = _open_bulk_connection(portal_db)
+    for ddl in PORTAL_TABLES:
+        portal.execute(ddl)
+    if reset:
+        for table in ('user_notifications', 'book_waitlist', 'access_logs', 'book_ratings'):
+            portal.execute(f'DELETE FROM {table}')
+    portal.commit()
+
+    def notification_rows():
+        for enrollment_no, b, due in active_loans:
+            days_over = span_days - due
+            yield (enrollment_no, 'overdue', 'Book Overdue',
+                   f'"{titles[b]}" is {days_over} day(s) overdue. Fine: Rs {days_over * fine_per_day}',
+                   '/my-books', 0, f"{date_strs[min(due + 1, span_days)]} 09:00:00")
+        system_msgs = [('system', 'Library Notice', 'Library will remain closed on Saturday.'),
+                       ('request_update', 'Request Approved', 'Your renewal request has been approved.'),
+                       ('request_update', 'Request Rejected', 'Your profile update request was rejected.'),
+                       ('security', 'Password Changed', 'Your portal password was changed.')]
+        for _ in range(len(enrollments)):
+            enrollment_no = enrollments[rng.randrange(len(enrollments))][0]
+            ntype, title, msg = rng.choice(system_msgs)
+            day = rng.randint(max(0, span_days - 180), span_days)
+            yield (enrollment_no, ntype, title, msg, None, 1 if rng.random() < 0.7 else 0,
+                   f"{date_strs[day]} {rng.randint(8, 18):02d}:{rng.randint(0, 59):02d}:00")
+
+    n_notifications = _insert_batches(
+        portal, 'INSERT INTO user_notifications (enrollment_no, type, title, message, link, is_read, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', notification_rows(), batch_size)
+
+    def rating_rows():
+        seen = set()
+        for _ in range(max(1, loans // 20)):
+            key = (pick_book(), enrollments[rng.randrange(len(enrollments))][0])
+            if key in seen:
+                continue
+            seen.add(key)
+            rating = min(5, max(1, int(rng.gauss(3.9, 1.0) + 0.5)))
+            yield (str(key[0] + 1), key[1], rating, f"{date_strs[rng.randint(0, span_days)]} 12:00:00")
+
+    n_ratings = _insert_batches(
+        portal, 'INSERT INTO book_ratings (book_id, enrollment_no, rating, created_at) VALUES (?, ?, ?, ?)',
+        rating_rows(), batch_size)
+
+    def waitlist_rows():
+        current_base, current_n = cohort_ranges[cohorts[-1]]
+        for b in range(books):
+            if on_loan[b] < copies[b]:
+                continue
+            waiting = set()
+            for _ in range(rng.randint(1, 3)):
+                waiting.add(enrollments[current_base + rng.randrange(current_n)][0])
+            for enrollment_no in sorted(waiting):
+                yield (enrollment_no, str(b + 1), titles[b], 0,
+                       f"{date_strs[rng.randint(max(0, span_days - 14), span_days)]} 10:00:00")
+
+    n_waitlist = _insert_batches(
+        portal, 'INSERT INTO book_waitlist (enrollment_no, book_id, book_title, notified, created_at) '
+                'VALUES (?, ?, ?, ?, ?)', waitlist_rows(), batch_size)
+
+    endpoints = [e for e, _ in PORTAL_ENDPOINTS]
+    pick_endpoint = _weighted_picker(rng, [w for _, w in PORTAL_ENDPOINTS])
+    statuses = [s for s, _ in PORTAL_STATUSES]
+    pick_status = _weighted_picker(rng, [w for _, w in PORTAL_STATUSES])
+    pick_hour = _weighted_picker(rng, HOURLY_TRAFFIC)
+
+    def access_log_rows():
+        for _ in range(access_logs):
+            endpoint = endpoints[pick_endpoint()]
+            method = 'POST' if endpoint in ('/api/login', '/api/request') else 'GET'
+            day = span_days - rng.randint(0, 6)
+            ts = f"{date_strs[day]} {pick_hour():02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+            yield (endpoint, method, statuses[pick_status()], ts)
+
+    n_logs = _insert_batches(
+        portal, 'INSERT INTO access_logs (endpoint, method, status, timestamp) VALUES (?, ?, ?, ?)',
+        access_log_rows(), batch_size)
+    portal.close()
+
+    counts = {
+        'students': n_students, 'books': n_books, 'borrow_records': n_loans,
+        'academic_years': len(ay_rows), 'user_notifications': n_notifications,
+        'book_ratings': n_ratings, 'book_waitlist': n_waitlist, 'access_logs': n_logs,
+    }
+    log("\n" + "=" * 60)
+    log(f"✅ Synthetic dataset generated in {time.time() - started:.1f}s (seed={seed})")
+    log("=" * 60)
+    for table, count in counts.items():
+        log(f"  • {table}: {count}")
+    log(f"    - Returned on time: {stats['returned_on_time']}")
+    log(f"    - Returned late: {stats['returned_late']}")
+    log(f"    - Currently borrowed: {stats['borrowed']} (overdue: {stats['overdue']})")
+    counts.update(stats)
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Populate the library databases with demo or synthetic data")
+    parser.add_argument('--students', type=int, help="Generator mode: number of students")
+    parser.add_argument('--books', type=int, help="Generator mode: number of books")
+    parser.add_argument('--loans', type=int, help="Generator mode: number of borrow records")
+    parser.add_argument('--years', type=int, default=5, help="Years of loan history (default 5)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (default 42)")
+    parser.add_argument('--access-logs', type=int, help="Portal access log rows (default loans/10)")
+    parser.add_argument('--end-date', help="Last day of generated history, YYYY-MM-DD (default today)")
+    parser.add_argument('--library-db', help="Target library.db (default: the application database)")
+    parser.add_argument('--portal-db', help="Target portal.db (default: Web-Extension/portal.db next to library.db)")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Rows per insert transaction")
+    parser.add_argument('--reset', action='store_true', help="Delete existing data in the target databases first")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        create_demo_data()
+        if args.students or args.books or args.loans:
+            generate_synthetic_data(
+                students=args.students or 5000, books=args.books or 10000, loans=args.loans or 200000,
+                years=args.years, seed=args.seed, library_db=args.library_db, portal_db=args.portal_db,
+                access_logs=args.access_logs, end_date=args.end_date, reset=args.reset,
+                batch_size=args.batch_size)
+        else:
+            create_demo_data()
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
@@ -1,7 +1,11 @@
 import sqlite3
+import json
 import os
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+
+from search_query import SearchQuery, fts_match_expression
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -70,10 +74,25 @@ class PostgresCursorWrapper:
             print(f"Query: {pg_sql}")
             raise e
 
+    def executemany(self, sql, seq_of_params):
+        pg_sql = sql.replace('?', '%s')
+        try:
+            self.cursor.executemany(pg_sql, seq_of_params)
+            self.rowcount = self.cursor.rowcount
+            return self.cursor
+        except Exception as e:
+            print(f"SQL Error in PostgresWrapper: {e}")
+            print(f"Query: {pg_sql}")
+            raise e
+
     def fetchone(self):
         row = self.cursor.fetchone()
         return PostgresRow(row) if row else None
 
+    def fetchmany(self, size):
+        rows = self.cursor.fetchmany(size)
+        return [PostgresRow(row) for row in rows] if rows else []
+
     def fetchall(self):
         rows = self.cursor.fetchall()
         return [PostgresRow(row) for row in rows] if rows else []
@@ -86,8 +105,9 @@ class PostgresConnectionWrapper:
     def __init__(self, conn):
         self.conn = conn
     
-    def cursor(self):
-        return PostgresCursorWrapper(self.conn.cursor(cursor_factory=RealDictCursor))
+    def cursor(self, name=None):
+        # A named cursor is server-side: rows are sent as fetchmany() asks for them
+        return PostgresCursorWrapper(self.conn.cursor(name=name, cursor_factory=RealDictCursor))
     
     def commit(self):
         self.conn.commit()
@@ -103,16 +123,20 @@ class PostgresConnectionWrapper:
 
 
 class Database:
-    def __init__(self):
+    def __init__(self, db_path=None, portal_db_path=None):
         # Check if we should use Cloud DB (PostgreSQL)
         # Only if psycopg2 is available AND DATABASE_URL is set
+        # An explicit db_path (benchmarks, data generators) always forces local SQLite
         self.database_url = os.getenv('DATABASE_URL')
-        self.use_cloud = POSTGRES_AVAILABLE and bool(self.database_url)
-        
+        self.use_cloud = POSTGRES_AVAILABLE and bool(self.database_url) and not db_path
+
         self.db_path = ""
-        
+
         if self.use_cloud:
             print(f"Database: Using Cloud PostgreSQL")
+        elif db_path:
+            self.db_path = db_path
+            print(f"Database: Using Local SQLite at {self.db_path}")
         else:
             # Fallback to local SQLite
             # Create database in a persistent location
@@ -125,7 +149,23 @@ class Database:
                 self.db_path = os.path.join(os.path.dirname(__file__), 'library.db')
             
             print(f"Database: Using Local SQLite at {self.db_path}")
-            
+
+        # Student portal database (waitlist notifications on return)
+        self.portal_db_path = portal_db_path or os.path.join(os.path.dirname(__file__), 'Web-Extension', 'portal.db')
+
+        # Incremented after every committed change made through this class; used as a cache key by analytics
+        self.data_version = 0
+        # Callbacks notified with the set of changed tables (see add_change_listener)
+        self._change_listeners = []
+        # Listeners that also take the changed row keys (add_change_listener(with_keys=True))
+        self._keyed_listeners = set()
+        # Set by init_database when the FTS5 search indexes exist (SQLite builds with FTS5)
+        self.fts_enabled = False
+        # Long-lived connection that only reads PRAGMA data_version (SQLite bumps it when
+        # any other connection or process, e.g. the student portal, commits to the file)
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+
         self.init_database()
     
     def get_connection(self):
@@ -318,8 +358,152 @@ class Database:
                 created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+
+        # Daily circulation counters (maintained by borrow_book/return_book).
+        # late_days is summed so fines can be priced with the current fine_per_day setting.
+        self.create_table_safe(cursor, 'daily_circulation_stats', '''
+            CREATE TABLE IF NOT EXISTS daily_circulation_stats (
+                day DATE PRIMARY KEY,
+                borrowed INTEGER DEFAULT 0,
+                returned INTEGER DEFAULT 0,
+                late_returns INTEGER DEFAULT 0,
+                late_days INTEGER DEFAULT 0
+            )
+        ''', sqlite_sql='''
+            CREATE TABLE IF NOT EXISTS daily_circulation_stats (
+                day DATE PRIMARY KEY,
+                borrowed INTEGER DEFAULT 0,
+                returned INTEGER DEFAULT 0,
+                late_returns INTEGER DEFAULT 0,
+                late_days INTEGER DEFAULT 0
+            )
+        ''')
+
+        self.create_table_safe(cursor, 'daily_book_circulation', '''
+            CREATE TABLE IF NOT EXISTS daily_book_circulation (
+                day DATE NOT NULL,
+                book_id TEXT NOT NULL,
+                borrowed INTEGER DEFAULT 0,
+                PRIMARY KEY (day, book_id)
+            )
+        ''', sqlite_sql='''
+            CREATE TABLE IF NOT EXISTS daily_book_circulation (
+                day DATE NOT NULL,
+                book_id TEXT NOT NULL,
+                borrowed INTEGER DEFAULT 0,
+                PRIMARY KEY (day, book_id)
+            )
+        ''')
+
+        # Borrowings per student year (1st Year, 2nd Year...) at the time of borrowing
+        self.create_table_safe(cursor, 'daily_year_circulation', '''
+            CREATE TABLE IF NOT EXISTS daily_year_circulation (
+                day DATE NOT NULL,
+                student_year TEXT NOT NULL,
+                borrowed INTEGER DEFAULT 0,
+                PRIMARY KEY (day, student_year)
+            )
+        ''', sqlite_sql='''
+            CREATE TABLE IF NOT EXISTS daily_year_circulation (
+                day DATE NOT NULL,
+                student_year TEXT NOT NULL,
+                borrowed INTEGER DEFAULT 0,
+                PRIMARY KEY (day, student_year)
+            )
+        ''')
+
+        # One row per overdue letter / reminder email attempt (History tab in Email Settings)
+        self.create_table_safe(cursor, 'email_log', '''
+            CREATE TABLE IF NOT EXISTS email_log (
+                id SERIAL PRIMARY KEY,
+                sent_at TEXT NOT NULL,
+                enrollment_no TEXT,
+                student_name TEXT,
+                student_email TEXT,
+                book_title TEXT,
+                success INTEGER DEFAULT 0,
+                error_message TEXT
+            )
+        ''', sqlite_sql='''
+            CREATE TABLE IF NOT EXISTS email_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sent_at TEXT NOT NULL,
+                enrollment_no TEXT,
+                student_name TEXT,
+                student_email TEXT,
+                book_title TEXT,
+                success INTEGER DEFAULT 0,
+                error_message TEXT
+            )
+        ''')
+
+        # One row per run of a scheduled job (see job_scheduler.py) with its stats
+        self.create_table_safe(cursor, 'job_runs', '''
+            CREATE TABLE IF NOT EXISTS job_runs (
+                id SERIAL PRIMARY KEY,
+                job_name TEXT NOT NULL,
+                scheduled_for TEXT NOT NULL,
+                trigger_type TEXT DEFAULT 'scheduled',
+                status TEXT DEFAULT 'running',
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                processed INTEGER DEFAULT 0,
+                succeeded INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                message TEXT
+            )
+        ''', sqlite_sql='''
+            CREATE TABLE IF NOT EXISTS job_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_name TEXT NOT NULL,
+                scheduled_for TEXT NOT NULL,
+                trigger_type TEXT DEFAULT 'scheduled',
+                status TEXT DEFAULT 'running',
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                processed INTEGER DEFAULT 0,
+                succeeded INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                message TEXT
+            )
+        ''')
+
+        self.create_table_safe(cursor, 'admin_activity', '''
+            CREATE TABLE IF NOT EXISTS admin_activity (
+                id SERIAL PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                action TEXT NOT NULL,
+                details TEXT,
+                admin_user TEXT
+            )
+        ''', sqlite_sql='''
+            CREATE TABLE IF NOT EXISTS admin_activity (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                action TEXT NOT NULL,
+                details TEXT,
+                admin_user TEXT
+            )
+        ''')
+
+        # Indexes for the date-window and active-loan queries (same syntax on both backends)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_borrow_records_borrow_date ON borrow_records (borrow_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_borrow_records_status ON borrow_records (status, due_date)')
+        # Record search: matches by student/book and the academic year filter
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_borrow_records_enrollment ON borrow_records (enrollment_no)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_borrow_records_book ON borrow_records (book_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_borrow_records_academic_year ON borrow_records (academic_year)')
+        # Email history: newest-first paging with date and student filters
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_log_sent_at ON email_log (sent_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_email_log_enrollment ON email_log (enrollment_no)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs (job_name, scheduled_for)')
+        # Admin activity report: newest-first with a date range
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_admin_activity_timestamp ON admin_activity (timestamp)')
         
         conn.commit()
+
+        self.fts_enabled = self._init_search_index(cursor)
+        conn.commit()
         
         # Migration: Add fine column if it doesn't exist
         # Migration: Add fine column if it doesn't exist (SQLite specific logic usually, but let's check basic columns)
@@ -349,9 +533,63 @@ class Database:
         except Exception as e:
             print(f"Migration check warning: {e}")
 
+        # One-shot backfill of the daily circulation counters from existing history
+        try:
+            cursor.execute('SELECT 1 FROM daily_circulation_stats LIMIT 1')
+            has_stats = cursor.fetchone() is not None
+            cursor.execute('SELECT 1 FROM borrow_records LIMIT 1')
+            has_records = cursor.fetchone() is not None
+        except Exception as e:
+            print(f"Circulation stats check warning: {e}")
+            has_stats, has_records = True, False
         
         conn.close()
+
+        if has_records and not has_stats:
+            success, message = self.rebuild_circulation_stats()
+            print(f"Migration: {message}")
         
+    # Columns mirrored into the FTS5 search index of each table
+    FTS_COLUMNS = {
+        'students': ('enrollment_no', 'name', 'email', 'phone', 'department', 'year'),
+        'books': ('book_id', 'title', 'author', 'isbn', 'category'),
+    }
+
+    def _init_search_index(self, cursor):
+        """Create <table>_fts FTS5 indexes over students and books, kept in sync by triggers.
+        SQLite only; returns False when FTS5 is not compiled in (searches then use LIKE).
+        """
+        if self.use_cloud:
+            return False
+        try:
+            for table, columns in self.FTS_COLUMNS.items():
+                fts = f"{table}_fts"
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,))
+                existed = cursor.fetchone() is not None
+                cols = ', '.join(columns)
+                new_values = ', '.join(f"new.{col}" for col in columns)
+                old_values = ', '.join(f"old.{col}" for col in columns)
+                cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id')")
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                        INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+                    END''')
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                        INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+                    END''')
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+                        INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+                        INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+                    END''')
+                if not existed:
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search unavailable, using LIKE: {e}")
+            return False
+
     # No automatic sample data insertion (clean production build)
     
     def add_student(self, enrollment_no, name, email='', phone='', department='', year=''):
@@ -370,6 +608,7 @@ class Database:
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (enrollment_no, name, email, phone, department, year))
             conn.commit()
+            self.mark_changed('students', keys={'students': (enrollment_no,)})
             return True, "Student added successfully"
         except sqlite3.IntegrityError:
             return False, "Enrollment Number already exists"
@@ -395,6 +634,7 @@ class Database:
                 WHERE enrollment_no=?
             ''', (name, email, phone, department, year, enrollment_no))
             conn.commit()
+            self.mark_changed('students', keys={'students': (enrollment_no,)})
             return True, "Student updated successfully"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -424,6 +664,7 @@ class Database:
             # Remove student
             cursor.execute("DELETE FROM students WHERE enrollment_no = ?", (enrollment_no,))
             conn.commit()
+            self.mark_changed('students', keys={'students': (enrollment_no,)})
             
             if cursor.rowcount > 0:
                 return True, f"Student '{student_name}' removed successfully"
@@ -452,6 +693,7 @@ class Database:
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (book_id, title, author, isbn, category, total_copies, total_copies))
             conn.commit()
+            self.mark_changed('books', keys={'books': (book_id,)})
             return True, "Book added successfully"
         except sqlite3.IntegrityError:
             return False, "Book ID already exists"
@@ -488,6 +730,7 @@ class Database:
                 WHERE book_id=?
             ''', (title, author, isbn, category, total_copies, new_available, book_id))
             conn.commit()
+            self.mark_changed('books', keys={'books': (book_id,)})
             return True, "Book updated successfully"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -553,8 +796,16 @@ class Database:
                 UPDATE books SET available_copies = available_copies - 1 
                 WHERE book_id = ?
             ''', (book_id,))
+
+            # Daily counters (same transaction as the borrow record)
+            self._bump_circulation_stats(cursor, 'daily_circulation_stats', {'day': borrow_date}, {'borrowed': 1})
+            self._bump_circulation_stats(cursor, 'daily_book_circulation',
+                                         {'day': borrow_date, 'book_id': book_id}, {'borrowed': 1})
+            self._bump_circulation_stats(cursor, 'daily_year_circulation',
+                                         {'day': borrow_date, 'student_year': (srow[0] or '').strip()}, {'borrowed': 1})
             
             conn.commit()
+            self.mark_changed('borrow_records', 'books', keys={'books': (book_id,)})
             return True, "Book borrowed successfully"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -575,6 +826,13 @@ class Database:
                 datetime.strptime(return_date, '%Y-%m-%d')
             except ValueError:
                 return False, "Invalid return date format"
+            # Due dates of the loans being closed (for the late-return counters)
+            cursor.execute('''
+                SELECT due_date FROM borrow_records
+                WHERE enrollment_no = ? AND book_id = ? AND status = 'borrowed'
+            ''', (enrollment_no, book_id))
+            due_dates = [row[0] for row in cursor.fetchall()]
+
             cursor.execute('''
                 UPDATE borrow_records 
                 SET return_date = ?, status = 'returned'
@@ -589,8 +847,21 @@ class Database:
                 UPDATE books SET available_copies = available_copies + 1 
                 WHERE book_id = ?
             ''', (book_id,))
+
+            # Daily counters (same transaction as the return)
+            returned_on = datetime.strptime(return_date, '%Y-%m-%d').date()
+            late_returns = late_days = 0
+            for due in due_dates:
+                days_late = (returned_on - datetime.strptime(str(due)[:10], '%Y-%m-%d').date()).days
+                if days_late > 0:
+                    late_returns += 1
+                    late_days += days_late
+            self._bump_circulation_stats(cursor, 'daily_circulation_stats', {'day': return_date},
+                                         {'returned': len(due_dates), 'late_returns': late_returns,
+                                          'late_days': late_days})
             
             conn.commit()
+            self.mark_changed('borrow_records', 'books', keys={'books': (book_id,)})
             
             # Notify waitlist - get book title for notification
             cursor.execute('SELECT title FROM books WHERE book_id = ?', (book_id,))
@@ -605,13 +876,135 @@ class Database:
         finally:
             conn.close()
     
+    def mark_changed(self, *tables, keys=None):
+        """Record that committed data changed (invalidates cached analytics) and notify listeners.
+        Call this after writing to the database outside of the Database methods.
+
+        Parameters:
+        - tables: Names of the tables written; none means "anything may have changed"
+        - keys: Optional dict of table -> row keys (enrollment_no, book_id) written; tables
+          missing from it may have changed anywhere
+        """
+        with self._version_lock:
+            self.data_version += 1
+            listeners = list(self._change_listeners)
+            keyed = set(self._keyed_listeners)
+        changed = frozenset(tables)
+        changed_keys = {table: frozenset(values) for table, values in (keys or {}).items()}
+        for listener in listeners:
+            try:
+                if listener in keyed:
+                    listener(changed, changed_keys)
+                else:
+                    listener(changed)
+            except Exception as e:
+                print(f"Change listener failed: {e}")
+
+    def add_change_listener(self, callback, with_keys=False):
+        """Register callback(tables) to run after every committed change.
+        Called on the writing thread with a frozenset of table names (empty = unknown/all).
+        with_keys=True calls callback(tables, keys) instead, keys being {table: frozenset of
+        row keys} for the tables whose changed rows are known.
+        """
+        with self._version_lock:
+            if callback not in self._change_listeners:
+                self._change_listeners.append(callback)
+            if with_keys:
+                self._keyed_listeners.add(callback)
+
+    def remove_change_listener(self, callback):
+        with self._version_lock:
+            if callback in self._change_listeners:
+                self._change_listeners.remove(callback)
+            self._keyed_listeners.discard(callback)
+
+    def get_data_version(self):
+        """Return a token that changes whenever committed data may have changed.
+        Combines the in-process counter with SQLite's PRAGMA data_version so writes
+        from other processes are detected too (Cloud mode uses the counter only).
+        """
+        if self.use_cloud:
+            return (self.data_version, None)
+        with self._version_lock:
+            try:
+                if self._version_conn is None:
+                    self._version_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                external = self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"data_version check failed: {e}")
+                self._version_conn = None
+                external = None
+            return (self.data_version, external)
+
+    def _bump_circulation_stats(self, cursor, table, keys, counters):
+        """Add counters to one row of a daily circulation table, creating the row if needed.
+        keys/counters: dicts of column -> value. Runs on the caller's cursor (no commit).
+        """
+        key_sql = ' AND '.join(f"{col} = ?" for col in keys)
+        set_sql = ', '.join(f"{col} = {col} + ?" for col in counters)
+        cursor.execute(f"UPDATE {table} SET {set_sql} WHERE {key_sql}",
+                       tuple(counters.values()) + tuple(keys.values()))
+        if cursor.rowcount == 0:
+            columns = list(keys) + list(counters)
+            placeholders = ', '.join('?' for _ in columns)
+            cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                           tuple(keys.values()) + tuple(counters.values()))
+
+    def rebuild_circulation_stats(self):
+        """Rebuild the daily circulation counters from borrow_records (one-shot backfill).
+        Student year counters use each student's current year, since the year at
+        borrow time is not stored for historical records.
+        """
+        if self.use_cloud:
+            late_days_sql = "(return_date - due_date)"
+        else:
+            late_days_sql = "CAST(julianday(return_date) - julianday(due_date) AS INTEGER)"
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM daily_circulation_stats')
+            cursor.execute('DELETE FROM daily_book_circulation')
+            cursor.execute('DELETE FROM daily_year_circulation')
+            cursor.execute(f'''
+                INSERT INTO daily_circulation_stats (day, borrowed, returned, late_returns, late_days)
+                SELECT day, SUM(borrowed), SUM(returned), SUM(late_returns), SUM(late_days) FROM (
+                    SELECT borrow_date AS day, 1 AS borrowed, 0 AS returned, 0 AS late_returns, 0 AS late_days
+                    FROM borrow_records
+                    UNION ALL
+                    SELECT return_date, 0, 1,
+                           CASE WHEN return_date > due_date THEN 1 ELSE 0 END,
+                           CASE WHEN return_date > due_date THEN {late_days_sql} ELSE 0 END
+                    FROM borrow_records WHERE return_date IS NOT NULL
+                ) t
+                GROUP BY day
+            ''')
+            cursor.execute('''
+                INSERT INTO daily_book_circulation (day, book_id, borrowed)
+                SELECT borrow_date, book_id, COUNT(*) FROM borrow_records GROUP BY borrow_date, book_id
+            ''')
+            cursor.execute('''
+                INSERT INTO daily_year_circulation (day, student_year, borrowed)
+                SELECT br.borrow_date, COALESCE(s.year, ''), COUNT(*)
+                FROM borrow_records br JOIN students s ON s.enrollment_no = br.enrollment_no
+                GROUP BY br.borrow_date, COALESCE(s.year, '')
+            ''')
+            cursor.execute('SELECT COUNT(*) FROM daily_circulation_stats')
+            days = cursor.fetchone()[0]
+            conn.commit()
+            self.mark_changed('daily_circulation_stats')
+            return True, f"Rebuilt daily circulation statistics ({days} days)"
+        except Exception as e:
+            return False, f"Error rebuilding circulation statistics: {e}"
+        finally:
+            conn.close()
+
     def _notify_waitlist(self, book_id, book_title):
         """Notify first person on waitlist when book becomes available."""
         import sqlite3
         import os
         
         # Connect to portal.db
-        portal_db_path = os.path.join(os.path.dirname(__file__), 'Web-Extension', 'portal.db')
+        portal_db_path = self.portal_db_path
         if not os.path.exists(portal_db_path):
             return
         
@@ -677,6 +1070,477 @@ class Database:
         conn.close()
         return result
 
+    def build_student_search(self, search_term='', year_filter='All'):
+        """Compile the Students tab filters into a SearchQuery (rows shaped like get_students()).
+        Text uses the FTS index (word-prefix match on every column); the year filter keeps
+        the tab's rule that a year containing 1/2/3 matches 1st/2nd/3rd.
+        """
+        query = SearchQuery(
+            'id, enrollment_no, name, email, phone, department, year, date_registered',
+            'FROM students',
+            order_columns=['enrollment_no', 'name', 'email', 'phone', 'year'],
+            default_order='id DESC'
+        )
+        term = (search_term or '').strip()
+        if term:
+            if self.fts_enabled:
+                query.where('id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)',
+                            fts_match_expression(term))
+            else:
+                like = f"%{term.lower()}%"
+                query.where("LOWER(enrollment_no) LIKE ? OR LOWER(name) LIKE ? OR LOWER(COALESCE(email, '')) LIKE ? "
+                            "OR LOWER(COALESCE(phone, '')) LIKE ? OR LOWER(COALESCE(year, '')) LIKE ? "
+                            "OR LOWER(COALESCE(department, '')) LIKE ?", like, like, like, like, like, like)
+        if year_filter and year_filter != 'All':
+            level = str(year_filter).lower().strip()
+            for digit in ('1', '2', '3'):
+                if digit in level:
+                    query.where('year LIKE ?', f"%{digit}%")
+                    for lower in ('1', '2')[:int(digit) - 1]:
+                        query.where('year NOT LIKE ?', f"%{lower}%")
+                    break
+            else:
+                query.where("LOWER(TRIM(COALESCE(year, ''))) = ?", level)
+        return query
+
+    def build_record_search(self, search_term='', type_filter='All', from_date=None, to_date=None,
+                            academic_years=None, today=None):
+        """Compile the Records tab filters into a SearchQuery over borrow_records.
+
+        Parameters:
+        - search_term: Matched against the student (enrollment no, name...) and book
+          (ID, title, author...) through the FTS indexes
+        - type_filter: 'All', 'Issued', 'Returned' or 'Overdue' (late now or returned late)
+        - from_date/to_date: Inclusive borrow_date range, 'YYYY-MM-DD'
+        - academic_years: Stored academic_year values to match (any of)
+        - today: 'YYYY-MM-DD' used for the overdue test (default: today)
+
+        Rows: (enrollment_no, name, book_id, title, borrow_date, due_date, return_date,
+        status, academic_year, id)
+        """
+        if self.use_cloud:
+            late_days_sql = ("CASE WHEN br.status = 'borrowed' THEN GREATEST(0, CURRENT_DATE - br.due_date) "
+                             "WHEN br.return_date > br.due_date THEN br.return_date - br.due_date ELSE 0 END")
+        else:
+            late_days_sql = ("CASE WHEN br.status = 'borrowed' THEN MAX(0, julianday(date('now', 'localtime')) - julianday(br.due_date)) "
+                             "WHEN br.return_date > br.due_date THEN julianday(br.return_date) - julianday(br.due_date) ELSE 0 END")
+        query = SearchQuery(
+            "br.enrollment_no, s.name, br.book_id, b.title, br.borrow_date, br.due_date, br.return_date, "
+            "br.status, COALESCE(br.academic_year, 'N/A'), br.id",
+            'FROM borrow_records br JOIN students s ON br.enrollment_no = s.enrollment_no '
+            'JOIN books b ON br.book_id = b.book_id',
+            order_columns=['br.enrollment_no', 's.name', 'br.book_id', 'b.title', 'br.borrow_date',
+                           'br.due_date', 'br.return_date', 'br.status', late_days_sql],
+            default_order='br.id DESC'
+        )
+        if type_filter == 'Issued':
+            query.where('br.status = ?', 'borrowed')
+        elif type_filter == 'Returned':
+            query.where('br.status = ?', 'returned')
+        elif type_filter == 'Overdue':
+            query.where("(br.status = 'borrowed' AND br.due_date < ?) OR "
+                        "(br.status <> 'borrowed' AND br.return_date > br.due_date)",
+                        today or datetime.now().strftime('%Y-%m-%d'))
+        if academic_years:
+            placeholders = ', '.join('?' for _ in academic_years)
+            query.where(f"br.academic_year IN ({placeholders})", *academic_years)
+        if from_date:
+            query.where('br.borrow_date >= ?', from_date)
+        if to_date:
+            query.where('br.borrow_date <= ?', to_date)
+        term = (search_term or '').strip()
+        if term:
+            if self.fts_enabled:
+                match = fts_match_expression(term)
+                query.where('br.enrollment_no IN (SELECT enrollment_no FROM students WHERE id IN '
+                            '(SELECT rowid FROM students_fts WHERE students_fts MATCH ?)) OR '
+                            'br.book_id IN (SELECT book_id FROM books WHERE id IN '
+                            '(SELECT rowid FROM books_fts WHERE books_fts MATCH ?))', match, match)
+            else:
+                like = f"%{term.lower()}%"
+                query.where('LOWER(br.enrollment_no) LIKE ? OR LOWER(s.name) LIKE ? '
+                            'OR LOWER(br.book_id) LIKE ? OR LOWER(b.title) LIKE ?', like, like, like, like)
+        return query
+
+    def count_search(self, query):
+        """Number of rows matching a SearchQuery"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(*query.count_sql())
+            return cursor.fetchone()[0]
+        finally:
+            conn.close()
+
+    def fetch_search_page(self, query, limit, offset=0):
+        """One page (limit rows from offset) of a SearchQuery in its current order"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(*query.page_sql(limit, offset))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    # Rows per fetchmany() round trip when streaming exports
+    STREAM_CHUNK_SIZE = 2000
+
+    def iter_query(self, sql, params=(), chunk_size=None):
+        """Yield the rows of a SELECT, chunk_size at a time (fetchmany), for exports.
+        PostgreSQL uses a server-side cursor; SQLite steps the statement as rows are read.
+        The connection stays open until the generator is exhausted or closed.
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor('export_stream') if self.use_cloud else conn.cursor()
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield row
+        finally:
+            conn.close()
+
+    def iter_search(self, query, chunk_size=None):
+        """Stream every row of a SearchQuery in its current order (order fixed at call time)"""
+        return self.iter_query(*query.all_sql(), chunk_size=chunk_size)
+
+    def iter_students(self, department=None, year=None):
+        """Stream students (rows shaped like get_students()), newest first"""
+        query = SearchQuery('id, enrollment_no, name, email, phone, department, year, date_registered',
+                            'FROM students', default_order='id DESC')
+        if department:
+            query.where('department = ?', department)
+        if year and year != 'All':
+            query.where('year = ?', year)
+        return self.iter_search(query)
+
+    def iter_books(self, categories=None):
+        """Stream books (rows shaped like get_books()), optionally limited to categories"""
+        query = SearchQuery('id, book_id, title, author, isbn, category, total_copies, available_copies, date_added',
+                            'FROM books', default_order='id')
+        if categories:
+            query.where(f"category IN ({', '.join('?' * len(categories))})", *categories)
+        return self.iter_search(query)
+
+    def count_books_missing_fields(self):
+        """Number of books with an empty Book ID or Title"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM books "
+                           "WHERE TRIM(COALESCE(book_id, '')) = '' OR TRIM(COALESCE(title, '')) = ''")
+            return cursor.fetchone()[0]
+        finally:
+            conn.close()
+
+    # ---- Reports ----
+
+    REPORT_TYPES = ('students', 'books', 'transactions', 'overdue', 'promotions', 'admin_activity')
+
+    def build_report_query(self, report_type, filter_value=None, date_from=None, date_to=None,
+                           fine_per_day=0, today=None):
+        """Compile a Reports-tab report into a SearchQuery. The same query serves the preview
+        (count_search() and fetch_search_page() with LIMIT) and the export (iter_search()).
+
+        Parameters:
+        - report_type: One of REPORT_TYPES
+        - filter_value: Year (students), category (books) or 'Active'/'Returned'/'Overdue'
+          (transactions); 'All' or None for no filter
+        - date_from/date_to: Inclusive 'YYYY-MM-DD' range (transactions and overdue by borrow
+          date, promotions and admin activity by when they happened)
+        - fine_per_day: Rate for the overdue report's fine column
+        - today: 'YYYY-MM-DD' used for the overdue tests (default: today)
+        """
+        today = today or datetime.now().strftime('%Y-%m-%d')
+        filtered = filter_value and filter_value != 'All'
+        next_day = None
+        if date_to:
+            try:
+                next_day = (datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            except ValueError:
+                next_day = date_to
+
+        if report_type == 'students':
+            query = SearchQuery("enrollment_no, name, email, phone, department || ' - ' || year, 'N/A'",
+                                'FROM students', default_order='year, name')
+            if filtered:
+                query.where('year = ?', filter_value)
+        elif report_type == 'books':
+            query = SearchQuery(
+                "b.book_id, b.title, b.author, b.category, "
+                "CASE WHEN EXISTS(SELECT 1 FROM borrow_records br WHERE br.book_id = b.book_id "
+                "AND br.return_date IS NULL) THEN 'Borrowed' ELSE 'Available' END, 'Good', 'N/A'",
+                'FROM books b', default_order='b.category, b.title')
+            if filtered:
+                query.where('b.category = ?', filter_value)
+        elif report_type == 'transactions':
+            query = SearchQuery(
+                "br.enrollment_no, s.name, br.book_id, b.title, br.borrow_date, br.due_date, br.return_date, "
+                "CASE WHEN br.return_date IS NOT NULL THEN 'Returned' "
+                "WHEN CURRENT_DATE > br.due_date THEN 'Overdue' ELSE 'Active' END, COALESCE(br.fine, 0)",
+                'FROM borrow_records br LEFT JOIN students s ON br.enrollment_no = s.enrollment_no '
+                'LEFT JOIN books b ON br.book_id = b.book_id',
+                default_order='br.borrow_date DESC, br.id DESC')
+            if filter_value == 'Active':
+                query.where('br.return_date IS NULL AND br.due_date >= ?', today)
+            elif filter_value == 'Returned':
+                query.where('br.return_date IS NOT NULL')
+            elif filter_value == 'Overdue':
+                query.where('br.return_date IS NULL AND br.due_date < ?', today)
+            if date_from:
+                query.where('br.borrow_date >= ?', date_from)
+            if date_to:
+                query.where('br.borrow_date <= ?', date_to)
+        elif report_type == 'overdue':
+            if self.use_cloud:
+                days_sql = 'CAST(CURRENT_DATE - br.due_date AS INTEGER)'
+            else:
+                days_sql = "CAST(julianday(date('now', 'localtime')) - julianday(br.due_date) AS INTEGER)"
+            rate = float(fine_per_day or 0)
+            rate_sql = str(int(rate)) if rate.is_integer() else repr(rate)
+            query = SearchQuery(
+                f"br.enrollment_no, s.name, s.phone, br.book_id, b.title, br.borrow_date, br.due_date, "
+                f"{days_sql}, {days_sql} * {rate_sql}",
+                'FROM borrow_records br LEFT JOIN students s ON br.enrollment_no = s.enrollment_no '
+                'LEFT JOIN books b ON br.book_id = b.book_id',
+                default_order='br.due_date, br.id')
+            query.where('br.return_date IS NULL AND br.due_date < ?', today)
+            if date_from:
+                query.where('br.borrow_date >= ?', date_from)
+            if date_to:
+                query.where('br.borrow_date <= ?', date_to)
+        elif report_type == 'promotions':
+            # One row per promotion run: students promoted together on a day under one letter
+            query = SearchQuery(
+                "p.promotion_day, 'Year Promotion', p.students, p.old_year, p.new_year, "
+                "'Letter: ' || p.letter_number || ' | Academic Year: ' || p.academic_year",
+                "FROM (SELECT SUBSTR(CAST(promotion_date AS TEXT), 1, 10) AS promotion_day, "
+                "COALESCE(letter_number, 'N/A') AS letter_number, old_year, new_year, "
+                "COALESCE(MAX(academic_year), 'N/A') AS academic_year, COUNT(*) AS students "
+                "FROM promotion_history GROUP BY 1, 2, 3, 4) p",
+                default_order='p.promotion_day DESC, p.old_year')
+            if date_from:
+                query.where('p.promotion_day >= ?', date_from)
+            if date_to:
+                query.where('p.promotion_day <= ?', date_to)
+        elif report_type == 'admin_activity':
+            query = SearchQuery('timestamp, action, details, admin_user', 'FROM admin_activity',
+                                default_order='timestamp DESC')
+            if date_from:
+                query.where('timestamp >= ?', date_from)
+            if next_day:
+                query.where('timestamp < ?', next_day)
+        else:
+            raise ValueError(f"Unknown report type: {report_type}")
+        return query
+
+    # ---- Email log ----
+
+    EMAIL_LOG_COLUMNS = ('sent_at', 'enrollment_no', 'student_name', 'student_email',
+                         'book_title', 'success', 'error_message')
+
+    def log_emails(self, entries):
+        """Append email attempts in one transaction.
+        entries: dicts with enrollment_no, student_name, student_email, book_title, success,
+        and optional error_message / sent_at ('YYYY-MM-DD HH:MM:SS', default now).
+        Returns the number of rows written.
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(entry.get('sent_at') or now,
+                 entry.get('enrollment_no'),
+                 entry.get('student_name'),
+                 entry.get('student_email'),
+                 entry.get('book_title'),
+                 1 if entry.get('success') else 0,
+                 entry.get('error_message') or '')
+                for entry in entries]
+        if not rows:
+            return 0
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(f"INSERT INTO email_log ({', '.join(self.EMAIL_LOG_COLUMNS)}) "
+                               f"VALUES ({', '.join('?' for _ in self.EMAIL_LOG_COLUMNS)})", rows)
+            conn.commit()
+            return len(rows)
+        finally:
+            conn.close()
+
+    def log_email(self, enrollment_no, student_name, student_email, book_title, success, error_message=''):
+        """Append one email attempt to the log"""
+        return self.log_emails([{
+            'enrollment_no': enrollment_no,
+            'student_name': student_name,
+            'student_email': student_email,
+            'book_title': book_title,
+            'success': success,
+            'error_message': error_message,
+        }])
+
+    def build_email_log_search(self, from_date=None, to_date=None, student='', status='All'):
+        """Compile the email History filters into a SearchQuery over email_log.
+
+        Parameters:
+        - from_date/to_date: Inclusive 'YYYY-MM-DD' range on the send date
+        - student: Enrollment no prefix or part of the student's name/email
+        - status: 'All', 'Sent' or 'Failed'
+
+        Rows: (sent_at, student_name, enrollment_no, student_email, book_title, success,
+        error_message, id)
+        """
+        query = SearchQuery(
+            'sent_at, student_name, enrollment_no, student_email, book_title, success, error_message, id',
+            'FROM email_log',
+            order_columns=['sent_at', 'student_name', 'enrollment_no', 'student_email', 'book_title', 'success'],
+            default_order='sent_at DESC, id DESC'
+        )
+        if from_date:
+            query.where('sent_at >= ?', from_date)
+        if to_date:
+            # sent_at carries a time, so the range ends before the following day
+            next_day = datetime.strptime(to_date, '%Y-%m-%d') + timedelta(days=1)
+            query.where('sent_at < ?', next_day.strftime('%Y-%m-%d'))
+        term = (student or '').strip()
+        if term:
+            like = f"%{term.lower()}%"
+            query.where("enrollment_no LIKE ? OR LOWER(COALESCE(student_name, '')) LIKE ? "
+                        "OR LOWER(COALESCE(student_email, '')) LIKE ?", f"{term}%", like, like)
+        if status == 'Sent':
+            query.where('success = 1')
+        elif status == 'Failed':
+            query.where('success = 0')
+        return query
+
+    def clear_email_log(self):
+        """Delete the whole email history"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM email_log')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def import_email_history_file(self, path):
+        """One-time migration of the old email_history.json into email_log.
+        The file is renamed to *.imported afterwards; returns the number of entries imported.
+        """
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+        entries = []
+        for item in history if isinstance(history, list) else []:
+            if isinstance(item, dict):
+                entry = dict(item)
+                entry['sent_at'] = item.get('timestamp')
+                entries.append(entry)
+        imported = self.log_emails(entries)
+        os.replace(path, path + '.imported')
+        return imported
+
+    def get_due_reminders(self, from_date, to_date):
+        """Books still on loan with a due date in from_date..to_date ('YYYY-MM-DD', inclusive),
+        for students with an email address.
+        Rows: (enrollment_no, name, email, title, due_date), ordered by due date
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT br.enrollment_no, s.name, s.email, b.title, br.due_date
+                FROM borrow_records br
+                JOIN students s ON br.enrollment_no = s.enrollment_no
+                JOIN books b ON br.book_id = b.book_id
+                WHERE br.status = 'borrowed' AND br.due_date >= ? AND br.due_date <= ?
+                  AND s.email IS NOT NULL AND s.email != ''
+                ORDER BY br.due_date, br.enrollment_no
+            ''', (from_date, to_date))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
+    # ---- Scheduled jobs ----
+
+    def start_job_run(self, job_name, scheduled_for, trigger_type='scheduled'):
+        """Record that a job run started; returns the run id for finish_job_run()"""
+        started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            sql = ('''INSERT INTO job_runs (job_name, scheduled_for, trigger_type, status, started_at)
+                     VALUES (?, ?, ?, 'running', ?)''')
+            params = (job_name, scheduled_for, trigger_type, started_at)
+            if self.use_cloud:
+                cursor.execute(sql + ' RETURNING id', params)
+                run_id = cursor.fetchone()[0]
+            else:
+                cursor.execute(sql, params)
+                run_id = cursor.lastrowid
+            conn.commit()
+            return run_id
+        finally:
+            conn.close()
+
+    def finish_job_run(self, run_id, status, stats=None):
+        """Store the outcome of a job run: status ('done'/'failed') and its stats
+        (processed, succeeded, failed, message)"""
+        stats = stats or {}
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                UPDATE job_runs SET status = ?, finished_at = ?, processed = ?, succeeded = ?,
+                                    failed = ?, message = ?
+                WHERE id = ?
+            ''', (status, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                  int(stats.get('processed', 0)), int(stats.get('succeeded', 0)),
+                  int(stats.get('failed', 0)), stats.get('message', ''), run_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_job_state(self, job_name):
+        """(latest scheduled_for completed by a scheduled run, latest started_at of a scheduled
+        run that failed or never finished) for a job; either may be None"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT MAX(scheduled_for) FROM job_runs
+                WHERE job_name = ? AND trigger_type = 'scheduled' AND status = 'done'
+            ''', (job_name,))
+            last_done = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT MAX(started_at) FROM job_runs
+                WHERE job_name = ? AND trigger_type = 'scheduled' AND status <> 'done'
+            ''', (job_name,))
+            last_attempt = cursor.fetchone()[0]
+            return last_done, last_attempt
+        finally:
+            conn.close()
+
+    def get_job_runs(self, job_name=None, limit=50):
+        """Most recent job runs, newest first: (job_name, scheduled_for, trigger_type, status,
+        started_at, finished_at, processed, succeeded, failed, message)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            sql = ('SELECT job_name, scheduled_for, trigger_type, status, started_at, finished_at, '
+                   'processed, succeeded, failed, message FROM job_runs')
+            params = ()
+            if job_name:
+                sql += ' WHERE job_name = ?'
+                params = (job_name,)
+            cursor.execute(sql + ' ORDER BY id DESC LIMIT ?', params + (int(limit),))
+            return cursor.fetchall()
+        finally:
+            conn.close()
+
     def get_student_by_enrollment(self, enrollment_no):
         """Get specific student details by enrollment number"""
         conn = self.get_connection()
@@ -722,7 +1586,7 @@ class Database:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT br.enrollment_no, s.name, s.department, s.year, br.book_id, b.title, b.author, 
-                   br.borrow_date, br.due_date
+                   br.borrow_date, br.due_date, br.id
             FROM borrow_records br
             JOIN students s ON br.enrollment_no = s.enrollment_no
             JOIN books b ON br.book_id = b.book_id
@@ -751,6 +1615,7 @@ class Database:
                 return False, "Student not found"
             
             conn.commit()
+            self.mark_changed('students', keys={'students': (enrollment_no,)})
             return True, "Student deleted successfully"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -775,6 +1640,7 @@ class Database:
                 return False, "Book not found"
             
             conn.commit()
+            self.mark_changed('books', keys={'books': (book_id,)})
             return True, "Book deleted successfully"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -831,6 +1697,7 @@ class Database:
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (enrollment_no, student_name, old_year, new_year, letter_number, academic_year))
             conn.commit()
+            self.mark_changed('promotion_history')
             return True, "Promotion recorded"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -902,6 +1769,7 @@ class Database:
             ''', (last_time,))
             
             conn.commit()
+            self.mark_changed('students', 'promotion_history')
             return True, f"Undone promotion for {count} student(s) from last activity"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -922,6 +1790,7 @@ class Database:
                 VALUES (?, 1)
             ''', (year_name,))
             conn.commit()
+            self.mark_changed('academic_years')
             return True, f"Academic year {year_name} created"
         except sqlite3.IntegrityError:
             # Year already exists, just activate it
@@ -932,6 +1801,7 @@ class Database:
                 UPDATE academic_years SET is_active = 0 WHERE year_name != ?
             ''', (year_name,))
             conn.commit()
+            self.mark_changed('academic_years')
             return True, f"Academic year {year_name} activated"
         except Exception as e:
             return False, f"Error: {str(e)}"
@@ -979,9 +1849,13 @@ class Database:
                 pass
 
             cursor.execute('DELETE FROM borrow_records')
+            cursor.execute('DELETE FROM daily_circulation_stats')
+            cursor.execute('DELETE FROM daily_book_circulation')
+            cursor.execute('DELETE FROM daily_year_circulation')
             cursor.execute('DELETE FROM books')
             cursor.execute('DELETE FROM students')
             conn.commit()
+            self.mark_changed()
             return True, "All data cleared successfully"
         except Exception as e:
             return False, f"Error clearing data: {e}"
@@ -1088,6 +1962,8 @@ class Database:
                     issues_found.append(f"Book {book['book_id']}: available ({book['available_copies']}) > total ({book['total_copies']})")
             
             conn.commit()
+            if issues_fixed:
+                self.mark_changed()
             
             return {
                 'status': 'ok' if not issues_found else 'issues_found',
@@ -0,0 +1,157 @@
+"""
+Debounced, cached detail lookups for the Transactions tab entry fields
+Each field (channel) keeps at most one pending lookup: a new keystroke cancels
+the scheduled one, and a result that arrives after a newer request is dropped,
+so a fast barcode scan costs one query on one shared worker thread instead of a
+thread and a connection per character. Records are cached for a short TTL and
+evicted as soon as Database reports a write to their tables.
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_DELAY_MS = 150
+DEFAULT_TTL_SECONDS = 30
+DEFAULT_CACHE_SIZE = 256
+
+
+class DetailLookupService:
+    """
+    Latest-wins lookup of single records by key.
+
+    Parameters:
+    - root: Tk widget used for after() scheduling; callbacks run on its thread
+    - fetchers: {kind: function(key) -> record or None}, called on the worker thread
+    - invalidated_by: {kind: table names whose writes evict that kind from the cache}
+    - db: Optional Database to listen to for invalidation
+    - delay_ms: Debounce before a lookup is started
+    - ttl: Seconds a cached record stays valid
+    - max_entries: Cache size (least recently used entries are dropped)
+    """
+
+    def __init__(self, root, fetchers, invalidated_by=None, db=None,
+                 delay_ms=DEFAULT_DELAY_MS, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_CACHE_SIZE):
+        self.root = root
+        self.fetchers = dict(fetchers)
+        self.invalidated_by = dict(invalidated_by or {})
+        self.delay_ms = delay_ms
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # kind -> number of invalidate() calls; a fetch that spans one is not cached
+        self._invalidations = dict.fromkeys(self.fetchers, 0)
+        self._generations = {}
+        self._jobs = {}
+        self._queue = queue.Queue()
+        self._worker = None
+        self.db = db
+        if db is not None:
+            db.add_change_listener(self._on_database_changed)
+
+    def request(self, channel, kind, key, callback):
+        """Look up `key` for `channel` and call callback(record) on the Tk thread.
+        record is None when not found, or the Exception raised by the fetcher.
+        Any earlier request on the same channel is cancelled.
+        """
+        generation = self.cancel(channel)
+        found, record = self._cached(kind, key)
+        if found:
+            callback(record)
+            return
+        self._jobs[channel] = self.root.after(
+            self.delay_ms, lambda: self._submit(channel, generation, kind, key, callback))
+
+    def cancel(self, channel):
+        """Drop any pending or in-flight lookup for channel; returns the new generation"""
+        job = self._jobs.pop(channel, None)
+        if job is not None:
+            try:
+                self.root.after_cancel(job)
+            except Exception:
+                pass
+        generation = self._generations.get(channel, 0) + 1
+        self._generations[channel] = generation
+        return generation
+
+    def invalidate(self, kind=None):
+        """Forget cached records of one kind (or all)"""
+        with self._cache_lock:
+            for invalidated in (self._invalidations if kind is None else (kind,)):
+                self._invalidations[invalidated] = self._invalidations.get(invalidated, 0) + 1
+            if kind is None:
+                self._cache.clear()
+                return
+            for cache_key in [k for k in self._cache if k[0] == kind]:
+                del self._cache[cache_key]
+
+    def _on_database_changed(self, tables):
+        if not tables:
+            self.invalidate()
+            return
+        for kind, kind_tables in self.invalidated_by.items():
+            if tables.intersection(kind_tables):
+                self.invalidate(kind)
+
+    def _cached(self, kind, key):
+        with self._cache_lock:
+            entry = self._cache.get((kind, key))
+            if entry is None:
+                return False, None
+            stored_at, record = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._cache[(kind, key)]
+                return False, None
+            self._cache.move_to_end((kind, key))
+            return True, record
+
+    def _invalidation_count(self, kind):
+        with self._cache_lock:
+            return self._invalidations.get(kind, 0)
+
+    def _store(self, kind, key, record, invalidations):
+        """Cache record unless kind was invalidated since it was read (invalidations is the
+        count taken before the fetch); a stale record would otherwise live for the full TTL
+        """
+        with self._cache_lock:
+            if self._invalidations.get(kind, 0) != invalidations:
+                return
+            self._cache[(kind, key)] = (time.monotonic(), record)
+            self._cache.move_to_end((kind, key))
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _is_current(self, channel, generation):
+        return self._generations.get(channel) == generation
+
+    def _submit(self, channel, generation, kind, key, callback):
+        self._jobs.pop(channel, None)
+        if not self._is_current(channel, generation):
+            return
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+        self._queue.put((channel, generation, kind, key, callback))
+
+    def _run(self):
+        while True:
+            channel, generation, kind, key, callback = self._queue.get()
+            # Superseded while queued: skip the query entirely
+            if not self._is_current(channel, generation):
+                continue
+            try:
+                invalidations = self._invalidation_count(kind)
+                record = self.fetchers[kind](key)
+                self._store(kind, key, record, invalidations)
+            except Exception as e:
+                record = e
+            try:
+                self.root.after(0, lambda c=channel, g=generation, r=record, cb=callback: self._deliver(c, g, r, cb))
+            except RuntimeError:
+                return  # Tk has shut down
+
+    def _deliver(self, channel, generation, record, callback):
+        if self._is_current(channel, generation):
+            callback(record)
@@ -0,0 +1,279 @@
+"""
+Batched email sending over pooled SMTP sessions
+Each worker thread logs in once and sends its share of the batch on the same
+session (recycled every `batch_size` messages), a shared rate limit keeps the
+whole pool under the provider's per-minute quota, and transient SMTP errors are
+retried with exponential backoff. Progress is reported on the thread that
+called send_batch_emails() (the Tk thread for the overdue-letter dialog).
+"""
+
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_RATE_PER_MINUTE = 60
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 2.0
+DEFAULT_TIMEOUT_SECONDS = 30
+# Longest gap between progress callbacks while waiting for results
+PROGRESS_INTERVAL = 0.1
+
+DOCX_SUBTYPE = 'vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+_FED = object()  # marks the end of the input in the results queue
+
+
+def build_message(sender, email):
+    """MIME message for an email dict: to, subject, body, optional attachment (path)"""
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = email['to']
+    msg['Subject'] = email.get('subject', '')
+    msg.attach(MIMEText(email.get('body', ''), 'plain'))
+    attachment_path = email.get('attachment')
+    if attachment_path and os.path.exists(attachment_path):
+        with open(attachment_path, 'rb') as f:
+            attachment = MIMEApplication(f.read(), _subtype=DOCX_SUBTYPE)
+        attachment.add_header('Content-Disposition', 'attachment', filename=os.path.basename(attachment_path))
+        msg.attach(attachment)
+    return msg
+
+
+def is_transient(error):
+    """True for SMTP/network errors worth retrying (4xx replies, dropped connections, timeouts)"""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _msg in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)  # timeouts, refused/reset connections
+
+
+class RateLimiter:
+    """Spaces calls to acquire() so at most `per_minute` pass per minute (0 = unlimited)"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class _SmtpSession:
+    """One worker's authenticated connection; reopened when dropped or recycled"""
+
+    def __init__(self, settings, timeout, max_messages):
+        self.settings = settings
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.server = None
+        self.sent = 0
+
+    def send(self, msg):
+        if self.server is None or (self.max_messages and self.sent >= self.max_messages):
+            self.close()
+            self._open()
+        try:
+            self.server.send_message(msg)
+        except Exception:
+            self.close()  # the session state is unknown; start fresh on the next attempt
+            raise
+        self.sent += 1
+
+    def _open(self):
+        settings = self.settings
+        server = smtplib.SMTP(settings['smtp_server'], int(settings['smtp_port']), timeout=self.timeout)
+        try:
+            if settings.get('use_tls', True):
+                server.starttls()
+            if settings.get('sender_password'):
+                server.login(settings['sender_email'], settings['sender_password'])
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+            raise
+        self.server = server
+        self.sent = 0
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                try:
+                    self.server.close()
+                except Exception:
+                    pass
+            self.server = None
+
+
+class EmailBatchService:
+    """
+    Sends lists of emails in parallel.
+
+    Parameters:
+    - max_workers: Worker threads, each with its own SMTP session
+    - batch_size: Messages sent on one session before it is closed and reopened
+    - rate_per_minute: Send limit for the whole pool (0 = unlimited); overridden by
+      settings['rate_per_minute'] when present
+    - max_retries: Retries per message after a transient failure
+    - backoff_seconds: First retry delay; doubled on every further retry (plus jitter)
+    - timeout: SMTP socket timeout in seconds
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                 rate_per_minute=DEFAULT_RATE_PER_MINUTE, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_seconds=DEFAULT_BACKOFF_SECONDS, timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.max_workers = max(1, int(max_workers))
+        self.batch_size = max(1, int(batch_size))
+        self.rate_per_minute = rate_per_minute
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+
+    def send_batch_emails(self, emails, settings, progress_callback=None, total=None):
+        """Send email dicts (to, subject, body, attachment) with the SMTP settings
+        (smtp_server, smtp_port, sender_email, sender_password[, use_tls]).
+
+        emails may be a list or an iterator (e.g. letters as they finish rendering; pass
+        total for progress). An email dict with an 'error' entry is recorded as failed
+        without being sent.
+
+        progress_callback(sent, total, percentage) runs on the calling thread after each
+        message (sent counts finished messages, successful or not), and at least every
+        PROGRESS_INTERVAL seconds while waiting so a Tk caller can keep its window responsive.
+
+        Returns {'sent', 'failed', 'results': [bool], 'errors': [str], 'emails', 'duration'};
+        results, errors and emails are in the order the emails were supplied ('' error when sent).
+        """
+        if total is None:
+            total = len(emails)
+        started = time.perf_counter()
+        supplied = []
+        if not total:
+            return {'sent': 0, 'failed': 0, 'results': [], 'errors': [], 'emails': supplied, 'duration': 0.0}
+
+        rate = settings.get('rate_per_minute', self.rate_per_minute)
+        limiter = RateLimiter(rate)
+        worker_count = min(self.max_workers, total)
+        pending = queue.Queue()
+        finished = queue.Queue()
+        abort = threading.Event()
+
+        def feed():
+            try:
+                for email in emails:
+                    supplied.append(email)
+                    pending.put(len(supplied) - 1)
+            except Exception as e:
+                print(f"Email batch source failed: {e}")
+            finally:
+                for _ in range(worker_count):
+                    pending.put(None)
+                finished.put((_FED, len(supplied), None))
+
+        def worker():
+            session = _SmtpSession(settings, self.timeout, self.batch_size)
+            try:
+                while True:
+                    index = pending.get()
+                    if index is None:
+                        return
+                    email = supplied[index]
+                    if email.get('error'):
+                        finished.put((index, False, str(email['error'])))
+                        continue
+                    if abort.is_set():
+                        finished.put((index, False, 'Not sent: SMTP login failed'))
+                        continue
+                    try:
+                        ok, error = self._send_one(session, limiter, settings.get('sender_email', ''), email, abort)
+                    except Exception as e:
+                        ok, error = False, f"Failed to send email: {e}"
+                    finished.put((index, ok, error))
+            finally:
+                session.close()
+
+        threads = [threading.Thread(target=feed, name='EmailBatch-feed', daemon=True)]
+        threads += [threading.Thread(target=worker, name=f"EmailBatch-{n + 1}", daemon=True)
+                    for n in range(worker_count)]
+        for thread in threads:
+            thread.start()
+
+        outcomes = {}
+        expected = None
+
+        def report():
+            if progress_callback is not None:
+                done = len(outcomes)
+                try:
+                    progress_callback(done, max(total, done), done * 100.0 / max(total, done))
+                except Exception as e:
+                    print(f"Email progress callback failed: {e}")
+
+        while expected is None or len(outcomes) < expected:
+            try:
+                index, ok, error = finished.get(timeout=PROGRESS_INTERVAL)
+            except queue.Empty:
+                report()
+                continue
+            if index is _FED:
+                expected = ok
+                continue
+            outcomes[index] = (ok, error)
+            report()
+        for thread in threads:
+            thread.join()
+
+        results = [outcomes[index][0] for index in range(len(supplied))]
+        errors = [outcomes[index][1] for index in range(len(supplied))]
+        sent = sum(1 for ok in results if ok)
+        return {'sent': sent, 'failed': len(results) - sent, 'results': results, 'errors': errors,
+                'emails': supplied, 'duration': time.perf_counter() - started}
+
+    def _send_one(self, session, limiter, sender, email, abort):
+        """Send with retries; returns (ok, error message)"""
+        if not email.get('to'):
+            return False, "Student email address is not available."
+        try:
+            msg = build_message(sender, email)
+        except Exception as e:
+            return False, f"Failed to build email: {e}"
+        attempt = 0
+        while True:
+            limiter.acquire()
+            try:
+                session.send(msg)
+                return True, ''
+            except smtplib.SMTPAuthenticationError:
+                # Every other message would fail the same way
+                abort.set()
+                return False, "Authentication failed. Please check your email and app password."
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e) or abort.is_set():
+                    return False, f"SMTP error: {e}" if isinstance(e, smtplib.SMTPException) else f"Failed to send email: {e}"
+                delay = self.backoff_seconds * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay / 2))
+                attempt += 1
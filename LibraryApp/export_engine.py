@@ -0,0 +1,135 @@
+"""
+Streaming Excel/CSV export
+Rows are written as they arrive from a database cursor (or any iterator), so
+memory stays flat however many rows are exported: .xlsx files are written by
+xlsxwriter in constant_memory mode (each row goes to disk once the next one
+starts) and .csv files by the csv module. Column widths are sized from the
+first rows instead of a second pass over every cell.
+"""
+
+import csv
+import itertools
+import os
+
+WIDTH_SAMPLE_ROWS = 500
+MIN_COLUMN_WIDTH = 10
+MAX_COLUMN_WIDTH = 60
+# Rows between progress callbacks (and cancel checks)
+PROGRESS_EVERY = 500
+
+WORKBOOK_OPTIONS = {
+    'constant_memory': True,
+    # Cell text is data, never a formula or hyperlink
+    'strings_to_formulas': False,
+    'strings_to_urls': False,
+    'default_date_format': 'yyyy-mm-dd',
+}
+HEADER_FORMAT = {
+    'bold': True, 'font_color': 'white', 'bg_color': '#4472C4', 'align': 'center',
+    'valign': 'vcenter', 'border': 1, 'border_color': '#FFFFFF',
+}
+DATA_FORMAT = {'border': 1, 'border_color': '#E0E0E0', 'valign': 'vcenter'}
+ALT_DATA_FORMAT = dict(DATA_FORMAT, bg_color='#F8F9FA')
+
+
+class ExportCancelled(Exception):
+    """Raised by export_rows() when its cancel event is set; the partial file is removed"""
+
+
+def is_csv(path):
+    return os.path.splitext(path)[1].lower() == '.csv'
+
+
+def column_widths(columns, sample):
+    """Excel column widths from the headings and a sample of rows"""
+    widths = [len(str(column)) for column in columns]
+    for row in sample:
+        for index, value in zip(range(len(widths)), row):
+            if value is not None:
+                widths[index] = max(widths[index], len(str(value)))
+    return [min(max(width + 2, MIN_COLUMN_WIDTH), MAX_COLUMN_WIDTH) for width in widths]
+
+
+def export_rows(path, columns, rows, sheet_name='Data', header=None, total=None,
+                progress_callback=None, cancel=None):
+    """Write columns and rows to path (.csv, anything else is .xlsx); returns the row count.
+
+    - rows: Iterable of sequences, consumed once (e.g. Database.iter_query())
+    - header: Optional function(workbook, worksheet, column_count) -> first free row, for a
+      letterhead above the table (xlsx only; the table starts at row 0 without it)
+    - total: Expected row count, passed through to progress_callback (None if unknown)
+    - progress_callback(written, total): Called on this thread every PROGRESS_EVERY rows
+      and once at the end
+    - cancel: Optional threading.Event; when set the export stops with ExportCancelled
+    """
+    rows = iter(rows)
+    try:
+        if is_csv(path):
+            written = _write_csv(path, columns, rows, total, progress_callback, cancel)
+        else:
+            written = _write_xlsx(path, columns, rows, sheet_name, header, total, progress_callback, cancel)
+    except BaseException:
+        _close(rows)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    if progress_callback is not None:
+        progress_callback(written, total)
+    return written
+
+
+def _write_csv(path, columns, rows, total, progress_callback, cancel):
+    written = 0
+    # utf-8-sig so Excel opens non-ASCII names correctly
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        while True:
+            chunk = list(itertools.islice(rows, PROGRESS_EVERY))
+            if not chunk:
+                return written
+            writer.writerows(['' if value is None else value for value in row] for row in chunk)
+            written += len(chunk)
+            _tick(written, total, progress_callback, cancel)
+
+
+def _write_xlsx(path, columns, rows, sheet_name, header, total, progress_callback, cancel):
+    import xlsxwriter
+
+    sample = list(itertools.islice(rows, WIDTH_SAMPLE_ROWS))
+    workbook = xlsxwriter.Workbook(path, WORKBOOK_OPTIONS)
+    try:
+        worksheet = workbook.add_worksheet(sheet_name[:31])
+        for index, width in enumerate(column_widths(columns, sample)):
+            worksheet.set_column(index, index, width)
+        # constant_memory: rows must be written top to bottom, letterhead first
+        start = header(workbook, worksheet, len(columns)) if header else 0
+        worksheet.write_row(start, 0, columns, workbook.add_format(HEADER_FORMAT))
+        worksheet.set_row(start, 22)
+        worksheet.freeze_panes(start + 1, 0)
+        formats = (workbook.add_format(DATA_FORMAT), workbook.add_format(ALT_DATA_FORMAT))
+        written = 0
+        for row in itertools.chain(sample, rows):
+            worksheet.write_row(start + 1 + written, 0, tuple(row), formats[written % 2])
+            written += 1
+            if written % PROGRESS_EVERY == 0:
+                _tick(written, total, progress_callback, cancel)
+    finally:
+        workbook.close()
+    return written
+
+
+def _tick(written, total, progress_callback, cancel):
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+    if progress_callback is not None:
+        progress_callback(written, total)
+
+
+def _close(rows):
+    # Stops a database row generator now, which closes its connection
+    close = getattr(rows, 'close', None)
+    if close is not None:
+        close()
@@ -0,0 +1,160 @@
+"""
+Fine and overdue engine shared by the desktop app and the student portal
+Due/return dates are turned into integer day numbers once and overdue days,
+fines and due-date buckets are computed for whole columns with NumPy (a plain
+Python loop is used only when NumPy is missing). The fine rate always comes
+from library_settings.json, so every screen charges the same amount.
+"""
+
+import json
+import os
+import sys
+from datetime import date, datetime
+
+from lazy_imports import LazyModule, module_available
+
+# NumPy is imported the first time a column is processed, not when this module loads
+NUMPY_AVAILABLE = module_available('numpy')
+np = LazyModule('numpy') if NUMPY_AVAILABLE else None
+
+DEFAULT_FINE_PER_DAY = 5
+# Day number used for a missing or unparseable date
+NO_DATE = -(2 ** 62)
+# Days before the due date that count as "due soon"
+DUE_SOON_DAYS = 3
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_settings_cache = {'path': None, 'mtime': None, 'fine_per_day': DEFAULT_FINE_PER_DAY}
+
+
+def settings_path():
+    """library_settings.json next to the executable (frozen build) or next to this module"""
+    if hasattr(sys, '_MEIPASS'):
+        return os.path.join(os.path.dirname(sys.executable), 'library_settings.json')
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'library_settings.json')
+
+
+def load_fine_per_day(path=None):
+    """fine_per_day from library_settings.json; the file is re-read only when it changes"""
+    path = path or settings_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return DEFAULT_FINE_PER_DAY
+    if _settings_cache['path'] != path or _settings_cache['mtime'] != mtime:
+        try:
+            with open(path, 'r') as f:
+                value = json.load(f).get('fine_per_day', DEFAULT_FINE_PER_DAY)
+            _settings_cache['fine_per_day'] = int(value)
+        except (OSError, ValueError, TypeError, AttributeError):
+            _settings_cache['fine_per_day'] = DEFAULT_FINE_PER_DAY
+        _settings_cache['path'] = path
+        _settings_cache['mtime'] = mtime
+    return _settings_cache['fine_per_day']
+
+
+def day_number(value):
+    """'YYYY-MM-DD' string, date or datetime -> days since 1970-01-01 (NO_DATE if missing/invalid)"""
+    if value is None:
+        return NO_DATE
+    if isinstance(value, datetime):
+        return value.date().toordinal() - _EPOCH_ORDINAL
+    if isinstance(value, date):
+        return value.toordinal() - _EPOCH_ORDINAL
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return NO_DATE
+
+
+def day_numbers(values):
+    """Column of dates -> int64 array of day numbers (a list without NumPy)"""
+    values = list(values)
+    if not NUMPY_AVAILABLE:
+        return [day_number(v) for v in values]
+    try:
+        # Fast path: NumPy parses ISO strings/None (NaT) for the whole column at once
+        days = np.array(values, dtype='datetime64[D]').astype('int64')
+        days[days == np.iinfo('int64').min] = NO_DATE
+        return days
+    except (ValueError, TypeError):
+        return np.fromiter((day_number(v) for v in values), dtype='int64', count=len(values))
+
+
+def today_number(today=None):
+    return day_number(today or date.today())
+
+
+def compute_fines(due_dates, return_dates=None, open_loans=None, today=None, fine_per_day=None):
+    """Overdue days and fines for parallel columns of loans.
+
+    Parameters:
+    - due_dates: Due date per loan
+    - return_dates: Return date per loan (None/missing while still out)
+    - open_loans: Optional booleans (status == 'borrowed'); defaults to "no return date".
+      Open loans accrue up to today, closed ones up to their return date.
+    - today: Override for the current date
+    - fine_per_day: Rate; defaults to library_settings.json
+
+    Returns (overdue_days, fines) as int64 arrays (lists without NumPy).
+    """
+    rate = load_fine_per_day() if fine_per_day is None else fine_per_day
+    due = day_numbers(due_dates)
+    count = len(due)
+    returned = day_numbers(return_dates if return_dates is not None else [None] * count)
+    now = today_number(today)
+
+    if not NUMPY_AVAILABLE:
+        overdue = []
+        for i in range(count):
+            is_open = open_loans[i] if open_loans is not None else returned[i] == NO_DATE
+            end = now if is_open else returned[i]
+            late = end - due[i] if due[i] != NO_DATE and end != NO_DATE else 0
+            overdue.append(max(0, late))
+        return overdue, [days * rate for days in overdue]
+
+    if open_loans is None:
+        is_open = returned == NO_DATE
+    else:
+        is_open = np.asarray(list(open_loans), dtype=bool)
+    end = np.where(is_open, now, returned)
+    valid = (due != NO_DATE) & (end != NO_DATE)
+    overdue = np.where(valid, np.maximum(end - due, 0), 0)
+    return overdue, overdue * rate
+
+
+def days_until_due(due_dates, today=None):
+    """Due date minus today in days for each loan (negative = overdue; NO_DATE if missing)"""
+    due = day_numbers(due_dates)
+    now = today_number(today)
+    if not NUMPY_AVAILABLE:
+        return [d - now if d != NO_DATE else NO_DATE for d in due]
+    return np.where(due != NO_DATE, due - now, NO_DATE)
+
+
+def due_buckets(days_left, soon_days=DUE_SOON_DAYS):
+    """Bucket days_until_due() values: 'overdue' (< 0), 'due_soon' (0..soon_days), 'ok', 'unknown'"""
+    if not NUMPY_AVAILABLE:
+        buckets = []
+        for d in days_left:
+            if d == NO_DATE:
+                buckets.append('unknown')
+            elif d < 0:
+                buckets.append('overdue')
+            elif d <= soon_days:
+                buckets.append('due_soon')
+            else:
+                buckets.append('ok')
+        return buckets
+    days_left = np.asarray(days_left)
+    return np.select(
+        [days_left == NO_DATE, days_left < 0, days_left <= soon_days],
+        ['unknown', 'overdue', 'due_soon'],
+        default='ok'
+    ).tolist()
+
+
+def total_fines(due_dates, return_dates=None, open_loans=None, today=None, fine_per_day=None):
+    """Sum of compute_fines() over all loans"""
+    _overdue, fines = compute_fines(due_dates, return_dates, open_loans, today, fine_per_day)
+    return int(fines.sum()) if NUMPY_AVAILABLE else int(sum(fines))
@@ -0,0 +1,158 @@
+"""
+Persistent daily job scheduler for the desktop app
+Jobs (e.g. the due-date reminder emails) are defined in code with a time of day;
+every run is recorded in the job_runs table. On start-up, and every few minutes
+after, any job whose latest scheduled time has no successful run is started, so a
+day the app was closed (or restarted) is caught up instead of silently skipped.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+DEFAULT_POLL_SECONDS = 300
+DEFAULT_RETRY_MINUTES = 60
+
+TRIGGER_SCHEDULED = 'scheduled'
+TRIGGER_MANUAL = 'manual'
+
+SLOT_FORMAT = '%Y-%m-%d %H:%M'
+STARTED_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class DailyJob:
+    """
+    A job that should run once a day at `at` ('HH:MM', local time).
+
+    Parameters:
+    - name: Key in job_runs
+    - at: Time of day
+    - run: Function(context) -> stats dict (processed, succeeded, failed, message);
+      context has scheduled_for (datetime), previous (datetime of the last successful
+      scheduled run, or None) and trigger
+    - enabled: Optional function -> bool; disabled jobs are skipped and not recorded
+    - retry_minutes: Wait after a failed attempt before the same slot is tried again
+    """
+
+    def __init__(self, name, at, run, enabled=None, retry_minutes=DEFAULT_RETRY_MINUTES):
+        self.name = name
+        self.hour, self.minute = (int(part) for part in at.split(':'))
+        self.run = run
+        self.enabled = enabled
+        self.retry_minutes = retry_minutes
+
+    def is_enabled(self):
+        return self.enabled is None or bool(self.enabled())
+
+    def latest_slot(self, now):
+        """Most recent scheduled time at or before now"""
+        slot = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if slot > now:
+            slot -= timedelta(days=1)
+        return slot
+
+    def next_slot(self, now):
+        return self.latest_slot(now) + timedelta(days=1)
+
+
+class JobScheduler:
+    """
+    Runs DailyJobs on one daemon thread and records them through Database.
+
+    Parameters:
+    - db: Database providing start_job_run(), finish_job_run() and get_job_state()
+    - poll_seconds: Longest sleep between checks (covers clock changes and suspend)
+    """
+
+    def __init__(self, db, poll_seconds=DEFAULT_POLL_SECONDS):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self._jobs = {}
+        self._wake = threading.Event()
+        self._stopped = False
+        self._run_lock = threading.Lock()
+        self._thread = None
+
+    def add_daily(self, name, at, run, enabled=None, retry_minutes=DEFAULT_RETRY_MINUTES):
+        self._jobs[name] = DailyJob(name, at, run, enabled, retry_minutes)
+
+    def start(self):
+        """Start the scheduler thread (missed runs are caught up straight away)"""
+        if self._thread is not None and self._thread.is_alive():
+            self.wake()
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name='JobScheduler', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Re-check due jobs now (e.g. after a job was enabled)"""
+        self._wake.set()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def run_now(self, name):
+        """Run a job immediately on the calling thread; recorded as a manual run, which
+        does not count towards (or move) the daily schedule. Returns the stats dict.
+        """
+        job = self._jobs[name]
+        now = datetime.now()
+        previous, _last_attempt = self._state(job)
+        return self._run(job, now, previous, TRIGGER_MANUAL)
+
+    def _state(self, job):
+        last_done, last_attempt = self.db.get_job_state(job.name)
+        return self._parse(last_done), self._parse(last_attempt)
+
+    @staticmethod
+    def _parse(value):
+        if not value:
+            return None
+        for fmt in (SLOT_FORMAT, STARTED_FORMAT):
+            try:
+                return datetime.strptime(str(value), fmt)
+            except ValueError:
+                continue
+        return None
+
+    def _loop(self):
+        while not self._stopped:
+            self._wake.clear()
+            now = datetime.now()
+            for job in list(self._jobs.values()):
+                try:
+                    self._run_if_due(job, now)
+                except Exception as e:
+                    print(f"[Scheduler] Error checking job {job.name}: {e}")
+            now = datetime.now()
+            wait = min([self.poll_seconds] +
+                       [(job.next_slot(now) - now).total_seconds() for job in self._jobs.values()])
+            self._wake.wait(max(1.0, wait))
+
+    def _run_if_due(self, job, now):
+        if not job.is_enabled():
+            return
+        slot = job.latest_slot(now)
+        previous, last_attempt = self._state(job)
+        if previous is not None and previous >= slot:
+            return
+        if last_attempt is not None and now - last_attempt < timedelta(minutes=job.retry_minutes):
+            return  # Recently failed (or still running in another instance); retry later
+        if previous is not None and previous < slot - timedelta(days=1):
+            print(f"[Scheduler] Catching up {job.name}: last run {previous.strftime(SLOT_FORMAT)}")
+        self._run(job, slot, previous, TRIGGER_SCHEDULED)
+
+    def _run(self, job, scheduled_for, previous, trigger):
+        with self._run_lock:
+            run_id = self.db.start_job_run(job.name, scheduled_for.strftime(SLOT_FORMAT), trigger)
+            context = {'scheduled_for': scheduled_for, 'previous': previous, 'trigger': trigger}
+            try:
+                stats = job.run(context) or {}
+                status = 'done'
+            except Exception as e:
+                print(f"[Scheduler] Job {job.name} failed: {e}")
+                stats = {'message': str(e)}
+                status = 'failed'
+            self.db.finish_job_run(run_id, status, stats)
+            return dict(stats, status=status)
@@ -0,0 +1,103 @@
+"""
+Deferred imports for heavy optional libraries
+pandas, matplotlib, reportlab, python-docx, tkcalendar, qrcode, PIL and xlsxwriter
+are only needed once the user opens the feature that uses them. The proxies here
+stand in for a module (or a name imported from one) and import it on first
+attribute access or call, so start-up only pays for what the login screen uses.
+"""
+
+import importlib
+import importlib.util
+import sys
+
+_available = {}
+
+
+def module_available(name):
+    """True if top-level module `name` can be imported (checked without importing it)"""
+    if name not in _available:
+        if name in sys.modules:
+            _available[name] = True
+        elif getattr(sys, 'frozen', False):
+            # PyInstaller builds bundle every optional dependency (see build_app.spec)
+            _available[name] = True
+        else:
+            try:
+                _available[name] = importlib.util.find_spec(name) is not None
+            except (ImportError, ValueError):
+                _available[name] = False
+    return _available[name]
+
+
+class LazyModule:
+    """Stand-in for `import name`; the real module is imported on first attribute access"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            name = self.__dict__['_name']
+            # __import__ (not import_module) so the start-up profiler sees the import
+            __import__(name)
+            module = self.__dict__['_module'] = sys.modules[name]
+        return module
+
+    @property
+    def is_loaded(self):
+        return self.__dict__['_module'] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+class LazyAttribute:
+    """Stand-in for `from module import attr`; resolved on first call or attribute access"""
+
+    def __init__(self, module, attr):
+        self._module = LazyModule(module)
+        self._attr = attr
+        self._value = None
+        self._resolved = False
+
+    def resolve(self):
+        if not self._resolved:
+            self._value = getattr(self._module, self._attr)
+            self._resolved = True
+        return self._value
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f"<lazy {self._module.__dict__['_name']}.{self._attr}>"
+
+
+def lazy_module(name, requires=None):
+    """LazyModule for `name`, or None when it (or any of `requires`) is not installed"""
+    top_level = [name.split('.')[0]] + list(requires or [])
+    if not all(module_available(module) for module in top_level):
+        return None
+    return LazyModule(name)
+
+
+def lazy_attr(module, attr, requires=None):
+    """LazyAttribute for module.attr, or None when the module (or `requires`) is not installed"""
+    top_level = [module.split('.')[0]] + list(requires or [])
+    if not all(module_available(name) for name in top_level):
+        return None
+    return LazyAttribute(module, attr)
@@ -0,0 +1,157 @@
+"""
+Notebook tabs that are built the first time they are selected
+Until then each tab holds a light skeleton placeholder, so logging in only pays
+for the tab that is actually shown. Build time and time-to-first-paint are
+recorded per tab.
+"""
+
+import time
+import tkinter as tk
+
+SKELETON_BAR_COLOR = '#e9ecef'
+SKELETON_TEXT_COLOR = '#999999'
+
+
+class _LazyTab:
+    def __init__(self, name, text, builder, adds_own_tab, frame):
+        self.name = name
+        self.text = text
+        self.builder = builder
+        self.adds_own_tab = adds_own_tab
+        self.frame = frame
+        self.built = False
+        self.build_seconds = None
+        self.paint_seconds = None
+
+
+class LazyTabs:
+    """
+    Deferred construction for the tabs of a ttk.Notebook.
+
+    Parameters:
+    - notebook: The ttk.Notebook
+    - bg: Background of the placeholder frames
+    - on_built: Called with (name, build_seconds, paint_seconds) once a tab has painted
+
+    Builders come in two forms (see add()):
+    - builder(frame) fills the placeholder frame it is given
+    - builder() adds its own frame to the notebook (adds_own_tab=True); the new tab is
+      moved into the placeholder's position and the placeholder is removed
+    """
+
+    def __init__(self, notebook, bg='white', on_built=None):
+        self.notebook = notebook
+        self.bg = bg
+        self.on_built = on_built
+        self._tabs = []
+        self._building = False
+        notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed, add='+')
+
+    def add(self, name, text, builder, adds_own_tab=False):
+        """Add a placeholder tab titled `text`; builder runs on first selection"""
+        frame = tk.Frame(self.notebook, bg=self.bg)
+        self.notebook.add(frame, text=text)
+        self._draw_skeleton(frame, text)
+        self._tabs.append(_LazyTab(name, text, builder, adds_own_tab, frame))
+        return frame
+
+    def is_built(self, name):
+        tab = self._find(name)
+        return tab is not None and tab.built
+
+    def select(self, name):
+        """Select (and build if needed) the tab called name"""
+        tab = self._find(name)
+        if tab is not None:
+            self.notebook.select(tab.frame)
+            self.ensure_built(name)
+
+    def ensure_built(self, name):
+        """Build the tab now if it has not been built yet; returns its frame"""
+        tab = self._find(name)
+        if tab is None:
+            return None
+        if not tab.built:
+            self._build(tab)
+        return tab.frame
+
+    def timings(self):
+        """{name: (build_seconds, paint_seconds)} for the tabs built so far"""
+        return {tab.name: (tab.build_seconds, tab.paint_seconds) for tab in self._tabs if tab.built}
+
+    def _find(self, name):
+        for tab in self._tabs:
+            if tab.name == name:
+                return tab
+        return None
+
+    def _draw_skeleton(self, frame, text):
+        """Grey bars roughly where a tab's header, filters and table will appear"""
+        tk.Label(frame, text=f"Loading {text.split(' ', 1)[-1]}...", font=('Segoe UI', 11),
+                 bg=self.bg, fg=SKELETON_TEXT_COLOR).pack(anchor='w', padx=20, pady=(20, 10))
+        for height, fill in ((40, tk.X), (30, tk.X), (300, tk.BOTH)):
+            tk.Frame(frame, bg=SKELETON_BAR_COLOR, height=height).pack(
+                fill=fill, expand=(fill == tk.BOTH), padx=20, pady=6)
+
+    def _on_tab_changed(self, event=None):
+        if self._building:
+            return
+        try:
+            selected = str(self.notebook.select())
+        except tk.TclError:
+            return
+        for tab in self._tabs:
+            if not tab.built and str(tab.frame) == selected:
+                # Let the skeleton paint before the (blocking) build starts
+                self.notebook.after_idle(lambda t=tab: self._build_if_selected(t))
+                break
+
+    def _build_if_selected(self, tab):
+        if tab.built:
+            return
+        try:
+            if str(self.notebook.select()) != str(tab.frame):
+                return  # User moved on before the build started
+        except tk.TclError:
+            return
+        self._build(tab)
+
+    def _build(self, tab):
+        tab.built = True
+        started = time.perf_counter()
+        self._building = True
+        try:
+            placeholder = tab.frame
+            if tab.adds_own_tab:
+                before = set(self.notebook.tabs())
+                tab.builder()
+                added = [t for t in self.notebook.tabs() if t not in before]
+                if added:
+                    tab.frame = self.notebook.nametowidget(added[0])
+                    was_selected = str(self.notebook.select()) == str(placeholder)
+                    self.notebook.insert(placeholder, tab.frame)
+                    if was_selected:
+                        self.notebook.select(tab.frame)
+                    self.notebook.forget(placeholder)
+                    placeholder.destroy()
+            else:
+                for child in placeholder.winfo_children():
+                    child.destroy()
+                tab.builder(placeholder)
+        except Exception as e:
+            print(f"Error building tab {tab.name}: {e}")
+            raise
+        finally:
+            self._building = False
+            tab.build_seconds = time.perf_counter() - started
+        # First paint: geometry and redraw of the new widgets have been processed
+        self.notebook.after_idle(lambda: self._painted(tab, started))
+
+    def _painted(self, tab, started):
+        try:
+            self.notebook.update_idletasks()
+        except tk.TclError:
+            return
+        tab.paint_seconds = time.perf_counter() - started
+        if self.on_built:
+            self.on_built(tab.name, tab.build_seconds, tab.paint_seconds)
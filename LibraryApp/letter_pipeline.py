@@ -0,0 +1,223 @@
+"""
+Overdue-letter rendering pipeline (python-docx)
+The letterhead (logo and the three header lines) is built once into a template
+.docx kept in memory; each letter is a copy of that template with the student's
+details added. Large runs are rendered in a process pool sized to the CPU count
+and handed back as each letter finishes, so emailing can start with the first
+letter instead of after the last.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+# Below this many letters a process pool costs more to start than it saves
+PROCESS_POOL_MIN_LETTERS = 8
+
+HEADER_LINES = (
+    ("Government Polytechnic Awasari (Kh)", 20, (31, 71, 136)),
+    ("Departmental Library", 16, (46, 92, 138)),
+    ("Computer Department", 14, (54, 95, 145)),
+)
+LOGO_WIDTH_PT = 80
+
+_template_cache = {}
+_worker_template = None
+
+
+def find_logo():
+    """Path of the letterhead logo (bundled next to the app), or None"""
+    base_dir = sys._MEIPASS if hasattr(sys, '_MEIPASS') else os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(base_dir, 'logo.png')
+    return path if os.path.exists(path) else None
+
+
+def build_template(logo_path=None):
+    """Letterhead .docx as bytes; cached per logo file (and its modification time)"""
+    mtime = os.path.getmtime(logo_path) if logo_path and os.path.exists(logo_path) else None
+    cache_key = (logo_path, mtime)
+    template = _template_cache.get(cache_key)
+    if template is None:
+        from docx import Document
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.shared import Pt, RGBColor
+
+        doc = Document()
+        if mtime is not None:
+            try:
+                logo_para = doc.add_paragraph()
+                logo_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                logo_para.add_run().add_picture(logo_path, width=Pt(LOGO_WIDTH_PT))
+            except Exception as e:
+                print(f"Could not add logo: {e}")
+        for text, size, rgb_color in HEADER_LINES:
+            p = doc.add_paragraph()
+            run = p.add_run(text)
+            run.bold = True
+            run.font.size = Pt(size)
+            run.font.color.rgb = RGBColor(*rgb_color)
+            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        doc.add_paragraph("_" * 70).alignment = WD_ALIGN_PARAGRAPH.CENTER
+        buffer = BytesIO()
+        doc.save(buffer)
+        template = _template_cache[cache_key] = buffer.getvalue()
+    return template
+
+
+def render_overdue_letter(template, letter, path):
+    """Write one overdue letter to path.
+
+    letter keys: enrollment_no, student_name, book_id, book_title, issue_date, due_date,
+    days_overdue, fine_amount, fine_per_day, date (as printed on the letter)
+    """
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
+
+    doc = Document(BytesIO(template))
+
+    def add_text(text, size=11, bold=False, alignment=None):
+        p = doc.add_paragraph()
+        run = p.add_run(text)
+        run.font.size = Pt(size)
+        run.bold = bold
+        if alignment is not None:
+            p.alignment = alignment
+        return p
+
+    doc.add_paragraph()  # Spacing
+    add_text(f"Date: {letter['date']}", alignment=WD_ALIGN_PARAGRAPH.RIGHT)
+    doc.add_paragraph()
+    add_text('Subject: Overdue Book Notice', size=12, bold=True, alignment=WD_ALIGN_PARAGRAPH.CENTER)
+    doc.add_paragraph()
+    add_text(f"To,\n{letter['student_name']}\nEnrollment No: {letter['enrollment_no']}")
+    doc.add_paragraph()
+    add_text(
+        f"Dear {letter['student_name']},\n\n"
+        f"This is to inform you that the following book borrowed from the Library of Computer Department "
+        f"is overdue and needs to be returned immediately.\n\n"
+    )
+
+    # Book details table
+    doc.add_paragraph('Book Details:', style='Heading 2')
+    table = doc.add_table(rows=5, cols=2)
+    table.style = 'Light Grid Accent 1'
+    details = (
+        ('Book ID:', letter['book_id']),
+        ('Book Title:', letter['book_title']),
+        ('Issue Date:', letter['issue_date']),
+        ('Due Date:', letter['due_date']),
+        ('Days Overdue:', letter['days_overdue']),
+    )
+    for row, (label, value) in enumerate(details):
+        table.cell(row, 0).text = label
+        table.cell(row, 1).text = str(value)
+
+    doc.add_paragraph()
+    add_text(
+        f"As per library rules, a fine of ₹{letter['fine_per_day']} per day is applicable for overdue books.\n"
+        f"Your current fine amount is: ₹{letter['fine_amount']}\n\n",
+        bold=True
+    )
+    add_text(
+        "You are hereby requested to return the book to the library at the earliest and clear the pending fine. "
+        "Failure to do so may result in restrictions on future borrowing privileges.\n\n"
+        "Please contact the library desk for any queries or clarifications.\n\n"
+    )
+    doc.add_paragraph()
+    add_text("Thank you for your cooperation.\n\nYours sincerely,\n\n")
+
+    # Signature
+    doc.add_paragraph()
+    doc.add_paragraph("__________________________")
+    add_text('Librarian', bold=True)
+    for line in ('Departmental Library', 'Computer Department', 'Government Polytechnic Awasari (Kh)'):
+        add_text(line, size=10)
+
+    doc.save(path)
+    return path
+
+
+def _init_worker(template):
+    global _worker_template
+    _worker_template = template
+
+
+def _render_in_worker(letter, path):
+    return render_overdue_letter(_worker_template, letter, path)
+
+
+class LetterPipeline:
+    """
+    Renders overdue letters from one cached template.
+
+    Parameters:
+    - logo_path: Letterhead logo (default: find_logo())
+    - max_workers: Process pool size (default: CPU count)
+    """
+
+    def __init__(self, logo_path=None, max_workers=None):
+        self.logo_path = logo_path if logo_path is not None else find_logo()
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def template(self):
+        return build_template(self.logo_path)
+
+    def render(self, letter, path):
+        """Render one letter in this process"""
+        return render_overdue_letter(self.template(), letter, path)
+
+    def render_many(self, letters, out_dir):
+        """Render letters into out_dir; yields (letter, path, error) in completion order
+        (error is None on success). Letters get unique file names, so one student with
+        several overdue books gets one file per book.
+        """
+        template = self.template()
+        jobs = [(letter, os.path.join(out_dir, f"Overdue_{index + 1:04d}_{_safe_name(letter['enrollment_no'])}.docx"))
+                for index, letter in enumerate(letters)]
+        workers = min(self.max_workers, len(jobs))
+        if workers > 1 and len(jobs) >= PROCESS_POOL_MIN_LETTERS:
+            try:
+                pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template,))
+            except (OSError, ValueError, NotImplementedError) as e:
+                print(f"Letter process pool unavailable, rendering in-process: {e}")
+                pool = None
+            if pool is not None:
+                finished = set()
+                try:
+                    futures = {pool.submit(_render_in_worker, letter, path): (letter, path) for letter, path in jobs}
+                    for future in as_completed(futures):
+                        letter, path = futures[future]
+                        try:
+                            result, error = future.result(), None
+                        except Exception as e:
+                            if _is_pool_failure(e):
+                                raise
+                            result, error = None, e
+                        # Only letters with an outcome count as done; a dead worker's are retried below
+                        finished.add(path)
+                        yield letter, result, error
+                    return
+                except Exception as e:
+                    if not _is_pool_failure(e):
+                        raise
+                    # A worker died (or the pool could not start): finish the rest here
+                    print(f"Letter process pool failed, rendering in-process: {e}")
+                    jobs = [(letter, path) for letter, path in jobs if path not in finished]
+                finally:
+                    pool.shutdown(wait=False)
+        for letter, path in jobs:
+            try:
+                yield letter, render_overdue_letter(template, letter, path), None
+            except Exception as e:
+                yield letter, None, e
+
+
+def _is_pool_failure(error):
+    from concurrent.futures.process import BrokenProcessPool
+    return isinstance(error, BrokenProcessPool)
+
+
+def _safe_name(value):
+    return ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in str(value))
@@ -4,13 +4,16 @@ Library of Computer Department Management System
 Version v3.7_DEVELOPER_LOGIN - Developer branding on login + visible version label
 """
 
+# --profile-startup: time every import below and each start-up phase (see startup_profiler)
+from startup_profiler import profiler as startup_profiler
+startup_profiler.enable_from_argv()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime, timedelta
 import sqlite3
 import os
 import sys
-import pandas as pd
 from tkinter import font
 import webbrowser
 import subprocess
@@ -24,84 +27,82 @@ import json
 import threading
 import time
 import socket
-import qrcode
-from PIL import ImageTk, Image
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors as rl_colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from lazy_imports import LazyModule, lazy_attr, lazy_module, module_available
+
+# Heavy libraries are imported on first use; the proxies below stand in for the modules
+pd = LazyModule('pandas')
+qrcode = LazyModule('qrcode')
+Image = LazyModule('PIL.Image')
+ImageTk = LazyModule('PIL.ImageTk')
 
 # Add Web-Extension directory to path to allow import
 sys.path.append(os.path.join(os.path.dirname(__file__), 'Web-Extension'))
 
-# Optional: Web Portal support
-try:
-    from student_portal import app as flask_app  # type: ignore
-    from waitress import serve  # type: ignore
-    WEB_PORTAL_AVAILABLE = True
-except Exception as e:
-    import traceback
-    traceback.print_exc()
-    print(f"Portal Import Error: {e}")
-    flask_app = None
-    serve = None
-    WEB_PORTAL_AVAILABLE = False
+# Optional: Web Portal support. student_portal (Flask app, portal DB init, log cleanup
+# thread) is only imported when the portal is started - see start_student_portal()
+WEB_PORTAL_AVAILABLE = all(module_available(name) for name in ('flask', 'waitress', 'student_portal'))
+if not WEB_PORTAL_AVAILABLE:
     print("Web portal not available - student portal features will be disabled")
 
-# Optional: Word export support
-try:
-    from docx import Document
-    from docx.shared import Pt
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-except Exception:
-    Document = None
-
-# Calendar date picker support
-try:
-    from tkcalendar import DateEntry
-except Exception:
-    DateEntry = None
-
-# Matplotlib for charts and analysis
+# Access-log rollups shared with the portal (stdlib only)
 try:
-    import matplotlib.pyplot as plt
-    import matplotlib.patches as patches
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    from matplotlib.figure import Figure
-    import numpy as np
-    MATPLOTLIB_AVAILABLE = True
+    import log_rollup  # type: ignore
 except Exception:
-    MATPLOTLIB_AVAILABLE = False
+    log_rollup = None
+
+# Optional: Word export support (None when python-docx is not installed)
+Document = lazy_attr('docx', 'Document')
+Pt = lazy_attr('docx.shared', 'Pt')
+WD_ALIGN_PARAGRAPH = lazy_attr('docx.enum.text', 'WD_ALIGN_PARAGRAPH')
+
+# Calendar date picker support (None when tkcalendar is not installed)
+DateEntry = lazy_attr('tkcalendar', 'DateEntry')
+
+# Matplotlib for charts and analysis (imported when the first chart is drawn)
+MATPLOTLIB_AVAILABLE = module_available('matplotlib') and module_available('numpy')
+if MATPLOTLIB_AVAILABLE:
+    FigureCanvasTkAgg = lazy_attr('matplotlib.backends.backend_tkagg', 'FigureCanvasTkAgg')
+    Figure = lazy_attr('matplotlib.figure', 'Figure')
+    ChartSlot = lazy_attr('analysis_charts', 'ChartSlot')
+    update_pie = lazy_attr('analysis_charts', 'update_pie')
+    update_bars = lazy_attr('analysis_charts', 'update_bars')
+else:
     print("matplotlib not available - Analysis tab will show installation prompt")
 
 # Advanced Excel export support
-try:
-    import xlsxwriter
-    XLSXWRITER_AVAILABLE = True
-except Exception:
-    XLSXWRITER_AVAILABLE = False
+xlsxwriter = lazy_module('xlsxwriter')
+XLSXWRITER_AVAILABLE = xlsxwriter is not None
 
 # Add the current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from database import Database
 # from login_loader import LoginLoader
 from autocomplete_widget import AutocompleteEntry
+from autocomplete_index import LibraryAutocompleteIndex
+from detail_lookup import DetailLookupService
+from task_runner import (TaskRunner, PRIORITY_WRITE, PRIORITY_INTERACTIVE,
+                         PRIORITY_REFRESH, PRIORITY_BACKGROUND)
+from virtual_tree import VirtualTreeview, KeyedTreeSync
+from lazy_tabs import LazyTabs
+from search_query import PagedQuerySource
+from job_scheduler import JobScheduler, TRIGGER_SCHEDULED
+from letter_pipeline import LetterPipeline
+from export_engine import ExportCancelled, WIDTH_SAMPLE_ROWS, export_rows, is_csv
+from pdf_report import build_report
+from fines import compute_fines, days_until_due, due_buckets, total_fines, NO_DATE
+
+from email_batch_service import EmailBatchService
+from sync_manager import create_sync_manager
 
 # Performance Optimization Modules
 try:
     from database_pool import get_pool, ConnectionPool
-    from email_batch_service import EmailBatchService, send_overdue_emails_async
-    from sync_manager import create_sync_manager, SyncManager
     from config_manager import get_config, ConfigManager
     PERFORMANCE_MODULES_AVAILABLE = True
 except Exception as e:
     print(f"Performance modules not available: {e}")
     PERFORMANCE_MODULES_AVAILABLE = False
     ConnectionPool = None
-    EmailBatchService = None
-    SyncManager = None
     ConfigManager = None
 
 # ---------------------------------------------------------------------------
@@ -111,25 +112,127 @@ APP_VERSION = "v5.0_FINAL"
 FINE_PER_DAY = 5  # monetary units per day late
 # Fixed loan period (teacher requirement): exactly 7 days between borrow and due date
 LOAN_PERIOD_DAYS = 7
+# Auto-sync interval when no config_manager settings are available
+DEFAULT_SYNC_INTERVAL_MINUTES = 15
 # Simple password required to perform full data wipe (change as needed)
 CLEAR_WIPE_PASSWORD = "clear123"  # EASY default; change for production use
 # Admin login credentials (required at startup)
 ADMIN_USERNAME = "gpa"
 ADMIN_PASSWORD = "gpa123"
+# Analysis refresh requests arriving within this window are merged into one redraw
+ANALYSIS_REFRESH_DELAY_MS = 150
+# Views to reload when Database reports a write to a table
+TABLE_VIEWS = {
+    'students': ('students', 'records', 'borrowed', 'dashboard'),
+    'books': ('books', 'records', 'borrowed', 'dashboard'),
+    'borrow_records': ('borrowed', 'records', 'dashboard'),
+    'academic_years': ('dashboard', 'academic_years'),
+    'promotion_history': ('students',),
+    'daily_circulation_stats': ('dashboard',),
+}
+# View name -> refresh method, in the order stale views are reloaded
+VIEW_REFRESHERS = {
+    'dashboard': 'refresh_dashboard',
+    'students': 'refresh_students',
+    'books': 'refresh_books',
+    'borrowed': 'refresh_borrowed',
+    'records': 'refresh_records',
+    'academic_years': 'refresh_academic_year_filter',
+}
+# Change events arriving within this window are merged into one reload per view
+VIEW_REFRESH_DELAY_MS = 100
+# Main notebook tabs in display order: (name, tab text, builder); each is built on first selection
+MAIN_TABS = (
+    ('dashboard', "📊 Dashboard", 'create_dashboard_tab'),
+    ('students', "👥 Students", 'create_students_tab'),
+    ('books', "📚 Books", 'create_books_tab'),
+    ('transactions', "📋 Transactions", 'create_transactions_tab'),
+    ('records', "📊 Records", 'create_records_tab'),
+    ('analysis', "📊 Analysis", 'create_analysis_tab'),
+    ('reports', "📄 Reports", 'create_reports_tab'),
+    ('admin', "⚙️ Admin", 'create_admin_tab'),
+    ('portal', "📱 Portal", 'create_student_portal_tab'),
+)
+# Tab holding each view; refreshes of views in tabs not built yet wait until the tab is opened
+VIEW_TABS = {
+    'dashboard': 'dashboard',
+    'students': 'students',
+    'books': 'books',
+    'borrowed': 'transactions',
+    'records': 'records',
+    'academic_years': 'records',
+}
+# Views a tab's builder does not load itself; refreshed right after the tab is built
+TAB_INITIAL_VIEWS = {'transactions': ('borrowed',)}
+# The portal server starts this long after the main window first paints (independent of the Portal tab)
+PORTAL_AUTOSTART_DELAY_MS = 1500
+# Daily due-date reminder emails: time of day, and parallel sends when the batch service is unavailable
+REMINDER_JOB_TIME = '09:00'
+REMINDER_SEND_WORKERS = 4
+# Save dialog choices for table exports (written by export_engine; .csv skips xlsxwriter)
+EXPORT_FILETYPES = [("Excel files", "*.xlsx"), ("CSV files", "*.csv")]
 
 class LibraryApp:
-    def run_in_background_thread(self, target, callback, **kwargs):
-        """Helper to run a function in a background thread and callback on main thread."""
-        def wrapper():
-            try:
-                result = target(**kwargs)
-                # Schedule callback on main thread
-                self.root.after(0, lambda: callback(result))
-            except Exception as e:
-                print(f"Background thread error: {e}")
-                self.root.after(0, lambda: callback(e)) # Pass error to callback
-        
-        threading.Thread(target=wrapper, daemon=True).start()
+    def run_in_background_thread(self, target, callback, task_key=None, priority=PRIORITY_REFRESH,
+                                 coalesce=False, **kwargs):
+        """Run target(**kwargs) on the shared worker pool and callback(result) on the main thread.
+        Exceptions are passed to callback. A task_key makes a new request replace the previous
+        one with that key (latest wins), or with coalesce=True join a request still queued.
+        """
+        return self._get_task_runner().submit(target, callback, key=task_key, priority=priority,
+                                              coalesce=coalesce, **kwargs)
+
+    def _get_task_runner(self):
+        """The app's bounded TaskRunner (created on first use; per-task timings via .stats())"""
+        runner = getattr(self, 'task_runner', None)
+        if runner is None:
+            root = getattr(self, 'root', None)
+            # Headless instances (benchmarks) have no Tk loop: run callbacks on the worker
+            dispatch = (lambda fn: root.after(0, fn)) if root is not None else None
+            runner = self.task_runner = TaskRunner(dispatch)
+        return runner
+
+    def _analytics_version(self):
+        """Cache validity token: database data version plus today's date (windows and overdue move daily)"""
+        return (self.db.get_data_version(), datetime.now().strftime('%Y-%m-%d'))
+
+    def _get_cached_analytics(self, kind, compute, days=None, enrollment_no=None, book_id=None):
+        """Return compute(), reusing the previous result while the data is unchanged.
+
+        Entries are keyed by (kind, days, enrollment_no, book_id) and validated against
+        _analytics_version(), so nothing is recomputed until Database records a write.
+        Exceptions returned by compute() are passed through and never cached.
+        """
+        cache = getattr(self, '_analytics_cache', None)
+        if cache is None:
+            cache = self._analytics_cache = {}
+        key = (kind, days, enrollment_no, book_id)
+        # Version is read before computing, so a write during compute() forces a recompute next time
+        version = self._analytics_version()
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        result = compute()
+        if not isinstance(result, Exception):
+            cache[key] = (version, result)
+        return result
+
+    def _sync_interval(self):
+        """Auto-sync interval in minutes (config_manager setting, else the default)"""
+        if self.config_manager is not None:
+            return self.config_manager.get_sync_interval()
+        return DEFAULT_SYNC_INTERVAL_MINUTES
+
+    def _auto_sync_enabled(self):
+        """config_manager setting; without it auto-sync runs whenever a remote is configured"""
+        if self.config_manager is not None:
+            return self.config_manager.is_sync_enabled()
+        return self.sync_manager is not None and self.sync_manager.remote is not None
+
+    def clear_analytics_cache(self):
+        """Drop cached analytics results and book rankings (the next calls recompute them)"""
+        self._analytics_cache = {}
+        self._book_rankings_cache = {}
 
     def _fetch_analysis_data(self, days=30, enrollment_no=None, book_id=None):
         """Fetch all analysis data in a background thread."""
@@ -143,8 +246,8 @@ class LibraryApp:
             cursor.execute("SELECT CASE WHEN br.status = 'borrowed' THEN 'Currently Issued' ELSE 'Available' END as status, COUNT(DISTINCT b.book_id) as count FROM books b LEFT JOIN borrow_records br ON b.book_id = br.book_id AND br.status = 'borrowed' GROUP BY status")
             data['borrow_status'] = cursor.fetchall()
 
-            # 2. Student Activity (Fixed for Postgres with simple HAVING)
-            cursor.execute("SELECT s.year, COUNT(br.id) as borrow_count FROM students s LEFT JOIN borrow_records br ON s.enrollment_no = br.enrollment_no AND br.borrow_date >= ? GROUP BY s.year HAVING COUNT(br.id) > 0 ORDER BY borrow_count DESC", (start_date,))
+            # 2. Student Activity (daily per-year counters, O(days) rows)
+            cursor.execute("SELECT student_year, SUM(borrowed) as borrow_count FROM daily_year_circulation WHERE day >= ? AND student_year != '' GROUP BY student_year HAVING SUM(borrowed) > 0 ORDER BY borrow_count DESC", (start_date,))
             data['student_activity'] = cursor.fetchall()
 
             # 3. Inventory & Overdue
@@ -155,34 +258,25 @@ class LibraryApp:
             overdue = cursor.fetchone()[0] or 0
             data['inventory'] = {'total_copies': total_copies, 'total_available': total_available, 'overdue': overdue}
 
-            # 4. Daily Trend
-            cursor.execute("SELECT borrow_date, COUNT(*) FROM borrow_records WHERE borrow_date >= ? GROUP BY borrow_date ORDER BY borrow_date", (start_date,))
-            data['daily_trend'] = cursor.fetchall()
-
-            # 5. Popular Books
-            cursor.execute("SELECT b.title, COUNT(br.id) as borrow_count FROM books b INNER JOIN borrow_records br ON b.book_id = br.book_id WHERE br.borrow_date >= ? GROUP BY b.book_id, b.title ORDER BY borrow_count DESC, b.title ASC LIMIT 10", (start_date,))
-            data['popular_books'] = cursor.fetchall()
+            # 4. Daily Trend + period totals (one row per day from daily_circulation_stats)
+            cursor.execute("SELECT day, borrowed, returned, late_days FROM daily_circulation_stats WHERE day >= ? ORDER BY day", (start_date,))
+            daily_rows = cursor.fetchall()
+            data['daily_trend'] = [(row[0], row[1]) for row in daily_rows if row[1]]
 
-            # 6. Least Popular (Complex Query)
-            cursor.execute("SELECT b.title, COALESCE(COUNT(br.id), 0) as borrow_count FROM books b LEFT JOIN borrow_records br ON b.book_id = br.book_id AND br.borrow_date >= ? GROUP BY b.book_id, b.title HAVING COALESCE(COUNT(br.id), 0) = (SELECT MIN(cnt) FROM (SELECT COALESCE(COUNT(br2.id), 0) as cnt FROM books b2 LEFT JOIN borrow_records br2 ON b2.book_id = br2.book_id AND br2.borrow_date >= ? GROUP BY b2.book_id) t) ORDER BY b.title ASC LIMIT 10", (start_date, start_date))
-            data['least_popular'] = cursor.fetchall()
+            # 5/6. Popular and Least Popular Books (one ranked pass, cached per data version)
+            data['popular_books'], data['least_popular'] = self._get_book_rankings(cursor, days, start_date)
             
             # 7. Summary Stats
-            cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE borrow_date >= ?", (start_date,))
-            total_borrowings = cursor.fetchone()[0]
-            cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE return_date >= ? AND return_date IS NOT NULL", (start_date,))
-            total_returns = cursor.fetchone()[0]
+            total_borrowings = sum(row[1] or 0 for row in daily_rows)
+            total_returns = sum(row[2] or 0 for row in daily_rows)
             cursor.execute("SELECT COUNT(DISTINCT enrollment_no) FROM borrow_records WHERE borrow_date >= ?", (start_date,))
             active_students = cursor.fetchone()[0]
-            # Fines (calc in python)
-            cursor.execute("SELECT return_date, due_date FROM borrow_records WHERE return_date > due_date AND return_date IS NOT NULL AND return_date >= ?", (start_date,))
-            fines_data = cursor.fetchall()
             data['summary'] = {
                 'total_borrowings': total_borrowings,
                 'total_returns': total_returns,
                 'overdue_count': overdue, # Reused from inventory
                 'active_students': active_students,
-                'fines_data': fines_data
+                'late_days': sum(row[3] or 0 for row in daily_rows)
             }
 
             # 8. Focused Insights (access via kwargs generally, but fetch here if provided)
@@ -219,6 +313,48 @@ class LibraryApp:
             print(f"Data fetch error: {e}")
             return e # Return error object
 
+    def _get_book_rankings(self, cursor, days, start_date, limit=10):
+        """Return (top_books, least_popular_books) for the period as (title, borrow_count) lists.
+
+        Both lists come from one per-book count CTE ranked with window functions:
+        top-N by count (titles break ties) and the books sharing the lowest count.
+        Results are cached by (days, start_date, data version) so unchanged data
+        is never re-ranked.
+        """
+        cache = getattr(self, '_book_rankings_cache', None)
+        if cache is None:
+            cache = self._book_rankings_cache = {}
+        version = self.db.get_data_version()
+        key = (days, start_date, version)
+        if key in cache:
+            return cache[key]
+
+        cursor.execute("""
+            WITH counts AS (
+                SELECT b.title, COALESCE(t.cnt, 0) AS borrow_count
+                FROM books b
+                LEFT JOIN (SELECT book_id, SUM(borrowed) AS cnt FROM daily_book_circulation
+                           WHERE day >= ? GROUP BY book_id) t ON t.book_id = b.book_id
+            ), ranked AS (
+                SELECT title, borrow_count,
+                       ROW_NUMBER() OVER (ORDER BY borrow_count DESC, title ASC) AS top_pos,
+                       RANK() OVER (ORDER BY borrow_count ASC) AS bottom_rank,
+                       ROW_NUMBER() OVER (ORDER BY borrow_count ASC, title ASC) AS bottom_pos
+                FROM counts
+            )
+            SELECT title, borrow_count, top_pos, bottom_rank, bottom_pos FROM ranked
+            WHERE (top_pos <= ? AND borrow_count > 0) OR (bottom_rank = 1 AND bottom_pos <= ?)
+        """, (start_date, limit, limit))
+        rows = cursor.fetchall()
+        top = [(r[0], r[1]) for r in sorted((r for r in rows if r[2] <= limit and r[1] > 0), key=lambda r: r[2])]
+        least = [(r[0], r[1]) for r in sorted((r for r in rows if r[3] == 1 and r[4] <= limit), key=lambda r: r[4])]
+
+        # Keep only entries for the current data version
+        for old_key in [k for k in list(cache) if k[2] != version]:
+            cache.pop(old_key, None)
+        cache[key] = (top, least)
+        return top, least
+
     def import_students_excel_new(self):
         """Import students from Excel with year selection (robust new workflow)."""
         import tkinter as tk
@@ -352,7 +488,8 @@ class LibraryApp:
         pb.start(10)
 
         # Run worker
-        self.run_in_background_thread(self._import_students_worker, self._on_import_complete, file_path=file_path, default_year=default_year)
+        self.run_in_background_thread(self._import_students_worker, self._on_import_complete,
+                                      priority=PRIORITY_BACKGROUND, file_path=file_path, default_year=default_year)
 
     def _import_students_worker(self, file_path, default_year):
         """Worker function for importing students from Excel"""
@@ -432,10 +569,6 @@ class LibraryApp:
             
             messagebox.showinfo("Import Results", msg)
             
-            if summary['added'] > 0:
-                self.refresh_students()
-                if hasattr(self, 'refresh_dashboard'):
-                    self.refresh_dashboard()
 
         except Exception as e:
             print(f"Error in import callback: {e}")
@@ -456,41 +589,128 @@ class LibraryApp:
         }
         
         self.root.configure(bg=self.colors['primary'])
+        startup_profiler.mark('main window created')
+        
+        # Open the database on a worker thread while the login screen is shown;
+        # create_main_interface() waits for it (see ensure_database_ready)
+        self._db_ready = threading.Event()
+        self._db_error = None
+        self._db_services_started = False
+        threading.Thread(target=self._open_database, name='DatabaseInit', daemon=True).start()
+        
+        # Configure styles
+        self.setup_styles()
+        
+        # Search/filter related variables
+        self.student_search_var = tk.StringVar()
+        self.student_year_filter = tk.StringVar(value="All")
+        self.book_search_var = tk.StringVar()
+        self.book_category_filter = tk.StringVar(value="All")
+        self.record_search_var = tk.StringVar()
+        self.record_type_filter = tk.StringVar(value="All")
+        
+        # Email settings
+        self.email_settings = self.load_email_settings()
         
-        # Initialize database
-        self.db = Database()
+        # Library settings (configurable fine, loan period, etc.)
+        self.library_settings = self.load_library_settings()
+
+        # Student Portal Thread
+        self.portal_thread = None
+        self.portal_port = 5000
+
+        # Launch login interface
+        self.create_login_interface()
+        startup_profiler.mark('login screen built')
+        self.root.after_idle(lambda: startup_profiler.mark('login screen shown'))
+
+    def _open_database(self):
+        """Worker: construct Database (schema checks, migrations, FTS setup) off the Tk thread"""
+        try:
+            self.db = Database()
+            startup_profiler.mark('database ready')
+        except Exception as e:
+            print(f"Database initialization failed: {e}")
+            self._db_error = e
+        finally:
+            self._db_ready.set()
+        try:
+            self.root.after(0, self._on_database_opened)
+        except (RuntimeError, tk.TclError):
+            pass  # Window closed during start-up
+
+    def _on_database_opened(self):
+        try:
+            self.ensure_database_ready()
+        except Exception:
+            pass  # Reported when the user logs in (create_main_interface)
+
+    def ensure_database_ready(self):
+        """Block until the database is open, then start the services that need it (once).
+        Raises the initialization error if Database() failed."""
+        self._db_ready.wait()
+        if self._db_error is not None:
+            raise self._db_error
+        if not self._db_services_started:
+            self._db_services_started = True
+            self._start_database_services()
+        return self.db
+
+    def _start_database_services(self):
+        """Listeners, caches, background jobs and optional modules that depend on self.db"""
+        # Writes made through Database invalidate the views that display the changed tables
+        self.db.add_change_listener(self._on_database_changed)
+        # Borrow/return autocomplete answers from memory; loaded in the background
+        self.autocomplete_index = LibraryAutocompleteIndex(self.db)
+        self.autocomplete_index.start()
+        # Student/book details under the borrow/return fields: debounced, latest-wins, cached
+        self.detail_lookup = DetailLookupService(
+            self.root,
+            fetchers={'student': self.db.get_student_by_enrollment, 'book': self.db.get_book_by_id},
+            invalidated_by={'student': ('students',), 'book': ('books', 'borrow_records')},
+            db=self.db
+        )
         
         # Initialize performance optimization systems
         if PERFORMANCE_MODULES_AVAILABLE:
             try:
                 self.config_manager = get_config()
                 self.connection_pool = get_pool(self.db)
-                self.email_batch_service = EmailBatchService(
-                    max_workers=self.config_manager.get_email_config()['max_workers'],
-                    batch_size=self.config_manager.get_email_config()['batch_size']
-                )
-                self.sync_manager = create_sync_manager(self.db)
-                # Start auto-sync if enabled
-                if self.config_manager.is_sync_enabled():
-                    sync_interval = self.config_manager.get_sync_interval()
-                    threading.Thread(
-                        target=self.sync_manager.auto_sync_daemon,
-                        args=(sync_interval,),
-                        daemon=True
-                    ).start()
-                    print(f"✅ Auto-sync started (interval: {sync_interval} minutes)")
                 print("✅ Performance optimization modules loaded successfully")
             except Exception as e:
                 print(f"⚠️ Performance modules initialization failed: {e}")
                 self.config_manager = None
                 self.connection_pool = None
-                self.email_batch_service = None
-                self.sync_manager = None
         else:
             self.config_manager = None
             self.connection_pool = None
-            self.email_batch_service = None
+        
+        # Incremental sync with the remote database (SYNC_DATABASE_URL)
+        try:
+            self.sync_manager = create_sync_manager(self.db)
+        except Exception as e:
+            print(f"⚠️ Sync manager initialization failed: {e}")
             self.sync_manager = None
+        if self.sync_manager is not None and self._auto_sync_enabled():
+            sync_interval = self._sync_interval()
+            threading.Thread(
+                target=self.sync_manager.auto_sync_daemon,
+                args=(sync_interval,),
+                daemon=True
+            ).start()
+            print(f"✅ Auto-sync started (interval: {sync_interval} minutes)")
+        
+        # Overdue letters and reminders: parallel sends over pooled SMTP sessions
+        email_config = {}
+        if self.config_manager is not None:
+            try:
+                email_config = self.config_manager.get_email_config()
+            except Exception as e:
+                print(f"Email batch config unavailable, using defaults: {e}")
+        self.email_batch_service = EmailBatchService(
+            **{key: email_config[key] for key in ('max_workers', 'batch_size', 'rate_per_minute')
+               if key in email_config}
+        )
         
         # Run data integrity check on startup (Background Thread to prevent freezing)
         def _check_integrity_thread():
@@ -509,21 +729,26 @@ class LibraryApp:
             except Exception as e:
                 print(f"Error during integrity check: {e}")
 
-        threading.Thread(target=_check_integrity_thread, daemon=True).start()
+        self._get_task_runner().submit(_check_integrity_thread, priority=PRIORITY_BACKGROUND,
+                                       key='integrity_check')
+
+        # Move an old email_history.json into the email_log table (once)
+        self._get_task_runner().submit(self._import_legacy_email_history, priority=PRIORITY_BACKGROUND,
+                                       key='import_email_history')
         
         # Auto-resume sync if overdue (after app restart)
-        if PERFORMANCE_MODULES_AVAILABLE and self.sync_manager:
+        if self.sync_manager and self._auto_sync_enabled():
             def _check_and_resume_sync():
                 try:
                     time.sleep(3)  # Wait for app to fully initialize
-                    sync_log_path = os.path.join(os.path.dirname(self.db.db_path), 'sync_log.json')
+                    sync_log_path = self.sync_manager.log_path
                     if os.path.exists(sync_log_path):
                         with open(sync_log_path, 'r') as f:
                             data = json.load(f)
                             last_sync = data.get('last_sync', '2000-01-01 00:00:00')
                             last_sync_dt = datetime.strptime(last_sync, '%Y-%m-%d %H:%M:%S')
                             minutes_since = (datetime.now() - last_sync_dt).total_seconds() / 60
-                            sync_interval = self.config_manager.get_sync_interval()
+                            sync_interval = self._sync_interval()
                             
                             if minutes_since >= sync_interval:
                                 print(f"⚠️  Sync overdue ({int(minutes_since)} min since last sync)")
@@ -542,34 +767,14 @@ class LibraryApp:
         if DateEntry is None:
             print("tkcalendar not installed - falling back to manual date entry dialog.")
         
-        # Configure styles
-        self.setup_styles()
-        
-        # Search/filter related variables
-        self.student_search_var = tk.StringVar()
-        self.student_year_filter = tk.StringVar(value="All")
-        self.book_search_var = tk.StringVar()
-        self.book_category_filter = tk.StringVar(value="All")
-        self.record_search_var = tk.StringVar()
-        self.record_type_filter = tk.StringVar(value="All")
-        
-        # Email settings
-        self.email_settings = self.load_email_settings()
-        
-        # Library settings (configurable fine, loan period, etc.)
-        self.library_settings = self.load_library_settings()
-        
-        # Start reminder email scheduler if enabled
-        if self.email_settings.get('reminder_enabled', False):
-            self.schedule_reminder_emails()
-
-
-        # Student Portal Thread
-        self.portal_thread = None
-        self.portal_port = 5000
-
-        # Launch login interface
-        self.create_login_interface()
+        # Daily jobs; runs missed while the app was closed are caught up on start
+        self.job_scheduler = JobScheduler(self.db)
+        self.job_scheduler.add_daily(
+            'due_reminders', REMINDER_JOB_TIME, self._run_reminder_job,
+            enabled=lambda: (self.email_settings.get('reminder_enabled', False)
+                             and self.email_settings.get('enabled', False))
+        )
+        self.job_scheduler.start()
 
     def setup_styles(self):
         """Configure ttk styles (restored after refactor)."""
@@ -988,6 +1193,9 @@ class LibraryApp:
                 'reminder_enabled': reminder_enabled_var.get(),
                 'reminder_days_before': int(reminder_days_var.get() or 2)
             }
+            # Keep settings that have no field in this dialog (e.g. rate_per_minute)
+            for key, value in self.email_settings.items():
+                settings.setdefault(key, value)
             
             if settings['enabled'] and not settings['sender_email']:
                 messagebox.showwarning("⚠️ Missing Information", 
@@ -1054,7 +1262,7 @@ class LibraryApp:
             sender_email.focus()
     
     def _build_history_tab(self, parent):
-        """Build the email history tab content"""
+        """Build the email history tab content (filtered, paged from the email_log table)"""
         main_frame = tk.Frame(parent, bg='white', padx=20, pady=20)
         main_frame.pack(fill=tk.BOTH, expand=True)
         
@@ -1067,6 +1275,31 @@ class LibraryApp:
                            font=('Segoe UI', 10), bg='white', fg='#666')
         subtitle.pack(pady=(0, 15))
         
+        # Filters (empty dates = no limit)
+        filter_frame = tk.Frame(main_frame, bg='white')
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        tk.Label(filter_frame, text="From (YYYY-MM-DD):", font=('Segoe UI', 10), bg='white').pack(side=tk.LEFT)
+        from_entry = tk.Entry(filter_frame, font=('Segoe UI', 10), width=12)
+        from_entry.pack(side=tk.LEFT, padx=(5, 10))
+        
+        tk.Label(filter_frame, text="To:", font=('Segoe UI', 10), bg='white').pack(side=tk.LEFT)
+        to_entry = tk.Entry(filter_frame, font=('Segoe UI', 10), width=12)
+        to_entry.pack(side=tk.LEFT, padx=(5, 10))
+        
+        tk.Label(filter_frame, text="Student:", font=('Segoe UI', 10), bg='white').pack(side=tk.LEFT)
+        student_entry = tk.Entry(filter_frame, font=('Segoe UI', 10), width=18)
+        student_entry.pack(side=tk.LEFT, padx=(5, 10))
+        
+        tk.Label(filter_frame, text="Status:", font=('Segoe UI', 10), bg='white').pack(side=tk.LEFT)
+        status_var = tk.StringVar(value='All')
+        status_combo = ttk.Combobox(filter_frame, textvariable=status_var, values=['All', 'Sent', 'Failed'],
+                                    state='readonly', width=8)
+        status_combo.pack(side=tk.LEFT, padx=(5, 10))
+        
+        count_label = tk.Label(filter_frame, text="", font=('Segoe UI', 9), bg='white', fg='#666')
+        count_label.pack(side=tk.RIGHT)
+        
         # Treeview for history
         tree_frame = tk.Frame(main_frame, bg='white')
         tree_frame.pack(fill=tk.BOTH, expand=True)
@@ -1078,10 +1311,8 @@ class LibraryApp:
         # Treeview
         columns = ('Date/Time', 'Student', 'Enrollment', 'Email', 'Book', 'Status')
         history_tree = ttk.Treeview(tree_frame, columns=columns, show='headings',
-                                    yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set,
-                                    height=15)
+                                    xscrollcommand=h_scroll.set, height=15)
         
-        v_scroll.config(command=history_tree.yview)
         h_scroll.config(command=history_tree.xview)
         
         # Define columns
@@ -1107,8 +1338,20 @@ class LibraryApp:
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
         
+        # Only the visible rows are materialized; pages are read from email_log as it scrolls
+        history_view = VirtualTreeview(history_tree, v_scroll, column_keys=[0, 1, 2, 3, 4, 5],
+                                       key=lambda entry: entry[7])
+        
+        def load():
+            self._load_email_history(history_view, count_label,
+                                     from_entry.get(), to_entry.get(), student_entry.get(), status_var.get())
+        
+        for entry in (from_entry, to_entry, student_entry):
+            entry.bind('<Return>', lambda e: load())
+        status_combo.bind('<<ComboboxSelected>>', lambda e: load())
+        
         # Load history
-        self._load_email_history(history_tree)
+        load()
         
         # Buttons
         btn_frame = tk.Frame(main_frame, bg='white')
@@ -1117,96 +1360,80 @@ class LibraryApp:
         refresh_btn = tk.Button(btn_frame, text="🔄 Refresh", font=('Segoe UI', 10, 'bold'),
                                bg=self.colors['secondary'], fg='white', padx=20, pady=8,
                                cursor='hand2', relief='flat',
-                               command=lambda: self._load_email_history(history_tree))
+                               command=load)
         refresh_btn.pack(side=tk.LEFT, padx=5)
         
         clear_btn = tk.Button(btn_frame, text="🗑️ Clear History", font=('Segoe UI', 10),
                              bg='#dc3545', fg='white', padx=20, pady=8,
                              cursor='hand2', relief='flat',
-                             command=lambda: self._clear_email_history(history_tree))
+                             command=lambda: self._clear_email_history(load))
         clear_btn.pack(side=tk.LEFT, padx=5)
     
-    def _load_email_history(self, tree):
-        """Load email history from JSON file"""
-        # Clear existing items
-        for item in tree.get_children():
-            tree.delete(item)
-        
-        history_file = os.path.join(os.path.dirname(__file__), 'email_history.json')
-        if hasattr(sys, '_MEIPASS'):
-            history_file = os.path.join(os.path.dirname(sys.executable), 'email_history.json')
+    def _load_email_history(self, view, count_label, from_date, to_date, student, status):
+        """Run the history filters as one paged query over email_log (Async)"""
+        def worker():
+            query = self.db.build_email_log_search(
+                from_date=self._filter_date(from_date),
+                to_date=self._filter_date(to_date),
+                student=student,
+                status=status
+            )
+            return PagedQuerySource(self.db, query, formatter=self._format_email_log_row)
         
-        if os.path.exists(history_file):
+        def callback(result):
+            if isinstance(result, Exception):
+                messagebox.showerror("Error", f"Failed to load email history.\n\n{result}")
+                return
             try:
-                with open(history_file, 'r') as f:
-                    history = json.load(f)
-                
-                # Sort by date (newest first)
-                history = sorted(history, key=lambda x: x.get('timestamp', ''), reverse=True)
-                
-                for entry in history:
-                    status_icon = '✅' if entry.get('success') else '❌'
-                    tree.insert('', 'end', values=(
-                        entry.get('timestamp', 'N/A'),
-                        entry.get('student_name', 'N/A'),
-                        entry.get('enrollment_no', 'N/A'),
-                        entry.get('student_email', 'N/A'),
-                        entry.get('book_title', 'N/A'),
-                        status_icon
-                    ))
-            except:
-                pass
+                view.set_source(result)
+                count_label.config(text=f"{len(result)} email(s)")
+            except tk.TclError:
+                pass  # History window closed while loading
+        
+        self.run_in_background_thread(worker, callback, task_key='email_history',
+                                      priority=PRIORITY_INTERACTIVE)
     
-    def _clear_email_history(self, tree):
+    @staticmethod
+    def _format_email_log_row(entry):
+        """Map an email_log row to UI columns: Date/Time, Student, Enrollment, Email, Book, Status"""
+        status_icon = '✅' if entry[5] else '❌'
+        return (entry[0] or 'N/A', entry[1] or 'N/A', entry[2] or 'N/A',
+                entry[3] or 'N/A', entry[4] or 'N/A', status_icon), ()
+    
+    def _clear_email_history(self, reload):
         """Clear all email history"""
         if not messagebox.askyesno("Confirm", "Are you sure you want to clear all email history?\n\nThis cannot be undone."):
             return
         
-        history_file = os.path.join(os.path.dirname(__file__), 'email_history.json')
-        if hasattr(sys, '_MEIPASS'):
-            history_file = os.path.join(os.path.dirname(sys.executable), 'email_history.json')
-        
         try:
-            if os.path.exists(history_file):
-                os.remove(history_file)
-            self._load_email_history(tree)
+            self.db.clear_email_log()
+            reload()
             messagebox.showinfo("Success", "Email history cleared successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to clear history.\n\n{e}")
     
-    def _log_email_sent(self, enrollment_no, student_name, student_email, book_title, success, error_message=''):
-        """Log sent email to history file"""
-        history_file = os.path.join(os.path.dirname(__file__), 'email_history.json')
+    @staticmethod
+    def _email_history_file():
+        """Path of the email_history.json written by older versions"""
         if hasattr(sys, '_MEIPASS'):
-            history_file = os.path.join(os.path.dirname(sys.executable), 'email_history.json')
-        
-        # Load existing history
-        history = []
-        if os.path.exists(history_file):
-            try:
-                with open(history_file, 'r') as f:
-                    history = json.load(f)
-            except:
-                history = []
-        
-        # Add new entry
-        entry = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'enrollment_no': enrollment_no,
-            'student_name': student_name,
-            'student_email': student_email,
-            'book_title': book_title,
-            'success': success,
-            'error_message': error_message
-        }
-        history.append(entry)
-        
-        # Save history
+            return os.path.join(os.path.dirname(sys.executable), 'email_history.json')
+        return os.path.join(os.path.dirname(__file__), 'email_history.json')
+    
+    def _import_legacy_email_history(self):
+        """Worker: copy email_history.json into the email_log table, then retire the file"""
         try:
-            with open(history_file, 'w') as f:
-                json.dump(history, f, indent=4)
-        except:
-            pass
+            imported = self.db.import_email_history_file(self._email_history_file())
+            if imported:
+                print(f"✅ Imported {imported} email history entries into the database")
+        except Exception as e:
+            print(f"Error importing email history: {e}")
+    
+    def _log_email_sent(self, enrollment_no, student_name, student_email, book_title, success, error_message=''):
+        """Log sent email to the email_log table"""
+        try:
+            self.db.log_email(enrollment_no, student_name, student_email, book_title, success, error_message)
+        except Exception as e:
+            print(f"Error logging email: {e}")
     
     def send_email_with_attachment(self, recipient_email, subject, body, attachment_path):
         """Send email with Word document attachment"""
@@ -1250,76 +1477,54 @@ class LibraryApp:
             return False, f"Failed to send email: {str(e)}"
     
     def schedule_reminder_emails(self):
-        """Start background thread for daily reminder email checks"""
-        def run_scheduler():
-            while True:
-                try:
-                    # Calculate seconds until next 9 AM
-                    now = datetime.now()
-                    target = now.replace(hour=9, minute=0, second=0, microsecond=0)
-                    if now >= target:
-                        # If already past 9 AM today, schedule for 9 AM tomorrow
-                        target += timedelta(days=1)
-                    
-                    wait_seconds = (target - now).total_seconds()
-                    print(f"[Auto-Reminder] Next reminder check scheduled at {target.strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    # Wait until 9 AM
-                    time.sleep(wait_seconds)
-                    
-                    # Check and send reminders
-                    if self.email_settings.get('reminder_enabled', False):
-                        self.check_and_send_reminders()
-                    
-                except Exception as e:
-                    print(f"[Auto-Reminder] Scheduler error: {e}")
-                    time.sleep(3600)  # Wait 1 hour and retry on error
-        
-        # Start daemon thread
-        thread = threading.Thread(target=run_scheduler, daemon=True)
-        thread.start()
-        print("[Auto-Reminder] Background scheduler started.")
+        """Make the job scheduler re-check the reminder job now (e.g. reminders were just enabled)"""
+        scheduler = getattr(self, 'job_scheduler', None)
+        if scheduler is not None:
+            scheduler.start()
+            print("[Auto-Reminder] Reminder job scheduled.")
+    
+    def _run_reminder_job(self, context):
+        """Scheduler job: remind every student whose book falls due in reminder_days_before days.
+        A catch-up run also covers the due dates of the days that were missed (still in the future).
+        """
+        days_before = int(self.email_settings.get('reminder_days_before', 2))
+        today = context['scheduled_for'].date()
+        to_date = today + timedelta(days=days_before)
+        from_date = to_date
+        previous = context.get('previous')
+        if previous is not None and context.get('trigger') == TRIGGER_SCHEDULED:
+            from_date = max(today, previous.date() + timedelta(days=days_before + 1))
+        if from_date > to_date:
+            from_date = to_date
+        return self.check_and_send_reminders(from_date.strftime('%Y-%m-%d'), to_date.strftime('%Y-%m-%d'))
     
-    def check_and_send_reminders(self):
-        """Check for books due soon and send reminder emails"""
+    def check_and_send_reminders(self, from_date=None, to_date=None):
+        """Send reminder emails for books due in from_date..to_date (default: in
+        reminder_days_before days). Returns run stats: processed, succeeded, failed, message.
+        """
         if not self.email_settings.get('reminder_enabled', False):
-            return
+            return {'message': 'Reminders disabled'}
+        if not self.email_settings.get('enabled', False):
+            raise RuntimeError("Email sending is not enabled")
         
         days_before = self.email_settings.get('reminder_days_before', 2)
+        if to_date is None:
+            to_date = (datetime.now() + timedelta(days=days_before)).strftime('%Y-%m-%d')
+        from_date = from_date or to_date
         
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Calculate target due date (N days from now)
-            target_date = (datetime.now() + timedelta(days=days_before)).strftime('%Y-%m-%d')
-            
-            # Find books due on target date that are not yet returned
-            query = """
-                SELECT b.enrollment_no, s.name, s.email, bk.title, b.due_date
-                FROM borrow_records b
-                JOIN students s ON b.enrollment_no = s.enrollment_no
-                JOIN books bk ON b.book_id = bk.book_id
-                WHERE b.due_date = ? AND b.return_date IS NULL AND s.email IS NOT NULL AND s.email != ''
-            """
-            cursor.execute(query, (target_date,))
-            records = cursor.fetchall()
-            conn.close()
-            
-            if not records:
-                print(f"[Auto-Reminder] No books due on {target_date}. No reminders sent.")
-                return
-            
-            # Send reminder emails
-            success_count = 0
-            fail_count = 0
-            
-            for enrollment, name, email, book_title, due_date in records:
-                # Compose friendly reminder email
-                subject = f"Reminder: Book Due Soon - {book_title}"
-                body = f"""Dear {name},
+        # Find books due in the window that are not yet returned
+        records = self.db.get_due_reminders(from_date, to_date)
+        if not records:
+            print(f"[Auto-Reminder] No books due {from_date} to {to_date}. No reminders sent.")
+            return {'message': f'No books due {from_date} to {to_date}'}
+        
+        emails = []
+        for enrollment, name, email, book_title, due_date in records:
+            # Compose friendly reminder email
+            subject = f"Reminder: Book Due Soon - {book_title}"
+            body = f"""Dear {name},
 
-This is a friendly reminder that you have a book due in {days_before} day(s).
+This is a friendly reminder that you have a book due on {due_date}.
 
 📚 Book Details:
    Title: {book_title}
@@ -1332,31 +1537,65 @@ If you have already returned the book, please disregard this message.
 Thank you,
 Library of Computer Department
 Government Polytechnic Awasari (Kh)"""
-                
-                # Send email (no attachment for reminders)
-                success, message = self.send_email_with_attachment(email, subject, body, None)
-                
-                # Log attempt
-                self.log_email_history(
-                    enrollment,
-                    name,
-                    email,
-                    book_title,
-                    success,
-                    "" if success else message
-                )
-                
-                if success:
-                    success_count += 1
-                    print(f"[Auto-Reminder] ✅ Sent to {name} ({email})")
-                else:
-                    fail_count += 1
-                    print(f"[Auto-Reminder] ❌ Failed for {name}: {message}")
-            
-            print(f"[Auto-Reminder] Summary: {success_count} sent, {fail_count} failed")
-            
+            emails.append({
+                'to': email,
+                'subject': subject,
+                'body': body,
+                'attachment': None,  # no attachment for reminders
+                'enrollment_no': enrollment,
+                'student_name': name,
+                'book_title': book_title
+            })
+        
+        results = self._send_emails_parallel(emails)
+        
+        # Log all attempts in one transaction
+        log_entries = []
+        for email_data, (success, message) in zip(emails, results):
+            log_entries.append({
+                'enrollment_no': email_data['enrollment_no'],
+                'student_name': email_data['student_name'],
+                'student_email': email_data['to'],
+                'book_title': email_data['book_title'],
+                'success': success,
+                'error_message': '' if success else message
+            })
+            if not success:
+                print(f"[Auto-Reminder] ❌ Failed for {email_data['student_name']}: {message}")
+        try:
+            self.db.log_emails(log_entries)
         except Exception as e:
-            print(f"[Auto-Reminder] Error checking reminders: {e}")
+            print(f"Error logging emails: {e}")
+        
+        success_count = sum(1 for success, _message in results if success)
+        fail_count = len(results) - success_count
+        print(f"[Auto-Reminder] Summary: {success_count} sent, {fail_count} failed")
+        return {'processed': len(results), 'succeeded': success_count, 'failed': fail_count,
+                'message': f'Due {from_date} to {to_date}'}
+    
+    def _send_emails_parallel(self, emails, progress_callback=None):
+        """Send email dicts (to, subject, body, attachment) concurrently; returns
+        [(success, message)] in the same order. Uses the batch service when it is loaded.
+        """
+        if not emails:
+            return []
+        service = getattr(self, 'email_batch_service', None)
+        if service is not None:
+            result = service.send_batch_emails(emails, self.email_settings, progress_callback)
+            return [(success, message) for success, message in zip(result['results'], result['errors'])]
+        
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(REMINDER_SEND_WORKERS, len(emails))) as pool:
+            futures = [pool.submit(self.send_email_with_attachment, email_data['to'], email_data['subject'],
+                                   email_data['body'], email_data.get('attachment'))
+                       for email_data in emails]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append((False, str(e)))
+            return results
     
     def send_reminder_emails_now(self):
         """Manually trigger reminder email check (for testing)"""
@@ -1382,14 +1621,24 @@ Government Polytechnic Awasari (Kh)"""
         
         progress.update()
         
-        # Run check in background
-        def run_check():
-            self.check_and_send_reminders()
-            progress.destroy()
-            messagebox.showinfo("Reminders Sent", "Reminder emails have been sent to students with books due soon.\n\nCheck the Email History tab for details.")
+        # Run check in background (recorded as a manual run of the reminder job)
+        def on_done(result):
+            try:
+                progress.destroy()
+            except tk.TclError:
+                pass
+            if isinstance(result, Exception):
+                messagebox.showerror("Reminders", f"Failed to send reminders.\n\n{result}")
+                return
+            if result.get('status') == 'failed':
+                messagebox.showerror("Reminders", f"Failed to send reminders.\n\n{result.get('message', '')}")
+                return
+            messagebox.showinfo("Reminders Sent",
+                                f"Reminders sent: {result.get('succeeded', 0)}, failed: {result.get('failed', 0)}.\n\n"
+                                "Check the Email History tab for details.")
         
-        thread = threading.Thread(target=run_check, daemon=True)
-        thread.start()
+        self.run_in_background_thread(lambda: self.job_scheduler.run_now('due_reminders'), on_done,
+                                      task_key='send_reminders', priority=PRIORITY_BACKGROUND)
 
     def create_login_interface(self):
         """Render the login screen with dark card design"""
@@ -1606,6 +1855,11 @@ Government Polytechnic Awasari (Kh)"""
             self.root.unbind('<Return>')
         except Exception:
             pass
+        try:
+            self.ensure_database_ready()
+        except Exception as e:
+            messagebox.showerror("Database Error", f"Could not open the library database.\n\n{e}")
+            return
         # Clear root
         for widget in self.root.winfo_children():
             widget.destroy()
@@ -1628,22 +1882,38 @@ Government Polytechnic Awasari (Kh)"""
         
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=20, pady=(10, 20))
         
-        # Create tabs
-        self.create_dashboard_tab()
-        self.create_students_tab()
-        self.create_books_tab()
-        self.create_transactions_tab()
-        self.create_records_tab()  # New records tab
-        self.create_analysis_tab()  # New analysis tab with charts
-        self.create_reports_tab()  # Reports tab with Excel and PDF export
-        self.create_admin_tab()  # Admin Settings tab
-        self.create_student_portal_tab()  # Student Portal tab
+        # Create tabs: skeleton placeholders now, real content on first selection
+        self.lazy_tabs = LazyTabs(self.notebook, bg=self.colors['primary'], on_built=self._on_tab_built)
+        for name, text, builder in MAIN_TABS:
+            self.lazy_tabs.add(name, text, getattr(self, builder), adds_own_tab=True)
         
-        # Set focus to dashboard
-        self.notebook.select(0)
+        # Set focus to dashboard (the only tab built at login)
+        self.lazy_tabs.select('dashboard')
         
         # Initial data load
         self.refresh_all_data()
+        startup_profiler.mark('main interface built')
+        self.root.after_idle(startup_profiler.write_report)
+        # Students reach the portal without the librarian opening the Portal tab
+        if WEB_PORTAL_AVAILABLE:
+            self.root.after(PORTAL_AUTOSTART_DELAY_MS, self.start_student_portal)
+
+    def _on_tab_built(self, name, build_seconds, paint_seconds):
+        """LazyTabs callback: log first-paint time and load views the builder left empty"""
+        print(f"Tab '{name}' built in {build_seconds * 1000:.0f} ms, first paint after {paint_seconds * 1000:.0f} ms")
+        startup_profiler.mark(f"tab '{name}' painted ({paint_seconds * 1000:.0f} ms)")
+        # The builder has just loaded its own data, so its views are current again
+        stale = getattr(self, '_stale_views', None)
+        if stale:
+            stale.difference_update(view for view, tab in VIEW_TABS.items() if tab == name)
+        if TAB_INITIAL_VIEWS.get(name):
+            self.invalidate_views(*TAB_INITIAL_VIEWS[name])
+
+    def _view_tab_built(self, view):
+        """False while the tab showing view is still a placeholder"""
+        lazy_tabs = getattr(self, 'lazy_tabs', None)
+        tab = VIEW_TABS.get(view)
+        return lazy_tabs is None or tab is None or lazy_tabs.is_built(tab)
     
     def create_header(self, parent):
         """Create application header"""
@@ -2493,37 +2763,48 @@ Government Polytechnic Awasari (Kh)"""
         self.root.after(100, lambda: bind_mousewheel(scrollable_frame))
     
     def _preview_report(self, report_type, date_from, date_to, filter_value):
-        """Preview report data in a dialog before exporting"""
+        """Preview report data in a dialog before exporting.
+        The COUNT and first page are read on a worker thread; later pages load (LIMIT/OFFSET)
+        as the preview scrolls, so a large report is never loaded whole.
+        """
         try:
-            # Get report data
             if report_type == 'students':
-                data = self._get_students_report_data(filter_value, date_from, date_to)
                 title = "Students Report Preview"
                 columns = ['Enrollment No', 'Name', 'Email', 'Phone', 'Year', 'Registration Date']
             elif report_type == 'books':
-                data = self._get_books_report_data(filter_value, date_from, date_to)
                 title = "Books Report Preview"
                 columns = ['Book ID', 'Title', 'Author', 'Category', 'Status', 'Condition', 'Added Date']
             elif report_type == 'transactions':
-                data = self._get_transactions_report_data(filter_value, date_from, date_to)
                 title = "Transactions Report Preview"
                 columns = ['Enrollment', 'Student', 'Book ID', 'Book', 'Issue', 'Due', 'Return', 'Status', 'Fine']
             elif report_type == 'overdue':
-                data = self._get_overdue_report_data(date_from, date_to)
                 title = "Overdue Books Preview"
                 columns = ['Enrollment', 'Student', 'Phone', 'Book ID', 'Title', 'Issue', 'Due', 'Days', 'Fine']
             elif report_type == 'promotions':
-                data = self._get_promotions_report_data(date_from, date_to)
                 title = "Promotion History Preview"
                 columns = ['Date', 'Action', 'Students', 'From', 'To', 'Details']
             elif report_type == 'admin_activity':
-                data = self._get_admin_activity_report_data(date_from, date_to)
                 title = "Admin Activity Preview"
                 columns = ['Timestamp', 'Action', 'Details', 'User']
             else:
                 return
             
-            if not data:
+            query = self._report_query(report_type, filter_value, date_from, date_to)
+            self.run_in_background_thread(
+                PagedQuerySource, lambda source: self._show_report_preview(source, title, columns),
+                task_key='report_preview', priority=PRIORITY_INTERACTIVE, db=self.db, query=query
+            )
+            
+        except Exception as e:
+            messagebox.showerror("Preview Error", f"Failed to preview report:\n{str(e)}")
+            print(f"Preview error: {e}")
+    
+    def _show_report_preview(self, source, title, columns):
+        """Open the preview dialog for a PagedQuerySource (or report the error it raised)"""
+        try:
+            if isinstance(source, Exception):
+                raise source
+            if not len(source):
                 messagebox.showinfo("Preview", "No data available with the selected filters.")
                 return
             
@@ -2549,7 +2830,7 @@ Government Polytechnic Awasari (Kh)"""
             
             tk.Label(
                 header,
-                text=f"Total Records: {len(data)}",
+                text=f"Total Records: {len(source)}",
                 font=('Segoe UI', 12),
                 bg=self.colors['secondary'],
                 fg='#FFD700'
@@ -2568,9 +2849,9 @@ Government Polytechnic Awasari (Kh)"""
                 tree.column(col, width=100, anchor='center')
             
             # Add scrollbars
-            vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+            vsb = ttk.Scrollbar(tree_frame, orient="vertical")
             hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
-            tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+            tree.configure(xscrollcommand=hsb.set)
             
             tree.grid(row=0, column=0, sticky='nsew')
             vsb.grid(row=0, column=1, sticky='ns')
@@ -2579,9 +2860,9 @@ Government Polytechnic Awasari (Kh)"""
             tree_frame.grid_rowconfigure(0, weight=1)
             tree_frame.grid_columnconfigure(0, weight=1)
             
-            # Insert data
-            for row_data in data:
-                tree.insert('', tk.END, values=row_data)
+            # Only the visible rows are materialized; pages are fetched as the preview scrolls
+            preview_view = VirtualTreeview(tree, vsb)
+            preview_view.set_source(source)
             
             # Close button
             tk.Button(
@@ -2674,15 +2955,18 @@ Government Polytechnic Awasari (Kh)"""
                 messagebox.showerror("Error", "Invalid report type")
                 return
             
-            if not data:
+            # data is a lazy row stream; only the COUNT runs here
+            total = self.db.count_search(self._report_query(report_type, filter_value, date_from, date_to))
+            if not total:
+                data.close()
                 messagebox.showwarning("No Data", "No data available for the selected filters.")
                 return
             
             # Export based on format
             if format_type == 'excel':
-                self._export_to_excel(data, columns, title, report_type, filter_value, date_from, date_to)
+                self._export_to_excel(data, columns, title, report_type, filter_value, date_from, date_to, total=total)
             elif format_type == 'pdf':
-                self._export_to_pdf(data, columns, title, report_type, filter_value, date_from, date_to)
+                self._export_to_pdf(data, columns, title, report_type, filter_value, date_from, date_to, total=total)
             
             # Log the export activity
             filter_info = f"Filter: {filter_value}" if filter_value and filter_value != "All" else ""
@@ -2693,290 +2977,73 @@ Government Polytechnic Awasari (Kh)"""
             messagebox.showerror("Export Error", f"Failed to export report:\n{str(e)}")
             print(f"Export error: {e}")
     
+    def _report_query(self, report_type, filter_value=None, date_from=None, date_to=None):
+        """SearchQuery behind a report (Database.build_report_query): the preview pages through
+        it with LIMIT and a COUNT, the export streams the same SQL without loading it"""
+        if date_from == "YYYY-MM-DD" or not date_from:
+            date_from = None
+        if date_to == "YYYY-MM-DD" or not date_to:
+            date_to = None
+        return self.db.build_report_query(report_type, filter_value, date_from, date_to,
+                                          fine_per_day=self.get_fine_per_day())
+
     def _get_students_report_data(self, year_filter, date_from, date_to):
-        """Get students data for report with optimized query"""
-        try:
-            conn = self.db.get_connection()
-            c = conn.cursor()
-            
-            # Optimized query with proper column selection
-            query = """SELECT enrollment_no, name, email, phone, department || ' - ' || year as year_dept, 
-                       'N/A' as registration_date 
-                       FROM students WHERE 1=1"""
-            params = []
-            
-            if year_filter and year_filter != "All":
-                query += " AND year = ?"
-                params.append(year_filter)
-            
-            query += " ORDER BY year, name"
-            
-            c.execute(query, params)
-            rows = c.fetchall()
-            conn.close()
-            
-            # Ensure data exists
-            if not rows:
-                print("No students found in database")
-            return [list(row) for row in rows]
-        except Exception as e:
-            print(f"Error getting students report data: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        """Students report rows, read lazily in fetchmany() chunks"""
+        return self.db.iter_search(self._report_query('students', year_filter, date_from, date_to))
     
     def _get_books_report_data(self, category_filter, date_from, date_to):
-        """Get books data for report with optimized query"""
-        try:
-            conn = self.db.get_connection()
-            c = conn.cursor()
-            
-            # Optimized query: check if book is borrowed using status column (no book_condition column)
-            query = """SELECT DISTINCT b.book_id, b.title, b.author, b.category, 
-                      CASE WHEN EXISTS(
-                          SELECT 1 FROM borrow_records br 
-                          WHERE br.book_id = b.book_id AND br.return_date IS NULL
-                      ) THEN 'Borrowed' ELSE 'Available' END as status,
-                      'Good' as condition, 'N/A' as added_date 
-                      FROM books b
-                      WHERE 1=1"""
-            params = []
-            
-            if category_filter and category_filter != "All":
-                query += " AND b.category = ?"
-                params.append(category_filter)
-            
-            query += " ORDER BY b.category, b.title"
-            
-            c.execute(query, params)
-            rows = c.fetchall()
-            conn.close()
-            
-            if not rows:
-                print("No books found in database")
-            return [list(row) for row in rows]
-        except Exception as e:
-            print(f"Error getting books report data: {e}")
-            import traceback
-            traceback.print_exc()
-            return []
+        """Books report rows (status: Borrowed while a loan is open), read lazily in chunks"""
+        return self.db.iter_search(self._report_query('books', category_filter, date_from, date_to))
     
     def _get_transactions_report_data(self, status_filter, date_from, date_to):
-        """Get transactions data for report"""
-        try:
-            conn = self.db.get_connection()
-            c = conn.cursor()
-            
-            # Use borrow_records table (not transactions)
-            query = """SELECT 
-                br.enrollment_no, s.name, br.book_id, b.title,
-                br.borrow_date, br.due_date, br.return_date,
-                CASE 
-                    WHEN br.return_date IS NOT NULL THEN 'Returned'
-                    WHEN CURRENT_DATE > br.due_date THEN 'Overdue'
-                    ELSE 'Active'
-                END as status,
-                COALESCE(br.fine, 0) as fine
-                FROM borrow_records br
-                LEFT JOIN students s ON br.enrollment_no = s.enrollment_no
-                LEFT JOIN books b ON br.book_id = b.book_id
-                WHERE 1=1"""
-            params = []
-            
-            if status_filter and status_filter != "All":
-                if status_filter == "Active":
-                    query += " AND br.return_date IS NULL AND CURRENT_DATE <= br.due_date"
-                elif status_filter == "Returned":
-                    query += " AND br.return_date IS NOT NULL"
-                elif status_filter == "Overdue":
-                    query += " AND br.return_date IS NULL AND CURRENT_DATE > br.due_date"
-            
-            if date_from:
-                query += " AND br.borrow_date >= ?"
-                params.append(date_from)
-            
-            if date_to:
-                query += " AND br.borrow_date <= ?"
-                params.append(date_to)
-            
-            query += " ORDER BY br.borrow_date DESC"
-            
-            c.execute(query, params)
-            rows = c.fetchall()
-            conn.close()
-            
-            return [list(row) for row in rows]
-        except Exception as e:
-            print(f"Error getting transactions report data: {e}")
-            return []
+        """Transactions (borrow_records) report rows, read lazily in chunks"""
+        return self.db.iter_search(self._report_query('transactions', status_filter, date_from, date_to))
     
     def _get_overdue_report_data(self, date_from, date_to):
-        """Get overdue books data for report"""
+        """Overdue books report rows, most overdue first, read lazily in chunks"""
+        return self.db.iter_search(self._report_query('overdue', None, date_from, date_to))
+    
+    def _get_promotions_report_data(self, date_from, date_to):
+        """Promotion history report rows (one per promotion run), read lazily in chunks"""
+        return self.db.iter_search(self._report_query('promotions', None, date_from, date_to))
+    
+    def _get_admin_activity_report_data(self, date_from, date_to):
+        """Admin activity log report rows, read lazily in chunks"""
+        return self.db.iter_search(self._report_query('admin_activity', None, date_from, date_to))
+    
+    def _export_to_excel(self, data, columns, title, report_type, filter_value, date_from, date_to, total=None):
+        """Export report data (a list or a row stream with its total) to Excel (or CSV) with
+        GPAK branding; written on a worker thread"""
         try:
-            conn = self.db.get_connection()
-            c = conn.cursor()
-            
-            # PostgreSQL uses CURRENT_DATE instead of date('now')
-            # And uses DATE - DATE for day difference instead of julianday
-            query = """SELECT 
-                br.enrollment_no, s.name, s.phone, br.book_id, b.title,
-                br.borrow_date, br.due_date,
-                CAST(CURRENT_DATE - br.due_date AS INTEGER) as days_overdue,
-                CAST(CURRENT_DATE - br.due_date AS INTEGER) * ? as fine
-                FROM borrow_records br
-                LEFT JOIN students s ON br.enrollment_no = s.enrollment_no
-                LEFT JOIN books b ON br.book_id = b.book_id
-                WHERE br.return_date IS NULL AND CURRENT_DATE > br.due_date"""
-            
-            params = [self.get_fine_per_day()]
-            
-            if date_from:
-                query += " AND br.borrow_date >= ?"
-                params.append(date_from)
+            if total is None and hasattr(data, '__len__'):
+                total = len(data)
+            if total == 0:
+                messagebox.showwarning("No Data", "No data available to export.")
+                return
+                
+            # Ask user for save location
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            default_filename = f"GPAK_{title.replace(' ', '_')}_{timestamp}.xlsx"
             
-            if date_to:
-                query += " AND br.borrow_date <= ?"
-                params.append(date_to)
+            filepath = filedialog.asksaveasfilename(
+                defaultextension=".xlsx",
+                filetypes=EXPORT_FILETYPES,
+                initialfile=default_filename,
+                title=f"Save {title}"
+            )
             
-            query += " ORDER BY days_overdue DESC"
+            if not filepath:
+                return
             
-            c.execute(query, params)
-            rows = c.fetchall()
-            conn.close()
+            # Metadata line
+            metadata = f"Generated: {datetime.now().strftime('%d-%b-%Y %I:%M %p')}"
+            if filter_value and filter_value != "All":
+                metadata += f" | Filter: {filter_value}"
+            if date_from or date_to:
+                metadata += f" | Date Range: {date_from or 'Start'} to {date_to or 'End'}"
             
-            return [list(row) for row in rows]
-        except Exception as e:
-            print(f"Error getting overdue report data: {e}")
-            return []
-    
-    def _get_promotions_report_data(self, date_from, date_to):
-        """Get promotion history data for report"""
-        try:
-            conn = self.db.get_connection()
-            c = conn.cursor()
-            
-            # Try to create table if it doesn't exist
-            try:
-                c.execute('''CREATE TABLE IF NOT EXISTS promotion_history (
-                    id SERIAL PRIMARY KEY,
-                    promotion_date TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    students_affected INTEGER,
-                    from_year TEXT,
-                    to_year TEXT,
-                    details TEXT
-                )''')
-                conn.commit()
-            except:
-                pass
-            
-            query = """SELECT promotion_date, action, students_affected, from_year, to_year, details
-                      FROM promotion_history WHERE 1=1"""
-            params = []
-            
-            if date_from:
-                query += " AND promotion_date >= ?"
-                params.append(date_from)
-            
-            if date_to:
-                query += " AND promotion_date <= ?"
-                params.append(date_to)
-            
-            query += " ORDER BY promotion_date DESC"
-            
-            try:
-                c.execute(query, params)
-                rows = c.fetchall()
-                conn.close()
-                return [list(row) for row in rows]
-            except:
-                conn.close()
-                return []
-        except Exception as e:
-            print(f"Error getting promotions report data: {e}")
-            return []
-    
-    def _get_admin_activity_report_data(self, date_from, date_to):
-        """Get admin activity log data for report"""
-        try:
-            conn = self.db.get_connection()
-            c = conn.cursor()
-            
-            # Try to create table if it doesn't exist (works for both SQLite and PostgreSQL)
-            try:
-                c.execute('''CREATE TABLE IF NOT EXISTS admin_activity (
-                    id SERIAL PRIMARY KEY,
-                    timestamp TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    details TEXT,
-                    admin_user TEXT
-                )''')
-                conn.commit()
-            except:
-                # Table might already exist or creation failed, continue anyway
-                pass
-            
-            query = """SELECT timestamp, action, details, admin_user
-                      FROM admin_activity WHERE 1=1"""
-            params = []
-            
-            if date_from:
-                query += " AND timestamp >= ?"
-                params.append(date_from)
-            
-            if date_to:
-                query += " AND timestamp <= ?"
-                params.append(date_to)
-            
-            query += " ORDER BY timestamp DESC"
-            
-            try:
-                c.execute(query, params)
-                rows = c.fetchall()
-                conn.close()
-                return [list(row) for row in rows]
-            except:
-                # Table doesn't exist or query failed, return empty
-                conn.close()
-                return []
-        except Exception as e:
-            print(f"Error getting admin activity report data: {e}")
-            return []
-    
-    def _export_to_excel(self, data, columns, title, report_type, filter_value, date_from, date_to):
-        """Export report data to Excel format with GPAK branding"""
-        try:
-            if not data:
-                messagebox.showwarning("No Data", "No data available to export.")
-                return
-                
-            # Ask user for save location
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            default_filename = f"GPAK_{title.replace(' ', '_')}_{timestamp}.xlsx"
-            
-            filepath = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
-                initialfile=default_filename,
-                title=f"Save {title}"
-            )
-            
-            if not filepath:
-                return
-            
-            # Create DataFrame
-            df = pd.DataFrame(data, columns=columns)
-            
-            # Create Excel writer with xlsxwriter engine
-            with pd.ExcelWriter(filepath, engine='xlsxwriter') as writer:
-                # Write data to sheet starting from row 8 (leave space for header)
-                df.to_excel(writer, sheet_name='Report', index=False, startrow=8)
-                
-                # Get workbook and worksheet objects
-                workbook = writer.book
-                worksheet = writer.sheets['Report']
-                
-                # Define formats
+            def letterhead(workbook, worksheet, column_count):
+                # Runs on the export thread; rows 0-6 are the branded header, the table starts at row 8
                 college_header_format = workbook.add_format({
                     'bold': True,
                     'font_size': 18,
@@ -3006,22 +3073,6 @@ Government Polytechnic Awasari (Kh)"""
                     'border': 1
                 })
                 
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'text_wrap': True,
-                    'valign': 'top',
-                    'align': 'center',
-                    'fg_color': '#4DA6FF',
-                    'font_color': 'white',
-                    'border': 1,
-                    'font_size': 10
-                })
-                
-                data_format = workbook.add_format({
-                    'border': 1,
-                    'valign': 'vcenter'
-                })
-                
                 info_format = workbook.add_format({
                     'italic': True,
                     'font_size': 9,
@@ -3037,56 +3088,30 @@ Government Polytechnic Awasari (Kh)"""
                 except Exception as e:
                     print(f"Logo insertion failed: {e}")
                 
-                # Write college header
-                end_col = chr(65 + len(columns) - 1)
-                worksheet.merge_range(f'B1:{end_col}1', 'GOVERNMENT POLYTECHNIC AWASARI KHURD', college_header_format)
-                worksheet.merge_range(f'B2:{end_col}2', 'Tal. Ambegaon, Dist. Pune - 410503', subtitle_format)
+                # Write college header (rows must go top to bottom: the sheet is streamed)
+                end_col = max(column_count - 1, 1)
+                worksheet.merge_range(0, 1, 0, end_col, 'GOVERNMENT POLYTECHNIC AWASARI KHURD', college_header_format)
                 worksheet.set_row(0, 25)
+                worksheet.merge_range(1, 1, 1, end_col, 'Tal. Ambegaon, Dist. Pune - 410503', subtitle_format)
                 worksheet.set_row(1, 20)
                 
                 # Library title
-                worksheet.merge_range(f'A3:{end_col}3', 'LIBRARY MANAGEMENT SYSTEM', title_format)
+                worksheet.merge_range(2, 0, 2, end_col, 'LIBRARY MANAGEMENT SYSTEM', title_format)
                 worksheet.set_row(2, 20)
                 
                 # Report title
-                worksheet.merge_range(f'A5:{end_col}5', title, title_format)
+                worksheet.merge_range(4, 0, 4, end_col, title, title_format)
                 worksheet.set_row(4, 18)
                 
-                # Write metadata
-                metadata = f"Generated: {datetime.now().strftime('%d-%b-%Y %I:%M %p')}"
-                if filter_value and filter_value != "All":
-                    metadata += f" | Filter: {filter_value}"
-                if date_from or date_to:
-                    metadata += f" | Date Range: {date_from or 'Start'} to {date_to or 'End'}"
-                
-                worksheet.merge_range(f'A6:{end_col}6', metadata, info_format)
-                worksheet.merge_range(f'A7:{end_col}7', f"Total Records: {len(data)}", info_format)
-                
-                # Apply header format to column headers
-                for col_num, value in enumerate(columns):
-                    worksheet.write(8, col_num, value, header_format)
-                
-                # Apply data format to all data cells
-                for row_num in range(len(data)):
-                    for col_num in range(len(columns)):
-                        worksheet.write(9 + row_num, col_num, data[row_num][col_num], data_format)
-                
-                # Set column widths dynamically
-                for i, col in enumerate(columns):
-                    max_len = len(str(col))
-                    for row in data:
-                        if i < len(row):
-                            max_len = max(max_len, len(str(row[i])))
-                    worksheet.set_column(i, i, min(max_len + 2, 30))
-                
-                # Set row heights
-                worksheet.set_row(8, 25)  # Header row height
+                worksheet.merge_range(5, 0, 5, end_col, metadata, info_format)
+                if total is not None:
+                    worksheet.merge_range(6, 0, 6, end_col, f"Total Records: {total}", info_format)
+                return 8
             
-            messagebox.showinfo("Success", f"Report exported successfully!\n\nFile: {os.path.basename(filepath)}\nLocation: {os.path.dirname(filepath)}")
-            
-            # Ask if user wants to open the file
-            if messagebox.askyesno("Open File", "Do you want to open the exported file now?"):
-                os.startfile(filepath)
+            self._run_export(
+                filepath, columns, data, sheet_name='Report', total=total, header=letterhead,
+                success_message=f"Report exported successfully!\n\nFile: {os.path.basename(filepath)}\nLocation: {os.path.dirname(filepath)}"
+            )
         
         except Exception as e:
             messagebox.showerror("Export Error", f"Failed to export to Excel:\n{str(e)}")
@@ -3094,16 +3119,19 @@ Government Polytechnic Awasari (Kh)"""
             import traceback
             traceback.print_exc()
     
-    def _export_to_pdf(self, data, columns, title, report_type, filter_value, date_from, date_to):
-        """Export report data to PDF format with GPAK branding"""
+    def _export_to_pdf(self, data, columns, title, report_type, filter_value, date_from, date_to, total=None):
+        """Export report data (a list or a row stream with its total) to PDF format with GPAK branding.
+        pdf_report lays the rows out a page at a time on a worker thread (long reports in a process pool).
+        """
         try:
-            if not data:
+            if total is None and hasattr(data, '__len__'):
+                total = len(data)
+            if total == 0:
                 messagebox.showwarning("No Data", "No data available to export.")
                 return
-                
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.lib.units import inch
-            from reportlab.platypus import Image as RLImage
+            if not module_available('reportlab'):
+                messagebox.showerror("Export Error", "reportlab package is required for PDF export.\n\nPlease install: pip install reportlab")
+                return
             
             # Ask user for save location
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -3119,238 +3147,23 @@ Government Polytechnic Awasari (Kh)"""
             if not filepath:
                 return
             
-            # Use landscape orientation for better table fit
-            page_size = landscape(A4)
-            
-            # Create PDF with custom margins
-            doc = SimpleDocTemplate(
-                filepath, 
-                pagesize=page_size,
-                topMargin=0.5*inch,
-                bottomMargin=0.4*inch,
-                leftMargin=0.4*inch,
-                rightMargin=0.4*inch
-            )
-            elements = []
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            
-            # Custom styles for IARE branding
-            college_name_style = ParagraphStyle(
-                'CollegeName',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor=rl_colors.HexColor('#003366'),
-                spaceAfter=4,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            
-            college_location_style = ParagraphStyle(
-                'CollegeLocation',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor=rl_colors.HexColor('#0066CC'),
-                spaceAfter=8,
-                alignment=TA_CENTER,
-                fontName='Helvetica'
-            )
-            
-            library_title_style = ParagraphStyle(
-                'LibraryTitle',
-                parent=styles['Heading2'],
-                fontSize=14,
-                textColor=rl_colors.HexColor('#2E86AB'),
-                spaceAfter=12,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            
-            report_title_style = ParagraphStyle(
-                'ReportTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor=rl_colors.HexColor('#2E86AB'),
-                spaceAfter=12,
-                spaceBefore=8,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            )
-            
-            info_style = ParagraphStyle(
-                'Info',
-                parent=styles['Normal'],
-                fontSize=9,
-                textColor=rl_colors.HexColor('#666666'),
-                spaceAfter=4,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Oblique'
-            )
-            
-            # Add college logo
-            logo_path = os.path.join(os.path.dirname(__file__), 'logo.png')
-            try:
-                if os.path.exists(logo_path):
-                    logo = RLImage(logo_path, width=1*inch, height=1*inch)
-                    elements.append(logo)
-                    elements.append(Spacer(1, 0.1*inch))
-            except Exception as e:
-                print(f"Logo insertion failed: {e}")
-            
-            # Add college header
-            elements.append(Paragraph('GOVERNMENT POLYTECHNIC AWASARI KHURD', college_name_style))
-            elements.append(Paragraph('Tal. Ambegaon, Dist. Pune - 410503', college_location_style))
-            elements.append(Paragraph('LIBRARY MANAGEMENT SYSTEM', library_title_style))
-            
-            # Add horizontal line
-            from reportlab.platypus import HRFlowable
-            elements.append(HRFlowable(width="100%", thickness=2, color=rl_colors.HexColor('#2E86AB')))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Add report title
-            elements.append(Paragraph(title, report_title_style))
-            elements.append(Spacer(1, 0.15*inch))
-            
             # Add metadata
             metadata = f"<b>Generated:</b> {datetime.now().strftime('%d-%b-%Y %I:%M %p')}"
             if filter_value and filter_value != "All":
                 metadata += f" | <b>Filter:</b> {filter_value}"
             if date_from or date_to:
                 metadata += f"<br/><b>Date Range:</b> {date_from or 'Start'} to {date_to or 'End'}"
-            
-            elements.append(Paragraph(metadata, info_style))
-            elements.append(Paragraph(f"<b>Total Records:</b> {len(data)}", info_style))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Prepare table data with proper formatting and Paragraph wrapping
-            table_data = [columns]
-            for row in data:
-                # Convert all values to strings and handle None
-                formatted_row = [str(val) if val is not None else 'N/A' for val in row]
-                table_data.append(formatted_row)
-            
-            # Calculate column widths dynamically based on content - use landscape width
-            page_width = page_size[0] - 0.8*inch  # Available width for landscape A4
-            
-            # Fixed column widths for common report types to prevent merging
-            num_cols = len(columns)
-            if num_cols <= 4:
-                col_widths = [page_width / num_cols] * num_cols
-            elif num_cols <= 6:
-                col_widths = [page_width / num_cols] * num_cols
-            else:
-                # For many columns, calculate proportionally with minimums
-                col_widths = []
-                min_width = 0.7*inch
-                
-                # Calculate weights based on content
-                col_weights = []
-                for col_idx in range(len(columns)):
-                    max_len = len(str(columns[col_idx]))
-                    for row in data[:50]:  # Sample first 50 rows for speed
-                        if col_idx < len(row):
-                            max_len = max(max_len, len(str(row[col_idx])))
-                    col_weights.append(min(max_len, 40))
-                
-                total_weight = sum(col_weights)
-                
-                # Distribute width proportionally
-                for weight in col_weights:
-                    col_width = max((weight / total_weight) * page_width, min_width)
-                    col_widths.append(col_width)
-                
-                # Ensure total doesn't exceed page width
-                total_col_width = sum(col_widths)
-                if total_col_width > page_width:
-                    scale = page_width / total_col_width
-                    col_widths = [w * scale for w in col_widths]
-            
-            # Wrap text in cells using Paragraph for better formatting
-            from reportlab.platypus import Paragraph as RLParagraph
-            cell_style = ParagraphStyle(
-                'CellStyle',
-                parent=styles['Normal'],
-                fontSize=7,
-                leading=9,
-                fontName='Helvetica',
-                alignment=TA_LEFT,
-                wordWrap='CJK'
+            info_lines = [metadata]
+            if total is not None:
+                info_lines.append(f"<b>Total Records:</b> {total}")
+            
+            self._run_file_job(
+                filepath, build_report, total=total,
+                success_message=f"Report exported successfully!\n\nFile: {os.path.basename(filepath)}\nLocation: {os.path.dirname(filepath)}",
+                columns=list(columns), rows=data, title=title, info_lines=info_lines,
+                footer=f'Report generated by GPAK Library Management System v{APP_VERSION}',
+                logo_path=os.path.join(os.path.dirname(__file__), 'logo.png')
             )
-            
-            wrapped_table_data = []
-            for row_idx, row in enumerate(table_data):
-                wrapped_row = []
-                for cell in row:
-                    # Wrap long text in Paragraph for automatic line breaks
-                    if row_idx == 0:  # Header row
-                        wrapped_row.append(str(cell))
-                    else:
-                        # For data cells, use Paragraph to enable wrapping
-                        cell_text = str(cell).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                        wrapped_row.append(RLParagraph(cell_text, cell_style))
-                wrapped_table_data.append(wrapped_row)
-            
-            # Create table with dynamic widths
-            table = Table(wrapped_table_data, colWidths=col_widths, repeatRows=1)
-            
-            # Professional table styling
-            table_style = TableStyle([
-                # Header row styling
-                ('BACKGROUND', (0, 0), (-1, 0), rl_colors.HexColor('#003366')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), rl_colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                
-                # Data rows styling
-                ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                ('VALIGN', (0, 1), (-1, -1), 'TOP'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('TOPPADDING', (0, 1), (-1, -1), 5),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-                ('LEFTPADDING', (0, 0), (-1, -1), 5),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-                
-                # Grid and borders
-                ('GRID', (0, 0), (-1, -1), 0.5, rl_colors.grey),
-                ('BOX', (0, 0), (-1, -1), 1.5, rl_colors.HexColor('#003366')),
-                ('LINEBELOW', (0, 0), (-1, 0), 2, rl_colors.HexColor('#0066CC')),
-                
-                # Alternating row colors
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [rl_colors.white, rl_colors.HexColor('#F0F0F0')]),
-                
-                # Enable word wrap
-                ('WORDWRAP', (0, 0), (-1, -1), True)
-            ])
-            
-            table.setStyle(table_style)
-            elements.append(table)
-            
-            # Add footer
-            elements.append(Spacer(1, 0.3*inch))
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                textColor=rl_colors.HexColor('#999999'),
-                alignment=TA_CENTER,
-                fontName='Helvetica-Oblique'
-            )
-            elements.append(Paragraph(f'Report generated by GPAK Library Management System v{APP_VERSION}', footer_style))
-            
-            # Build PDF
-            doc.build(elements)
-            
-            messagebox.showinfo("Success", f"Report exported successfully!\n\nFile: {os.path.basename(filepath)}\nLocation: {os.path.dirname(filepath)}")
-            
-            # Ask if user wants to open the file
-            if messagebox.askyesno("Open File", "Do you want to open the exported file now?"):
-                os.startfile(filepath)
         
         except Exception as e:
             messagebox.showerror("Export Error", f"Failed to export to PDF:\n{str(e)}")
@@ -3835,7 +3648,7 @@ Current Settings:
         ).pack(anchor='w')
         
         # ============== ROW 4: PERFORMANCE & SYNC ==============
-        if PERFORMANCE_MODULES_AVAILABLE and self.sync_manager:
+        if self.sync_manager:
             row4 = tk.Frame(content_frame, bg='#f0f2f5')
             row4.pack(fill=tk.X, pady=10)
             
@@ -3856,7 +3669,7 @@ Current Settings:
             # Update sync status
             def update_sync_status():
                 try:
-                    log_file = os.path.join(os.path.dirname(__file__), 'sync_log.json')
+                    log_file = self.sync_manager.log_path
                     if os.path.exists(log_file):
                         with open(log_file, 'r') as f:
                             log_data = json.load(f)
@@ -3922,11 +3735,15 @@ Current Settings:
                         messagebox.showinfo(
                             "Sync Complete",
                             f"✅ Database synced successfully!\n\n"
-                            f"Records synced: {result.get('records_synced', 0)}\n"
-                            f"Direction: {result.get('direction', 'both')}"
+                            f"Records synced: {result.get('records_synced', 0)} "
+                            f"(sent {result.get('pushed', 0)}, received {result.get('pulled', 0)})\n"
+                            f"Conflicts resolved: {result.get('conflicts', 0)}\n"
+                            f"Direction: {result.get('direction', 'both')}\n"
+                            f"Duration: {result.get('duration', 0):.1f}s"
                         )
                 
-                self.run_in_background_thread(run_sync, sync_callback)
+                self.run_in_background_thread(run_sync, sync_callback, task_key='manual_sync',
+                                              priority=PRIORITY_BACKGROUND, coalesce=True)
             
             manual_sync_btn = tk.Button(
                 sync_card,
@@ -3960,7 +3777,7 @@ Current Settings:
                 fg='#333'
             ).pack(side=tk.LEFT, padx=(0, 10))
             
-            interval_var = tk.StringVar(value=str(self.config_manager.get_sync_interval()))
+            interval_var = tk.StringVar(value=str(self._sync_interval()))
             interval_combo = ttk.Combobox(
                 interval_frame,
                 textvariable=interval_var,
@@ -3982,7 +3799,9 @@ Current Settings:
             def save_interval():
                 try:
                     minutes = int(interval_var.get())
-                    if self.config_manager.set_sync_interval(minutes):
+                    if self.config_manager is None:
+                        messagebox.showerror("Error", "Sync settings are not available (config_manager not loaded)")
+                    elif self.config_manager.set_sync_interval(minutes):
                         messagebox.showinfo(
                             "Settings Saved",
                             f"✅ Auto-sync interval set to {minutes} minutes\n\n"
@@ -4008,7 +3827,7 @@ Current Settings:
             save_interval_btn.pack(side=tk.LEFT, padx=5)
             
             # Info text
-            auto_sync_status = "enabled" if self.config_manager.is_sync_enabled() else "disabled"
+            auto_sync_status = "enabled" if self._auto_sync_enabled() else "disabled"
             tk.Label(
                 sync_card,
                 text=f"Auto-sync: {auto_sync_status}\nLocal database ↔ Remote PostgreSQL\n💡 Application must be running for sync to work",
@@ -4084,8 +3903,9 @@ Current Settings:
         # Clear current items immediately or wait? 
         # Better to wait until data is ready to avoid flicker, or show "Loading..."
         self.run_in_background_thread(
-            lambda: self.db.get_borrowed_books(),
-            self._dashboard_borrowed_callback
+            lambda: self._get_cached_analytics('borrowed_books', self.db.get_borrowed_books),
+            self._dashboard_borrowed_callback,
+            task_key='dashboard_borrowed', coalesce=True
         )
 
     def _dashboard_borrowed_callback(self, result):
@@ -4095,53 +3915,51 @@ Current Settings:
             
         # Update Treeview
         if hasattr(self, 'dashboard_borrowed_tree'):
+            # Same cached result already shown in this tree: nothing to redraw
+            rendered = getattr(self, '_dashboard_borrowed_rendered', None)
+            if rendered and rendered[0] is self.dashboard_borrowed_tree and rendered[1] is result:
+                return
+            self._dashboard_borrowed_rendered = (self.dashboard_borrowed_tree, result)
+
             # Configure tags for color coding
             self.dashboard_borrowed_tree.tag_configure('overdue', foreground='#dc3545', background='#ffe6e6')
             self.dashboard_borrowed_tree.tag_configure('due_soon', foreground='#856404', background='#fff3cd')
             self.dashboard_borrowed_tree.tag_configure('ok', foreground='#155724', background='#d4edda')
             
-            for item in self.dashboard_borrowed_tree.get_children():
-                try:
-                    self.dashboard_borrowed_tree.delete(item)
-                except:
-                    pass
-            
-            for record in result:
+            # Days left and overdue/due_soon/ok bucket for every loan in one pass (fines engine)
+            days_left = days_until_due([record[8] for record in result])
+            buckets = due_buckets(days_left, soon_days=3)
+            rows = []
+            for record, days_diff, tag in zip(result, days_left, buckets):
                 enrollment_no = record[0]
                 student_name = record[1]
                 book_id = record[4]
                 book_name = record[5]
                 borrow_date = record[7]
                 due_date = record[8]
-                # Calculate days left and format nicely
-                try:
-                    from datetime import datetime
-                    days_diff = (datetime.strptime(due_date, '%Y-%m-%d') - datetime.now()).days
-                    
-                    if days_diff < 0:
-                        # Overdue - show in red with "X days late"
-                        days_display = f"{abs(days_diff)} days late"
-                        tag = 'overdue'
-                    elif days_diff == 0:
-                        days_display = "Due Today!"
-                        tag = 'due_soon'
-                    elif days_diff <= 3:
-                        days_display = f"{days_diff} days left"
-                        tag = 'due_soon'
-                    else:
-                        days_display = f"{days_diff} days left"
-                        tag = 'ok'
-                except:
+                # Format days left nicely
+                if tag == 'unknown':
                     days_display = 'N/A'
                     tag = ''
+                elif days_diff < 0:
+                    # Overdue - show in red with "X days late"
+                    days_display = f"{abs(days_diff)} days late"
+                elif days_diff == 0:
+                    days_display = "Due Today!"
+                else:
+                    days_display = f"{days_diff} days left"
                 
-                self.dashboard_borrowed_tree.insert('', 'end', values=(enrollment_no, student_name, book_id, book_name, borrow_date, due_date, days_display), tags=(tag,))
+                rows.append((record[9], (enrollment_no, student_name, book_id, book_name, borrow_date, due_date, days_display), (tag,)))
+
+            # Only borrowed/returned rows (and changed countdowns) touch the tree
+            self._tree_sync(self.dashboard_borrowed_tree).apply(rows)
 
     def refresh_stats_async(self):
         """Fetch stats in background and update UI"""
         self.run_in_background_thread(
             lambda: self.get_library_statistics(),
-            self._update_stats_callback
+            self._update_stats_callback,
+            task_key='library_stats', coalesce=True
         )
 
     def _update_stats_callback(self, stats):
@@ -4195,35 +4013,9 @@ Current Settings:
             value_label.pack(pady=(0, 15))
     
     def get_library_statistics(self):
-        """Get library statistics (helper for worker thread)"""
+        """Get library statistics (helper for worker thread); cached until the data changes"""
         try:
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            # Total books
-            cursor.execute("SELECT COUNT(*) FROM books")
-            total_books = cursor.fetchone()[0]
-            
-            # Available books (sum of available_copies)
-            cursor.execute("SELECT SUM(available_copies) FROM books")
-            available_books = cursor.fetchone()[0] or 0
-            
-            # Borrowed books
-            cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE status = 'borrowed'")
-            borrowed_books = cursor.fetchone()[0]
-            
-            # Total students (Computer department only)
-            cursor.execute("SELECT COUNT(*) FROM students WHERE department = 'Computer'")
-            total_students = cursor.fetchone()[0]
-            
-            conn.close()
-            
-            return {
-                'total_books': total_books,
-                'available_books': available_books,
-                'borrowed_books': borrowed_books,
-                'total_students': total_students
-            }
+            return self._get_cached_analytics('library_statistics', self._query_library_statistics)
         except Exception as e:
             print(f"Error getting statistics: {e}")
             return {
@@ -4232,6 +4024,36 @@ Current Settings:
                 'borrowed_books': 0,
                 'total_students': 0
             }
+
+    def _query_library_statistics(self):
+        """Run the library statistics queries"""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        # Total books
+        cursor.execute("SELECT COUNT(*) FROM books")
+        total_books = cursor.fetchone()[0]
+        
+        # Available books (sum of available_copies)
+        cursor.execute("SELECT SUM(available_copies) FROM books")
+        available_books = cursor.fetchone()[0] or 0
+        
+        # Borrowed books
+        cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE status = 'borrowed'")
+        borrowed_books = cursor.fetchone()[0]
+        
+        # Total students (Computer department only)
+        cursor.execute("SELECT COUNT(*) FROM students WHERE department = 'Computer'")
+        total_students = cursor.fetchone()[0]
+        
+        conn.close()
+        
+        return {
+            'total_books': total_books,
+            'available_books': available_books,
+            'borrowed_books': borrowed_books,
+            'total_students': total_students
+        }
     
     def create_students_tab(self):
         """Create students management tab"""
@@ -4336,6 +4158,9 @@ Current Settings:
         self.students_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         students_v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         students_h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        # Only the visible window of rows is materialized; headings sort the backing list
+        self.students_view = VirtualTreeview(self.students_tree, students_v_scrollbar, column_keys=[1, 2, 3, 4, 6],
+                                             key=lambda student: student[1])
         
         # Add double-click binding for delete option
         self.students_tree.bind('<Double-1>', self.on_student_double_click)
@@ -4462,6 +4287,9 @@ Current Settings:
         self.books_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         books_v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         books_h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        # Only the visible window of rows is materialized; headings sort the backing list
+        self.books_view = VirtualTreeview(self.books_tree, books_v_scrollbar, column_keys=[1, 2, 3, 4, 5, 6, 7],
+                                          key=lambda book: book[1])
         
         # Add double-click binding for delete option
         self.books_tree.bind('<Double-1>', self.on_book_double_click)
@@ -4621,32 +4449,15 @@ Current Settings:
                 bg=self.colors['primary'], 
                 fg=self.colors['accent']).pack(anchor='w', pady=(0, 8))
         
-        # Autocomplete for student enrollment
-        def get_student_suggestions(query):
-            try:
-                students = self.db.get_students()
-                matches = []
-                query_lower = query.lower()
-                for s in students:
-                    enrollment = str(s['enrollment']).lower()
-                    name = str(s['name']).lower()
-                    if query_lower in enrollment or query_lower in name:
-                        matches.append(s)
-                return matches[:10]  # Limit to 10 suggestions
-            except:
-                return []
-        
-        def format_student_display(student):
-            return f"{student['enrollment']} - {student['name']} ({student['year']}, {student['section']})"
-        
+        # Autocomplete for student enrollment (served from the in-memory index)
         self.borrow_enrollment_entry = AutocompleteEntry(
             student_col,
-            data_callback=get_student_suggestions,
-            display_callback=format_student_display,
+            data_callback=self.autocomplete_index.suggest_students,
+            display_callback=self._format_student_suggestion,
             width=25
         )
         self.borrow_enrollment_entry.pack(fill=tk.X, pady=(0, 8))
-        self.borrow_enrollment_entry.bind('<KeyRelease>', lambda e: self.show_student_details('borrow'))
+        self.borrow_enrollment_entry.bind('<KeyRelease>', lambda e: self.show_student_details('borrow'), add='+')
 
         # Student details display
         self.borrow_student_details = tk.Label(student_col, 
@@ -4666,33 +4477,15 @@ Current Settings:
                 bg=self.colors['primary'], 
                 fg=self.colors['accent']).pack(anchor='w', pady=(0, 8))
         
-        # Autocomplete for book ID
-        def get_book_suggestions(query):
-            try:
-                books = self.db.get_books()
-                matches = []
-                query_lower = query.lower()
-                for b in books:
-                    book_id = str(b['book_id']).lower()
-                    title = str(b['title']).lower()
-                    author = str(b['author']).lower()
-                    if query_lower in book_id or query_lower in title or query_lower in author:
-                        matches.append(b)
-                return matches[:10]
-            except:
-                return []
-        
-        def format_book_display(book):
-            return f"{book['book_id']} - {book['title']} by {book['author']}"
-        
+        # Autocomplete for book ID (served from the in-memory index)
         self.borrow_book_id_entry = AutocompleteEntry(
             book_col,
-            data_callback=get_book_suggestions,
-            display_callback=format_book_display,
+            data_callback=self.autocomplete_index.suggest_books,
+            display_callback=self._format_book_suggestion,
             width=25
         )
         self.borrow_book_id_entry.pack(fill=tk.X, pady=(0, 8))
-        self.borrow_book_id_entry.bind('<KeyRelease>', lambda e: self.show_book_details('borrow'))
+        self.borrow_book_id_entry.bind('<KeyRelease>', lambda e: self.show_book_details('borrow'), add='+')
         
         # Book details display
         self.borrow_book_details = tk.Label(book_col, 
@@ -4841,31 +4634,14 @@ Current Settings:
                 fg=self.colors['accent']).pack(anchor='w', pady=(0, 8))
         
         # Autocomplete for return student enrollment
-        def get_return_student_suggestions(query):
-            try:
-                students = self.db.get_students()
-                matches = []
-                query_lower = query.lower()
-                for s in students:
-                    enrollment = str(s['enrollment']).lower()
-                    name = str(s['name']).lower()
-                    if query_lower in enrollment or query_lower in name:
-                        matches.append(s)
-                return matches[:10]
-            except:
-                return []
-        
-        def format_return_student_display(student):
-            return f"{student['enrollment']} - {student['name']} ({student['year']}, {student['section']})"
-        
         self.return_enrollment_entry = AutocompleteEntry(
             return_student_col,
-            data_callback=get_return_student_suggestions,
-            display_callback=format_return_student_display,
+            data_callback=self.autocomplete_index.suggest_students,
+            display_callback=self._format_student_suggestion,
             width=25
         )
         self.return_enrollment_entry.pack(fill=tk.X, pady=(0, 8))
-        self.return_enrollment_entry.bind('<KeyRelease>', lambda e: self.show_student_details('return'))
+        self.return_enrollment_entry.bind('<KeyRelease>', lambda e: self.show_student_details('return'), add='+')
         
         self.return_student_details = tk.Label(return_student_col, 
                                              text="", 
@@ -4885,32 +4661,14 @@ Current Settings:
                 fg=self.colors['accent']).pack(anchor='w', pady=(0, 8))
         
         # Autocomplete for return book ID
-        def get_return_book_suggestions(query):
-            try:
-                books = self.db.get_books()
-                matches = []
-                query_lower = query.lower()
-                for b in books:
-                    book_id = str(b['book_id']).lower()
-                    title = str(b['title']).lower()
-                    author = str(b['author']).lower()
-                    if query_lower in book_id or query_lower in title or query_lower in author:
-                        matches.append(b)
-                return matches[:10]
-            except:
-                return []
-        
-        def format_return_book_display(book):
-            return f"{book['book_id']} - {book['title']} by {book['author']}"
-        
         self.return_book_id_entry = AutocompleteEntry(
             return_book_col,
-            data_callback=get_return_book_suggestions,
-            display_callback=format_return_book_display,
+            data_callback=self.autocomplete_index.suggest_books,
+            display_callback=self._format_book_suggestion,
             width=25
         )
         self.return_book_id_entry.pack(fill=tk.X, pady=(0, 8))
-        self.return_book_id_entry.bind('<KeyRelease>', lambda e: self.show_book_details('return'))
+        self.return_book_id_entry.bind('<KeyRelease>', lambda e: self.show_book_details('return'), add='+')
         
         self.return_book_details = tk.Label(return_book_col, 
                                           text="", 
@@ -5046,6 +4804,14 @@ Current Settings:
     #     except Exception as e:
     #         print(f"Error filtering book suggestions: {e}")
     
+    @staticmethod
+    def _format_student_suggestion(student):
+        return f"{student['enrollment_no']} - {student['name']} ({student['year']}, {student['department']})"
+
+    @staticmethod
+    def _format_book_suggestion(book):
+        return f"{book['book_id']} - {book['title']} by {book['author']} ({book['available_copies']} available)"
+
     def show_student_details(self, mode):
         """Show student details with debouncing and async fetch"""
         if mode == 'borrow':
@@ -5053,24 +4819,18 @@ Current Settings:
         else:
             enrollment_no = self.return_enrollment_entry.get().strip()
         
-        # Debouncing
-        if hasattr(self, '_student_details_timer') and self._student_details_timer:
-            self.root.after_cancel(self._student_details_timer)
-        
+        channel = ('student', mode)
         if not enrollment_no:
+            self.detail_lookup.cancel(channel)
             if mode == 'borrow':
                 self.borrow_student_details.config(text="")
             else:
                 self.return_student_details.config(text="")
             return
 
-        # Delay before fetching (500ms)
-        self._student_details_timer = self.root.after(500, 
-            lambda: self.run_in_background_thread(
-                lambda: self.db.get_student_by_enrollment(enrollment_no),
-                lambda result: self._show_student_details_callback(result, mode)
-            )
-        )
+        # Debounced; a newer keystroke cancels this lookup and stale results are dropped
+        self.detail_lookup.request(channel, 'student', enrollment_no,
+                                   lambda result: self._show_student_details_callback(result, mode))
 
     def _show_student_details_callback(self, student, mode):
         """Callback to update student details label"""
@@ -5094,24 +4854,18 @@ Current Settings:
         else:
             book_id = self.return_book_id_entry.get().strip()
         
-        # Debouncing
-        if hasattr(self, '_book_details_timer') and self._book_details_timer:
-            self.root.after_cancel(self._book_details_timer)
-
+        channel = ('book', mode)
         if not book_id:
+            self.detail_lookup.cancel(channel)
             if mode == 'borrow':
                 self.borrow_book_details.config(text="")
             else:
                 self.return_book_details.config(text="")
             return
-            
-        # Delay before fetching (500ms)
-        self._book_details_timer = self.root.after(500, 
-            lambda: self.run_in_background_thread(
-                lambda: self.db.get_book_by_id(book_id),
-                lambda result: self._show_book_details_callback(result, mode)
-            )
-        )
+
+        # Debounced; a newer keystroke cancels this lookup and stale results are dropped
+        self.detail_lookup.request(channel, 'book', book_id,
+                                   lambda result: self._show_book_details_callback(result, mode))
 
     def _show_book_details_callback(self, book, mode):
         """Callback to update book details label"""
@@ -5259,8 +5013,6 @@ Current Settings:
             if success:
                 messagebox.showinfo("Success", message)
                 dialog.destroy()
-                self.refresh_students()
-                self.refresh_dashboard()
             else:
                 messagebox.showerror("Error", message)
         
@@ -5281,8 +5033,6 @@ Current Settings:
                     )
                     messagebox.showinfo("Success", "Student deleted successfully")
                     dialog.destroy()
-                    self.refresh_students()
-                    self.refresh_dashboard()
                 else:
                     messagebox.showerror("Error", message)
         
@@ -5491,8 +5241,6 @@ Current Settings:
             if success:
                 messagebox.showinfo("Success", message)
                 dialog.destroy()
-                self.refresh_books()
-                self.refresh_dashboard()
             else:
                 messagebox.showerror("Error", message)
         
@@ -5513,8 +5261,6 @@ Current Settings:
                     )
                     messagebox.showinfo("Success", "Book deleted successfully")
                     dialog.destroy()
-                    self.refresh_books()
-                    self.refresh_dashboard()
                 else:
                     messagebox.showerror("Error", message)
         
@@ -5848,6 +5594,10 @@ Current Settings:
         self.records_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         records_v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         records_h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        # Only the visible window of rows is materialized; headings sort the backing list
+        self.records_view = VirtualTreeview(self.records_tree, records_v_scrollbar,
+                                            column_keys=[0, 1, 2, 3, 4, 5, 6, 7, 8],
+                                            key=lambda record: record[10])
 
         # Free scrolling in Records: vertical and Shift+Wheel horizontal, pointer-scoped
         def _rec_units(delta):
@@ -5855,7 +5605,7 @@ Current Settings:
         def _records_vwheel(event):
             u = _rec_units(event.delta)
             if u:
-                self.records_tree.yview_scroll(u, 'units')
+                self.records_view.scroll(u)
             return 'break'
         def _records_hwheel(event):
             u = _rec_units(event.delta)
@@ -6015,12 +5765,6 @@ Current Settings:
                 )
                 messagebox.showinfo("Success", message)
                 dialog.destroy()
-                self.refresh_students()
-                # Refresh dashboard so total student count updates immediately
-                try:
-                    self.refresh_dashboard()
-                except Exception:
-                    pass
             else:
                 messagebox.showerror("Error", message)
         
@@ -6216,10 +5960,6 @@ Current Settings:
                 )
                 messagebox.showinfo("Success", message)
                 dialog.destroy()
-                # Refresh books view
-                self.refresh_books()
-                # Update dashboard statistics
-                self.refresh_dashboard()
             else:
                 messagebox.showerror("Error", message)
         
@@ -6305,6 +6045,7 @@ Current Settings:
         self.run_in_background_thread(
             self._borrow_book_worker,
             self._borrow_book_callback,
+            priority=PRIORITY_WRITE,
             enrollment_no=enrollment_no,
             book_id=book_id,
             borrow_date=borrow_date,
@@ -6383,11 +6124,7 @@ Current Settings:
             self.borrow_student_details.config(text="")
             self.borrow_book_details.config(text="")
 
-            # Refresh views (Async calls where possible)
-            self.refresh_borrowed() 
-            self.refresh_books()
-            self.refresh_dashboard()
-            self.refresh_records()
+            # Borrowed, books, dashboard and records views refresh from the Database change event
         else:
             # Handle specific error titles if possible
             title = "Not Allowed" if "Pass Out" in message else "Error"
@@ -6418,6 +6155,7 @@ Current Settings:
         self.run_in_background_thread(
             self._return_book_worker,
             self._return_book_callback,
+            priority=PRIORITY_WRITE,
             enrollment_no=enrollment_no, 
             book_id=book_id, 
             user_return_date=user_return_date
@@ -6497,11 +6235,7 @@ Current Settings:
                 return_date_input.delete(0, tk.END)
                 return_date_input.insert(0, datetime.now().strftime('%Y-%m-%d'))
             
-            # Refresh views (Async calls where possible)
-            self.refresh_borrowed()
-            self.refresh_books()
-            self.refresh_dashboard()
-            self.refresh_records()
+            # Borrowed, books, dashboard and records views refresh from the Database change event
         else:
             messagebox.showerror("Error", message)
     
@@ -6689,9 +6423,6 @@ Current Settings:
                 if len(error_list) > 5:
                     summary += f"\n... and {len(error_list) - 5} more errors."
             messagebox.showinfo("Import Results", summary)
-            if added or duplicate:
-                self.refresh_students()
-                self.refresh_dashboard()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to import Excel file: {e}")
     def search_students(self):
@@ -6704,38 +6435,16 @@ Current Settings:
         self.run_in_background_thread(
             self._search_students_worker,
             self._search_students_callback,
+            task_key='search_students',
+            priority=PRIORITY_INTERACTIVE,
             search_term=search_term,
             year_filter=year_filter
         )
 
     def _search_students_worker(self, search_term, year_filter):
-        """Worker thread for searching students"""
-        if hasattr(self.db, 'get_students'):
-             students = self.db.get_students()
-        else:
-             return []
-
-        # DB students columns:
-        # (id, enrollment_no, name, email, phone, department, year, date_registered)
-        filtered_students = []
-        for s in students:
-            if search_term:
-                text = f"{s[1]} {s[2]} {s[3]} {s[4]} {s[6]} {s[5]}".lower()
-                if search_term not in text:
-                    continue
-            if year_filter != "All":
-                def normalize_year(y):
-                    y = str(y or '').lower().strip()
-                    if '1' in y: return '1'
-                    if '2' in y: return '2'
-                    if '3' in y: return '3'
-                    return y
-                
-                student_year = (s[6] or '').strip()
-                if normalize_year(year_filter) != normalize_year(student_year):
-                    continue
-            filtered_students.append(s)
-        return filtered_students
+        """Worker thread: run the filters as one paged SQL query (see Database.build_student_search)"""
+        query = self.db.build_student_search(search_term, year_filter)
+        return PagedQuerySource(self.db, query, formatter=self._format_student_row)
 
     def _search_students_callback(self, result):
         """Update UI with search results"""
@@ -6754,6 +6463,8 @@ Current Settings:
                 self.run_in_background_thread(
                     self._search_books_worker,
                     self._search_books_callback,
+                    task_key='search_books',
+                    priority=PRIORITY_INTERACTIVE,
                     term=term,
                     category=category
                 )
@@ -6793,6 +6504,8 @@ Current Settings:
         self.run_in_background_thread(
             self._search_records_worker,
             self._search_records_callback,
+            task_key='search_records',
+            priority=PRIORITY_INTERACTIVE,
             search_term=search_term,
             type_filter=type_filter,
             from_date=from_date,
@@ -6801,75 +6514,42 @@ Current Settings:
         )
 
     def _search_records_worker(self, search_term, type_filter, from_date, to_date, academic_year_filter):
-        """Worker: Fetch and Filter Records"""
-        records = self.get_all_records() # This calls self.db.get_transactions() internally?
-        # Check get_all_records implementation. It might be in main.py or db.
-        # Assuming get_all_records is safe to call from thread if it just reads DB.
-        
-        # Filter records
-        filtered_records = []
-        for record in records:
-            # record: (enroll, name, book_id, title, borrow_date, due_date, return_date, status, fine, academic_year)
-            status_val = record[7]
-            fine_val = record[8]
-            academic_year_val = record[9] if len(record) > 9 else 'N/A'
-            
-            # Apply type filter
-            if type_filter != "All":
-                if type_filter == "Overdue":
-                    # Overdue means fine > 0
-                    if fine_val == 0 or fine_val == '0':
-                        continue
-                elif type_filter == "Issued":
-                    # Issued means status is 'borrowed'
-                    if status_val.lower() != 'borrowed':
-                        continue
-                elif type_filter == "Returned":
-                    # Returned means status is 'returned'
-                    if status_val.lower() != 'returned':
-                        continue
-            
-            # Apply academic year filter
-            if academic_year_filter != "All":
-                # Convert database format to display format for comparison
-                display_academic_year = academic_year_val
-                if academic_year_val and "-" in academic_year_val:
-                    years = academic_year_val.split("-")
-                    if len(years) == 2:
-                        year1 = years[0][-2:]  # "2025" -> "25"
-                        year2 = years[1][-2:]  # "2026" -> "26"
-                        display_academic_year = f"{year1}-{year2}"
-                
-                if display_academic_year != academic_year_filter:
-                    continue
-            
-            # Apply search filter
-            if search_term:
-                if not any(search_term in str(field).lower() for field in record):
-                    continue
-            
-            # Apply date filters
-            from datetime import datetime
-            if from_date:
-                try:
-                    record_date = datetime.strptime(record[4], '%Y-%m-%d')  # borrow_date index 4
-                    from_date_obj = datetime.strptime(from_date, '%Y-%m-%d')
-                    if record_date < from_date_obj:
-                        continue
-                except ValueError:
-                    pass
-            
-            if to_date:
-                try:
-                    record_date = datetime.strptime(record[4], '%Y-%m-%d')
-                    to_date_obj = datetime.strptime(to_date, '%Y-%m-%d')
-                    if record_date > to_date_obj:
-                        continue
-                except ValueError:
-                    pass
-            
-            filtered_records.append(record)
-        return filtered_records
+        """Worker: compile the filters into one paged SQL query (see Database.build_record_search)
+        and read only the first page; further pages load as the Records view scrolls.
+        """
+        query = self.db.build_record_search(
+            search_term=search_term,
+            type_filter=type_filter,
+            from_date=self._filter_date(from_date),
+            to_date=self._filter_date(to_date),
+            academic_years=self._academic_year_candidates(academic_year_filter)
+        )
+        return PagedQuerySource(self.db, query, formatter=self._format_record_row,
+                                transform=self._format_record_rows)
+
+    @staticmethod
+    def _filter_date(value):
+        """A 'YYYY-MM-DD' filter entry, or None when empty/invalid (invalid dates are ignored)"""
+        value = (value or '').strip()
+        if not value:
+            return None
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            return None
+        return value
+
+    @staticmethod
+    def _academic_year_candidates(display_year):
+        """Stored academic_year values shown as display_year in the filter ('25-26' -> '2025-2026')"""
+        if not display_year or display_year == "All":
+            return None
+        candidates = [display_year]
+        years = display_year.split("-")
+        if len(years) == 2:
+            candidates.append(f"20{years[0]}-20{years[1]}")
+            candidates.append(f"20{years[0]}-{years[1]}")
+        return candidates
 
     def _search_records_callback(self, result):
          if isinstance(result, Exception):
@@ -6913,20 +6593,49 @@ Current Settings:
         self.search_records()
     
     def refresh_all_data(self):
-        """Refresh all data in the application - runs in background to avoid UI freeze"""
-        def do_refresh():
-            try:
-                # Small delay to let UI settle
-                self.root.after(100, lambda: self.refresh_dashboard())
-                self.root.after(200, lambda: self.refresh_students())
-                self.root.after(300, lambda: self.refresh_books())
-                self.root.after(400, lambda: self.refresh_borrowed())
-                self.root.after(500, lambda: self.refresh_records())
-            except Exception as e:
-                print(f"Refresh error: {e}")
-        
-        # Schedule refresh after short delay to let UI draw first
-        self.root.after(50, do_refresh)
+        """Refresh all data in the application (one coalesced reload of every view)"""
+        self.invalidate_views(*VIEW_REFRESHERS)
+
+    def _on_database_changed(self, tables):
+        """Database change listener; may run on a worker thread, so hand off to the Tk loop"""
+        views = self._views_for_tables(tables)
+        try:
+            self.root.after(0, lambda: self.invalidate_views(*views))
+        except (RuntimeError, tk.TclError):
+            pass  # Window already closed
+
+    @staticmethod
+    def _views_for_tables(tables):
+        """Views showing any of tables (no tables = unknown change, so every view)"""
+        if not tables:
+            return tuple(VIEW_REFRESHERS)
+        views = []
+        for table in tables:
+            for view in TABLE_VIEWS.get(table, ()):
+                if view not in views:
+                    views.append(view)
+        return tuple(views)
+
+    def invalidate_views(self, *views):
+        """Mark views stale; all stale views are reloaded once after VIEW_REFRESH_DELAY_MS"""
+        stale = getattr(self, '_stale_views', None)
+        if stale is None:
+            stale = self._stale_views = set()
+        stale.update(views)
+        if stale and getattr(self, '_view_refresh_job', None) is None:
+            self._view_refresh_job = self.root.after(VIEW_REFRESH_DELAY_MS, self._refresh_stale_views)
+
+    def _refresh_stale_views(self):
+        self._view_refresh_job = None
+        stale = self._stale_views
+        # Views in tabs that are not built yet stay stale until the tab is opened
+        self._stale_views = {view for view in stale if not self._view_tab_built(view)}
+        for view, method in VIEW_REFRESHERS.items():
+            if view in stale and view not in self._stale_views:
+                try:
+                    getattr(self, method)()
+                except Exception as e:
+                    print(f"Refresh error ({view}): {e}")
     
     def refresh_dashboard(self):
         """Refresh dashboard statistics"""
@@ -6992,7 +6701,8 @@ Current Settings:
         # Fetch data in background, then populate tree
         self.run_in_background_thread(
             lambda: self.db.get_borrowed_books(),
-            self._refresh_borrowed_callback
+            self._refresh_borrowed_callback,
+            task_key='borrowed', coalesce=True
         )
 
     def _refresh_borrowed_callback(self, result):
@@ -7006,65 +6716,69 @@ Current Settings:
         self.search_records()  # This will apply current filters
     
     def populate_students_tree(self, students):
-        """Populate students treeview"""
-        if hasattr(self, 'students_tree'):
-            for item in self.students_tree.get_children():
-                self.students_tree.delete(item)
-            
-            for student in students:
-                # Map DB tuple to UI columns
-                # Enrollment No, Name, Email, Phone, Year
-                display_data = (student[1], student[2], student[3], student[4], student[6])
-                self.students_tree.insert('', 'end', values=display_data)
+        """Populate students treeview from a list or a PagedQuerySource (virtual: rows are
+        formatted as they scroll into view)"""
+        if hasattr(self, 'students_view'):
+            if isinstance(students, PagedQuerySource):
+                self.students_view.set_source(students)
+            else:
+                self.students_view.set_rows(students, self._format_student_row)
+
+    @staticmethod
+    def _format_student_row(student):
+        """Map DB tuple to UI columns: Enrollment No, Name, Email, Phone, Year"""
+        return (student[1], student[2], student[3], student[4], student[6]), ()
     
     def populate_books_tree(self, books):
-        """Populate books treeview"""
-        if hasattr(self, 'books_tree'):
-            for item in self.books_tree.get_children():
-                self.books_tree.delete(item)
-            
-            for book in books:
-                # Map DB tuple to UI columns: (Book ID, Title, Author, ISBN, Category, Total, Available)
-                display_data = (book[1], book[2], book[3], book[4], book[5], book[6], book[7])
-                self.books_tree.insert('', 'end', values=display_data)
+        """Populate books treeview (virtual: rows are formatted as they scroll into view)"""
+        if hasattr(self, 'books_view'):
+            # Map DB tuple to UI columns: (Book ID, Title, Author, ISBN, Category, Total, Available)
+            self.books_view.set_rows(
+                books,
+                lambda book: ((book[1], book[2], book[3], book[4], book[5], book[6], book[7]), ()))
     
+    def _tree_sync(self, tree):
+        """KeyedTreeSync for a plain treeview, created on first use (a rebuilt tree gets a fresh one)"""
+        syncs = getattr(self, '_tree_syncs', None)
+        if syncs is None:
+            syncs = self._tree_syncs = {}
+        sync = syncs.get(str(tree))
+        if sync is None or sync.tree is not tree:
+            sync = syncs[str(tree)] = KeyedTreeSync(tree)
+        return sync
+
     def populate_borrowed_tree(self, borrowed):
-        """Populate borrowed books treeview with enhanced data
+        """Populate borrowed books treeview with enhanced data (keyed diff by borrow record id)
         Expected order from get_borrowed_books():
-        (enrollment_no, student_name, department, year, book_id, title, author, borrow_date, due_date)
+        (enrollment_no, student_name, department, year, book_id, title, author, borrow_date, due_date, record_id)
         """
         if hasattr(self, 'borrowed_tree'):
-            for item in self.borrowed_tree.get_children():
-                self.borrowed_tree.delete(item)
-            
-            for record in borrowed:
+            borrowed = list(borrowed)
+            # Days left for every loan in one pass (fines engine)
+            days_left = days_until_due([record[8] for record in borrowed])
+            rows = []
+            for record, delta in zip(borrowed, days_left):
                 # record indexes mapping
-                enrollment_no = record[0]
                 student_name = record[1]
                 book_id = record[4]
                 book_title = record[5]
                 borrow_date = record[7]
                 due_date_val = record[8]
-                # Calculate days left
-                try:
-                    from datetime import datetime as _dt
-                    due_date = _dt.strptime(due_date_val, '%Y-%m-%d').date()
-                    today = _dt.now().date()
-                    delta = (due_date - today).days
-                    if delta < 0:
-                        days_left_str = f"Overdue {abs(delta)}d"
-                        tag = 'overdue'
-                    elif delta == 0:
-                        days_left_str = 'Due Today'
-                        tag = ''
-                    else:
-                        days_left_str = f"{delta}d left"
-                        tag = ''
-                except Exception:
+                if delta == NO_DATE:
                     days_left_str = 'N/A'
                     tag = ''
+                elif delta < 0:
+                    days_left_str = f"Overdue {abs(delta)}d"
+                    tag = 'overdue'
+                elif delta == 0:
+                    days_left_str = 'Due Today'
+                    tag = ''
+                else:
+                    days_left_str = f"{delta}d left"
+                    tag = ''
                 display_data = (student_name, book_id, book_title, borrow_date, due_date_val, days_left_str)
-                self.borrowed_tree.insert('', 'end', values=display_data, tags=(tag,))
+                rows.append((record[9], display_data, (tag,)))
+            self._tree_sync(self.borrowed_tree).apply(rows)
             try:
                 self.borrowed_tree.tag_configure('overdue', background='#ffe6e6', foreground='#b30000')
             except Exception:
@@ -7073,42 +6787,45 @@ Current Settings:
     def populate_activities_tree(self, activities):
         """Populate recent activities treeview"""
         if hasattr(self, 'activities_tree'):
-            for item in self.activities_tree.get_children():
-                self.activities_tree.delete(item)
-            
-            for activity in activities:
-                self.activities_tree.insert('', 'end', values=activity)
+            # Activities have no id; the row itself is the key
+            self._tree_sync(self.activities_tree).apply(
+                (tuple(activity), activity, ()) for activity in activities)
     
     def populate_records_tree(self, records):
-        """Populate records treeview"""
-        if hasattr(self, 'records_tree'):
-            for item in self.records_tree.get_children():
-                self.records_tree.delete(item)
-            
-            for record in records:
-                # record: (..., status, fine)
-                *base, status, fine = record
-                fine_is_num = False
-                if isinstance(fine, str):
-                    try:
-                        fine_val_num = int(fine)
-                        fine_is_num = True
-                    except ValueError:
-                        fine_val_num = fine
-                else:
-                    fine_val_num = fine
-                    fine_is_num = True
-                # Add "Rs" prefix and "(Late)" suffix for overdue records
-                if fine_is_num and isinstance(fine_val_num, int) and fine_val_num > 0:
-                    fine_display = f"Rs {fine_val_num} (Late)"
-                else:
-                    fine_display = f"Rs {fine_val_num}" if fine_is_num else str(fine_val_num)
-                tag = 'late' if (fine_is_num and isinstance(fine_val_num, int) and fine_val_num > 0) else ''
-                self.records_tree.insert('', 'end', values=(*base, status, fine_display), tags=(tag,))
+        """Populate records treeview from a list or a PagedQuerySource (virtual: rows are
+        formatted as they scroll into view)"""
+        if hasattr(self, 'records_view'):
             try:
                 self.records_tree.tag_configure('late', background='#fff3cd')
             except Exception:
                 pass
+            if isinstance(records, PagedQuerySource):
+                self.records_view.set_source(records)
+            else:
+                self.records_view.set_rows(records, self._format_record_row)
+
+    @staticmethod
+    def _format_record_row(record):
+        """Map a get_all_records() tuple to (values, tags) for the records treeview"""
+        # record: (..., status, fine, record_id)
+        *base, status, fine = record[:10]
+        fine_is_num = False
+        if isinstance(fine, str):
+            try:
+                fine_val_num = int(fine)
+                fine_is_num = True
+            except ValueError:
+                fine_val_num = fine
+        else:
+            fine_val_num = fine
+            fine_is_num = True
+        # Add "Rs" prefix and "(Late)" suffix for overdue records
+        if fine_is_num and isinstance(fine_val_num, int) and fine_val_num > 0:
+            fine_display = f"Rs {fine_val_num} (Late)"
+        else:
+            fine_display = f"Rs {fine_val_num}" if fine_is_num else str(fine_val_num)
+        tag = 'late' if (fine_is_num and isinstance(fine_val_num, int) and fine_val_num > 0) else ''
+        return (*base, status, fine_display), (tag,)
     
     def on_record_double_click(self, event):
         """Handle double-click on record to send overdue letter"""
@@ -7190,141 +6907,23 @@ Current Settings:
             except:
                 fine_amount = days_overdue * self.get_fine_per_day()
             
-            # Create Word document
-            doc = Document()
-            
-            # Add logo at the top if available
-            logo_path = os.path.join(os.path.dirname(__file__), 'logo.png')
-            if os.path.exists(logo_path):
-                try:
-                    logo_para = doc.add_paragraph()
-                    logo_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    logo_run = logo_para.add_run()
-                    logo_run.add_picture(logo_path, width=Pt(80))
-                except Exception as e:
-                    print(f"Could not add logo: {e}")
-            
-            # Add institutional header with colors
-            def add_colored_header(text, size, rgb_color):
-                from docx.shared import RGBColor
-                p = doc.add_paragraph()
-                run = p.add_run(text)
-                run.bold = True
-                run.font.size = Pt(size)
-                run.font.color.rgb = RGBColor(*rgb_color)
-                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                return p
-            
-            # Three-line header with gradient colors
-            add_colored_header("Government Polytechnic Awasari (Kh)", 20, (31, 71, 136))
-            add_colored_header("Departmental Library", 16, (46, 92, 138))
-            add_colored_header("Computer Department", 14, (54, 95, 145))
-            
-            # Add separator line
-            sep_para = doc.add_paragraph("_" * 70)
-            sep_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            doc.add_paragraph()  # Spacing
-            
-            # Add date
-            date_para = doc.add_paragraph()
-            date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-            date_run = date_para.add_run(f"Date: {today.strftime('%B %d, %Y')}")
-            date_run.font.size = Pt(11)
-            
-            doc.add_paragraph()  # Spacing
-            
-            # Add subject
-            subject = doc.add_paragraph()
-            subject_run = subject.add_run('Subject: Overdue Book Notice')
-            subject_run.bold = True
-            subject_run.font.size = Pt(12)
-            subject.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            doc.add_paragraph()  # Spacing
-            
-            # Recipient details
-            to_para = doc.add_paragraph()
-            to_run = to_para.add_run(f'To,\n{student_name}\nEnrollment No: {enrollment_no}')
-            to_run.font.size = Pt(11)
-            
-            doc.add_paragraph()  # Spacing
-            
-            # Body of letter
-            body = doc.add_paragraph()
-            body_text = (
-                f"Dear {student_name},\n\n"
-                f"This is to inform you that the following book borrowed from the Library of Computer Department "
-                f"is overdue and needs to be returned immediately.\n\n"
-            )
-            body_run = body.add_run(body_text)
-            body_run.font.size = Pt(11)
-            
-            # Book details table
-            doc.add_paragraph('Book Details:', style='Heading 2')
-            table = doc.add_table(rows=5, cols=2)
-            table.style = 'Light Grid Accent 1'
-            
-            table.cell(0, 0).text = 'Book ID:'
-            table.cell(0, 1).text = str(book_id)
-            table.cell(1, 0).text = 'Book Title:'
-            table.cell(1, 1).text = book_title
-            table.cell(2, 0).text = 'Issue Date:'
-            table.cell(2, 1).text = issue_date
-            table.cell(3, 0).text = 'Due Date:'
-            table.cell(3, 1).text = due_date
-            table.cell(4, 0).text = 'Days Overdue:'
-            table.cell(4, 1).text = str(days_overdue)
-            
-            doc.add_paragraph()  # Spacing
-            
-            # Fine details
-            fine_para = doc.add_paragraph()
-            fine_run = fine_para.add_run(
-                f"As per library rules, a fine of ₹{self.get_fine_per_day()} per day is applicable for overdue books.\n"
-                f"Your current fine amount is: ₹{fine_amount}\n\n"
-            )
-            fine_run.font.size = Pt(11)
-            fine_run.bold = True
-            
-            # Request
-            request_para = doc.add_paragraph()
-            request_text = (
-                "You are hereby requested to return the book to the library at the earliest and clear the pending fine. "
-                "Failure to do so may result in restrictions on future borrowing privileges.\n\n"
-                "Please contact the library desk for any queries or clarifications.\n\n"
-            )
-            request_run = request_para.add_run(request_text)
-            request_run.font.size = Pt(11)
-            
-            # Closing
-            doc.add_paragraph()  # Spacing
-            closing = doc.add_paragraph()
-            closing_text = "Thank you for your cooperation.\n\nYours sincerely,\n\n"
-            closing_run = closing.add_run(closing_text)
-            closing_run.font.size = Pt(11)
-            
-            # Signature
-            doc.add_paragraph()
-            doc.add_paragraph("__________________________")
-            signature = doc.add_paragraph()
-            signature_run = signature.add_run('Librarian')
-            signature_run.font.size = Pt(11)
-            signature_run.bold = True
-            
-            dept1 = doc.add_paragraph()
-            dept1.add_run('Departmental Library').font.size = Pt(10)
-            dept2 = doc.add_paragraph()
-            dept2.add_run('Computer Department').font.size = Pt(10)
-            dept3 = doc.add_paragraph()
-            dept3.add_run('Government Polytechnic Awasari (Kh)').font.size = Pt(10)
-            
-            # Save the document to temp location first
-            import tempfile
-            temp_dir = tempfile.gettempdir()
-            default_filename = f"Overdue_Letter_{enrollment_no}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
-            temp_filepath = os.path.join(temp_dir, default_filename)
-            doc.save(temp_filepath)
+            # Render from the shared letter template (same pipeline as the bulk overdue notice)
+            import tempfile
+            temp_dir = tempfile.gettempdir()
+            default_filename = f"Overdue_Letter_{enrollment_no}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
+            temp_filepath = os.path.join(temp_dir, default_filename)
+            self._get_letter_pipeline().render({
+                'enrollment_no': enrollment_no,
+                'student_name': student_name,
+                'book_id': book_id,
+                'book_title': book_title,
+                'issue_date': issue_date,
+                'due_date': due_date,
+                'days_overdue': days_overdue,
+                'fine_amount': fine_amount,
+                'fine_per_day': self.get_fine_per_day(),
+                'date': today.strftime('%B %d, %Y'),
+            }, temp_filepath)
             
             # Get student email
             student_email = self.get_student_email(enrollment_no)
@@ -7335,35 +6934,16 @@ Current Settings:
             
             if self.email_settings.get('enabled', False) and student_email:
                 email_subject = f"Overdue Book Notice - {book_title}"
-                email_body = f"""Dear {student_name},
-
-This is an automated notification from the Library of Computer Department, Government Polytechnic Awasari (Kh).
-
-The following book borrowed from our library is overdue and needs to be returned immediately:
-
-Book ID: {book_id}
-Book Title: {book_title}
-Issue Date: {issue_date}
-Due Date: {due_date}
-Days Overdue: {days_overdue}
-Fine Amount: ₹{fine_amount}
-
-As per library rules, a fine of ₹{self.get_fine_per_day()} per day is applicable for overdue books.
-
-Please return the book to the library at the earliest and clear the pending fine. Failure to do so may result in restrictions on future borrowing privileges.
-
-For any queries, please contact the library desk.
-
-Thank you for your cooperation.
-
-Librarian
-Departmental Library
-Computer Department
-Government Polytechnic Awasari (Kh)
-
----
-Note: This is an automated email. Please find the attached formal overdue letter.
-"""
+                email_body = self._overdue_email_body({
+                    'student_name': student_name,
+                    'book_id': book_id,
+                    'book_title': book_title,
+                    'issue_date': issue_date,
+                    'due_date': due_date,
+                    'days_overdue': days_overdue,
+                    'fine_amount': fine_amount,
+                    'fine_per_day': self.get_fine_per_day(),
+                })
                 
                 success, message = self.send_email_with_attachment(
                     student_email, 
@@ -7452,6 +7032,66 @@ Note: This is an automated email. Please find the attached formal overdue letter
             return result[0] if result and result[0] else None
         except:
             return None
+
+    def get_student_emails(self, enrollment_nos):
+        """{enrollment_no: email} for the given students (those with an email address)"""
+        enrollment_nos = list(dict.fromkeys(str(e) for e in enrollment_nos))
+        emails = {}
+        try:
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(enrollment_nos), 500):
+                chunk = enrollment_nos[start:start + 500]
+                cursor.execute(f"SELECT enrollment_no, email FROM students WHERE enrollment_no IN "
+                               f"({', '.join('?' for _ in chunk)})", chunk)
+                for enrollment_no, email in cursor.fetchall():
+                    if email:
+                        emails[str(enrollment_no)] = email
+            conn.close()
+        except Exception as e:
+            print(f"Error reading student emails: {e}")
+        return emails
+
+    def _get_letter_pipeline(self):
+        """Shared overdue-letter renderer (keeps the letterhead template cached)"""
+        pipeline = getattr(self, '_letter_pipeline', None)
+        if pipeline is None:
+            pipeline = self._letter_pipeline = LetterPipeline()
+        return pipeline
+
+    @staticmethod
+    def _overdue_email_body(letter):
+        """Plain-text email sent with an overdue letter (keys as for letter_pipeline letters)"""
+        return f"""Dear {letter['student_name']},
+
+This is an automated notification from the Library of Computer Department, Government Polytechnic Awasari (Kh).
+
+The following book borrowed from our library is overdue and needs to be returned immediately:
+
+Book ID: {letter['book_id']}
+Book Title: {letter['book_title']}
+Issue Date: {letter['issue_date']}
+Due Date: {letter['due_date']}
+Days Overdue: {letter['days_overdue']}
+Fine Amount: ₹{letter['fine_amount']}
+
+As per library rules, a fine of ₹{letter['fine_per_day']} per day is applicable for overdue books.
+
+Please return the book to the library at the earliest and clear the pending fine. Failure to do so may result in restrictions on future borrowing privileges.
+
+For any queries, please contact the library desk.
+
+Thank you for your cooperation.
+
+Librarian
+Departmental Library
+Computer Department
+Government Polytechnic Awasari (Kh)
+
+---
+Note: This is an automated email. Please find the attached formal overdue letter.
+"""
     
     def get_student_name(self, enrollment_no):
         """Get student name by enrollment number"""
@@ -7521,8 +7161,8 @@ Note: This is an automated email. Please find the attached formal overdue letter
                     br.due_date,
                     br.return_date,
                     br.status,
-                    0 as days_overdue,
-                    COALESCE(br.academic_year, 'N/A') as academic_year
+                    COALESCE(br.academic_year, 'N/A') as academic_year,
+                    br.id
                 FROM borrow_records br
                 JOIN students s ON br.enrollment_no = s.enrollment_no
                 JOIN books b ON br.book_id = b.book_id
@@ -7531,55 +7171,33 @@ Note: This is an automated email. Please find the attached formal overdue letter
             
             records = cursor.fetchall()
             conn.close()
-            
-            # Format records for display
-            formatted_records = []
-            from datetime import datetime as _dt
-            today = _dt.now().date()
-            for rec in records:
-                (enroll, student_name, book_id, title, borrow_date, due_date, return_date_raw, status, _, academic_year) = rec
-                
-                # Handle return_date normalization (None/Date -> String)
-                if return_date_raw is None:
-                    return_date_str = 'Not returned'
-                else:
-                    return_date_str = str(return_date_raw)
-
-                # Determine effective overdue days & fine
-                try:
-                    due_d = _dt.strptime(str(due_date), '%Y-%m-%d').date()
-                except Exception:
-                    due_d = None
-                
-                fine = 0
-                if status == 'borrowed':
-                    # still out; overdue based on today
-                    if due_d and today > due_d:
-                        overdue_days = (today - due_d).days
-                        fine = overdue_days * self.get_fine_per_day()
-                else:
-                    # returned; compute late based on return_date
-                    try:
-                        # Use raw if date object, or parse if string
-                        if hasattr(return_date_raw, 'year'):
-                             ret_d = return_date_raw
-                             # Postgres returns date object, but Python datetime.date doesn't strictly have comparison with None same way
-                             if isinstance(ret_d, datetime): ret_d = ret_d.date() 
-                        else:
-                             ret_d = _dt.strptime(return_date_str, '%Y-%m-%d').date()
-                             
-                        if due_d and ret_d > due_d:
-                            overdue_days = (ret_d - due_d).days
-                            fine = overdue_days * self.get_fine_per_day()
-                    except Exception:
-                        pass
-                # Keep fine as numeric for downstream display logic, add academic_year
-                formatted_records.append((enroll, student_name, book_id, title, borrow_date, due_date, return_date_str, status, fine, academic_year))
-            return formatted_records
+            return self._format_record_rows(records)
         except Exception as e:
             print(f"Error getting records: {e}")
             return []
 
+    def _format_record_rows(self, records):
+        """Turn borrow record rows (enrollment_no, name, book_id, title, borrow_date, due_date,
+        return_date, status, academic_year, id) into display records with the accrued fine:
+        (enroll, name, book_id, title, borrow_date, due_date, return_date, status, fine, academic_year, id)
+        """
+        records = list(records)
+        # Fines for the whole batch at once: open loans accrue up to today, returned ones up to return_date
+        _overdue_days, fine_values = compute_fines(
+            [rec[5] for rec in records],
+            [rec[6] for rec in records],
+            open_loans=[rec[7] == 'borrowed' for rec in records],
+            fine_per_day=self.get_fine_per_day()
+        )
+        formatted_records = []
+        for rec, fine in zip(records, fine_values):
+            (enroll, student_name, book_id, title, borrow_date, due_date, return_date_raw, status, academic_year, record_id) = rec
+            # Handle return_date normalization (None/Date -> String)
+            return_date_str = 'Not returned' if return_date_raw is None else str(return_date_raw)
+            # Keep fine as numeric for downstream display logic, add academic_year (record id last, used as row key)
+            formatted_records.append((enroll, student_name, book_id, title, borrow_date, due_date, return_date_str, status, int(fine), academic_year, record_id))
+        return formatted_records
+
     # ------------------------------------------------------------------
     # Date auto update helpers
     # ------------------------------------------------------------------
@@ -7741,69 +7359,46 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def export_students_to_excel(self, year_filter="All", auto_update=True):
         """Export students to Excel with year filter.
         If auto_update is True, compute current year (1st..3rd) based on date_registered and an academic rollover on July 1.
+        Rows stream from the database to the file on a worker thread.
         """
         try:
-            students = self.db.get_students()
-            
-            # Filter by Computer department and year
-            filtered_students = []
-            for student in students:
-                if student[5] == "Computer":  # Department filter
-                    # Compute effective year label if requested
-                    eff_year = student[6]
-                    if auto_update:
-                        try:
-                            eff_year = self._compute_current_year_label(student[7], student[6])
-                        except Exception:
-                            eff_year = student[6]
-                    if year_filter == "All" or eff_year == year_filter:
-                        filtered_students.append({
-                            'Enrollment No': student[1],
-                            'Name': student[2],
-                            'Email': student[3],
-                            'Phone': student[4],
-                            'Department': student[5],
-                            'Year': eff_year,
-                            'Registered': student[7]
-                        })
-            
-            if not filtered_students:
-                messagebox.showwarning("Warning", f"No students found for year: {year_filter}")
-                return
-            
-            # Create DataFrame
-            df = pd.DataFrame(filtered_students)
-            
             # Save to file
             filename = f"students_{year_filter}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=EXPORT_FILETYPES,
                 # Tkinter option is 'initialfile' (not 'initialname')
                 initialfile=filename
             )
             
             if file_path:
-                # Add header then table using openpyxl for styling flexibility
-                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    sheet = 'Students'
-                    # Write institutional header first
-                    header_end_row = 6  # New enhanced header takes 6 rows
-                    df.to_excel(writer, sheet_name=sheet, index=False, startrow=header_end_row)
-                    ws = writer.book[sheet]
-                    # Write enhanced header
-                    self._write_excel_header_openpyxl(ws, start_row=1)
-                    # Apply enhanced auto-adjust with styling
-                    self._auto_adjust_column_width(ws)
-                messagebox.showinfo("Success", f"Students data exported to {file_path}")
-                
-                # Ask if user wants to open the file
-                if messagebox.askyesno("Open File", "Do you want to open the exported file?"):
-                    self.open_file(file_path)
+                # With auto_update the year is computed per student, so it is filtered as rows stream past
+                students = self.db.iter_students(department="Computer", year=None if auto_update else year_filter)
+                self._run_export(
+                    file_path, self.STUDENT_EXPORT_COLUMNS,
+                    self._student_export_rows(students, year_filter, auto_update),
+                    sheet_name='Students',
+                    success_message=f"Students data exported to {file_path}",
+                    empty_message=f"No students found for year: {year_filter}"
+                )
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export students: {str(e)}")
 
+    STUDENT_EXPORT_COLUMNS = ['Enrollment No', 'Name', 'Email', 'Phone', 'Department', 'Year', 'Registered']
+
+    def _student_export_rows(self, students, year_filter, auto_update):
+        """Export rows from a student row stream, with the effective year when auto_update is set"""
+        for student in students:
+            eff_year = student[6]
+            if auto_update:
+                try:
+                    eff_year = self._compute_current_year_label(student[7], student[6])
+                except Exception:
+                    eff_year = student[6]
+            if year_filter == "All" or eff_year == year_filter:
+                yield (student[1], student[2], student[3], student[4], student[5], eff_year, student[7])
+
     # ---------------------- Academic Year Helpers ----------------------
     def _compute_current_year_label(self, date_registered, stored_year_label):
         """Return current year label ('1st','2nd','3rd') based on date_registered and today's date.
@@ -7982,57 +7577,25 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def _export_students_by_year(self, year_filter):
         """Helper function to export students filtered by year"""
         try:
-            students = self.db.get_students()
-            
-            # Filter by Computer department and selected year
-            filtered_students = []
-            for student in students:
-                if student[5] == "Computer":  # Department filter
-                    # Check year filter
-                    if year_filter == "All" or student[6] == year_filter:
-                        filtered_students.append({
-                            'Enrollment No': student[1],
-                            'Name': student[2],
-                            'Email': student[3],
-                            'Phone': student[4],
-                            'Department': student[5],
-                            'Year': student[6],
-                            'Registered': student[7]
-                        })
-            
-            if not filtered_students:
-                messagebox.showwarning("Warning", f"No students found for {year_filter}!")
-                return
-            
-            # Create DataFrame
-            df = pd.DataFrame(filtered_students)
-            
             # Save to file
             year_suffix = year_filter if year_filter != "All" else "all_years"
             filename = f"students_{year_suffix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=EXPORT_FILETYPES,
                 initialfile=filename
             )
             
             if file_path:
-                # Add professional header and formatting
-                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    sheet_name = f'Students_{year_filter}' if year_filter != "All" else 'All_Students'
-                    header_end_row = 6  # Enhanced header takes 6 rows
-                    df.to_excel(writer, sheet_name=sheet_name, index=False, startrow=header_end_row)
-                    ws = writer.book[sheet_name]
-                    # Write enhanced header
-                    self._write_excel_header_openpyxl(ws, start_row=1)
-                    # Apply enhanced auto-adjust with styling
-                    self._auto_adjust_column_width(ws)
-                    
-                messagebox.showinfo("Success", f"{year_filter} students data exported to {file_path}")
-                
-                # Ask if user wants to open the file
-                if messagebox.askyesno("Open File", "Do you want to open the exported file?"):
-                    self.open_file(file_path)
+                # Computer department and the selected (stored) year are filtered in SQL
+                students = self.db.iter_students(department="Computer", year=year_filter)
+                self._run_export(
+                    file_path, self.STUDENT_EXPORT_COLUMNS,
+                    self._student_export_rows(students, "All", auto_update=False),
+                    sheet_name=f'Students_{year_filter}' if year_filter != "All" else 'All_Students',
+                    success_message=f"{year_filter} students data exported to {file_path}",
+                    empty_message=f"No students found for {year_filter}!"
+                )
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export students: {str(e)}")
@@ -8229,6 +7792,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 
                 conn.commit()
                 conn.close()
+                self.db.mark_changed('students')
                 
                 # Now add all promotion history records (after closing the main connection)
                 for record in promotion_records:
@@ -8257,8 +7821,6 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 dialog.destroy()
                 
                 try:
-                    self.refresh_students()
-                    self.refresh_dashboard()
                     self.refresh_academic_year_filter()  # Refresh academic year dropdown
                 except Exception:
                     pass
@@ -8290,8 +7852,6 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 if success:
                     messagebox.showinfo("Success", message)
                     try:
-                        self.refresh_students()
-                        self.refresh_dashboard()
                         self.refresh_academic_year_filter()  # Refresh academic year dropdown
                     except Exception:
                         pass
@@ -8543,70 +8103,35 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def export_books_to_excel(self):
         """Export books to Excel"""
         try:
-            books = self.db.get_books()
-            
-            # Filter Computer department books
-            filtered_books = []
-            for book in books:
-                # Defensive validation: check for missing Book ID or Title (should not happen due to enforced validation)
-                invalid_rows = []
-                for b in books:
-                    # Assuming schema: (id, book_id, title, author, isbn, category, total_copies, available_copies)
-                    try:
-                        book_id_val = str(b[1]).strip()
-                        title_val = str(b[2]).strip()
-                        if not book_id_val or not title_val:
-                            invalid_rows.append(b)
-                    except Exception:
-                        invalid_rows.append(b)
-                if invalid_rows:
-                    if not messagebox.askyesno(
-                        "Validation Warning",
-                        f"Detected {len(invalid_rows)} book record(s) with missing Book ID or Title. Continue export?"
-                    ):
-                        return
-                if book[5] in ["Technology", "Textbook", "Research"]:
-                    filtered_books.append({
-                        'Book ID': book[1],
-                        'Title': book[2],
-                        'Author': book[3],
-                        'ISBN': book[4],
-                        'Category': book[5],
-                        'Total Copies': book[6],
-                        'Available Copies': book[7],
-                        'Date Added': book[8]
-                    })
-            
-            if not filtered_books:
-                messagebox.showwarning("Warning", "No books found to export!")
-                return
-            
-            # Create DataFrame
-            df = pd.DataFrame(filtered_books)
+            # Defensive validation: check for missing Book ID or Title (should not happen due to enforced validation)
+            invalid_count = self.db.count_books_missing_fields()
+            if invalid_count:
+                if not messagebox.askyesno(
+                    "Validation Warning",
+                    f"Detected {invalid_count} book record(s) with missing Book ID or Title. Continue export?"
+                ):
+                    return
             
             # Save to file
             filename = f"books_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=EXPORT_FILETYPES,
                 # Correct parameter name
                 initialfile=filename
             )
             
             if file_path:
-                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    sheet = 'Books'
-                    header_end_row = 6  # Enhanced header takes 6 rows
-                    df.to_excel(writer, sheet_name=sheet, index=False, startrow=header_end_row)
-                    ws = writer.book[sheet]
-                    self._write_excel_header_openpyxl(ws, start_row=1)
-                    # Apply enhanced auto-adjust with styling
-                    self._auto_adjust_column_width(ws)
-                messagebox.showinfo("Success", f"Books data exported to {file_path}")
-                
-                # Ask if user wants to open the file
-                if messagebox.askyesno("Open File", "Do you want to open the exported file?"):
-                    self.open_file(file_path)
+                # Computer department books
+                books = self.db.iter_books(categories=("Technology", "Textbook", "Research"))
+                self._run_export(
+                    file_path,
+                    ['Book ID', 'Title', 'Author', 'ISBN', 'Category', 'Total Copies', 'Available Copies', 'Date Added'],
+                    (tuple(book)[1:9] for book in books),
+                    sheet_name='Books',
+                    success_message=f"Books data exported to {file_path}",
+                    empty_message="No books found to export!"
+                )
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export books: {str(e)}")
@@ -8617,64 +8142,49 @@ Note: This is an automated email. Please find the attached formal overdue letter
             # Instead of exporting ALL records from DB, export only what user currently sees
             # in the Records tab (i.e., after filters/search applied). This gives a true
             # "filtered export" matching on‑screen data.
-            if not hasattr(self, 'records_tree'):
+            if not hasattr(self, 'records_view'):
                 messagebox.showerror("Error", "Records view not initialized yet.")
                 return
 
-            visible_records = []
-            for item_id in self.records_tree.get_children():
-                vals = self.records_tree.item(item_id, 'values')
-                # Tree has 9 columns: (Enrollment No, Student Name, Book ID, Book Title, Issue Date, Due Date, Return Date, Status, Fine)
-                # Convert tuple to list to ensure we have exactly 9 columns
-                record_list = list(vals)
-                if len(record_list) > 9:
-                    # If more columns, trim to 9
-                    record_list = record_list[:9]
-                elif len(record_list) < 9:
-                    # If fewer columns, pad with empty strings
-                    record_list.extend([''] * (9 - len(record_list)))
-                visible_records.append(tuple(record_list))
-
-            if not visible_records:
+            total = len(self.records_view)
+            if not total:
                 messagebox.showwarning("Warning", "No filtered records to export (the list is empty)!")
                 return
 
-            # Build DataFrame with the same column ordering used in the tree
-            df = pd.DataFrame(visible_records, columns=[
-                'Enrollment No', 'Student Name', 'Book ID', 'Book Title', 'Issue Date',
-                'Due Date', 'Return Date', 'Status', 'Fine'
-            ])
-
-            # (Optional future enhancement) Could add metadata sheet with applied filters.
-            # For now keep it simple per request: export exactly what is visible.
-            
             # Save to file
             filename = f"records_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
+                filetypes=EXPORT_FILETYPES,
                 # Correct parameter name
                 initialfile=filename
             )
             
             if file_path:
-                with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                    sheet = 'Records'
-                    header_end_row = 6  # Enhanced header takes 6 rows
-                    df.to_excel(writer, sheet_name=sheet, index=False, startrow=header_end_row)
-                    ws = writer.book[sheet]
-                    self._write_excel_header_openpyxl(ws, start_row=1)
-                    # Apply enhanced auto-adjust with styling
-                    self._auto_adjust_column_width(ws)
-                messagebox.showinfo("Success", f"Records data exported to {file_path}")
-                
-                # Ask if user wants to open the file
-                if messagebox.askyesno("Open File", "Do you want to open the exported file?"):
-                    self.open_file(file_path)
+                # Every filtered row in the current sort order, streamed from the view's query
+                # (the tree itself only materializes the visible window)
+                self._run_export(
+                    file_path,
+                    ['Enrollment No', 'Student Name', 'Book ID', 'Book Title', 'Issue Date',
+                     'Due Date', 'Return Date', 'Status', 'Fine'],
+                    self._record_export_rows(self.records_view.export_values()),
+                    sheet_name='Records', total=total,
+                    success_message=f"Records data exported to {file_path}"
+                )
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export records: {str(e)}")
 
+    @staticmethod
+    def _record_export_rows(values):
+        """Records tree values trimmed or padded to the 9 exported columns
+        (Enrollment No, Student Name, Book ID, Book Title, Issue Date, Due Date, Return Date, Status, Fine)"""
+        for vals in values:
+            record_list = list(vals)[:9]
+            if len(record_list) < 9:
+                record_list.extend([''] * (9 - len(record_list)))
+            yield record_list
+
     # ------------------------------------------------------------------
     # Overdue Notice Letter Export
     # ------------------------------------------------------------------
@@ -8682,35 +8192,35 @@ Note: This is an automated email. Please find the attached formal overdue letter
         """Return list of overdue (currently issued and past due date) records.
         Each record dict with: Enrollment No, Student Name, Book ID, Book Title, Issue Date, Due Date, Days Overdue, Accrued Fine
         """
-        overdue = []
         try:
-            all_records = self.get_all_records()
-            today = datetime.now().date()
-            from datetime import datetime as _dt
-            for rec in all_records:
-                # Now handling 10 fields (with academic_year at the end)
-                if len(rec) >= 9:
-                    enroll, name, book_id, title, borrow_date, due_date, return_date, status, fine = rec[:9]
-                    # If there's a 10th field, it's academic_year (we don't need it here)
-                    
-                    if status == 'borrowed':
-                        try:
-                            due_d = _dt.strptime(due_date, '%Y-%m-%d').date()
-                            if due_d < today:
-                                days_overdue = (today - due_d).days
-                                overdue.append({
-                                    'Enrollment No': enroll,
-                                    'Student Name': name,
-                                    'Book ID': book_id,
-                                    'Book Title': title,
-                                    'Issue Date': borrow_date,
-                                    'Due Date': due_date,
-                                    'Days Overdue': days_overdue,
-                                    'Accrued Fine': int(days_overdue) * self.get_fine_per_day()
-                                })
-                        except Exception as e:
-                            print(f"Error processing overdue record: {e}")
-                            continue
+            conn = self.db.get_connection()
+            cursor = conn.cursor()
+            # Open loans past their due date (idx_borrow_records_status), newest first
+            cursor.execute("""
+                SELECT br.enrollment_no, s.name, br.book_id, b.title, br.borrow_date, br.due_date
+                FROM borrow_records br
+                JOIN students s ON br.enrollment_no = s.enrollment_no
+                JOIN books b ON br.book_id = b.book_id
+                WHERE br.status = 'borrowed' AND br.due_date < ?
+                ORDER BY br.id DESC
+            """, (datetime.now().strftime('%Y-%m-%d'),))
+            rows = cursor.fetchall()
+            conn.close()
+
+            overdue_days, fine_values = compute_fines([row[5] for row in rows], fine_per_day=self.get_fine_per_day())
+            overdue = []
+            for row, days_overdue, fine in zip(rows, overdue_days, fine_values):
+                enroll, name, book_id, title, borrow_date, due_date = tuple(row)
+                overdue.append({
+                    'Enrollment No': enroll,
+                    'Student Name': name,
+                    'Book ID': book_id,
+                    'Book Title': title,
+                    'Issue Date': str(borrow_date),
+                    'Due Date': str(due_date),
+                    'Days Overdue': int(days_overdue),
+                    'Accrued Fine': int(fine)
+                })
             return overdue
         except Exception as e:
             print(f"Overdue fetch error: {e}")
@@ -8965,438 +8475,124 @@ Note: This is an automated email. Please find the attached formal overdue letter
             email_results = []
             if send_emails:
                 import tempfile
+                import shutil
                 
-                # Use batch email service if available, otherwise use old method
-                if self.email_batch_service and PERFORMANCE_MODULES_AVAILABLE:
-                    # Prepare batch of emails using performance-optimized service
-                    progress_win = tk.Toplevel(self.root)
-                    progress_win.title("Sending Emails...")
-                    progress_win.geometry("500x250")
-                    progress_win.transient(self.root)
-                    progress_win.grab_set()
-                    
-                    # Center the window
-                    progress_win.update_idletasks()
-                    x = (progress_win.winfo_screenwidth() // 2) - (250)
-                    y = (progress_win.winfo_screenheight() // 2) - (125)
-                    progress_win.geometry(f"+{x}+{y}")
-                    
-                    label = tk.Label(progress_win, text="⚡ Sending overdue emails in parallel batches...", 
-                                   font=('Segoe UI', 12, 'bold'), pady=20)
-                    label.pack()
-                    
-                    # Progress bar
-                    from tkinter import ttk
-                    progress_bar = ttk.Progressbar(progress_win, length=400, mode='determinate')
-                    progress_bar.pack(pady=10)
-                    
-                    status_label = tk.Label(progress_win, text="Preparing...", font=('Segoe UI', 10), 
-                                          wraplength=450, justify=tk.LEFT)
-                    status_label.pack(pady=10)
-                    
-                    stats_label = tk.Label(progress_win, text="", font=('Segoe UI', 9, 'italic'), 
-                                          fg='#666', wraplength=450, justify=tk.LEFT)
-                    stats_label.pack(pady=5)
-                    
+                progress_win = tk.Toplevel(self.root)
+                progress_win.title("Sending Emails...")
+                progress_win.geometry("500x250")
+                progress_win.transient(self.root)
+                progress_win.grab_set()
+                
+                # Center the window
+                progress_win.update_idletasks()
+                x = (progress_win.winfo_screenwidth() // 2) - (250)
+                y = (progress_win.winfo_screenheight() // 2) - (125)
+                progress_win.geometry(f"+{x}+{y}")
+                
+                label = tk.Label(progress_win, text="⚡ Rendering letters and sending emails in parallel...", 
+                               font=('Segoe UI', 12, 'bold'), pady=20)
+                label.pack()
+                
+                # Progress bar
+                progress_bar = ttk.Progressbar(progress_win, length=400, mode='determinate')
+                progress_bar.pack(pady=10)
+                
+                status_label = tk.Label(progress_win, text="Preparing...", font=('Segoe UI', 10), 
+                                      wraplength=450, justify=tk.LEFT)
+                status_label.pack(pady=10)
+                
+                stats_label = tk.Label(progress_win, text="", font=('Segoe UI', 9, 'italic'), 
+                                      fg='#666', wraplength=450, justify=tk.LEFT)
+                stats_label.pack(pady=5)
+                
+                progress_win.update()
+                
+                # One letter per overdue book for students with an email address
+                emails_by_student = self.get_student_emails([rec['Enrollment No'] for rec in overdue])
+                letter_date = datetime.now().strftime('%B %d, %Y')
+                letters = []
+                failed_count = 0
+                for rec in overdue:
+                    enrollment_no = str(rec['Enrollment No'])
+                    student_email = emails_by_student.get(enrollment_no)
+                    if not student_email:
+                        failed_count += 1
+                        email_results.append(f"❌ {rec['Student Name']} ({enrollment_no}) - No email address")
+                        continue
+                    letters.append({
+                        'enrollment_no': enrollment_no,
+                        'student_name': str(rec['Student Name']),
+                        'student_email': student_email,
+                        'book_id': str(rec['Book ID']),
+                        'book_title': str(rec['Book Title']),
+                        'issue_date': str(rec['Issue Date']),
+                        'due_date': str(rec['Due Date']),
+                        'days_overdue': str(rec['Days Overdue']),
+                        'fine_amount': str(rec['Accrued Fine']),
+                        'fine_per_day': self.get_fine_per_day(),
+                        'date': letter_date,
+                    })
+                
+                # Letters render in a process pool; each one is emailed as soon as it is written
+                letters_dir = tempfile.mkdtemp(prefix='overdue_letters_')
+                
+                def emails_as_rendered():
+                    for letter, path, error in self._get_letter_pipeline().render_many(letters, letters_dir):
+                        email_data = {
+                            'to': letter['student_email'],
+                            'subject': f"Overdue Book Notice - {letter['book_title']}",
+                            'body': self._overdue_email_body(letter),
+                            'attachment': path,
+                            'enrollment_no': letter['enrollment_no'],
+                            'student_name': letter['student_name'],
+                            'book_title': letter['book_title']
+                        }
+                        if error is not None:
+                            email_data['error'] = f"Could not create letter: {error}"
+                        yield email_data
+                
+                def update_progress(sent, total, percentage):
+                    progress_bar['value'] = percentage
+                    status_label['text'] = f"Sending... {sent}/{total} emails ({percentage:.1f}%)"
+                    stats_label['text'] = (f"📝 {self._get_letter_pipeline().max_workers} letter workers | "
+                                           f"⚡ {self.email_batch_service.max_workers} parallel email sessions")
                     progress_win.update()
-                    
-                    # Prepare emails
-                    emails_to_send = []
-                    temp_files = []
-                    
-                    for rec in overdue:
-                        enrollment_no = str(rec['Enrollment No'])
-                        student_name = str(rec['Student Name'])
-                        book_id = str(rec['Book ID'])
-                        book_title = str(rec['Book Title'])
-                        issue_date = str(rec['Issue Date'])
-                        due_date = str(rec['Due Date'])
-                        days_overdue = str(rec['Days Overdue'])
-                        fine = str(rec['Accrued Fine'])
-                        
-                        student_email = self.get_student_email(enrollment_no)
-                        
-                        if student_email:
-                            # Generate individual letter
-                            temp_doc = Document()
-                            
-                            # Add header
-                            if os.path.exists(logo_path):
-                                try:
-                                    logo_para = temp_doc.add_paragraph()
-                                    logo_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                                    logo_run = logo_para.add_run()
-                                    logo_run.add_picture(logo_path, width=Pt(80))
-                                except:
-                                    pass
-                            
-                            def add_center_temp(text, bold=True, size=16, color=None):
-                                p = temp_doc.add_paragraph()
-                                run = p.add_run(text)
-                                run.bold = bold
-                                run.font.size = Pt(size)
-                                if color:
-                                    from docx.shared import RGBColor
-                                    run.font.color.rgb = RGBColor(*color)
-                                p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            
-                            add_center_temp("Government Polytechnic Awasari (Kh)", True, 20, (31, 71, 136))
-                            add_center_temp("Departmental Library", True, 16, (46, 92, 138))
-                            add_center_temp("Computer Department", True, 14, (54, 95, 145))
-                            temp_doc.add_paragraph("_" * 70).alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            temp_doc.add_paragraph()
-                            
-                            date_para = temp_doc.add_paragraph()
-                            date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                            date_para.add_run(f"Date: {datetime.now().strftime('%B %d, %Y')}")
-                            temp_doc.add_paragraph()
-                            
-                            subject = temp_doc.add_paragraph()
-                            subject.add_run('Subject: Overdue Book Notice').bold = True
-                            subject.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            temp_doc.add_paragraph()
-                            
-                            to_para = temp_doc.add_paragraph()
-                            to_para.add_run(f'To,\\n{student_name}\\nEnrollment No: {enrollment_no}')
-                            temp_doc.add_paragraph()
-                            
-                            body = temp_doc.add_paragraph()
-                            body.add_run(
-                                f"Dear {student_name},\\n\\n"
-                                f"This is to inform you that the following book borrowed from the Library of Computer Department "
-                                f"is overdue and needs to be returned immediately.\\n\\n"
-                            )
-                            
-                            temp_doc.add_paragraph('Book Details:', style='Heading 2')
-                            details_table = temp_doc.add_table(rows=5, cols=2)
-                            details_table.style = 'Light Grid Accent 1'
-                            details_table.cell(0, 0).text = 'Book ID:'
-                            details_table.cell(0, 1).text = book_id
-                            details_table.cell(1, 0).text = 'Book Title:'
-                            details_table.cell(1, 1).text = book_title
-                            details_table.cell(2, 0).text = 'Issue Date:'
-                            details_table.cell(2, 1).text = issue_date
-                            details_table.cell(3, 0).text = 'Due Date:'
-                            details_table.cell(3, 1).text = due_date
-                            details_table.cell(4, 0).text = 'Days Overdue:'
-                            details_table.cell(4, 1).text = days_overdue
-                            
-                            temp_doc.add_paragraph()
-                            fine_para = temp_doc.add_paragraph()
-                            fine_run = fine_para.add_run(
-                                f"As per library rules, a fine of ₹{self.get_fine_per_day()} per day is applicable for overdue books.\\n"
-                                f"Your current fine amount is: ₹{fine}\\n\\n"
-                            )
-                            fine_run.bold = True
-                            
-                            request_para = temp_doc.add_paragraph()
-                            request_para.add_run(
-                                "You are hereby requested to return the book to the library at the earliest and clear the pending fine. "
-                                "Failure to do so may result in restrictions on future borrowing privileges.\\n\\n"
-                                "Please contact the library desk for any queries or clarifications.\\n\\n"
-                            )
-                            
-                            temp_doc.add_paragraph()
-                            temp_doc.add_paragraph("Thank you for your cooperation.\\n\\nYours sincerely,\\n\\n")
-                            temp_doc.add_paragraph("__________________________")
-                            temp_doc.add_paragraph("Librarian").runs[0].bold = True
-                            temp_doc.add_paragraph('Departmental Library')
-                            temp_doc.add_paragraph('Computer Department')
-                            temp_doc.add_paragraph('Government Polytechnic Awasari (Kh)')
-                            
-                            # Save to temp file
-                            temp_dir = tempfile.gettempdir()
-                            temp_file = os.path.join(temp_dir, f"Overdue_{enrollment_no}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx")
-                            temp_doc.save(temp_file)
-                            temp_files.append(temp_file)
-                            
-                            # Prepare email data
-                            email_subject = f"Overdue Book Notice - {book_title}"
-                            email_body = f"""Dear {student_name},
-
-This is an automated notification from the Library of Computer Department, Government Polytechnic Awasari (Kh).
-
-The following book borrowed from our library is overdue and needs to be returned immediately:
-
-Book ID: {book_id}
-Book Title: {book_title}
-Issue Date: {issue_date}
-Due Date: {due_date}
-Days Overdue: {days_overdue}
-Fine Amount: ₹{fine}
-
-As per library rules, a fine of ₹{self.get_fine_per_day()} per day is applicable for overdue books.
-
-Please return the book to the library at the earliest and clear the pending fine. Failure to do so may result in restrictions on future borrowing privileges.
-
-For any queries, please contact the library desk.
-
-Thank you for your cooperation.
-
-Librarian
-Departmental Library
-Computer Department
-Government Polytechnic Awasari (Kh)
-
----
-Note: This is an automated email. Please find the attached formal overdue letter.
-"""
-                            
-                            emails_to_send.append({
-                                'to': student_email,
-                                'subject': email_subject,
-                                'body': email_body,
-                                'attachment': temp_file,
-                                'enrollment_no': enrollment_no,
-                                'student_name': student_name,
-                                'book_title': book_title
-                            })
-                    
-                    # Define progress callback
-                    def update_progress(sent, total, percentage):
-                        progress_bar['value'] = percentage
-                        status_label['text'] = f"Sending... {sent}/{total} emails ({percentage:.1f}%)"
-                        batch_num = (sent // self.email_batch_service.batch_size) + 1
-                        stats_label['text'] = f"🔄 Processing batch {batch_num} | ⚡ {self.email_batch_service.max_workers} parallel workers"
-                        progress_win.update()
-                    
-                    # Send emails using batch service
+                
+                try:
                     result = self.email_batch_service.send_batch_emails(
-                        emails_to_send,
+                        emails_as_rendered(),
                         self.email_settings,
-                        update_progress
+                        update_progress,
+                        total=len(letters)
                     )
-                    
-                    # Log results
-                    sent_count = result['sent']
-                    failed_count = result['failed']
-                    
-                    for email_data, success, message in zip(emails_to_send, result['results'], result['errors']):
-                        self._log_email_sent(
-                            email_data['enrollment_no'],
-                            email_data['student_name'],
-                            email_data['to'],
-                            email_data['book_title'],
-                            success,
-                            message if not success else ''
-                        )
-                        
-                        if success:
-                            email_results.append(f"✅ {email_data['student_name']} ({email_data['enrollment_no']})")
-                        else:
-                            email_results.append(f"❌ {email_data['student_name']} ({email_data['enrollment_no']}) - {message}")
-                    
-                    # Clean up temp files
-                    for temp_file in temp_files:
-                        try:
-                            os.remove(temp_file)
-                        except:
-                            pass
-                    
+                finally:
+                    shutil.rmtree(letters_dir, ignore_errors=True)
                     progress_win.destroy()
-                    
-                else:
-                    # Fallback to original sequential method
-                    progress_win = tk.Toplevel(self.root)
-                    progress_win.title("Sending Emails...")
-                    progress_win.geometry("500x200")
-                    progress_win.transient(self.root)
-                    progress_win.grab_set()
-                    
-                    # Center the window
-                    progress_win.update_idletasks()
-                    x = (progress_win.winfo_screenwidth() // 2) - (250)
-                    y = (progress_win.winfo_screenheight() // 2) - (100)
-                    progress_win.geometry(f"+{x}+{y}")
-                    
-                    label = tk.Label(progress_win, text="Sending overdue emails...", 
-                                   font=('Segoe UI', 12), pady=20)
-                    label.pack()
-                    
-                    status_label = tk.Label(progress_win, text="", font=('Segoe UI', 10), 
-                                          wraplength=450, justify=tk.LEFT)
-                    status_label.pack(pady=10)
-                    
-                    progress_win.update()
-                    
-                    sent_count = 0
-                    failed_count = 0
                 
-                for idx, rec in enumerate(overdue, 1):
-                    enrollment_no = str(rec['Enrollment No'])
-                    student_name = str(rec['Student Name'])
-                    book_id = str(rec['Book ID'])
-                    book_title = str(rec['Book Title'])
-                    issue_date = str(rec['Issue Date'])
-                    due_date = str(rec['Due Date'])
-                    days_overdue = str(rec['Days Overdue'])
-                    fine = str(rec['Accrued Fine'])
-                    
-                    status_label.config(text=f"Sending email {idx}/{len(overdue)}\nTo: {student_name} ({enrollment_no})")
-                    progress_win.update()
-                    
-                    # Get student email
-                    student_email = self.get_student_email(enrollment_no)
+                sent_count = result['sent']
+                failed_count += result['failed']
+                
+                log_entries = []
+                for email_data, success, message in zip(result['emails'], result['results'], result['errors']):
+                    log_entries.append({
+                        'enrollment_no': email_data['enrollment_no'],
+                        'student_name': email_data['student_name'],
+                        'student_email': email_data['to'],
+                        'book_title': email_data['book_title'],
+                        'success': success,
+                        'error_message': message if not success else ''
+                    })
                     
-                    if student_email:
-                        # Generate individual letter for this student
-                        temp_doc = Document()
-                        
-                        # Add same header
-                        if os.path.exists(logo_path):
-                            try:
-                                logo_para = temp_doc.add_paragraph()
-                                logo_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                                logo_run = logo_para.add_run()
-                                logo_run.add_picture(logo_path, width=Pt(80))
-                            except:
-                                pass
-                        
-                        def add_center_temp(text, bold=True, size=16, color=None):
-                            p = temp_doc.add_paragraph()
-                            run = p.add_run(text)
-                            run.bold = bold
-                            run.font.size = Pt(size)
-                            if color:
-                                from docx.shared import RGBColor
-                                run.font.color.rgb = RGBColor(*color)
-                            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        
-                        add_center_temp("Government Polytechnic Awasari (Kh)", True, 20, (31, 71, 136))
-                        add_center_temp("Departmental Library", True, 16, (46, 92, 138))
-                        add_center_temp("Computer Department", True, 14, (54, 95, 145))
-                        temp_doc.add_paragraph("_" * 70).alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        temp_doc.add_paragraph()
-                        
-                        date_para = temp_doc.add_paragraph()
-                        date_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                        date_para.add_run(f"Date: {datetime.now().strftime('%B %d, %Y')}")
-                        temp_doc.add_paragraph()
-                        
-                        subject = temp_doc.add_paragraph()
-                        subject.add_run('Subject: Overdue Book Notice').bold = True
-                        subject.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        temp_doc.add_paragraph()
-                        
-                        to_para = temp_doc.add_paragraph()
-                        to_para.add_run(f'To,\n{student_name}\nEnrollment No: {enrollment_no}')
-                        temp_doc.add_paragraph()
-                        
-                        body = temp_doc.add_paragraph()
-                        body.add_run(
-                            f"Dear {student_name},\n\n"
-                            f"This is to inform you that the following book borrowed from the Library of Computer Department "
-                            f"is overdue and needs to be returned immediately.\n\n"
-                        )
-                        
-                        temp_doc.add_paragraph('Book Details:', style='Heading 2')
-                        details_table = temp_doc.add_table(rows=5, cols=2)
-                        details_table.style = 'Light Grid Accent 1'
-                        details_table.cell(0, 0).text = 'Book ID:'
-                        details_table.cell(0, 1).text = book_id
-                        details_table.cell(1, 0).text = 'Book Title:'
-                        details_table.cell(1, 1).text = book_title
-                        details_table.cell(2, 0).text = 'Issue Date:'
-                        details_table.cell(2, 1).text = issue_date
-                        details_table.cell(3, 0).text = 'Due Date:'
-                        details_table.cell(3, 1).text = due_date
-                        details_table.cell(4, 0).text = 'Days Overdue:'
-                        details_table.cell(4, 1).text = days_overdue
-                        
-                        temp_doc.add_paragraph()
-                        fine_para = temp_doc.add_paragraph()
-                        fine_run = fine_para.add_run(
-                            f"As per library rules, a fine of ₹{self.get_fine_per_day()} per day is applicable for overdue books.\n"
-                            f"Your current fine amount is: ₹{fine}\n\n"
-                        )
-                        fine_run.bold = True
-                        
-                        request_para = temp_doc.add_paragraph()
-                        request_para.add_run(
-                            "You are hereby requested to return the book to the library at the earliest and clear the pending fine. "
-                            "Failure to do so may result in restrictions on future borrowing privileges.\n\n"
-                            "Please contact the library desk for any queries or clarifications.\n\n"
-                        )
-                        
-                        temp_doc.add_paragraph()
-                        temp_doc.add_paragraph("Thank you for your cooperation.\n\nYours sincerely,\n\n")
-                        temp_doc.add_paragraph("__________________________")
-                        temp_doc.add_paragraph("Librarian").runs[0].bold = True
-                        temp_doc.add_paragraph('Departmental Library')
-                        temp_doc.add_paragraph('Computer Department')
-                        temp_doc.add_paragraph('Government Polytechnic Awasari (Kh)')
-                        
-                        # Save to temp file
-                        temp_dir = tempfile.gettempdir()
-                        temp_file = os.path.join(temp_dir, f"Overdue_{enrollment_no}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx")
-                        temp_doc.save(temp_file)
-                        
-                        # Send email
-                        email_subject = f"Overdue Book Notice - {book_title}"
-                        email_body = f"""Dear {student_name},
-
-This is an automated notification from the Library of Computer Department, Government Polytechnic Awasari (Kh).
-
-The following book borrowed from our library is overdue and needs to be returned immediately:
-
-Book ID: {book_id}
-Book Title: {book_title}
-Issue Date: {issue_date}
-Due Date: {due_date}
-Days Overdue: {days_overdue}
-Fine Amount: ₹{fine}
-
-As per library rules, a fine of ₹{self.get_fine_per_day()} per day is applicable for overdue books.
-
-Please return the book to the library at the earliest and clear the pending fine. Failure to do so may result in restrictions on future borrowing privileges.
-
-For any queries, please contact the library desk.
-
-Thank you for your cooperation.
-
-Librarian
-Departmental Library
-Computer Department
-Government Polytechnic Awasari (Kh)
-
----
-Note: This is an automated email. Please find the attached formal overdue letter.
-"""
-                        
-                        success, message = self.send_email_with_attachment(
-                            student_email, 
-                            email_subject, 
-                            email_body, 
-                            temp_file
-                        )
-                        
-                        # Log the email
-                        self._log_email_sent(
-                            enrollment_no,
-                            student_name,
-                            student_email,
-                            book_title,
-                            success,
-                            message if not success else ''
-                        )
-                        
-                        if success:
-                            sent_count += 1
-                            email_results.append(f"✅ {student_name} ({enrollment_no})")
-                        else:
-                            failed_count += 1
-                            email_results.append(f"❌ {student_name} ({enrollment_no}) - {message}")
-                        
-                        # Clean up temp file
-                        try:
-                            os.remove(temp_file)
-                        except:
-                            pass
+                    if success:
+                        email_results.append(f"✅ {email_data['student_name']} ({email_data['enrollment_no']})")
                     else:
-                        failed_count += 1
-                        email_results.append(f"❌ {student_name} ({enrollment_no}) - No email address")
+                        email_results.append(f"❌ {email_data['student_name']} ({email_data['enrollment_no']}) - {message}")
                 
-                progress_win.destroy()
+                # One insert transaction for the whole batch
+                try:
+                    self.db.log_emails(log_entries)
+                except Exception as e:
+                    print(f"Error logging emails: {e}")
                 
                 # Show results
                 result_message = f"📧 Email Sending Complete!\n\n"
@@ -9494,10 +8690,6 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 if len(errors) > 5:
                     result_message += f"\n... and {len(errors) - 5} more errors."
             messagebox.showinfo("Import Results", result_message)
-            
-            if success_count > 0:
-                self.refresh_books()
-                self.refresh_dashboard()
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to import Excel file: {str(e)}")
@@ -9657,6 +8849,99 @@ Note: This is an automated email. Please find the attached formal overdue letter
             print(f"Failed to open file: {e}")
 
     # ---------------------- Excel Helpers ----------------------
+    def _run_export(self, file_path, columns, rows, sheet_name='Data', total=None, header=None,
+                    success_message=None, empty_message=None):
+        """Write columns and rows to file_path (.xlsx or .csv) with export_engine on a worker
+        thread, showing a progress window with a Cancel button.
+
+        rows is consumed on the worker, so pass a database stream (Database.iter_query(),
+        VirtualTreeview.export_values()) or a list - nothing is read on the Tk thread.
+        header(workbook, worksheet, column_count) draws the letterhead (default: college header).
+        With empty_message, an export that wrote no rows is deleted and the message shown instead.
+        """
+        if not is_csv(file_path) and not XLSXWRITER_AVAILABLE:
+            messagebox.showerror("Export Error", "xlsxwriter package is required for Excel export.\n\n"
+                                 "Please install: pip install xlsxwriter\n(or save the file as .csv)")
+            return
+        self._run_file_job(file_path, export_rows, total=total, success_message=success_message,
+                           empty_message=empty_message, columns=list(columns), rows=rows,
+                           sheet_name=sheet_name, header=header or self._export_letterhead)
+
+    def _run_file_job(self, file_path, target, total=None, success_message=None, empty_message=None, **kwargs):
+        """Run target(path=file_path, total=total, progress_callback=, cancel=, **kwargs) -> row
+        count on a worker thread with a progress window and Cancel button (see _run_export)
+        """
+        cancel = threading.Event()
+        progress = {'written': 0}
+
+        win = tk.Toplevel(self.root)
+        win.title("Exporting...")
+        win.geometry("420x180")
+        win.resizable(False, False)
+        win.transient(self.root)
+        win.protocol("WM_DELETE_WINDOW", cancel.set)
+        tk.Label(win, text=f"Exporting {os.path.basename(file_path)}", font=('Segoe UI', 11, 'bold'),
+                 wraplength=400, pady=12).pack()
+        bar = ttk.Progressbar(win, length=360, mode='determinate' if total else 'indeterminate',
+                              maximum=total or 100)
+        bar.pack(pady=5)
+        status_label = tk.Label(win, text="Starting...", font=('Segoe UI', 9))
+        status_label.pack(pady=5)
+        tk.Button(win, text="Cancel", command=cancel.set, bg='#6c757d', fg='white',
+                  relief='flat', padx=12, pady=4).pack(pady=5)
+        if not total:
+            bar.start(15)
+
+        def on_progress(written, _total):
+            # Export thread: only record the count; poll() draws it on the Tk thread
+            progress['written'] = written
+
+        def poll():
+            if progress.get('finished') or not win.winfo_exists():
+                return
+            written = progress['written']
+            if cancel.is_set():
+                status_label.config(text="Cancelling...")
+            elif total:
+                bar['value'] = written
+                status_label.config(text=f"{written:,} of {total:,} rows")
+            else:
+                status_label.config(text=f"{written:,} rows")
+            win.after(100, poll)
+
+        def on_done(result):
+            progress['finished'] = True
+            try:
+                win.destroy()
+            except tk.TclError:
+                pass
+            if isinstance(result, ExportCancelled):
+                messagebox.showinfo("Export", "Export cancelled.")
+                return
+            if isinstance(result, Exception):
+                messagebox.showerror("Export Error", f"Failed to export:\n{result}")
+                return
+            if not result and empty_message:
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass
+                messagebox.showwarning("Warning", empty_message)
+                return
+            messagebox.showinfo("Success", success_message or f"Exported {result:,} rows to {file_path}")
+            if messagebox.askyesno("Open File", "Do you want to open the exported file?"):
+                self.open_file(file_path)
+
+        poll()
+        self.run_in_background_thread(
+            target, on_done, priority=PRIORITY_BACKGROUND,
+            path=file_path, total=total, progress_callback=on_progress, cancel=cancel, **kwargs
+        )
+
+    def _export_letterhead(self, workbook, worksheet, column_count):
+        """export_engine header callback: the college header above the table"""
+        return self._xlsxwriter_write_header(worksheet, workbook, start_row=0, columns=column_count)
+
     def _write_excel_header_openpyxl(self, worksheet, start_row=1):
         """Write the required header into an openpyxl worksheet with professional formatting like Word documents.
         Creates a beautifully formatted header with logo, merged cells, colors, and borders.
@@ -9746,8 +9031,10 @@ Note: This is an automated email. Please find the attached formal overdue letter
         # Return next available row (after spacing)
         return start_row + 6
 
-    def _xlsxwriter_write_header(self, worksheet, workbook, start_row=0):
-        """Write the required header into an xlsxwriter worksheet with proper formatting and logo."""
+    def _xlsxwriter_write_header(self, worksheet, workbook, start_row=0, columns=7):
+        """Write the required header into an xlsxwriter worksheet with proper formatting and logo.
+        The headings span the table's columns (at least 7). Returns the first row after the header.
+        """
         # Main heading - VERY LARGE, bold, centered with color
         fmt_main = workbook.add_format({
             'bold': True, 
@@ -9795,13 +9082,14 @@ Note: This is an automated email. Please find the attached formal overdue letter
             except Exception as e:
                 print(f"Could not add logo: {e}")
         
-        # Merge cells for headers (assuming 7 columns minimum)
-        worksheet.merge_range(start_row, 1, start_row, 6, "Government Polytechnic Awasari(Kh)", fmt_main)
-        worksheet.merge_range(start_row + 1, 1, start_row + 1, 6, "Departmental Library", fmt_sub1)
-        worksheet.merge_range(start_row + 2, 1, start_row + 2, 6, "Computer Department", fmt_sub2)
+        # Merge cells for headers (7 columns minimum)
+        last_col = max(columns, 7) - 1
+        worksheet.merge_range(start_row, 1, start_row, last_col, "Government Polytechnic Awasari(Kh)", fmt_main)
+        worksheet.merge_range(start_row + 1, 1, start_row + 1, last_col, "Departmental Library", fmt_sub1)
+        worksheet.merge_range(start_row + 2, 1, start_row + 2, last_col, "Computer Department", fmt_sub2)
         
         # Add separator line
-        for col in range(7):
+        for col in range(last_col + 1):
             worksheet.write(start_row + 3, col, "", fmt_line)
         
         # Add blank row for spacing
@@ -9842,10 +9130,12 @@ Note: This is an automated email. Please find the attached formal overdue letter
                         cell.alignment = header_alignment
                         cell.border = header_border
             
-            # Auto-adjust column widths based on content
-            for column in worksheet.columns:
+            # Auto-adjust column widths from the header and a sample of the data rows
+            from openpyxl.utils import get_column_letter
+            sample_end = min(worksheet.max_row, (data_start_row or 1) + WIDTH_SAMPLE_ROWS)
+            for column in worksheet.iter_cols(min_row=1, max_row=sample_end):
                 max_length = 0
-                column_letter = column[0].column_letter
+                column_letter = get_column_letter(column[0].column)
                 
                 for cell in column:
                     try:
@@ -9904,6 +9194,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
         """Create comprehensive analysis tab using pie/donut charts only, with smooth scrolling"""
         analysis_frame = tk.Frame(self.notebook, bg=self.colors['primary'])
         self.notebook.add(analysis_frame, text="📊 Analysis")
+        self.analysis_tab_frame = analysis_frame
         
         if not MATPLOTLIB_AVAILABLE:
             self.create_analysis_unavailable_message(analysis_frame)
@@ -10277,6 +9568,9 @@ Note: This is an automated email. Please find the attached formal overdue letter
         self.current_charts = {}
         # Filter state (None or string values)
         self.analysis_filter = {'enrollment_no': None, 'book_id': None}
+
+        # Charts render only while the tab is visible; catch up when it is selected
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_notebook_tab_changed, add='+')
         
         # Initial load
         self.refresh_analysis()
@@ -10345,40 +9639,30 @@ Note: This is an automated email. Please find the attached formal overdue letter
         style = ttk.Style()
         style.configure('Portal.TNotebook.Tab', padding=[15, 8], font=('Segoe UI', 10, 'bold'))
         
+        # Sub-tabs are built (and query the portal) only when first opened
+        self.portal_lazy_tabs = LazyTabs(portal_notebook, bg='white', on_built=self._on_tab_built)
+        
         # Sub-tab 1: QR Access
-        qr_tab = tk.Frame(portal_notebook, bg='white')
-        portal_notebook.add(qr_tab, text="📱 QR Access")
-        self._create_qr_access_section(qr_tab)
+        self.portal_lazy_tabs.add('portal_qr', "📱 QR Access", self._create_qr_access_section)
         
         # Sub-tab 2: All Requests
-        requests_tab = tk.Frame(portal_notebook, bg='white')
-        portal_notebook.add(requests_tab, text="📋 Requests")
-        self._create_requests_section(requests_tab)
+        self.portal_lazy_tabs.add('portal_requests', "📋 Requests", self._create_requests_section)
         
         # Sub-tab 3: Deletion Requests
-        deletion_tab = tk.Frame(portal_notebook, bg='white')
-        portal_notebook.add(deletion_tab, text="🗑️ Deletions")
-        self._create_deletion_section(deletion_tab)
+        self.portal_lazy_tabs.add('portal_deletions', "🗑️ Deletions", self._create_deletion_section)
         
         # Sub-tab 4: Password Resets
-        password_tab = tk.Frame(portal_notebook, bg='white')
-        portal_notebook.add(password_tab, text="🔑 Password Reset")
-        self._create_password_reset_section(password_tab)
+        self.portal_lazy_tabs.add('portal_passwords', "🔑 Password Reset", self._create_password_reset_section)
         
         # Sub-tab 5: Broadcasts (New)
-        broadcast_tab = tk.Frame(portal_notebook, bg='white')
-        portal_notebook.add(broadcast_tab, text="📢 Broadcasts")
-        self._create_broadcast_section(broadcast_tab)
+        self.portal_lazy_tabs.add('portal_broadcasts', "📢 Broadcasts", self._create_broadcast_section)
 
         # Sub-tab 6: Observability
-        observability_tab = tk.Frame(portal_notebook, bg='white')
-        portal_notebook.add(observability_tab, text="📈 Observability")
-        self._create_observability_section(observability_tab)
+        self.portal_lazy_tabs.add('portal_observability', "📈 Observability", self._create_observability_section)
         
         # Sub-tab 7: Study Materials
-        materials_tab = tk.Frame(portal_notebook, bg='white')
-        portal_notebook.add(materials_tab, text="📚 Study Materials")
-        self._create_study_materials_section(materials_tab)
+        self.portal_lazy_tabs.add('portal_materials', "📚 Study Materials", self._create_study_materials_section)
+        self.portal_lazy_tabs.select('portal_qr')
 
     def _create_broadcast_section(self, parent):
         """Create broadcast notice management section"""
@@ -10684,291 +9968,202 @@ Note: This is an automated email. Please find the attached formal overdue letter
         self.obs_insights_container.pack(fill=tk.X, padx=20, pady=(10, 20))
         
         self.obs_scrollable_frame = scrollable_frame
-        self.traffic_graph_container = self.obs_charts_row1
-        
-        self._refresh_observability_dashboard(scrollable_frame)
-
-    def _refresh_observability_dashboard(self, parent):
-        """Refresh all observability components with comprehensive analytics"""
-        # Clear all containers
-        for container in [self.obs_kpi_container, self.obs_charts_row1, 
-                          self.obs_charts_row2, self.obs_trend_container, self.obs_insights_container]:
-            for widget in container.winfo_children():
-                widget.destroy()
-        
-        try:
-            # Connect to portal DB
-            portal_db_path = os.path.join(os.path.dirname(__file__), 'Web-Extension', 'portal.db')
-            if not os.path.exists(portal_db_path):
-                tk.Label(self.obs_kpi_container, text="⚠️ Portal Database not found. Start the server to generate logs.",
-                    font=('Segoe UI', 12), bg='white', fg='#dc3545').pack(pady=30)
-                return
-            
-            conn = sqlite3.connect(portal_db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Check if table exists
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='access_logs'")
-            if not cursor.fetchone():
-                tk.Label(self.obs_kpi_container, text="⚠️ Access Logs table not found.",
-                    font=('Segoe UI', 12), bg='white', fg='#dc3545').pack(pady=30)
-                conn.close()
-                return
-
-            # ═══════════════════════════════════════════════════════════════
-            # FETCH ALL METRICS
-            # ═══════════════════════════════════════════════════════════════
-            
-            # Total requests (24h)
-            cursor.execute("SELECT COUNT(*) FROM access_logs WHERE timestamp >= datetime('now', '-24 hours')")
-            total_24h = cursor.fetchone()[0] or 0
-            
-            # Total requests (7 days)
-            cursor.execute("SELECT COUNT(*) FROM access_logs WHERE timestamp >= datetime('now', '-7 days')")
-            total_7d = cursor.fetchone()[0] or 0
-            
-            # Success rate (2xx)
-            cursor.execute("SELECT COUNT(*) FROM access_logs WHERE status >= 200 AND status < 300 AND timestamp >= datetime('now', '-24 hours')")
-            success_24h = cursor.fetchone()[0] or 0
-            success_rate = (success_24h / total_24h * 100) if total_24h > 0 else 0
-            
-            # Error count (4xx, 5xx)
-            cursor.execute("SELECT COUNT(*) FROM access_logs WHERE status >= 400 AND timestamp >= datetime('now', '-24 hours')")
-            errors_24h = cursor.fetchone()[0] or 0
-            
-            # Peak hour
-            cursor.execute("""
-                SELECT strftime('%H', timestamp) as hour, COUNT(*) as cnt
-                FROM access_logs WHERE timestamp >= datetime('now', '-24 hours')
-                GROUP BY hour ORDER BY cnt DESC LIMIT 1
-            """)
-            peak_row = cursor.fetchone()
-            peak_hour = f"{peak_row['hour']}:00" if peak_row else "N/A"
-            peak_count = peak_row['cnt'] if peak_row else 0
-            
-            # Requests per hour (last 24h)
-            cursor.execute("""
-                SELECT strftime('%H', timestamp) as hour, COUNT(*) as count
-                FROM access_logs WHERE timestamp >= datetime('now', '-24 hours')
-                GROUP BY hour ORDER BY hour
-            """)
-            hourly_data = {row['hour']: row['count'] for row in cursor.fetchall()}
-            
-            # Top endpoints
-            cursor.execute("""
-                SELECT endpoint, COUNT(*) as count FROM access_logs
-                WHERE timestamp >= datetime('now', '-24 hours')
-                GROUP BY endpoint ORDER BY count DESC LIMIT 8
-            """)
-            endpoint_data = [(row['endpoint'], row['count']) for row in cursor.fetchall()]
-            
-            # Status code distribution
-            cursor.execute("""
-                SELECT 
-                    CASE 
-                        WHEN status >= 200 AND status < 300 THEN '2xx Success'
-                        WHEN status >= 300 AND status < 400 THEN '3xx Redirect'
-                        WHEN status >= 400 AND status < 500 THEN '4xx Client Error'
-                        WHEN status >= 500 THEN '5xx Server Error'
-                        ELSE 'Other'
-                    END as category, COUNT(*) as count
-                FROM access_logs WHERE timestamp >= datetime('now', '-24 hours')
-                GROUP BY category
-            """)
-            status_data = {row['category']: row['count'] for row in cursor.fetchall()}
-            
-            # 7-day trend
-            cursor.execute("""
-                SELECT date(timestamp) as day, COUNT(*) as count
-                FROM access_logs WHERE timestamp >= datetime('now', '-7 days')
-                GROUP BY day ORDER BY day
-            """)
-            trend_data = [(row['day'], row['count']) for row in cursor.fetchall()]
-            
+        self.traffic_graph_container = self.obs_charts_row1
+        # Widgets are (re)built on the first snapshot for these containers
+        self._obs_view = None
+        self._obs_snapshot = None
+        
+        self._refresh_observability_dashboard(scrollable_frame)
+
+    def _refresh_observability_dashboard(self, parent):
+        """Refresh all observability components with comprehensive analytics.
+        Metrics are aggregated by a background worker; the Tk thread only applies
+        the resulting immutable snapshot to the existing widgets."""
+        if getattr(self, '_obs_refresh_running', False):
+            return  # A refresh is already in flight; its snapshot will be shown
+        self._obs_refresh_running = True
+        self.obs_last_updated.config(text="Refreshing...")
+        portal_db_path = os.path.join(os.path.dirname(__file__), 'Web-Extension', 'portal.db')
+        self.run_in_background_thread(
+            self._collect_observability_snapshot,
+            self._apply_observability_snapshot,
+            task_key='observability',
+            priority=PRIORITY_BACKGROUND,
+            portal_db_path=portal_db_path
+        )
+
+    def _collect_observability_snapshot(self, portal_db_path):
+        """Worker: fold new access logs into the rollups and aggregate every KPI in one pass.
+        Returns a log_rollup.DashboardSnapshot, or a message string when there is no data source."""
+        if not os.path.exists(portal_db_path):
+            return "⚠️ Portal Database not found. Start the server to generate logs."
+        if log_rollup is None:
+            return "⚠️ Observability module not available."
+        conn = sqlite3.connect(portal_db_path, timeout=10)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='access_logs'")
+            if not cursor.fetchone():
+                return "⚠️ Access Logs table not found."
+            log_rollup.ensure_rollup_tables(conn)
+            log_rollup.rollup_access_logs(conn)
+            return log_rollup.collect_dashboard_snapshot(conn)
+        finally:
             conn.close()
-            
+
+    def _apply_observability_snapshot(self, result):
+        """Update only the labels and charts whose data changed since the last snapshot"""
+        self._obs_refresh_running = False
+        try:
+            if not self.obs_kpi_container.winfo_exists():
+                return
+        except Exception:
+            return
+
+        if isinstance(result, (str, Exception)):
+            message = result if isinstance(result, str) else f"Error loading observability data: {result}"
+            if getattr(self, '_obs_view', None) is None:
+                for widget in self.obs_kpi_container.winfo_children():
+                    widget.destroy()
+                tk.Label(self.obs_kpi_container, text=message,
+                    font=('Segoe UI', 12), bg='white', fg='#dc3545').pack(pady=30)
+                self.obs_last_updated.config(text="")
+            else:
+                self.obs_last_updated.config(text=message)
+            return
+
+        snapshot = result
+        previous = getattr(self, '_obs_snapshot', None)
+        try:
+            if getattr(self, '_obs_view', None) is None:
+                for widget in self.obs_kpi_container.winfo_children():
+                    widget.destroy()
+                self._obs_view = self._build_observability_view()
+                previous = None
+            view = self._obs_view
+
+            def changed(*fields):
+                return previous is None or any(getattr(previous, f) != getattr(snapshot, f) for f in fields)
+
             # ═══════════════════════════════════════════════════════════════
-            # BUILD KPI CARDS
+            # KPI CARDS
             # ═══════════════════════════════════════════════════════════════
+            success_rate = snapshot.success_rate
             kpis = [
-                ("📊 Total Requests", f"{total_24h:,}", "Last 24 Hours", self.colors['secondary']),
-                ("✅ Success Rate", f"{success_rate:.1f}%", f"{success_24h:,} successful", '#28a745' if success_rate > 95 else '#ffc107' if success_rate > 80 else '#dc3545'),
-                ("⏰ Peak Hour", peak_hour, f"{peak_count:,} requests", '#6f42c1'),
-                ("⚠️ Errors", f"{errors_24h:,}", "4xx + 5xx responses", '#dc3545' if errors_24h > 10 else '#28a745'),
-                ("📈 Weekly Total", f"{total_7d:,}", "Last 7 Days", '#17a2b8'),
+                (f"{snapshot.total_24h:,}", "Last 24 Hours", self.colors['secondary']),
+                (f"{success_rate:.1f}%", f"{snapshot.success_24h:,} successful", '#28a745' if success_rate > 95 else '#ffc107' if success_rate > 80 else '#dc3545'),
+                (snapshot.peak_hour, f"{snapshot.peak_count:,} requests", '#6f42c1'),
+                (f"{snapshot.errors_24h:,}", "4xx + 5xx responses", '#dc3545' if snapshot.errors_24h > 10 else '#28a745'),
+                (f"{snapshot.total_7d:,}", "Last 7 Days", '#17a2b8'),
             ]
-            
-            for i, (title, value, subtitle, color) in enumerate(kpis):
-                card = tk.Frame(self.obs_kpi_container, bg=color, relief='flat', bd=0)
-                card.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
-                
-                inner = tk.Frame(card, bg='white', relief='flat')
-                inner.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
-                
-                tk.Label(inner, text=title, font=('Segoe UI', 9), bg='white', fg='#666').pack(pady=(10, 2))
-                tk.Label(inner, text=value, font=('Segoe UI', 22, 'bold'), bg='white', fg=color).pack()
-                tk.Label(inner, text=subtitle, font=('Segoe UI', 8), bg='white', fg='#888').pack(pady=(2, 10))
-            
+            for card, kpi in zip(view['kpi_cards'], kpis):
+                if card['values'] == kpi:
+                    continue
+                value, subtitle, color = kpi
+                card['frame'].config(bg=color)
+                card['value'].config(text=value, fg=color)
+                card['subtitle'].config(text=subtitle)
+                card['values'] = kpi
+
             # ═══════════════════════════════════════════════════════════════
-            # CHART 1: Hourly Traffic (Bar Chart)
+            # CHART 1: Hourly Traffic - update bar heights in place
             # ═══════════════════════════════════════════════════════════════
-            chart1_frame = tk.LabelFrame(self.obs_charts_row1, text=" 📊 Requests by Hour (24h) ", 
-                font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
-            chart1_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
-            
-            fig1 = Figure(figsize=(5, 3), dpi=100)
-            fig1.patch.set_facecolor('white')
-            ax1 = fig1.add_subplot(111)
-            
-            hours = [f"{h:02d}" for h in range(24)]
-            counts = [hourly_data.get(h, 0) for h in hours]
-            colors_bars = [self.colors['secondary'] if c < peak_count else '#28a745' for c in counts]
-            
-            ax1.bar(hours, counts, color=colors_bars, alpha=0.85, width=0.7)
-            ax1.set_xlabel("Hour", fontsize=8)
-            ax1.set_ylabel("Requests", fontsize=8)
-            ax1.tick_params(axis='both', labelsize=7)
-            ax1.spines['top'].set_visible(False)
-            ax1.spines['right'].set_visible(False)
-            ax1.grid(axis='y', alpha=0.3, linestyle='--')
-            fig1.tight_layout()
-            
-            canvas1 = FigureCanvasTkAgg(fig1, chart1_frame)
-            canvas1.draw()
-            canvas1.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            
+            if changed('hourly', 'peak_count'):
+                for bar, count in zip(view['hourly_bars'], snapshot.hourly):
+                    bar.set_height(count)
+                    bar.set_color(self.colors['secondary'] if count < snapshot.peak_count else '#28a745')
+                ax1 = view['hourly_ax']
+                ax1.relim()
+                ax1.autoscale_view()
+                view['hourly_canvas'].draw_idle()
+
             # ═══════════════════════════════════════════════════════════════
             # CHART 2: Top Endpoints (Horizontal Bar)
             # ═══════════════════════════════════════════════════════════════
-            chart2_frame = tk.LabelFrame(self.obs_charts_row1, text=" 🔗 Top Endpoints ", 
-                font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
-            chart2_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            fig2 = Figure(figsize=(5, 3), dpi=100)
-            fig2.patch.set_facecolor('white')
-            ax2 = fig2.add_subplot(111)
-            
-            if endpoint_data:
-                endpoints = [e[0][-25:] for e in reversed(endpoint_data)]  # Truncate long names
-                ep_counts = [e[1] for e in reversed(endpoint_data)]
-                ax2.barh(endpoints, ep_counts, color='#6f42c1', alpha=0.8)
-                ax2.set_xlabel("Requests", fontsize=8)
-                ax2.tick_params(axis='both', labelsize=7)
-            else:
-                ax2.text(0.5, 0.5, "No data", ha='center', va='center')
-            ax2.spines['top'].set_visible(False)
-            ax2.spines['right'].set_visible(False)
-            fig2.tight_layout()
-            
-            canvas2 = FigureCanvasTkAgg(fig2, chart2_frame)
-            canvas2.draw()
-            canvas2.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            
+            if changed('top_endpoints'):
+                ax2 = view['endpoints_ax']
+                ax2.clear()
+                if snapshot.top_endpoints:
+                    endpoints = [e[0][-25:] for e in reversed(snapshot.top_endpoints)]  # Truncate long names
+                    ep_counts = [e[1] for e in reversed(snapshot.top_endpoints)]
+                    ax2.barh(endpoints, ep_counts, color='#6f42c1', alpha=0.8)
+                    ax2.set_xlabel("Requests", fontsize=8)
+                    ax2.tick_params(axis='both', labelsize=7)
+                else:
+                    ax2.text(0.5, 0.5, "No data", ha='center', va='center')
+                ax2.spines['top'].set_visible(False)
+                ax2.spines['right'].set_visible(False)
+                view['endpoints_fig'].tight_layout()
+                view['endpoints_canvas'].draw_idle()
+
             # ═══════════════════════════════════════════════════════════════
             # CHART 3: Status Code Pie
             # ═══════════════════════════════════════════════════════════════
-            chart3_frame = tk.LabelFrame(self.obs_charts_row2, text=" 🎯 Response Status Distribution ", 
-                font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
-            chart3_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
-            
-            fig3 = Figure(figsize=(4, 3), dpi=100)
-            fig3.patch.set_facecolor('white')
-            ax3 = fig3.add_subplot(111)
-            
-            if status_data:
-                labels = list(status_data.keys())
-                sizes = list(status_data.values())
-                colors_pie = ['#28a745', '#17a2b8', '#ffc107', '#dc3545', '#6c757d'][:len(labels)]
-                wedges, texts, autotexts = ax3.pie(sizes, labels=labels, autopct='%1.0f%%', 
-                    colors=colors_pie, startangle=90, textprops={'fontsize': 8})
-                for autotext in autotexts:
-                    autotext.set_fontsize(8)
-                    autotext.set_fontweight('bold')
-            else:
-                ax3.text(0.5, 0.5, "No data", ha='center', va='center')
-            ax3.axis('equal')
-            fig3.tight_layout()
-            
-            canvas3 = FigureCanvasTkAgg(fig3, chart3_frame)
-            canvas3.draw()
-            canvas3.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            
+            if changed('status_distribution'):
+                ax3 = view['status_ax']
+                ax3.clear()
+                if snapshot.status_distribution:
+                    labels = [s[0] for s in snapshot.status_distribution]
+                    sizes = [s[1] for s in snapshot.status_distribution]
+                    colors_pie = ['#28a745', '#17a2b8', '#ffc107', '#dc3545', '#6c757d'][:len(labels)]
+                    wedges, texts, autotexts = ax3.pie(sizes, labels=labels, autopct='%1.0f%%',
+                        colors=colors_pie, startangle=90, textprops={'fontsize': 8})
+                    for autotext in autotexts:
+                        autotext.set_fontsize(8)
+                        autotext.set_fontweight('bold')
+                else:
+                    ax3.text(0.5, 0.5, "No data", ha='center', va='center')
+                ax3.axis('equal')
+                view['status_canvas'].draw_idle()
+
             # ═══════════════════════════════════════════════════════════════
-            # CHART 4: Live Metrics Panel
+            # CHART 4: Quick Stats Panel
             # ═══════════════════════════════════════════════════════════════
-            chart4_frame = tk.LabelFrame(self.obs_charts_row2, text=" 📈 Quick Stats ", 
-                font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
-            chart4_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            
-            stats_inner = tk.Frame(chart4_frame, bg='white')
-            stats_inner.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
-            
-            avg_per_hour = total_24h / 24 if total_24h else 0
-            unique_endpoints = len(endpoint_data)
-            
-            quick_stats = [
-                ("📊 Avg Requests/Hour", f"{avg_per_hour:.1f}"),
-                ("🔗 Unique Endpoints", f"{unique_endpoints}"),
-                ("🟢 2xx Responses", f"{status_data.get('2xx Success', 0):,}"),
-                ("🟡 4xx Responses", f"{status_data.get('4xx Client Error', 0):,}"),
-                ("🔴 5xx Responses", f"{status_data.get('5xx Server Error', 0):,}"),
+            status_counts = dict(snapshot.status_distribution)
+            avg_per_hour = snapshot.total_24h / 24 if snapshot.total_24h else 0
+            quick_values = [
+                f"{avg_per_hour:.1f}",
+                f"{len(snapshot.top_endpoints)}",
+                f"{status_counts.get('2xx Success', 0):,}",
+                f"{status_counts.get('4xx Client Error', 0):,}",
+                f"{status_counts.get('5xx Server Error', 0):,}",
+                f"{snapshot.avg_latency_ms:.0f} ms" if snapshot.avg_latency_ms is not None else "N/A",
             ]
-            
-            for label, val in quick_stats:
-                row = tk.Frame(stats_inner, bg='white')
-                row.pack(fill=tk.X, pady=3)
-                tk.Label(row, text=label, font=('Segoe UI', 9), bg='white', fg='#555', anchor='w').pack(side=tk.LEFT)
-                tk.Label(row, text=val, font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'], anchor='e').pack(side=tk.RIGHT)
-            
+            for label, val in zip(view['quick_stats'], quick_values):
+                if label.cget('text') != val:
+                    label.config(text=val)
+
             # ═══════════════════════════════════════════════════════════════
             # CHART 5: 7-Day Trend (Line Chart)
             # ═══════════════════════════════════════════════════════════════
-            trend_frame = tk.LabelFrame(self.obs_trend_container, text=" 📅 7-Day Traffic Trend ", 
-                font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
-            trend_frame.pack(fill=tk.BOTH, expand=True)
-            
-            fig5 = Figure(figsize=(10, 2.5), dpi=100)
-            fig5.patch.set_facecolor('white')
-            ax5 = fig5.add_subplot(111)
-            
-            if trend_data:
-                days = [t[0][-5:] for t in trend_data]  # MM-DD format
-                day_counts = [t[1] for t in trend_data]
-                ax5.fill_between(range(len(days)), day_counts, alpha=0.3, color=self.colors['secondary'])
-                ax5.plot(range(len(days)), day_counts, color=self.colors['secondary'], linewidth=2, marker='o', markersize=6)
-                ax5.set_xticks(range(len(days)))
-                ax5.set_xticklabels(days, fontsize=8)
-                ax5.set_ylabel("Requests", fontsize=9)
-                for i, v in enumerate(day_counts):
-                    ax5.annotate(str(v), (i, v), textcoords="offset points", xytext=(0, 8), ha='center', fontsize=8, fontweight='bold')
-            else:
-                ax5.text(0.5, 0.5, "No trend data available", ha='center', va='center')
-            ax5.spines['top'].set_visible(False)
-            ax5.spines['right'].set_visible(False)
-            ax5.grid(axis='y', alpha=0.3, linestyle='--')
-            fig5.tight_layout()
-            
-            canvas5 = FigureCanvasTkAgg(fig5, trend_frame)
-            canvas5.draw()
-            canvas5.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            
+            if changed('trend'):
+                ax5 = view['trend_ax']
+                ax5.clear()
+                if snapshot.trend:
+                    days = [t[0][-5:] for t in snapshot.trend]  # MM-DD format
+                    day_counts = [t[1] for t in snapshot.trend]
+                    ax5.fill_between(range(len(days)), day_counts, alpha=0.3, color=self.colors['secondary'])
+                    ax5.plot(range(len(days)), day_counts, color=self.colors['secondary'], linewidth=2, marker='o', markersize=6)
+                    ax5.set_xticks(range(len(days)))
+                    ax5.set_xticklabels(days, fontsize=8)
+                    ax5.set_ylabel("Requests", fontsize=9)
+                    for i, v in enumerate(day_counts):
+                        ax5.annotate(str(v), (i, v), textcoords="offset points", xytext=(0, 8), ha='center', fontsize=8, fontweight='bold')
+                else:
+                    ax5.text(0.5, 0.5, "No trend data available", ha='center', va='center')
+                ax5.spines['top'].set_visible(False)
+                ax5.spines['right'].set_visible(False)
+                ax5.grid(axis='y', alpha=0.3, linestyle='--')
+                view['trend_fig'].tight_layout()
+                view['trend_canvas'].draw_idle()
+
             # ═══════════════════════════════════════════════════════════════
             # INSIGHTS PANEL
             # ═══════════════════════════════════════════════════════════════
-            insights_header = tk.Frame(self.obs_insights_container, bg='#f0f8ff')
-            insights_header.pack(fill=tk.X, padx=15, pady=(10, 5))
-            
-            tk.Label(insights_header, text="💡 Intelligent Insights", 
-                font=('Segoe UI', 12, 'bold'), bg='#f0f8ff', fg=self.colors['accent']).pack(side=tk.LEFT)
-            
-            insights_content = tk.Frame(self.obs_insights_container, bg='#f0f8ff')
-            insights_content.pack(fill=tk.X, padx=15, pady=(0, 15))
-            
-            # Generate insights
             insights = []
-            if peak_hour != "N/A":
-                insights.append(f"⏰ Peak traffic occurs at {peak_hour} with {peak_count:,} requests")
+            total_24h, total_7d, errors_24h = snapshot.total_24h, snapshot.total_7d, snapshot.errors_24h
+            if snapshot.peak_hour != "N/A":
+                insights.append(f"⏰ Peak traffic occurs at {snapshot.peak_hour} with {snapshot.peak_count:,} requests")
             if success_rate < 95:
                 insights.append(f"⚠️ Success rate is {success_rate:.1f}% - investigate error responses")
             elif success_rate >= 99:
@@ -10986,23 +10181,127 @@ Note: This is an automated email. Please find the attached formal overdue letter
                     insights.append("🚀 Today's traffic is 50%+ higher than the weekly average!")
                 elif total_24h < daily_avg * 0.5:
                     insights.append("📉 Today's traffic is below the weekly average")
-            
             if not insights:
                 insights.append("ℹ️ Collecting more data for actionable insights...")
-            
-            for insight in insights:
-                tk.Label(insights_content, text=f"  • {insight}", 
-                    font=('Segoe UI', 10), bg='#f0f8ff', fg='#333', anchor='w').pack(fill=tk.X, pady=2)
-            
-            # Update timestamp
-            self.obs_last_updated.config(text=f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
-            
+
+            if insights != view['insights']:
+                for widget in view['insights_content'].winfo_children():
+                    widget.destroy()
+                for insight in insights:
+                    tk.Label(view['insights_content'], text=f"  • {insight}",
+                        font=('Segoe UI', 10), bg='#f0f8ff', fg='#333', anchor='w').pack(fill=tk.X, pady=2)
+                view['insights'] = insights
+
+            self._obs_snapshot = snapshot
+            self.obs_last_updated.config(text=f"Last updated: {snapshot.generated_at}")
+
         except Exception as e:
-            tk.Label(self.obs_kpi_container, text=f"Error loading observability data: {e}",
-                font=('Segoe UI', 11), bg='white', fg='#dc3545').pack(pady=30)
+            self.obs_last_updated.config(text=f"Error loading observability data: {e}")
             import traceback
             traceback.print_exc()
 
+    def _build_observability_view(self):
+        """Create the observability widgets and matplotlib figures once.
+        Returns the widget/artist references that snapshots are applied to."""
+        view = {'kpi_cards': [], 'quick_stats': [], 'insights': None}
+
+        # KPI cards (values are filled in by _apply_observability_snapshot)
+        kpi_titles = ["📊 Total Requests", "✅ Success Rate", "⏰ Peak Hour", "⚠️ Errors", "📈 Weekly Total"]
+        for title in kpi_titles:
+            card = tk.Frame(self.obs_kpi_container, bg=self.colors['secondary'], relief='flat', bd=0)
+            card.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+            inner = tk.Frame(card, bg='white', relief='flat')
+            inner.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+
+            tk.Label(inner, text=title, font=('Segoe UI', 9), bg='white', fg='#666').pack(pady=(10, 2))
+            value_label = tk.Label(inner, text="-", font=('Segoe UI', 22, 'bold'), bg='white', fg=self.colors['secondary'])
+            value_label.pack()
+            subtitle_label = tk.Label(inner, text="", font=('Segoe UI', 8), bg='white', fg='#888')
+            subtitle_label.pack(pady=(2, 10))
+            view['kpi_cards'].append({'frame': card, 'value': value_label, 'subtitle': subtitle_label, 'values': None})
+
+        # Chart 1: Requests by hour - 24 bars created once, heights updated per snapshot
+        chart1_frame = tk.LabelFrame(self.obs_charts_row1, text=" 📊 Requests by Hour (24h) ",
+            font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
+        chart1_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
+
+        fig1 = Figure(figsize=(5, 3), dpi=100)
+        fig1.patch.set_facecolor('white')
+        ax1 = fig1.add_subplot(111)
+        hours = [f"{h:02d}" for h in range(24)]
+        view['hourly_bars'] = ax1.bar(hours, [0] * 24, color=self.colors['secondary'], alpha=0.85, width=0.7)
+        ax1.set_xlabel("Hour", fontsize=8)
+        ax1.set_ylabel("Requests", fontsize=8)
+        ax1.tick_params(axis='both', labelsize=7)
+        ax1.spines['top'].set_visible(False)
+        ax1.spines['right'].set_visible(False)
+        ax1.grid(axis='y', alpha=0.3, linestyle='--')
+        fig1.tight_layout()
+        canvas1 = FigureCanvasTkAgg(fig1, chart1_frame)
+        canvas1.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        view['hourly_ax'], view['hourly_canvas'] = ax1, canvas1
+
+        # Chart 2: Top endpoints
+        chart2_frame = tk.LabelFrame(self.obs_charts_row1, text=" 🔗 Top Endpoints ",
+            font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
+        chart2_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        fig2 = Figure(figsize=(5, 3), dpi=100)
+        fig2.patch.set_facecolor('white')
+        ax2 = fig2.add_subplot(111)
+        canvas2 = FigureCanvasTkAgg(fig2, chart2_frame)
+        canvas2.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        view['endpoints_fig'], view['endpoints_ax'], view['endpoints_canvas'] = fig2, ax2, canvas2
+
+        # Chart 3: Status code pie
+        chart3_frame = tk.LabelFrame(self.obs_charts_row2, text=" 🎯 Response Status Distribution ",
+            font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
+        chart3_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
+        fig3 = Figure(figsize=(4, 3), dpi=100)
+        fig3.patch.set_facecolor('white')
+        ax3 = fig3.add_subplot(111)
+        canvas3 = FigureCanvasTkAgg(fig3, chart3_frame)
+        canvas3.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        view['status_ax'], view['status_canvas'] = ax3, canvas3
+
+        # Chart 4: Quick stats panel
+        chart4_frame = tk.LabelFrame(self.obs_charts_row2, text=" 📈 Quick Stats ",
+            font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
+        chart4_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        stats_inner = tk.Frame(chart4_frame, bg='white')
+        stats_inner.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        quick_labels = ["📊 Avg Requests/Hour", "🔗 Unique Endpoints", "🟢 2xx Responses",
+                        "🟡 4xx Responses", "🔴 5xx Responses", "⏱️ Avg Response Time"]
+        for label in quick_labels:
+            row = tk.Frame(stats_inner, bg='white')
+            row.pack(fill=tk.X, pady=3)
+            tk.Label(row, text=label, font=('Segoe UI', 9), bg='white', fg='#555', anchor='w').pack(side=tk.LEFT)
+            value_label = tk.Label(row, text="-", font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'], anchor='e')
+            value_label.pack(side=tk.RIGHT)
+            view['quick_stats'].append(value_label)
+
+        # Chart 5: 7-day trend
+        trend_frame = tk.LabelFrame(self.obs_trend_container, text=" 📅 7-Day Traffic Trend ",
+            font=('Segoe UI', 10, 'bold'), bg='white', fg=self.colors['accent'])
+        trend_frame.pack(fill=tk.BOTH, expand=True)
+        fig5 = Figure(figsize=(10, 2.5), dpi=100)
+        fig5.patch.set_facecolor('white')
+        ax5 = fig5.add_subplot(111)
+        canvas5 = FigureCanvasTkAgg(fig5, trend_frame)
+        canvas5.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        view['trend_fig'], view['trend_ax'], view['trend_canvas'] = fig5, ax5, canvas5
+
+        # Insights panel
+        insights_header = tk.Frame(self.obs_insights_container, bg='#f0f8ff')
+        insights_header.pack(fill=tk.X, padx=15, pady=(10, 5))
+        tk.Label(insights_header, text="💡 Intelligent Insights",
+            font=('Segoe UI', 12, 'bold'), bg='#f0f8ff', fg=self.colors['accent']).pack(side=tk.LEFT)
+        insights_content = tk.Frame(self.obs_insights_container, bg='#f0f8ff')
+        insights_content.pack(fill=tk.X, padx=15, pady=(0, 15))
+        view['insights_content'] = insights_content
+
+        return view
+
     def _refresh_traffic_graph(self, parent):
 
         """Fetch logs and plot traffic"""
@@ -11027,12 +10326,15 @@ Note: This is an automated email. Please find the attached formal overdue letter
                conn.close()
                return
 
-            # Get recent traffic (last 24h) by hour
-            # Note: strftime('%H', timestamp) requires timestamp to be a valid string
+            # Get recent traffic (last 24h) by hour from the hourly rollup
+            if log_rollup is None:
+                raise RuntimeError("log_rollup module not available")
+            log_rollup.ensure_rollup_tables(conn)
+            log_rollup.rollup_access_logs(conn)
             cursor.execute("""
-                SELECT strftime('%H', timestamp) as hour, COUNT(*) as count
-                FROM access_logs
-                WHERE timestamp >= datetime('now', '-24 hours')
+                SELECT substr(bucket, 12, 2) as hour, SUM(request_count) as count
+                FROM access_logs_hourly
+                WHERE bucket >= strftime('%Y-%m-%d %H:00:00', 'now', '-23 hours')
                 GROUP BY hour
                 ORDER BY hour
             """)
@@ -14001,66 +13303,86 @@ Note: This is an automated email. Please find the attached formal overdue letter
 
     
     def refresh_analysis(self):
-        """Refresh all analysis charts based on selected time period (Threaded implementation)"""
-        if not MATPLOTLIB_AVAILABLE:
+        """Request an Analysis refresh.
+
+        Bursts of calls (e.g. refresh_dashboard after several writes) are coalesced
+        into one refresh, and nothing is rendered while the Analysis tab is hidden;
+        the pending refresh runs when the tab is shown.
+        """
+        if not MATPLOTLIB_AVAILABLE or not hasattr(self, 'stats_summary_frame'):
             return
-        
-        # If charts are hidden, clear frames and show a small placeholder
+        if getattr(self, '_analysis_refresh_job', None):
+            return
+        self._analysis_refresh_job = self.root.after(ANALYSIS_REFRESH_DELAY_MS, self._run_scheduled_analysis_refresh)
+
+    def _run_scheduled_analysis_refresh(self):
+        self._analysis_refresh_job = None
+        if not self._analysis_tab_visible():
+            self._analysis_dirty = True
+            return
+        self._analysis_dirty = False
+        self._refresh_analysis_now()
+
+    def _analysis_tab_visible(self):
+        """True when the Analysis tab is the selected notebook tab"""
+        try:
+            return str(self.notebook.select()) == str(self.analysis_tab_frame)
+        except Exception:
+            return True
+
+    def _on_notebook_tab_changed(self, event=None):
+        """Run the refresh deferred while the Analysis tab was hidden"""
+        if getattr(self, '_analysis_dirty', False) and self._analysis_tab_visible():
+            self.refresh_analysis()
+
+    def _refresh_analysis_now(self):
+        """Refresh all analysis charts based on selected time period (Threaded implementation)"""
+        # If charts are hidden, hide the canvases and show a small placeholder
         if hasattr(self, 'analysis_show_charts') and not self.analysis_show_charts.get():
-            def _clear_and_placeholder(frame, text):
-                for w in frame.winfo_children():
-                    w.destroy()
-                tk.Label(frame, text=text, font=('Segoe UI', 11), bg=self.colors['primary'], fg='#666').pack(expand=True, pady=20)
-            _clear_and_placeholder(self.borrow_status_frame, "Charts hidden")
-            _clear_and_placeholder(self.student_activity_frame, "Charts hidden")
-            if hasattr(self, 'inventory_overdue_frame'):
-                _clear_and_placeholder(self.inventory_overdue_frame, "Charts hidden")
+            for name in ('borrow_status', 'student_activity', 'inventory_overdue',
+                         'daily_trend', 'popular_books', 'least_popular_books'):
+                slot = self._analysis_chart_slot(name)
+                if slot is not None:
+                    slot.show_message("Charts hidden", font=('Segoe UI', 11), fg='#666')
             # Also clear summary
             for w in self.stats_summary_frame.winfo_children():
                 w.destroy()
             tk.Label(self.stats_summary_frame, text="Charts are hidden. Enable 'Show Charts' to view.", font=('Segoe UI', 11), bg=self.colors['primary'], fg='#666').pack(pady=10)
+            self._analysis_rendered_key = None
             return
 
-        # Clear existing widgets to avoid duplicates (charts, labels, legends)
-        def _clear(frame):
-            try:
-                for w in frame.winfo_children():
-                    w.destroy()
-            except Exception:
-                pass
-        _clear(self.borrow_status_frame)
-        _clear(self.student_activity_frame)
-        if hasattr(self, 'daily_trend_frame'): _clear(self.daily_trend_frame)
-        if hasattr(self, 'popular_books_frame'): _clear(self.popular_books_frame)
-        if hasattr(self, 'least_popular_books_frame'): _clear(self.least_popular_books_frame)
-        if hasattr(self, 'inventory_overdue_frame'): _clear(self.inventory_overdue_frame)
-        _clear(self.stats_summary_frame)
-        
-        # Clear focused frames
-        for w in self.student_specific_frame.winfo_children():
-            if isinstance(w, FigureCanvasTkAgg): w.get_tk_widget().destroy()
-            else: w.destroy()
-        for w in self.book_specific_frame.winfo_children():
-            if isinstance(w, FigureCanvasTkAgg): w.get_tk_widget().destroy()
-            else: w.destroy()
-
-        # Show Loading Indicator
-        tk.Label(self.stats_summary_frame, text="⏳ Loading analysis data...", font=('Segoe UI', 12), bg=self.colors['primary'], fg='#666').pack(pady=20)
-        
         days = int(self.analysis_period.get())
         en = self.analysis_filter.get('enrollment_no')
         bk = self.analysis_filter.get('book_id')
+        compact = bool(hasattr(self, 'analysis_compact_mode') and self.analysis_compact_mode.get())
+
+        # Nothing changed since the charts on screen were drawn: keep them
+        render_key = (days, en, bk, compact, self._analytics_version())
+        if getattr(self, '_analysis_rendered_key', None) == render_key:
+            return
+        self._analysis_rendered_key = None
+
+        # Charts stay on screen and are updated in place when the data arrives;
+        # only the summary cards are rebuilt
+        for w in self.stats_summary_frame.winfo_children():
+            w.destroy()
+
+        # Show Loading Indicator
+        tk.Label(self.stats_summary_frame, text="⏳ Loading analysis data...", font=('Segoe UI', 12), bg=self.colors['primary'], fg='#666').pack(pady=20)
         
         self.analysis_filter_summary.config(text="Loading filter details...")
         
-        # Run in background
+        # Run in background (served from the analytics cache when the data is unchanged)
         self.run_in_background_thread(
-            self._fetch_analysis_data, 
-            self._on_analysis_data_ready, 
-            days=days, enrollment_no=en, book_id=bk
+            lambda: self._get_cached_analytics(
+                'analysis', lambda: self._fetch_analysis_data(days=days, enrollment_no=en, book_id=bk),
+                days=days, enrollment_no=en, book_id=bk),
+            lambda result: self._on_analysis_data_ready(result, render_key=render_key),
+            task_key='analysis',
+            priority=PRIORITY_BACKGROUND
         )
 
-    def _on_analysis_data_ready(self, result):
+    def _on_analysis_data_ready(self, result, render_key=None):
         try:
             # Clear loading indicator
             for w in self.stats_summary_frame.winfo_children():
@@ -14104,17 +13426,51 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 if not self.student_specific_frame.winfo_manager():
                     self.student_specific_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
                 self.create_student_specific_pie(days, self.analysis_filter.get('enrollment_no'), data=data.get('student_specific'))
+            else:
+                self._analysis_chart_slot('student_specific').hide()
 
             if 'book_specific' in data and data['book_specific']:
                 if not self.book_specific_frame.winfo_manager():
                     self.book_specific_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0))
                 self.create_book_specific_pie(days, self.analysis_filter.get('book_id'), data=data.get('book_specific'))
+            else:
+                self._analysis_chart_slot('book_specific').hide()
+
+            self._analysis_rendered_key = render_key
         except Exception as e:
             print(f"Error in _on_analysis_data_ready: {e}")
     
+    def _analysis_chart_slot(self, name):
+        """Persistent ChartSlot for one Analysis chart frame (None if that frame does not exist)"""
+        focused_pack = {'side': tk.LEFT, 'fill': tk.BOTH, 'expand': True, 'padx': 10, 'pady': 10}
+        specs = {
+            'borrow_status': ('borrow_status_frame', (6, 4), None),
+            'student_activity': ('student_activity_frame', (6, 4), None),
+            'inventory_overdue': ('inventory_overdue_frame', (6, 4), None),
+            'daily_trend': ('daily_trend_frame', (6, 4), None),
+            'popular_books': ('popular_books_frame', (6, 4), None),
+            'least_popular_books': ('least_popular_books_frame', (6, 4), None),
+            'student_specific': ('student_specific_frame', (4.5, 3.5), focused_pack),
+            'book_specific': ('book_specific_frame', (4.5, 3.5), focused_pack),
+        }
+        frame_attr, figsize, pack_options = specs[name]
+        frame = getattr(self, frame_attr, None)
+        if frame is None:
+            return None
+        if not hasattr(self, '_analysis_slots'):
+            self._analysis_slots = {}
+        slot = self._analysis_slots.get(name)
+        if slot is None or slot.parent is not frame:
+            slot = ChartSlot(frame, figsize=figsize, pack_options=pack_options,
+                             on_canvas_created=getattr(self, '_analysis_bind_wheel', None),
+                             message_bg=self.colors['primary'])
+            self._analysis_slots[name] = slot
+        return slot
+
     def create_borrow_status_pie(self, data=None):
         """Create pie chart showing book status distribution"""
         try:
+            slot = self._analysis_chart_slot('borrow_status')
             # Get data
             if data is not None:
                 results = data
@@ -14139,32 +13495,60 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 conn.close()
             
             if not results:
-                # Clear frame then show no-data message
-                for w in self.borrow_status_frame.winfo_children():
-                    w.destroy()
-                tk.Label(
-                    self.borrow_status_frame,
-                    text="No books or borrow data to display",
-                    font=('Segoe UI', 12), bg=self.colors['primary'], fg='#666'
-                ).pack(expand=True, pady=20)
+                slot.show_message("No books or borrow data to display")
                 return
             
             raw_labels = [row[0] for row in results]
             sizes = [row[1] for row in results]
             labels = [f"{name} ({cnt})" for name, cnt in zip(raw_labels, sizes)]
+            # Labels carry the counts, so equal labels means the chart on screen is current
+            if slot.is_current(tuple(labels)):
+                return
             # Colorblind-friendly palette
             colors = ['#0072B2', '#D55E00', '#F0E442', '#009E73', '#CC79A7', '#56B4E9']
             
-            # Larger, modern figure with tight layout for legends
-            fig = Figure(figsize=(6, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            fig.patch.set_facecolor('white')
-            fig.subplots_adjust(left=0.1, right=0.78)  # Make room for legend
-            
+            def _autopct(pct, allvals=sizes):
+                total = sum(allvals)
+                if total == 0:
+                    return " "
+                val = int(round(pct*total/100.0))
+                return f"{pct:.1f}%\n({val})"
+
+            if slot.needs_rebuild(tuple(raw_labels)):
+                # Larger, modern figure with tight layout for legends
+                fig = slot.fig
+                ax = fig.add_subplot(111)
+                fig.subplots_adjust(left=0.1, right=0.78)  # Make room for legend
+                wedges, texts, autotexts = ax.pie(
+                    sizes, 
+                    labels=labels, 
+                    colors=colors[:len(sizes)],
+                    autopct=_autopct,
+                    startangle=90,
+                    wedgeprops=dict(width=0.32, edgecolor='white')  # donut style, slightly thinner
+                )
+                # Center label with total
+                center = ax.text(0, 0, f"Total\n{sum(sizes)}", ha='center', va='center', fontsize=14, fontweight='bold', color='#333')
+                ax.axis('equal')
+                ax.set_title('Book Status Distribution', fontsize=16, fontweight='bold', color='#0072B2')
+                # Add legend for clarity
+                legend = ax.legend(wedges, labels, title="Status", loc='center left', bbox_to_anchor=(1.0, 0.5), fontsize=10)
+                slot.state.update(ax=ax, wedges=wedges, texts=texts, autotexts=autotexts, center=center, legend=legend)
+            else:
+                st = slot.state
+                update_pie(st['wedges'], sizes, texts=st['texts'], labels=labels,
+                           autotexts=st['autotexts'], autopct=_autopct)
+                st['center'].set_text(f"Total\n{sum(sizes)}")
+                for text, label in zip(st['legend'].get_texts(), labels):
+                    text.set_text(label)
+
+            ax = slot.state['ax']
+            wedges = slot.state['wedges']
+
             def on_pie_click(event):
                 if event.inaxes == ax:
                     # Find which wedge was clicked
-                    for i, (wedge, label, size) in enumerate(zip(ax.patches, labels, sizes)):
+                    for i, wedge in enumerate(wedges):
                         contains, info = wedge.contains(event)
                         if contains:
                             # Check the raw status name (not the formatted label with count)
@@ -14174,46 +13558,10 @@ Note: This is an automated email. Please find the attached formal overdue letter
                             else:
                                 self.show_available_books_dialog()
                             break
+            slot.click_handler = on_pie_click
+            slot.draw(tuple(labels))
             
-            def _autopct(pct, allvals=sizes):
-                total = sum(allvals)
-                if total == 0:
-                    return " "
-                val = int(round(pct*total/100.0))
-                return f"{pct:.1f}%\n({val})"
-
-
-            wedges, texts, autotexts = ax.pie(
-                sizes, 
-                labels=labels, 
-                colors=colors[:len(sizes)],
-                autopct=_autopct,
-                startangle=90,
-                wedgeprops=dict(width=0.32, edgecolor='white')  # donut style, slightly thinner
-            )
-            # Center label with total
-            ax.text(0, 0, f"Total\n{sum(sizes)}", ha='center', va='center', fontsize=14, fontweight='bold', color='#333')
-            ax.axis('equal')
-            ax.set_title('Book Status Distribution', fontsize=16, fontweight='bold', color='#0072B2')
-            # Add legend for clarity
-            ax.legend(wedges, labels, title="Status", loc='center left', bbox_to_anchor=(1.0, 0.5), fontsize=10)
-            
-            # Clear any existing widgets in the frame
-            for widget in self.borrow_status_frame.winfo_children():
-                widget.destroy()
-            
-            # Add to GUI
-            canvas = FigureCanvasTkAgg(fig, self.borrow_status_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            canvas.mpl_connect('button_press_event', on_pie_click)
-            # Ensure wheel scrolling works when cursor is over the figure
-            try:
-                self._analysis_bind_wheel(canvas.get_tk_widget())
-            except Exception:
-                pass
-            
-            self.current_charts['borrow_status'] = (fig, labels, sizes)
+            self.current_charts['borrow_status'] = (slot.fig, labels, sizes)
             
         except Exception as e:
             print(f"Error creating borrow status pie chart: {e}")
@@ -14221,6 +13569,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def create_student_activity_pie(self, days, data=None):
         """Create pie chart showing student activity levels"""
         try:
+            slot = self._analysis_chart_slot('student_activity')
             # Get data
             if data is not None:
                 results = data
@@ -14246,38 +13595,35 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 results = cursor.fetchall()
                 conn.close()
             
+            title = f'Student Activity (Last {days} Days)'
             if not results:
                 # Always render a placeholder donut so the chart area is not blank
-                fig = Figure(figsize=(6, 4), dpi=100)
-                ax = fig.add_subplot(111)
-                fig.patch.set_facecolor('white')
-                fig.subplots_adjust(left=0.1, right=0.78)
-
                 sizes = [1]
                 labels = ["No Activity"]
-                colors = ['#d0d7de']  # light gray
-                wedges, texts = ax.pie(
-                    sizes,
-                    labels=None,
-                    colors=colors,
-                    startangle=90,
-                    wedgeprops=dict(width=0.32, edgecolor='white')
-                )
-                ax.text(0, 0, "No Data", ha='center', va='center', fontsize=14, fontweight='bold', color='#666')
-                ax.axis('equal')
-                ax.set_title(f'Student Activity (Last {days} Days)', fontsize=16, fontweight='bold', color='#D55E00')
-                ax.legend(wedges, labels, title="Year", loc='center left', bbox_to_anchor=(1.0, 0.5), fontsize=10)
-
-                for w in self.student_activity_frame.winfo_children():
-                    w.destroy()
-                canvas = FigureCanvasTkAgg(fig, self.student_activity_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-                try:
-                    self._analysis_bind_wheel(canvas.get_tk_widget())
-                except Exception:
-                    pass
-                self.current_charts['student_activity'] = (fig, labels, sizes)
+                if slot.is_current(('empty', title)):
+                    return
+                if slot.needs_rebuild(('empty',)):
+                    fig = slot.fig
+                    ax = fig.add_subplot(111)
+                    fig.subplots_adjust(left=0.1, right=0.78)
+                    colors = ['#d0d7de']  # light gray
+                    wedges, texts = ax.pie(
+                        sizes,
+                        labels=None,
+                        colors=colors,
+                        startangle=90,
+                        wedgeprops=dict(width=0.32, edgecolor='white')
+                    )
+                    ax.text(0, 0, "No Data", ha='center', va='center', fontsize=14, fontweight='bold', color='#666')
+                    ax.axis('equal')
+                    ax.set_title(title, fontsize=16, fontweight='bold', color='#D55E00')
+                    ax.legend(wedges, labels, title="Year", loc='center left', bbox_to_anchor=(1.0, 0.5), fontsize=10)
+                    slot.state['ax'] = ax
+                else:
+                    slot.state['ax'].set_title(title, fontsize=16, fontweight='bold', color='#D55E00')
+                slot.click_handler = None
+                slot.draw(('empty', title))
+                self.current_charts['student_activity'] = (slot.fig, labels, sizes)
                 return
             
             def _format_year_label(y):
@@ -14298,24 +13644,12 @@ Note: This is an automated email. Please find the attached formal overdue letter
             sizes = [row[1] for row in results]
             # Keep legend labels short to avoid truncation
             labels = list(raw_labels)
+            snapshot = (title, tuple(labels), tuple(sizes))
+            if slot.is_current(snapshot):
+                return
             # Colorblind-friendly palette
             colors = ['#0072B2', '#D55E00', '#F0E442', '#009E73', '#CC79A7', '#56B4E9']
             
-            # Larger, modern figure with tight layout for legends
-            fig = Figure(figsize=(6, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            fig.patch.set_facecolor('white')
-            fig.subplots_adjust(left=0.1, right=0.78)  # Make room for legend
-            
-            def on_activity_click(event):
-                if event.inaxes == ax:
-                    for i, (wedge, label, size) in enumerate(zip(ax.patches, labels, sizes)):
-                        contains, info = wedge.contains(event)
-                        if contains:
-                            year = results[i][0]
-                            self.show_students_by_year_dialog(year, days)
-                            break
-            
             # Explode the largest slice slightly for emphasis
             if sizes:
                 max_idx = sizes.index(max(sizes))
@@ -14327,51 +13661,54 @@ Note: This is an automated email. Please find the attached formal overdue letter
             def autopct_format(pct):
                 return f'{pct:.1f}%' if pct > 5 else ''
             
-            wedges, texts, autotexts = ax.pie(
-                sizes,
-                labels=labels,  # Show labels on slices
-                colors=colors[:len(sizes)],
-                autopct=autopct_format,
-                startangle=90,
-                explode=explode,
-                wedgeprops=dict(width=0.32, edgecolor='white'),  # donut style, thinner
-                textprops={'fontsize': 10, 'weight': 'bold'}
-            )
-            # Make percentage text black for better visibility
-            for autotext in autotexts:
-                autotext.set_color('black')
-            
-            ax.text(0, 0, f"Total\n{sum(sizes)}", ha='center', va='center', fontsize=14, fontweight='bold', color='#333')
-            ax.axis('equal')
-            ax.set_title(f'Student Activity (Last {days} Days)', fontsize=16, fontweight='bold', color='#D55E00')
-            
-            # Clear any existing widgets in the frame
-            for widget in self.student_activity_frame.winfo_children():
-                widget.destroy()
-            
-            # Add to GUI
-            canvas = FigureCanvasTkAgg(fig, self.student_activity_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            canvas.mpl_connect('button_press_event', on_activity_click)
-            try:
-                self._analysis_bind_wheel(canvas.get_tk_widget())
-            except Exception:
-                pass
+            if slot.needs_rebuild(('data', tuple(labels))):
+                # Larger, modern figure with tight layout for legends
+                fig = slot.fig
+                ax = fig.add_subplot(111)
+                fig.subplots_adjust(left=0.1, right=0.78)  # Make room for legend
+                wedges, texts, autotexts = ax.pie(
+                    sizes,
+                    labels=labels,  # Show labels on slices
+                    colors=colors[:len(sizes)],
+                    autopct=autopct_format,
+                    startangle=90,
+                    explode=explode,
+                    wedgeprops=dict(width=0.32, edgecolor='white'),  # donut style, thinner
+                    textprops={'fontsize': 10, 'weight': 'bold'}
+                )
+                # Make percentage text black for better visibility
+                for autotext in autotexts:
+                    autotext.set_color('black')
+                
+                center = ax.text(0, 0, f"Total\n{sum(sizes)}", ha='center', va='center', fontsize=14, fontweight='bold', color='#333')
+                ax.axis('equal')
+                slot.state.update(ax=ax, wedges=wedges, texts=texts, autotexts=autotexts, center=center)
+            else:
+                st = slot.state
+                update_pie(st['wedges'], sizes, texts=st['texts'], autotexts=st['autotexts'],
+                           autopct=autopct_format, explode=explode)
+                st['center'].set_text(f"Total\n{sum(sizes)}")
+            ax = slot.state['ax']
+            ax.set_title(title, fontsize=16, fontweight='bold', color='#D55E00')
+            wedges = slot.state['wedges']
+
+            def on_activity_click(event):
+                if event.inaxes == ax:
+                    for i, wedge in enumerate(wedges):
+                        contains, info = wedge.contains(event)
+                        if contains:
+                            year = results[i][0]
+                            self.show_students_by_year_dialog(year, days)
+                            break
+            slot.click_handler = on_activity_click
+            slot.draw(snapshot)
             
-            self.current_charts['student_activity'] = (fig, labels, sizes)
+            self.current_charts['student_activity'] = (slot.fig, labels, sizes)
             
         except Exception as e:
             try:
-                for w in self.student_activity_frame.winfo_children():
-                    w.destroy()
-                tk.Label(
-                    self.student_activity_frame,
-                    text="Unable to render chart",
-                    font=('Segoe UI', 12),
-                    bg=self.colors['primary'],
-                    fg='#b00020'
-                ).pack(expand=True, pady=20)
+                self._analysis_chart_slot('student_activity').show_message(
+                    "Unable to render chart", fg='#b00020')
             except Exception:
                 pass
             print(f"Error creating student activity pie chart: {e}")
@@ -14379,6 +13716,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def create_inventory_overdue_donut(self, data=None):
         """Create a nested donut pie showing Available vs Issued (outer), and inner ring splitting Issued into On-time vs Overdue."""
         try:
+            slot = self._analysis_chart_slot('inventory_overdue')
             if data:
                 total_copies = data.get('total_copies', 0)
                 total_available = data.get('total_available', 0)
@@ -14402,15 +13740,14 @@ Note: This is an automated email. Please find the attached formal overdue letter
             # Check if there's any data to display - prevent NaN division
             if (total_copies or 0) == 0:
                 # Show a placeholder message instead of empty chart
-                placeholder = tk.Label(
-                    self.inventory_overdue_frame,
-                    text="📊 No book inventory data available.\nAdd books to see inventory breakdown.",
-                    font=('Segoe UI', 12),
-                    bg=self.colors['primary'],
-                    fg='#666',
-                    justify='center'
+                slot.show_message(
+                    "📊 No book inventory data available.\nAdd books to see inventory breakdown.",
+                    pack_options={'expand': True, 'fill': 'both', 'pady': 40}
                 )
-                placeholder.pack(expand=True, fill='both', pady=40)
+                return
+
+            snapshot = (total_copies, total_available, overdue)
+            if slot.is_current(snapshot):
                 return
 
             outer_labels = ["Available", "Issued"]
@@ -14423,16 +13760,6 @@ Note: This is an automated email. Please find the attached formal overdue letter
             outer_colors = ['#2ed573', '#ff9f43']
             inner_colors = ['#7bed9f', '#ffa502', '#ff4757']
 
-            # Build figure
-            fig = Figure(figsize=(6, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            fig.patch.set_facecolor('white')
-
-            # Outer ring
-            res1 = ax.pie(outer_sizes, radius=1.0, labels=outer_labels, labeldistance=1.05,
-                                colors=outer_colors, startangle=90, wedgeprops=dict(width=0.3, edgecolor='white'))
-            wedges1 = res1[0]
-
             # Inner ring
             def _autopct(pct, allvals=inner_sizes):
                 total = sum(allvals)
@@ -14446,33 +13773,74 @@ Note: This is an automated email. Please find the attached formal overdue letter
                     return f"{pct:.1f}%\n({val})"
                 except:
                     return ""
-            res2 = ax.pie(inner_sizes, radius=1.0-0.3, labels=None,
-                                   colors=inner_colors, startangle=90,
-                                   autopct=_autopct,
-                                   wedgeprops=dict(width=0.3, edgecolor='white'))
-            wedges2 = res2[0]
-            # Center text
-            ax.text(0, 0, f"Total\n{int(total_copies or 0)}", ha='center', va='center', fontsize=11, fontweight='bold')
-            ax.set_title('Inventory & Overdue Breakdown', fontsize=12, fontweight='bold')
-
-            # Legend shows inner ring details
-            ax.legend(wedges2, inner_labels, title="Details", loc='center left', bbox_to_anchor=(1.0, 0.5))
-
-            canvas = FigureCanvasTkAgg(fig, self.inventory_overdue_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            try:
-                self._analysis_bind_wheel(canvas.get_tk_widget())
-            except Exception:
-                pass
 
-            self.current_charts['inventory_overdue_donut'] = (fig, inner_labels, inner_sizes)
+            if slot.needs_rebuild('inventory'):
+                ax = slot.fig.add_subplot(111)
+
+                # Outer ring
+                res1 = ax.pie(outer_sizes, radius=1.0, labels=outer_labels, labeldistance=1.05,
+                                    colors=outer_colors, startangle=90, wedgeprops=dict(width=0.3, edgecolor='white'))
+                res2 = ax.pie(inner_sizes, radius=1.0-0.3, labels=None,
+                                       colors=inner_colors, startangle=90,
+                                       autopct=_autopct,
+                                       wedgeprops=dict(width=0.3, edgecolor='white'))
+                wedges2 = res2[0]
+                # Center text
+                center = ax.text(0, 0, f"Total\n{int(total_copies or 0)}", ha='center', va='center', fontsize=11, fontweight='bold')
+                ax.set_title('Inventory & Overdue Breakdown', fontsize=12, fontweight='bold')
+
+                # Legend shows inner ring details
+                ax.legend(wedges2, inner_labels, title="Details", loc='center left', bbox_to_anchor=(1.0, 0.5))
+                slot.state.update(ax=ax, outer=res1, inner=res2, center=center)
+            else:
+                st = slot.state
+                update_pie(st['outer'][0], outer_sizes, texts=st['outer'][1], labeldistance=1.05)
+                update_pie(st['inner'][0], inner_sizes, autotexts=st['inner'][2], autopct=_autopct, radius=1.0-0.3)
+                st['center'].set_text(f"Total\n{int(total_copies or 0)}")
+            slot.draw(snapshot)
+
+            self.current_charts['inventory_overdue_donut'] = (slot.fig, inner_labels, inner_sizes)
         except Exception as e:
             print(f"Error creating inventory/overdue donut: {e}")
+
+    def _update_bar_chart(self, slot, labels, counts, title, color, horizontal=False, xlabel=None, ylabel=None):
+        """Draw or update a bar chart in a ChartSlot; bars are resized in place when the count matches"""
+        if slot.needs_rebuild(('bars', len(counts))):
+            fig = slot.fig
+            ax = fig.add_subplot(111)
+            positions = list(range(len(counts)))
+            if horizontal:
+                bars = ax.barh(positions, counts, color=color, alpha=0.7)
+                ax.set_yticks(positions)
+                ax.set_yticklabels(labels)
+            else:
+                bars = ax.bar(positions, counts, color=color, alpha=0.7)
+                ax.set_xticks(positions)
+                ax.set_xticklabels(labels, rotation=45, ha='right')
+            if xlabel:
+                ax.set_xlabel(xlabel)
+            if ylabel:
+                ax.set_ylabel(ylabel)
+            ax.set_title(title, fontsize=12, fontweight='bold')
+            fig.tight_layout()
+            slot.state.update(ax=ax, bars=bars, labels=list(labels))
+        else:
+            st = slot.state
+            labels_changed = st['labels'] != list(labels)
+            update_bars(st['ax'], st['bars'], counts, tick_labels=labels if labels_changed else None,
+                        horizontal=horizontal)
+            st['ax'].set_title(title, fontsize=12, fontweight='bold')
+            if labels_changed:
+                st['labels'] = list(labels)
+                slot.fig.tight_layout()
+        return slot.state['ax'], slot.state['bars']
     
     def create_daily_trend_chart(self, days, data=None):
         """Create bar chart showing daily borrowing trends"""
         try:
+            slot = self._analysis_chart_slot('daily_trend')
+            if slot is None:
+                return
             # Get data
             if data is not None:
                 results = data
@@ -14496,30 +13864,17 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 conn.close()
             
             if not results:
-                no_data_label = tk.Label(
-                    self.daily_trend_frame,
-                    text=f"No borrowing activity\nin last {days} days",
-                    font=('Segoe UI', 12),
-                    bg=self.colors['primary'],
-                    fg='#666666'
-                )
-                no_data_label.pack(expand=True)
+                slot.show_message(f"No borrowing activity\nin last {days} days")
                 return
             
             dates = [row[0] for row in results]
             counts = [row[1] for row in results]
+            snapshot = (days, tuple(dates), tuple(counts))
+            if slot.is_current(snapshot):
+                return
             
-            # Create figure
-            fig = Figure(figsize=(6, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            
-            bars = ax.bar(dates, counts, color='#45b7d1', alpha=0.7)
-            ax.set_title(f'Daily Borrowing Trends (Last {days} Days)', fontsize=12, fontweight='bold')
-            ax.set_xlabel('Date')
-            ax.set_ylabel('Books Issued')
-            
-            # Rotate x-axis labels for better readability
-            plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+            ax, bars = self._update_bar_chart(slot, dates, counts, f'Daily Borrowing Trends (Last {days} Days)',
+                                              '#45b7d1', xlabel='Date', ylabel='Books Issued')
             
             # Add click interaction
             def on_bar_click(event):
@@ -14529,16 +13884,10 @@ Note: This is an automated email. Please find the attached formal overdue letter
                         if contains:
                             self.show_borrow_details_for_date(dates[i])
                             break
+            slot.click_handler = on_bar_click
+            slot.draw(snapshot)
             
-            fig.tight_layout()
-            
-            # Add to GUI
-            canvas = FigureCanvasTkAgg(fig, self.daily_trend_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            canvas.mpl_connect('button_press_event', on_bar_click)
-            
-            self.current_charts['daily_trend'] = (fig, dates, counts)
+            self.current_charts['daily_trend'] = (slot.fig, dates, counts)
             
         except Exception as e:
             print(f"Error creating daily trend chart: {e}")
@@ -14546,6 +13895,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def create_popular_books_chart(self, days, data=None):
         """Create bar chart showing most popular books"""
         try:
+            slot = self._analysis_chart_slot('popular_books')
             # Get data
             if data is not None:
                 results = data
@@ -14571,26 +13921,17 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 conn.close()
             
             if not results:
-                no_data_label = tk.Label(
-                    self.popular_books_frame,
-                    text=f"No borrowing activity\nin last {days} days",
-                    font=('Segoe UI', 12),
-                    bg=self.colors['primary'],
-                    fg='#666666'
-                )
-                no_data_label.pack(expand=True)
+                slot.show_message(f"No borrowing activity\nin last {days} days")
                 return
             
             titles = [row[0][:20] + ('...' if len(row[0]) > 20 else '') for row in results]
             counts = [row[1] for row in results]
+            snapshot = (days, tuple(row[0] for row in results), tuple(counts))
+            if slot.is_current(snapshot):
+                return
             
-            # Create figure
-            fig = Figure(figsize=(6, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            
-            bars = ax.barh(titles, counts, color='#f9ca24', alpha=0.7)
-            ax.set_title(f'Most Popular Books (Last {days} Days)', fontsize=12, fontweight='bold')
-            ax.set_xlabel('Times Issued')
+            ax, bars = self._update_bar_chart(slot, titles, counts, f'Most Popular Books (Last {days} Days)',
+                                              '#f9ca24', horizontal=True, xlabel='Times Issued')
             
             # Add click interaction
             def on_popular_click(event):
@@ -14602,16 +13943,10 @@ Note: This is an automated email. Please find the attached formal overdue letter
                             full_title = results[i][0]
                             self.show_book_borrowers_dialog(full_title, days)
                             break
+            slot.click_handler = on_popular_click
+            slot.draw(snapshot)
             
-            fig.tight_layout()
-            
-            # Add to GUI
-            canvas = FigureCanvasTkAgg(fig, self.popular_books_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            canvas.mpl_connect('button_press_event', on_popular_click)
-            
-            self.current_charts['popular_books'] = (fig, titles, counts)
+            self.current_charts['popular_books'] = (slot.fig, titles, counts)
             
         except Exception as e:
             print(f"Error creating popular books chart: {e}")
@@ -14619,6 +13954,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def create_least_popular_books_chart(self, days, data=None):
         """Create bar chart showing least popular books (books with least borrows or zero borrows)"""
         try:
+            slot = self._analysis_chart_slot('least_popular_books')
             # Get data
             if data is not None:
                 results = data
@@ -14653,26 +13989,17 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 conn.close()
             
             if not results:
-                no_data_label = tk.Label(
-                    self.least_popular_books_frame,
-                    text=f"No book data available",
-                    font=('Segoe UI', 12),
-                    bg=self.colors['primary'],
-                    fg='#666666'
-                )
-                no_data_label.pack(expand=True)
+                slot.show_message("No book data available")
                 return
             
             titles = [row[0][:20] + ('...' if len(row[0]) > 20 else '') for row in results]
             counts = [row[1] for row in results]
+            snapshot = (days, tuple(row[0] for row in results), tuple(counts))
+            if slot.is_current(snapshot):
+                return
             
-            # Create figure
-            fig = Figure(figsize=(6, 4), dpi=100)
-            ax = fig.add_subplot(111)
-            
-            bars = ax.barh(titles, counts, color='#e74c3c', alpha=0.7)
-            ax.set_title(f'Least Popular Books (Last {days} Days)', fontsize=12, fontweight='bold')
-            ax.set_xlabel('Times Issued')
+            ax, bars = self._update_bar_chart(slot, titles, counts, f'Least Popular Books (Last {days} Days)',
+                                              '#e74c3c', horizontal=True, xlabel='Times Issued')
             
             # Add click interaction
             def on_least_popular_click(event):
@@ -14684,24 +14011,33 @@ Note: This is an automated email. Please find the attached formal overdue letter
                             full_title = results[i][0]
                             self.show_book_borrowers_dialog(full_title, days)
                             break
+            slot.click_handler = on_least_popular_click
+            slot.draw(snapshot)
             
-            fig.tight_layout()
-            
-            # Add to GUI
-            canvas = FigureCanvasTkAgg(fig, self.least_popular_books_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-            canvas.mpl_connect('button_press_event', on_least_popular_click)
-            
-            self.current_charts['least_popular_books'] = (fig, titles, counts)
+            self.current_charts['least_popular_books'] = (slot.fig, titles, counts)
             
         except Exception as e:
             print(f"Error creating least popular books chart: {e}")
 
+    def _update_simple_pie(self, slot, sizes, labels, colors, title):
+        """Draw or update a plain two-colour pie (focused insights) in a ChartSlot"""
+        def _autopct(pct):
+            return f"{pct:.1f}%"
+        if slot.needs_rebuild(('pie', tuple(labels))):
+            ax = slot.fig.add_subplot(111)
+            wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, autopct=_autopct, startangle=90)
+            slot.state.update(ax=ax, wedges=wedges, texts=texts, autotexts=autotexts)
+        else:
+            st = slot.state
+            update_pie(st['wedges'], sizes, texts=st['texts'], autotexts=st['autotexts'], autopct=_autopct)
+        slot.state['ax'].set_title(title, fontsize=11, fontweight='bold')
+        slot.draw((title, tuple(sizes)))
+
     # ---------------------- Focused Insights ----------------------
     def create_student_specific_pie(self, days, enrollment_no, data=None):
         """Pie: student's borrow status in period (borrowed vs returned)."""
         try:
+            slot = self._analysis_chart_slot('student_specific')
             if data:
                 active = data.get('active', 0)
                 returned = data.get('returned', 0)
@@ -14720,17 +14056,13 @@ Note: This is an automated email. Please find the attached formal overdue letter
             sizes = [active, returned]
             labels = ["Currently Issued", "Returned"]
             if sum(sizes) == 0:
-                lbl = tk.Label(self.student_specific_frame, text=f"No activity for {enrollment_no} in last {days} days", bg=self.colors['primary'], fg='#666', font=('Segoe UI', 11))
-                lbl.pack(fill=tk.X, padx=10, pady=10)
+                slot.show_message(f"No activity for {enrollment_no} in last {days} days",
+                                  pack_options={'fill': tk.X, 'padx': 10, 'pady': 10}, font=('Segoe UI', 11))
             else:
-                fig = Figure(figsize=(4.5, 3.5), dpi=100)
-                ax = fig.add_subplot(111)
-                ax.pie(sizes, labels=labels, colors=['#ff9f43', '#10ac84'], autopct='%1.1f%%', startangle=90)
-                ax.set_title(f"Student {enrollment_no} - Status (Last {days}d)", fontsize=11, fontweight='bold')
-                canvas = FigureCanvasTkAgg(fig, self.student_specific_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-                self.current_charts['student_specific_status'] = (fig, labels, sizes)
+                title = f"Student {enrollment_no} - Status (Last {days}d)"
+                if not slot.is_current((title, tuple(sizes))):
+                    self._update_simple_pie(slot, sizes, labels, ['#ff9f43', '#10ac84'], title)
+                self.current_charts['student_specific_status'] = (slot.fig, labels, sizes)
 
             # packing handled in refresh_analysis
         except Exception as e:
@@ -14739,6 +14071,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
     def create_book_specific_pie(self, days, book_id, data=None):
         """Pie: book's copies status currently (available vs borrowed)."""
         try:
+            slot = self._analysis_chart_slot('book_specific')
             if data:
                 row = data.get('row')
             else:
@@ -14748,21 +14081,17 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 row = cur.fetchone()
                 conn.close()
             if not row:
-                lbl = tk.Label(self.book_specific_frame, text=f"Book {book_id} not found", bg=self.colors['primary'], fg='#c00', font=('Segoe UI', 11, 'bold'))
-                lbl.pack(fill=tk.X, padx=10, pady=10)
+                slot.show_message(f"Book {book_id} not found", pack_options={'fill': tk.X, 'padx': 10, 'pady': 10},
+                                  font=('Segoe UI', 11, 'bold'), fg='#c00')
             else:
                 title, total, avail = row
                 borrowed = max(total - (avail or 0), 0)
                 sizes = [avail or 0, borrowed]
                 labels = ["Available", "Borrowed"]
-                fig = Figure(figsize=(4.5, 3.5), dpi=100)
-                ax = fig.add_subplot(111)
-                ax.pie(sizes, labels=labels, colors=['#2ed573', '#ff4757'], autopct='%1.1f%%', startangle=90)
-                ax.set_title(f"Book {book_id} - Copies Status", fontsize=11, fontweight='bold')
-                canvas = FigureCanvasTkAgg(fig, self.book_specific_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
-                self.current_charts['book_specific_status'] = (fig, labels, sizes)
+                chart_title = f"Book {book_id} - Copies Status"
+                if not slot.is_current((chart_title, tuple(sizes))):
+                    self._update_simple_pie(slot, sizes, labels, ['#2ed573', '#ff4757'], chart_title)
+                self.current_charts['book_specific_status'] = (slot.fig, labels, sizes)
 
             # packing handled in refresh_analysis
         except Exception as e:
@@ -14887,25 +14216,10 @@ Note: This is an automated email. Please find the attached formal overdue letter
             if not rows:
                 messagebox.showinfo("Export", "No data to export.")
                 return
-            filename = filedialog.asksaveasfilename(defaultextension='.xlsx', filetypes=[["Excel", "*.xlsx"]], initialfile=f"{export_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+            filename = filedialog.asksaveasfilename(defaultextension='.xlsx', filetypes=EXPORT_FILETYPES, initialfile=f"{export_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
             if not filename:
                 return
-            try:
-                import xlsxwriter
-                wb = xlsxwriter.Workbook(filename)
-                ws = wb.add_worksheet('Data')
-                start = self._xlsxwriter_write_header(ws, wb, start_row=0)
-                for j, c in enumerate(columns):
-                    ws.write(start, j, c)
-                for i, row in enumerate(rows, start=start+1):
-                    for j, v in enumerate(row):
-                        ws.write(i, j, v)
-                wb.close()
-                messagebox.showinfo("Export", f"Saved to {filename}")
-                if messagebox.askyesno("Open File", "Open the exported file?"):
-                    self.open_file(filename)
-            except Exception as e:
-                messagebox.showerror("Export", f"Failed to export: {e}")
+            self._run_export(filename, columns, rows, total=len(rows), success_message=f"Saved to {filename}")
         tk.Button(btns, text="Export to Excel", command=do_export, bg='#28a745', fg='white', relief='flat', padx=10, pady=6).pack(side=tk.RIGHT, padx=10, pady=8)
 
     # ---------------------- Filter handlers ----------------------
@@ -14955,56 +14269,61 @@ Note: This is an automated email. Please find the attached formal overdue letter
         """Create summary statistics display"""
         try:
             # Get comprehensive stats
+            late_days = None
             if data:
                 total_borrowings = data.get('total_borrowings', 0)
                 total_returns = data.get('total_returns', 0)
                 overdue_count = data.get('overdue_count', 0)
                 active_students = data.get('active_students', 0)
                 fines_raw = data.get('fines_data', [])
+                late_days = data.get('late_days')
             else:
-                conn = self.db.get_connection()
-                cursor = conn.cursor()
-                
-                start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-                
-                # Total borrowings in period
-                cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE borrow_date >= ?", (start_date,))
-                total_borrowings = cursor.fetchone()[0]
-                
-                # Total returns in period
-                cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE return_date >= ? AND return_date IS NOT NULL", (start_date,))
-                total_returns = cursor.fetchone()[0]
-                
-                # Currently overdue
-                today = datetime.now().strftime('%Y-%m-%d')
-                cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE status = 'borrowed' AND due_date < ?", (today,))
-                overdue_count = cursor.fetchone()[0]
-                
-                # Active students (who borrowed in period)
-                cursor.execute("SELECT COUNT(DISTINCT enrollment_no) FROM borrow_records WHERE borrow_date >= ?", (start_date,))
-                active_students = cursor.fetchone()[0]
-                
-                # Total fines collected (approximation)
-                # Calculate fines in Python to be DB-agnostic (avoid julianday vs EXTRACT differences)
-                cursor.execute("""
-                    SELECT return_date, due_date 
-                    FROM borrow_records 
-                    WHERE return_date > due_date AND return_date IS NOT NULL AND return_date >= ?
-                """, (start_date,))
-                fines_raw = cursor.fetchall()
-                conn.close()
+                def _query_summary():
+                    conn = self.db.get_connection()
+                    cursor = conn.cursor()
+                
+                    start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+                
+                    # Total borrowings in period
+                    cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE borrow_date >= ?", (start_date,))
+                    total_borrowings = cursor.fetchone()[0]
+                
+                    # Total returns in period
+                    cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE return_date >= ? AND return_date IS NOT NULL", (start_date,))
+                    total_returns = cursor.fetchone()[0]
+                
+                    # Currently overdue
+                    today = datetime.now().strftime('%Y-%m-%d')
+                    cursor.execute("SELECT COUNT(*) FROM borrow_records WHERE status = 'borrowed' AND due_date < ?", (today,))
+                    overdue_count = cursor.fetchone()[0]
+                
+                    # Active students (who borrowed in period)
+                    cursor.execute("SELECT COUNT(DISTINCT enrollment_no) FROM borrow_records WHERE borrow_date >= ?", (start_date,))
+                    active_students = cursor.fetchone()[0]
+                
+                    # Total fines collected (approximation)
+                    # Calculate fines in Python to be DB-agnostic (avoid julianday vs EXTRACT differences)
+                    cursor.execute("""
+                        SELECT return_date, due_date 
+                        FROM borrow_records 
+                        WHERE return_date > due_date AND return_date IS NOT NULL AND return_date >= ?
+                    """, (start_date,))
+                    fines_raw = cursor.fetchall()
+                    conn.close()
+                    return total_borrowings, total_returns, overdue_count, active_students, fines_raw
+
+                (total_borrowings, total_returns, overdue_count,
+                 active_students, fines_raw) = self._get_cached_analytics('summary', _query_summary, days=days)
             
-            fine_sum = 0
             fine_per_day = self.get_fine_per_day()
-            for r_date, d_date in fines_raw:
-                # Handle string dates vs date objects
-
-                if isinstance(r_date, str): r_date = datetime.strptime(r_date, '%Y-%m-%d').date()
-                if isinstance(d_date, str): d_date = datetime.strptime(d_date, '%Y-%m-%d').date()
-                days_late = (r_date - d_date).days
-                fine_sum += days_late * fine_per_day
+            # Daily counters already carry the summed days late
+            fine_sum = late_days * fine_per_day if late_days is not None else 0
+            if fines_raw:
+                # Late returns priced in one vectorized pass (fines engine)
+                fine_sum += total_fines([row[1] for row in fines_raw], [row[0] for row in fines_raw],
+                                        fine_per_day=fine_per_day)
                 
-            total_fines = fine_sum
+            total_fines_value = fine_sum
             
             # Create stats display
             stats_container = tk.Frame(self.stats_summary_frame, bg=self.colors['primary'])
@@ -15015,7 +14334,7 @@ Note: This is an automated email. Please find the attached formal overdue letter
                 ("📥 Total Returns", total_returns, "#45b7d1"),
                 ("⚠️ Currently Overdue", overdue_count, "#ff6b6b"),
                 ("👥 Active Students", active_students, "#f9ca24"),
-                (f"💰 Fines Collected (₹{self.get_fine_per_day()}/day)", f"₹{total_fines:.0f}", "#a55eea")
+                (f"💰 Fines Collected (₹{self.get_fine_per_day()}/day)", f"₹{total_fines_value:.0f}", "#a55eea")
             ]
             
             for i, (label, value, color) in enumerate(stats):
@@ -15312,6 +14631,15 @@ Note: This is an automated email. Please find the attached formal overdue letter
             return
 
         def run_server():
+            # Imported here: loading student_portal initializes the portal DB and starts its cleanup thread
+            try:
+                from student_portal import app as flask_app  # type: ignore
+                from waitress import serve  # type: ignore
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"Portal Import Error: {e}")
+                return
             # Use waitress for production-ready stable server
             # Listen on all interfaces (0.0.0.0) so other devices can access
             print(f"Starting Student Portal on port {self.portal_port}...")
@@ -15392,6 +14720,10 @@ Note: This is an automated email. Please find the attached formal overdue letter
 
 # Main application entry point
 if __name__ == "__main__":
+    # Letter rendering uses a process pool; required for the frozen (PyInstaller) build
+    import multiprocessing
+    multiprocessing.freeze_support()
+    startup_profiler.mark('imports finished')
     root = tk.Tk()
     app = LibraryApp(root)
     root.mainloop()
\ No newline at end of file
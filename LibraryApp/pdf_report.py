@@ -0,0 +1,429 @@
+"""
+Chunked PDF table reports (reportlab)
+Rows are paginated as they stream in: every page is its own LongTable with the
+column headings repeated, so layout work grows with the page instead of the
+whole report. Cells are plain strings and only text too wide for its column is
+wrapped in a Paragraph. Reports longer than one part are rendered as page ranges
+in a process pool and merged in order (needs pypdf; without it the report is
+built in this process, still one page at a time).
+"""
+
+import math
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from export_engine import ExportCancelled
+from lazy_imports import module_available
+
+WIDTH_SAMPLE_ROWS = 50
+# Pages per process-pool task (the pool is only used for reports longer than this)
+PAGES_PER_PART = 40
+
+MARGINS_INCH = {'top': 0.5, 'bottom': 0.4, 'left': 0.4, 'right': 0.4}
+MIN_COLUMN_WIDTH_INCH = 0.7
+HEADER_FONT_SIZE = 9
+HEADER_PADDING = 8
+DATA_FONT_SIZE = 8
+DATA_LEADING = 10
+CELL_PADDING = 5
+# Widest Helvetica glyph is about 0.56 em; shorter text cannot need wrapping
+MAX_CHAR_EM = 0.6
+
+DARK_BLUE = '#003366'
+MID_BLUE = '#0066CC'
+TITLE_BLUE = '#2E86AB'
+
+
+def merge_available():
+    return module_available('pypdf')
+
+
+def _cell_text(value):
+    return 'N/A' if value is None else str(value)
+
+
+def _escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+class ReportLayout:
+    """
+    Page geometry, column widths and header text for one report; plain data, so it is
+    sent as-is to pool workers.
+
+    Parameters:
+    - columns: Column headings
+    - sample: First rows (as strings), used to size the columns
+    - title: Report title
+    - info_lines: Lines under the title (reportlab paragraph markup, e.g. <b>)
+    - footer: Line after the last table
+    - logo_path: Letterhead logo, or None
+    """
+
+    def __init__(self, columns, sample, title, info_lines=(), footer='', logo_path=None):
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.units import inch
+
+        self.columns = [str(column) for column in columns]
+        self.title = title
+        self.info_lines = list(info_lines)
+        self.footer = footer
+        self.logo_path = logo_path if logo_path and os.path.exists(logo_path) else None
+        self.page_size = landscape(A4)
+        self.margins = {side: value * inch for side, value in MARGINS_INCH.items()}
+        self.page_width = self.page_size[0] - self.margins['left'] - self.margins['right']
+        # SimpleDocTemplate's frame has 6pt padding on every side
+        self.frame_height = self.page_size[1] - self.margins['top'] - self.margins['bottom'] - 12
+        self.col_widths = self._column_widths(sample, MIN_COLUMN_WIDTH_INCH * inch)
+        self.text_widths = [width - 2 * CELL_PADDING for width in self.col_widths]
+        self.header_height = HEADER_FONT_SIZE * 1.2 + 2 * HEADER_PADDING
+        self.letterhead_height = None
+
+    def _column_widths(self, sample, min_width):
+        count = len(self.columns)
+        if count <= 6:
+            return [self.page_width / count] * count
+        # For many columns, calculate proportionally with minimums
+        weights = []
+        for index, column in enumerate(self.columns):
+            longest = len(column)
+            for row in sample:
+                if index < len(row):
+                    longest = max(longest, len(row[index]))
+            weights.append(min(max(longest, 1), 40))
+        total_weight = sum(weights)
+        widths = [max(weight / total_weight * self.page_width, min_width) for weight in weights]
+        scale = min(1.0, self.page_width / sum(widths))
+        return [width * scale for width in widths]
+
+    def wraps(self, index, text):
+        """True if text is wider than its column (the cell becomes a Paragraph)"""
+        if len(text) * DATA_FONT_SIZE * MAX_CHAR_EM <= self.text_widths[index]:
+            return False
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        return stringWidth(text, 'Helvetica', DATA_FONT_SIZE) > self.text_widths[index]
+
+    def row_height(self, row):
+        lines = 1
+        for index, text in enumerate(row):
+            if self.wraps(index, text):
+                from reportlab.pdfbase.pdfmetrics import stringWidth
+                # CJK word wrap breaks anywhere; one extra line covers break positions
+                width = stringWidth(text, 'Helvetica', DATA_FONT_SIZE)
+                lines = max(lines, math.ceil(width / self.text_widths[index]) + 1)
+        return lines * DATA_LEADING + 2 * CELL_PADDING
+
+    def letterhead(self):
+        """Flowables above the first table (logo, college header, title, info lines)"""
+        from reportlab.lib import colors as rl_colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.lib.units import inch
+        from reportlab.platypus import HRFlowable, Image as RLImage, Paragraph, Spacer
+
+        styles = getSampleStyleSheet()
+
+        def style(name, parent, size, color, font, space_after, space_before=0):
+            return ParagraphStyle(name, parent=styles[parent], fontSize=size, textColor=rl_colors.HexColor(color),
+                                  spaceAfter=space_after, spaceBefore=space_before, alignment=TA_CENTER, fontName=font)
+
+        elements = []
+        if self.logo_path:
+            try:
+                elements += [RLImage(self.logo_path, width=1 * inch, height=1 * inch), Spacer(1, 0.1 * inch)]
+            except Exception as e:
+                print(f"Logo insertion failed: {e}")
+        elements += [
+            Paragraph('GOVERNMENT POLYTECHNIC AWASARI KHURD', style('CollegeName', 'Heading1', 16, DARK_BLUE, 'Helvetica-Bold', 4)),
+            Paragraph('Tal. Ambegaon, Dist. Pune - 410503', style('CollegeLocation', 'Normal', 10, MID_BLUE, 'Helvetica', 8)),
+            Paragraph('LIBRARY MANAGEMENT SYSTEM', style('LibraryTitle', 'Heading2', 14, TITLE_BLUE, 'Helvetica-Bold', 12)),
+            HRFlowable(width="100%", thickness=2, color=rl_colors.HexColor(TITLE_BLUE)),
+            Spacer(1, 0.2 * inch),
+            Paragraph(self.title, style('ReportTitle', 'Heading1', 16, TITLE_BLUE, 'Helvetica-Bold', 12, 8)),
+            Spacer(1, 0.15 * inch),
+        ]
+        info_style = style('Info', 'Normal', 9, '#666666', 'Helvetica-Oblique', 4)
+        elements += [Paragraph(line, info_style) for line in self.info_lines]
+        elements.append(Spacer(1, 0.2 * inch))
+        return elements
+
+    def footer_flowables(self):
+        from reportlab.lib import colors as rl_colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer
+
+        if not self.footer:
+            return []
+        footer_style = ParagraphStyle('Footer', parent=getSampleStyleSheet()['Normal'], fontSize=8,
+                                      textColor=rl_colors.HexColor('#999999'), alignment=TA_CENTER,
+                                      fontName='Helvetica-Oblique')
+        return [Spacer(1, 0.3 * inch), Paragraph(self.footer, footer_style)]
+
+    def measure_letterhead(self):
+        height = 0
+        for flowable in self.letterhead():
+            height += flowable.wrap(self.page_width, self.frame_height)[1]
+            height += flowable.getSpaceBefore() + flowable.getSpaceAfter()
+        self.letterhead_height = height
+        return height
+
+    def paginate(self, rows):
+        """Split string rows into pages: yields lists of rows that fit one page each"""
+        if self.letterhead_height is None:
+            self.measure_letterhead()
+        budget = self.frame_height - self.letterhead_height - self.header_height
+        page, used = [], 0.0
+        for row in rows:
+            height = self.row_height(row)
+            if page and used + height > budget:
+                yield page
+                page, used = [], 0.0
+                budget = self.frame_height - self.header_height
+            page.append(row)
+            used += height
+        if page:
+            yield page
+
+    def table(self, page):
+        """One page of rows as a LongTable with the heading row repeated"""
+        from reportlab.lib import colors as rl_colors
+        from reportlab.lib.enums import TA_LEFT
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.platypus import LongTable, Paragraph, TableStyle
+
+        cell_style = ParagraphStyle('CellStyle', fontSize=DATA_FONT_SIZE, leading=DATA_LEADING,
+                                    fontName='Helvetica', alignment=TA_LEFT, wordWrap='CJK')
+        data = [self.columns]
+        for row in page:
+            data.append([Paragraph(_escape(text), cell_style) if self.wraps(index, text) else text
+                         for index, text in enumerate(row)])
+        table = LongTable(data, colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(TableStyle([
+            # Header row styling
+            ('BACKGROUND', (0, 0), (-1, 0), rl_colors.HexColor(DARK_BLUE)),
+            ('TEXTCOLOR', (0, 0), (-1, 0), rl_colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), HEADER_FONT_SIZE),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), HEADER_PADDING),
+            ('TOPPADDING', (0, 0), (-1, 0), HEADER_PADDING),
+
+            # Data rows styling
+            ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), DATA_FONT_SIZE),
+            ('LEADING', (0, 1), (-1, -1), DATA_LEADING),
+            ('TOPPADDING', (0, 1), (-1, -1), CELL_PADDING),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), CELL_PADDING),
+            ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+            ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING),
+
+            # Grid and borders
+            ('GRID', (0, 0), (-1, -1), 0.5, rl_colors.grey),
+            ('BOX', (0, 0), (-1, -1), 1.5, rl_colors.HexColor(DARK_BLUE)),
+            ('LINEBELOW', (0, 0), (-1, 0), 2, rl_colors.HexColor(MID_BLUE)),
+
+            # Alternating row colors
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [rl_colors.white, rl_colors.HexColor('#F0F0F0')]),
+        ]))
+        return table
+
+
+class _FlowableFeed(list):
+    """Flowable list for doc.build() that refills from `pages` (an iterator of flowable
+    lists) whenever it runs empty, so only the page being laid out is held in memory"""
+
+    def __init__(self, pages):
+        super().__init__()
+        self._pages = iter(pages)
+
+    def __len__(self):
+        while not list.__len__(self):
+            flowables = next(self._pages, None)
+            if flowables is None:
+                break
+            self.extend(flowables)
+        return list.__len__(self)
+
+
+def write_pdf(layout, pages, path, first=True, last=True, on_page=None):
+    """Build path from an iterable of pages (lists of string rows).
+
+    first/last: include the letterhead / footer (False for the middle parts of a split report)
+    on_page(rows): called after each page's rows have been laid out
+    """
+    from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+    doc = SimpleDocTemplate(path, pagesize=layout.page_size, topMargin=layout.margins['top'],
+                            bottomMargin=layout.margins['bottom'], leftMargin=layout.margins['left'],
+                            rightMargin=layout.margins['right'])
+
+    def flowables():
+        if first:
+            yield layout.letterhead()
+        previous = None
+        for page in pages:
+            if previous is not None:
+                if on_page:
+                    on_page(len(previous))
+                yield [PageBreak()]
+            yield [layout.table(page)]
+            previous = page
+        if previous is not None and on_page:
+            on_page(len(previous))
+        if last:
+            yield layout.footer_flowables()
+
+    doc.build(_FlowableFeed(flowables()))
+
+
+def _render_part(layout, pages, path, first, last):
+    write_pdf(layout, pages, path, first, last)
+    return path
+
+
+def build_report(path, columns, rows, title, info_lines=(), footer='', logo_path=None, total=None,
+                 progress_callback=None, cancel=None, max_workers=None):
+    """Write a table report PDF to path; returns the number of rows written.
+
+    - rows: Iterable of sequences, consumed once (e.g. Database.iter_query())
+    - total: Expected row count for progress_callback(written, total) (None if unknown)
+    - cancel: Optional threading.Event; when set the build stops with ExportCancelled
+    - max_workers: Process pool size for long reports (default: CPU count; 1 = in-process)
+    """
+    rows = (tuple(_cell_text(value) for value in row) for row in rows)
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= WIDTH_SAMPLE_ROWS:
+            break
+    layout = ReportLayout(columns, sample, title, info_lines, footer, logo_path)
+    pages = layout.paginate(_chain(sample, rows))
+    progress = {'written': 0}
+
+    def on_page(count):
+        progress['written'] += count
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled()
+        if progress_callback is not None:
+            progress_callback(progress['written'], total)
+
+    workers = max_workers or os.cpu_count() or 1
+    try:
+        if workers > 1 and merge_available():
+            _build_in_parts(layout, pages, path, workers, on_page)
+        else:
+            write_pdf(layout, pages, path, on_page=on_page)
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return progress['written']
+
+
+def _chain(first, rest):
+    yield from first
+    yield from rest
+
+
+def _parts(pages):
+    part = []
+    for page in pages:
+        part.append(page)
+        if len(part) >= PAGES_PER_PART:
+            yield part
+            part = []
+    if part:
+        yield part
+
+
+def _build_in_parts(layout, pages, path, workers, on_page):
+    """Render PAGES_PER_PART-page ranges in a process pool and merge them into path.
+    A report that fits in one part is written directly, without a pool."""
+    parts = _parts(pages)
+    first_part = next(parts, [])
+    second_part = next(parts, None)
+    if second_part is None:
+        write_pdf(layout, first_part, path, on_page=on_page)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix='gpak_report_')
+    try:
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, ValueError, NotImplementedError) as e:
+            print(f"Report process pool unavailable, rendering in-process: {e}")
+            pool = None
+        part_paths = []
+        in_flight = deque()  # (future, pages, path, first, last)
+
+        def finish(entry):
+            future, part, part_path, first, last = entry
+            try:
+                future.result()
+            except Exception as e:
+                if not _is_pool_failure(e):
+                    raise
+                print(f"Report process pool failed, rendering part in-process: {e}")
+                write_pdf(layout, part, part_path, first, last)
+            for page in part:
+                on_page(len(page))
+
+        def submit(part, first, last):
+            part_path = os.path.join(work_dir, f"part_{len(part_paths):05d}.pdf")
+            part_paths.append(part_path)
+            if pool is None:
+                write_pdf(layout, part, part_path, first, last)
+                for page in part:
+                    on_page(len(page))
+                return
+            in_flight.append((pool.submit(_render_part, layout, part, part_path, first, last),
+                              part, part_path, first, last))
+            # Keep a bounded number of parts (and their rows) in memory
+            while len(in_flight) > workers * 2:
+                finish(in_flight.popleft())
+
+        try:
+            current, first = first_part, True
+            for following in _chain([second_part], parts):
+                submit(current, first, False)
+                current, first = following, False
+            submit(current, first, True)
+            while in_flight:
+                finish(in_flight.popleft())
+        finally:
+            if pool is not None:
+                for future, *_rest in in_flight:
+                    future.cancel()
+                pool.shutdown(wait=True)
+
+        _merge(part_paths, path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _merge(part_paths, path):
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    try:
+        for part_path in part_paths:
+            writer.append(part_path)
+        with open(path, 'wb') as f:
+            writer.write(f)
+    finally:
+        writer.close()
+
+
+def _is_pool_failure(error):
+    from concurrent.futures.process import BrokenProcessPool
+    return isinstance(error, BrokenProcessPool)
@@ -0,0 +1,147 @@
+"""
+Parameterized, paged search queries for the Records and Students tabs
+Filters are compiled into a single WHERE clause with ? placeholders (Database
+builds the clauses so they hit indexed columns and the FTS indexes) and rows are
+read one page at a time, so a search never loads the whole history.
+"""
+
+from collections import OrderedDict
+from itertools import islice
+
+
+def fts_match_expression(text):
+    """User text -> FTS5 MATCH string: every word must match the start of a token"""
+    words = [word.replace('"', '""') for word in str(text).split()]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchQuery:
+    """
+    SELECT ... FROM ... WHERE <clauses> ORDER BY ... built from parameterized parts.
+
+    Parameters:
+    - select_sql: Column list (without SELECT)
+    - from_sql: FROM clause including joins
+    - order_columns: One SQL expression per display column, used by order_by()
+    - default_order: ORDER BY used until order_by() is called; also the tie-breaker
+    """
+
+    def __init__(self, select_sql, from_sql, order_columns=None, default_order='1'):
+        self.select_sql = select_sql
+        self.from_sql = from_sql
+        self.order_columns = list(order_columns or [])
+        self.default_order = default_order
+        self.order_sql = default_order
+        self.clauses = []
+        self.params = []
+
+    def where(self, clause, *params):
+        """AND a clause (with ? placeholders) onto the filter"""
+        self.clauses.append(clause)
+        self.params.extend(params)
+        return self
+
+    def order_by(self, position, reverse=False):
+        """Sort by display column `position`; the default order breaks ties"""
+        expression = self.order_columns[position]
+        self.order_sql = f"{expression} {'DESC' if reverse else 'ASC'}, {self.default_order}"
+        return self
+
+    def _where_sql(self):
+        if not self.clauses:
+            return ''
+        return ' WHERE ' + ' AND '.join(f"({clause})" for clause in self.clauses)
+
+    def count_sql(self):
+        return f"SELECT COUNT(*) {self.from_sql}{self._where_sql()}", tuple(self.params)
+
+    def all_sql(self):
+        """Every matching row in the current order (for streaming exports)"""
+        sql = f"SELECT {self.select_sql} {self.from_sql}{self._where_sql()} ORDER BY {self.order_sql}"
+        return sql, tuple(self.params)
+
+    def page_sql(self, limit, offset):
+        sql = (f"SELECT {self.select_sql} {self.from_sql}{self._where_sql()} "
+               f"ORDER BY {self.order_sql} LIMIT ? OFFSET ?")
+        return sql, tuple(self.params) + (int(limit), int(offset))
+
+
+class PagedQuerySource:
+    """
+    Row source (for virtual_tree.VirtualTreeview) that reads a SearchQuery page by page.
+
+    Parameters:
+    - db: Database providing count_search() and fetch_search_page()
+    - query: SearchQuery to run
+    - formatter: Function raw_row -> (values, tags) for display
+    - transform: Optional function list_of_db_rows -> list_of_raw_rows applied per page
+    - page_size: Rows per database round trip
+    - max_pages: Pages kept in memory (least recently used are dropped)
+
+    The row count and first page are read in the constructor, so build the source
+    on a worker thread; later pages are fetched on demand as the view scrolls.
+    """
+
+    def __init__(self, db, query, formatter=None, transform=None, page_size=200, max_pages=20):
+        self.db = db
+        self.query = query
+        self.formatter = formatter
+        self.transform = transform
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self._pages = OrderedDict()
+        self.total = db.count_search(query)
+        if self.total:
+            self._page(0)
+
+    def __len__(self):
+        return self.total
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            rows = self.db.fetch_search_page(self.query, self.page_size, number * self.page_size)
+            page = self.transform(rows) if self.transform else list(rows)
+            self._pages[number] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def raw(self, index):
+        page = self._page(index // self.page_size)
+        return page[index % self.page_size]
+
+    def fetch(self, start, stop):
+        """Return [(values, tags)] for rows[start:stop]"""
+        stop = min(stop, self.total)
+        rows = []
+        for index in range(start, stop):
+            row = self.raw(index)
+            rows.append(self.formatter(row) if self.formatter else (tuple(row), ()))
+        return rows
+
+    def stream_values(self, chunk_size=2000):
+        """Display values for every row in the current order, read through one database
+        cursor instead of the page cache (for exports; can be consumed on a worker thread)
+        """
+        return self._stream(self.db.iter_search(self.query, chunk_size), chunk_size)
+
+    def _stream(self, rows, chunk_size):
+        try:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    return
+                if self.transform:
+                    chunk = self.transform(chunk)
+                for row in chunk:
+                    yield self.formatter(row)[0] if self.formatter else tuple(row)
+        finally:
+            rows.close()  # releases the database connection if the export stops early
+
+    def sort_by_column(self, position, reverse=False):
+        """Re-order in SQL by display column `position` (drops cached pages)"""
+        self.query.order_by(position, reverse)
+        self._pages.clear()
@@ -0,0 +1,119 @@
+"""
+Start-up timing report for the desktop app (enabled with --profile-startup)
+Records how long each first-time import took (self and cumulative time, like
+`python -X importtime`) and when each start-up phase finished, then writes a
+plain-text report. When the flag is absent nothing is hooked and mark() is a no-op.
+
+Usage:
+    python main.py --profile-startup            # writes startup_profile.txt
+    python main.py --profile-startup=out.txt    # custom report path
+"""
+
+import builtins
+import os
+import sys
+import threading
+import time
+
+FLAG = '--profile-startup'
+DEFAULT_REPORT_NAME = 'startup_profile.txt'
+
+
+class StartupProfiler:
+    """Import hook plus phase marks; one instance per process (see `profiler` below)"""
+
+    def __init__(self):
+        self.enabled = False
+        self.report_path = None
+        self.started_at = time.perf_counter()
+        self.phases = []
+        self.imports = []
+        self._stack = []
+        self._original_import = None
+        self._lock = threading.Lock()
+        self._main_thread = threading.main_thread()
+
+    def enable(self, report_path=None):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.report_path = report_path or self._default_path()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def enable_from_argv(self, argv=None):
+        """Enable if --profile-startup[=path] is on the command line (the flag is removed from argv)"""
+        argv = sys.argv if argv is None else argv
+        for arg in list(argv[1:]):
+            if arg == FLAG or arg.startswith(FLAG + '='):
+                argv.remove(arg)
+                path = arg.split('=', 1)[1] if '=' in arg else None
+                self.enable(path)
+        return self.enabled
+
+    def disable(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @staticmethod
+    def _default_path():
+        if hasattr(sys, '_MEIPASS'):
+            base = os.path.dirname(sys.executable)
+        else:
+            base = os.path.dirname(os.path.abspath(__file__))
+        return os.path.join(base, DEFAULT_REPORT_NAME)
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only first imports on the main thread are timed; everything else passes straight through
+        if level or name in sys.modules or threading.current_thread() is not self._main_thread:
+            return self._original_import(name, globals, locals, fromlist, level)
+        entry = [name, 0.0, 0.0, len(self._stack)]  # name, cumulative, children, depth
+        self._stack.append(entry)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            entry[1] = elapsed
+            if self._stack:
+                self._stack[-1][2] += elapsed
+            with self._lock:
+                self.imports.append((entry[0], elapsed, elapsed - entry[2], entry[3]))
+
+    def mark(self, phase):
+        """Record that `phase` finished now"""
+        if self.enabled:
+            with self._lock:
+                self.phases.append((phase, time.perf_counter() - self.started_at))
+
+    def write_report(self, top=40):
+        """Write the report (phases, then the slowest imports); returns its path"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            phases = list(self.phases)
+            imports = list(self.imports)
+        lines = [f"Start-up profile ({time.strftime('%Y-%m-%d %H:%M:%S')})", '', 'Phases (seconds since start):']
+        previous = 0.0
+        for phase, at in phases:
+            lines.append(f"  {at:8.3f}  (+{at - previous:7.3f})  {phase}")
+            previous = at
+        total_imports = sum(cumulative for _name, cumulative, _self, depth in imports if depth == 0)
+        lines += ['', f"Imports: {len(imports)} modules, {total_imports:.3f}s in top-level imports", '',
+                  f"Slowest {top} imports by cumulative time (self time excludes nested imports):",
+                  f"  {'cumulative':>10}  {'self':>8}  module"]
+        for name, cumulative, self_time, depth in sorted(imports, key=lambda i: -i[1])[:top]:
+            lines.append(f"  {cumulative:10.3f}  {self_time:8.3f}  {'  ' * depth}{name}")
+        try:
+            with open(self.report_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            print(f"Could not write start-up profile: {e}")
+            return None
+        print(f"Start-up profile written to {self.report_path}")
+        return self.report_path
+
+
+profiler = StartupProfiler()
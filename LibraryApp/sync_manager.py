@@ -0,0 +1,714 @@
+"""
+Incremental sync between the local SQLite database and a remote database
+Triggers on the synced tables record every insert, update and delete in a
+change_log table, stamped with a logical (Lamport) clock. A sync reads only the
+log entries after the last watermark on each side, keeps the latest change per
+row, settles rows changed on both sides with the table's conflict policy and
+ships the winners as batched upserts and deletes. The remote is normally
+PostgreSQL; another SQLite file works the same way (two local files stand in
+for the cloud when testing).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+try:
+    import psycopg2
+    from psycopg2.extras import execute_values
+except ImportError:
+    psycopg2 = None
+    execute_values = None
+
+DEFAULT_BATCH_SIZE = 500
+SYNC_LOG_NAME = 'sync_log.json'
+SYNC_URL_ENV = 'SYNC_DATABASE_URL'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Bumped when the triggers or bookkeeping tables change (reinstalled on the next sync)
+SYNC_SCHEMA_VERSION = '1'
+
+LAST_WRITER_WINS = 'last_writer_wins'
+REMOTE_WINS = 'remote_wins'
+LOCAL_WINS = 'local_wins'
+
+# Synced tables in foreign-key order (parents first): table -> (row key, conflict policy).
+# The active academic year is set for the whole institution, so the remote copy wins.
+SYNC_TABLES = {
+    'academic_years': ('year_name', REMOTE_WINS),
+    'students': ('enrollment_no', LAST_WRITER_WINS),
+    'books': ('book_id', LAST_WRITER_WINS),
+    'borrow_records': ('sync_uid', LAST_WRITER_WINS),
+}
+# Surrogate ids are assigned by each database and never shipped
+UNSYNCED_COLUMNS = ('id',)
+# Daily counters derived from borrow_records (recounted for the days a sync touches)
+CIRCULATION_TABLES = ('daily_circulation_stats', 'daily_book_circulation', 'daily_year_circulation')
+
+DIRECTIONS = ('both', 'push', 'pull')
+
+# Existing loans get a key from their content, so copies made by migrate_to_postgres.py
+# match up; a second loan with the same student, book and date gets its id appended
+_BACKFILL_SYNC_UID = (
+    "UPDATE borrow_records SET sync_uid = 'legacy-' || enrollment_no || '-' || book_id || '-' || borrow_date "
+    "WHERE sync_uid IS NULL",
+    "UPDATE borrow_records SET sync_uid = sync_uid || '-' || id "
+    "WHERE id NOT IN (SELECT MIN(id) FROM borrow_records GROUP BY sync_uid)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_borrow_records_sync_uid ON borrow_records (sync_uid)",
+)
+
+_SQLITE_TRIGGERS = '''
+CREATE TRIGGER IF NOT EXISTS {table}_log_insert AFTER INSERT ON {table}
+WHEN NEW.{key} IS NOT NULL AND (SELECT applying FROM sync_clock WHERE id = 1) = 0
+BEGIN
+    UPDATE sync_clock SET value = value + 1 WHERE id = 1;
+    INSERT INTO change_log (table_name, row_key, op, clock)
+    SELECT '{table}', NEW.{key}, 'U', value FROM sync_clock WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_log_update AFTER UPDATE ON {table}
+WHEN (SELECT applying FROM sync_clock WHERE id = 1) = 0
+BEGIN
+    UPDATE sync_clock SET value = value + 1 WHERE id = 1;
+    INSERT INTO change_log (table_name, row_key, op, clock)
+    SELECT '{table}', OLD.{key}, 'D', value FROM sync_clock
+    WHERE id = 1 AND OLD.{key} IS NOT NULL AND OLD.{key} IS NOT NEW.{key};
+    INSERT INTO change_log (table_name, row_key, op, clock)
+    SELECT '{table}', NEW.{key}, 'U', value FROM sync_clock WHERE id = 1 AND NEW.{key} IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS {table}_log_delete AFTER DELETE ON {table}
+WHEN OLD.{key} IS NOT NULL AND (SELECT applying FROM sync_clock WHERE id = 1) = 0
+BEGIN
+    UPDATE sync_clock SET value = value + 1 WHERE id = 1;
+    INSERT INTO change_log (table_name, row_key, op, clock)
+    SELECT '{table}', OLD.{key}, 'D', value FROM sync_clock WHERE id = 1;
+END;
+'''
+
+_POSTGRES_LOG_FUNCTION = '''
+CREATE OR REPLACE FUNCTION sync_log_change() RETURNS trigger AS $$
+DECLARE
+    old_key TEXT;
+    new_key TEXT;
+    tick BIGINT;
+BEGIN
+    IF current_setting('library.sync_applying', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP <> 'INSERT' THEN
+        old_key := to_jsonb(OLD) ->> TG_ARGV[0];
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        new_key := to_jsonb(NEW) ->> TG_ARGV[0];
+    END IF;
+    tick := nextval('sync_clock');
+    IF old_key IS NOT NULL AND old_key IS DISTINCT FROM new_key THEN
+        INSERT INTO change_log (table_name, row_key, op, clock) VALUES (TG_TABLE_NAME, old_key, 'D', tick);
+    END IF;
+    IF new_key IS NOT NULL THEN
+        INSERT INTO change_log (table_name, row_key, op, clock) VALUES (TG_TABLE_NAME, new_key, 'U', tick);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+'''
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _placeholders(count):
+    return ', '.join('?' * count)
+
+
+def _day_text(value):
+    # PostgreSQL returns DATE columns as date objects, SQLite as text; days are kept as
+    # ISO text so loans read from either side land in one sortable set
+    return SqliteEndpoint._adapt(value)
+
+
+class SqliteEndpoint:
+    """A SQLite database file taking part in sync"""
+
+    row_errors = (sqlite3.IntegrityError,)
+    late_days_sql = "CAST(julianday(return_date) - julianday(due_date) AS INTEGER)"
+
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+
+    def connect(self):
+        # Foreign keys stay off: a sync applies parents and children in separate batches
+        return sqlite3.connect(self.path, timeout=30)
+
+    def sql(self, statement):
+        return statement
+
+    def has_table(self, cur, table):
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return cur.fetchone() is not None
+
+    def install(self, cur):
+        cur.execute('CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)')
+        cur.execute('''CREATE TABLE IF NOT EXISTS sync_clock (
+            id INTEGER PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0,
+            applying INTEGER NOT NULL DEFAULT 0
+        )''')
+        cur.execute('INSERT OR IGNORE INTO sync_clock (id) VALUES (1)')
+        cur.execute('''CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            op TEXT NOT NULL,
+            clock INTEGER NOT NULL,
+            origin TEXT,
+            changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )''')
+        cur.execute('PRAGMA table_info(borrow_records)')
+        if 'sync_uid' not in [row[1] for row in cur.fetchall()]:
+            cur.execute('ALTER TABLE borrow_records ADD COLUMN sync_uid TEXT')
+        for statement in _BACKFILL_SYNC_UID:
+            cur.execute(statement)
+        # SQLite has no volatile column defaults: new loans get a random key from a trigger
+        # (its UPDATE is what logs the loan)
+        cur.execute('''CREATE TRIGGER IF NOT EXISTS borrow_records_sync_uid AFTER INSERT ON borrow_records
+            WHEN NEW.sync_uid IS NULL
+            BEGIN
+                UPDATE borrow_records SET sync_uid = lower(hex(randomblob(16))) WHERE id = NEW.id;
+            END''')
+        for table, (key, _policy) in SYNC_TABLES.items():
+            for statement in _SQLITE_TRIGGERS.format(table=table, key=key).split('END;'):
+                if statement.strip():
+                    cur.execute(statement + 'END')
+
+    def stable_max_seq(self, conn):
+        # Writers are serialized, so every seq up to MAX(seq) is committed
+        cur = conn.cursor()
+        cur.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+        return cur.fetchone()[0]
+
+    def begin_apply(self, cur):
+        # Changes written by the sync are logged by the sync itself (with their origin)
+        cur.execute('UPDATE sync_clock SET applying = 1 WHERE id = 1')
+
+    def end_apply(self, cur, clock):
+        cur.execute('UPDATE sync_clock SET applying = 0, value = MAX(value, ?) WHERE id = 1', (clock,))
+
+    def insert_many(self, cur, head, rows, tail=''):
+        if rows:
+            cur.executemany(f"{head} ({_placeholders(len(rows[0]))}) {tail}", rows)
+
+    def adapt_rows(self, rows):
+        return [tuple(self._adapt(value) for value in row) for row in rows]
+
+    @staticmethod
+    def _adapt(value):
+        # Dates are stored as text, as the app writes them
+        if isinstance(value, datetime):
+            return value.strftime(TIME_FORMAT)
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+
+
+class PostgresEndpoint:
+    """A PostgreSQL database (DATABASE_URL style connection string) taking part in sync"""
+
+    late_days_sql = "(return_date - due_date)"
+
+    def __init__(self, url):
+        self.url = url
+        self.name = url.split('@')[-1]  # host/database, without credentials
+
+    @property
+    def row_errors(self):
+        return (psycopg2.IntegrityError, psycopg2.DataError)
+
+    def connect(self):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 is not installed (pip install psycopg2-binary)")
+        return psycopg2.connect(self.url)
+
+    def sql(self, statement):
+        return statement.replace('?', '%s')
+
+    def has_table(self, cur, table):
+        cur.execute('SELECT to_regclass(%s)', (table,))
+        return cur.fetchone()[0] is not None
+
+    def install(self, cur):
+        cur.execute('CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)')
+        cur.execute('CREATE SEQUENCE IF NOT EXISTS sync_clock')
+        cur.execute('''CREATE TABLE IF NOT EXISTS change_log (
+            seq BIGSERIAL PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            op TEXT NOT NULL,
+            clock BIGINT NOT NULL,
+            origin TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''')
+        cur.execute('ALTER TABLE borrow_records ADD COLUMN IF NOT EXISTS sync_uid TEXT')
+        for statement in _BACKFILL_SYNC_UID:
+            cur.execute(statement)
+        # Set after the backfill so existing loans keep their content-based keys
+        cur.execute("ALTER TABLE borrow_records ALTER COLUMN sync_uid SET DEFAULT md5(random()::text || clock_timestamp()::text)")
+        cur.execute(_POSTGRES_LOG_FUNCTION)
+        for table, (key, _policy) in SYNC_TABLES.items():
+            cur.execute(f'DROP TRIGGER IF EXISTS {table}_change_log ON {table}')
+            cur.execute(f"CREATE TRIGGER {table}_change_log AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                        f"FOR EACH ROW EXECUTE PROCEDURE sync_log_change('{key}')")
+
+    def stable_max_seq(self, conn):
+        # Sequence values are taken before commit; SHARE mode waits for every transaction
+        # still writing to change_log, so no entry at or below the result can appear later
+        cur = conn.cursor()
+        cur.execute('LOCK TABLE change_log IN SHARE MODE')
+        cur.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+        seq = cur.fetchone()[0]
+        conn.commit()
+        return seq
+
+    def begin_apply(self, cur):
+        cur.execute("SET LOCAL library.sync_applying = 'on'")
+
+    def end_apply(self, cur, clock):
+        cur.execute("SELECT setval('sync_clock', GREATEST((SELECT last_value FROM sync_clock), %s))", (max(clock, 1),))
+        cur.execute("SET LOCAL library.sync_applying = 'off'")
+
+    def insert_many(self, cur, head, rows, tail=''):
+        if rows:
+            execute_values(cur, f"{head} %s {tail}", rows, page_size=len(rows))
+
+    def adapt_rows(self, rows):
+        return rows
+
+
+def endpoint_for(target):
+    """Endpoint for a postgres:// URL, a sqlite:/// URL or a SQLite file path"""
+    if target.startswith(('postgres://', 'postgresql://')):
+        return PostgresEndpoint(target)
+    if target.startswith('sqlite:///'):
+        target = target[len('sqlite:///'):]
+    return SqliteEndpoint(target)
+
+
+class SyncManager:
+    """
+    Two-way incremental sync between a local and a remote database.
+
+    Parameters:
+    - local, remote: SqliteEndpoint / PostgresEndpoint (None = not available; sync_now reports why)
+    - db: Optional Database told about rows written to it (mark_changed), so open views refresh
+    - log_path: JSON file with the last sync's status (shown in the admin panel)
+    - batch_size: Rows per upsert/delete statement batch
+    """
+
+    def __init__(self, local, remote, db=None, log_path=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.local = local
+        self.remote = remote
+        self.db = db
+        self.log_path = log_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), SYNC_LOG_NAME)
+        self.batch_size = max(1, int(batch_size))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def sync_now(self, direction='both'):
+        """Sync the changes made since the last sync; direction: 'both', 'push' (local to
+        remote) or 'pull' (remote to local). Blocks while another sync is running.
+
+        Returns {'direction', 'records_synced', 'pushed', 'pulled', 'conflicts', 'failed',
+        'tables': {table: {'pushed', 'pulled'}}, 'duration'}, or {'error', 'direction',
+        'duration'} when the sync could not run (nothing is half-applied on either side).
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown sync direction: {direction}")
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                if self.local is None:
+                    raise RuntimeError("Sync needs the local SQLite database (the app is using the cloud database directly)")
+                if self.remote is None:
+                    raise RuntimeError(f"No remote database configured (set {SYNC_URL_ENV})")
+                result = self._sync(direction)
+            except Exception as e:
+                print(f"[Sync] Failed: {e}")
+                result = {'error': str(e), 'direction': direction}
+            result['duration'] = round(time.perf_counter() - started, 3)
+            self._write_log(result)
+            return result
+
+    def auto_sync_daemon(self, interval_minutes):
+        """Run sync_now('both') every interval_minutes until stop(); meant for a daemon thread"""
+        if self.local is None or self.remote is None:
+            print(f"[Sync] Auto-sync off: no remote database configured ({SYNC_URL_ENV})")
+            return
+        interval = max(1.0, float(interval_minutes)) * 60
+        self._stop.clear()
+        while not self._stop.wait(interval):
+            result = self.sync_now('both')
+            if 'error' not in result:
+                print(f"[Sync] Auto-sync: {result['records_synced']} records in {result['duration']:.1f}s")
+
+    def stop(self):
+        self._stop.set()
+
+    def last_status(self):
+        """Contents of the sync log ({} before the first sync)"""
+        try:
+            with open(self.log_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # ---- Sync ----
+
+    def _sync(self, direction):
+        push = direction in ('both', 'push')
+        pull = direction in ('both', 'pull')
+        local_conn = self.local.connect()
+        try:
+            remote_conn = self.remote.connect()
+            try:
+                local_node = self._prepare(self.local, local_conn)
+                remote_node = self._prepare(self.remote, remote_conn)
+                push_key, pull_key = f"push_seq:{remote_node}", f"pull_seq:{remote_node}"
+                push_from = int(self._get_state(self.local, local_conn, push_key) or 0)
+                pull_from = int(self._get_state(self.local, local_conn, pull_key) or 0)
+                push_to = self.local.stable_max_seq(local_conn)
+                pull_to = self.remote.stable_max_seq(remote_conn)
+
+                # Only changes made on this side go out; everything not made on this side comes in
+                outgoing = self._pending(self.local, local_conn, push_from, push_to, local_node,
+                                         lambda origin: origin is None)
+                incoming = self._pending(self.remote, remote_conn, pull_from, pull_to, remote_node,
+                                         lambda origin: origin != local_node)
+                conflicts = self._resolve(local_conn, remote_conn, outgoing, incoming)
+
+                stats = {'pushed': 0, 'pulled': 0, 'conflicts': conflicts, 'failed': 0,
+                         'tables': {table: {'pushed': 0, 'pulled': 0} for table in SYNC_TABLES}}
+                if push and outgoing:
+                    self._ship(self.local, local_conn, self.remote, remote_conn, outgoing, 'pushed', stats)
+                    remote_conn.commit()
+                pulled_tables = set()
+                if pull and incoming:
+                    pulled_tables = self._ship(self.remote, remote_conn, self.local, local_conn, incoming, 'pulled', stats)
+                # Pulled rows, watermarks and the log cleanup commit together
+                cur = local_conn.cursor()
+                if push:
+                    self._set_state(self.local, cur, push_key, push_to)
+                    # Shipped entries are no longer needed here (the remote keeps its own log)
+                    cur.execute(self.local.sql('DELETE FROM change_log WHERE seq <= ?'), (push_to,))
+                if pull:
+                    self._set_state(self.local, cur, pull_key, pull_to)
+                local_conn.commit()
+            finally:
+                remote_conn.close()
+        finally:
+            local_conn.close()
+
+        if pulled_tables and self.db is not None:
+            self.db.mark_changed(*pulled_tables)
+        stats['records_synced'] = stats['pushed'] + stats['pulled']
+        stats['direction'] = direction
+        return stats
+
+    def _prepare(self, endpoint, conn):
+        """Install the change_log triggers on first use; returns the database's node id"""
+        cur = conn.cursor()
+        installed = endpoint.has_table(cur, 'sync_state') and \
+            self._get_state(endpoint, conn, 'schema_version') == SYNC_SCHEMA_VERSION
+        if not installed:
+            seed = not endpoint.has_table(cur, 'change_log')
+            endpoint.install(cur)
+            if seed:
+                # Rows that predate the log are shipped once, at clock 0 (any later edit wins)
+                for table, (key, _policy) in SYNC_TABLES.items():
+                    cur.execute(f"INSERT INTO change_log (table_name, row_key, op, clock) "
+                                f"SELECT '{table}', {key}, 'U', 0 FROM {table} WHERE {key} IS NOT NULL")
+            if self._get_state(endpoint, conn, 'node_id') is None:
+                self._set_state(endpoint, cur, 'node_id', uuid.uuid4().hex)
+            self._set_state(endpoint, cur, 'schema_version', SYNC_SCHEMA_VERSION)
+            conn.commit()
+            print(f"[Sync] Change tracking installed on {endpoint.name}")
+        return self._get_state(endpoint, conn, 'node_id')
+
+    @staticmethod
+    def _get_state(endpoint, conn, key):
+        cur = conn.cursor()
+        cur.execute(endpoint.sql('SELECT value FROM sync_state WHERE key = ?'), (key,))
+        row = cur.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_state(endpoint, cur, key, value):
+        cur.execute(endpoint.sql('INSERT INTO sync_state (key, value) VALUES (?, ?) '
+                                 'ON CONFLICT (key) DO UPDATE SET value = excluded.value'), (key, str(value)))
+
+    def _pending(self, endpoint, conn, after_seq, upto_seq, node, wanted):
+        """Latest logged change per row in (after_seq, upto_seq] whose origin passes wanted(origin).
+        Returns {(table, key): (op, clock, node that made the change)}.
+        """
+        if upto_seq <= after_seq:
+            return {}
+        cur = conn.cursor()
+        cur.execute(endpoint.sql('''
+            SELECT c.table_name, c.row_key, c.op, c.clock, c.origin
+            FROM change_log c
+            JOIN (
+                SELECT MAX(seq) AS seq FROM change_log
+                WHERE seq > ? AND seq <= ?
+                GROUP BY table_name, row_key
+            ) latest ON latest.seq = c.seq
+        '''), (after_seq, upto_seq))
+        return {(table, key): (op, clock, origin or node)
+                for table, key, op, clock, origin in cur.fetchall()
+                if table in SYNC_TABLES and wanted(origin)}
+
+    def _resolve(self, local_conn, remote_conn, outgoing, incoming):
+        """Settle rows changed on both sides: rows that are now the same on both are dropped
+        from both, otherwise the losing side is dropped. Returns the conflict count.
+        """
+        both = outgoing.keys() & incoming.keys()
+        same = self._same_rows(local_conn, remote_conn, both)
+        conflicts = 0
+        for row in both:
+            if row in same:
+                del outgoing[row], incoming[row]
+                continue
+            conflicts += 1
+            policy = SYNC_TABLES[row[0]][1]
+            if policy == REMOTE_WINS:
+                remote_wins = True
+            elif policy == LOCAL_WINS:
+                remote_wins = False
+            else:
+                # Higher logical clock wins; ties go to the higher node id, the same on every database
+                _op, local_clock, local_node = outgoing[row]
+                _op, remote_clock, remote_node = incoming[row]
+                remote_wins = (remote_clock, remote_node) > (local_clock, local_node)
+            del (outgoing if remote_wins else incoming)[row]
+        return conflicts
+
+    def _same_rows(self, local_conn, remote_conn, rows):
+        """The (table, key) rows whose synced columns are equal on both sides (or deleted on both)"""
+        local_cur, remote_cur = local_conn.cursor(), remote_conn.cursor()
+        keys_by_table = {}
+        for table, key in rows:
+            keys_by_table.setdefault(table, []).append(key)
+        same = set()
+        for table, keys in keys_by_table.items():
+            key_column = SYNC_TABLES[table][0]
+            columns = self._shared_columns(local_cur, remote_cur, table)
+            key_index = columns.index(key_column)
+            for chunk in _chunks(keys, self.batch_size):
+                select = f"SELECT {', '.join(columns)} FROM {table} WHERE {key_column} IN ({_placeholders(len(chunk))})"
+                local_cur.execute(self.local.sql(select), chunk)
+                local_rows = {row[key_index]: row for row in local_cur.fetchall()}
+                remote_cur.execute(self.remote.sql(select), chunk)
+                # Compared in the local representation (dates as text)
+                remote_rows = {row[key_index]: row for row in self.local.adapt_rows(remote_cur.fetchall())}
+                same.update((table, key) for key in chunk if local_rows.get(key) == remote_rows.get(key))
+        return same
+
+    def _ship(self, src, src_conn, dst, dst_conn, changes, counter, stats):
+        """Apply changes (read from src) to dst and log them there with their origin; deletes
+        run children first, upserts parents first. Returns the tables written (dst not committed).
+        """
+        src_cur, dst_cur = src_conn.cursor(), dst_conn.cursor()
+        dst.begin_apply(dst_cur)
+        upserts = {table: [] for table in SYNC_TABLES}
+        deletes = {table: [] for table in SYNC_TABLES}
+        for (table, key), (op, _clock, _node) in changes.items():
+            (deletes if op == 'D' else upserts)[table].append(key)
+        touched_books = set()
+        loan_days = set()
+
+        for table, (key_column, _policy) in SYNC_TABLES.items():
+            if not upserts[table]:
+                continue
+            columns = self._shared_columns(src_cur, dst_cur, table)
+            key_index = columns.index(key_column)
+            book_index = columns.index('book_id') if 'book_id' in columns else None
+            day_indexes = [columns.index(column) for column in ('borrow_date', 'return_date')
+                           if table == 'borrow_records' and column in columns]
+            head = f"INSERT INTO {table} ({', '.join(columns)}) VALUES"
+            tail = f"ON CONFLICT ({key_column}) DO UPDATE SET " + ', '.join(
+                f"{column} = excluded.{column}" for column in columns if column != key_column)
+            for keys in _chunks(upserts[table], self.batch_size):
+                src_cur.execute(src.sql(f"SELECT {', '.join(columns)} FROM {table} "
+                                        f"WHERE {key_column} IN ({_placeholders(len(keys))})"), keys)
+                rows = dst.adapt_rows(src_cur.fetchall())
+                # Rows deleted at the source since they were logged are deleted here too
+                found = {row[key_index] for row in rows}
+                deletes[table].extend(key for key in keys if key not in found)
+                if day_indexes:
+                    # Counted on the days the loans had before and have after the change
+                    loan_days.update(self._loan_days(dst, dst_cur, [key for key in keys if key in found]))
+                applied = self._apply(dst, dst_cur, lambda batch: dst.insert_many(dst_cur, head, batch, tail), rows, stats)
+                self._log_applied(dst, dst_cur, table, 'U', [row[key_index] for row in applied], changes)
+                stats['tables'][table][counter] += len(applied)
+                if book_index is not None:
+                    touched_books.update(row[book_index] for row in applied)
+                loan_days.update(_day_text(row[index]) for row in applied for index in day_indexes
+                                 if row[index] is not None)
+
+        for table, (key_column, _policy) in reversed(list(SYNC_TABLES.items())):
+            def delete(batch, table=table, key_column=key_column):
+                dst_cur.execute(dst.sql(f"DELETE FROM {table} WHERE {key_column} IN ({_placeholders(len(batch))})"),
+                                [key for key, in batch])
+
+            for keys in _chunks(deletes[table], self.batch_size):
+                if table in ('books', 'borrow_records'):
+                    dst_cur.execute(dst.sql(f"SELECT book_id FROM {table} WHERE {key_column} IN ({_placeholders(len(keys))})"), keys)
+                    touched_books.update(row[0] for row in dst_cur.fetchall())
+                if table == 'borrow_records':
+                    loan_days.update(self._loan_days(dst, dst_cur, keys))
+                applied = self._apply(dst, dst_cur, delete, [(key,) for key in keys], stats)
+                self._log_applied(dst, dst_cur, table, 'D', [key for key, in applied], changes)
+                stats['tables'][table][counter] += len(applied)
+
+        if touched_books:
+            self._refresh_available_copies(dst, dst_cur, sorted(touched_books))
+        written = {table for table, table_stats in stats['tables'].items() if table_stats[counter]}
+        if loan_days and dst.has_table(dst_cur, CIRCULATION_TABLES[0]):
+            self._recount_circulation_stats(dst, dst_cur, sorted(loan_days))
+            written.update(CIRCULATION_TABLES)
+        dst.end_apply(dst_cur, max(clock for _op, clock, _node in changes.values()))
+        stats[counter] = sum(table_stats[counter] for table_stats in stats['tables'].values())
+        return written
+
+    def _apply(self, dst, cur, run, rows, stats):
+        """run(rows) in a savepoint; a batch with a rejected row (constraint, bad value) is
+        retried row by row and the rejected rows skipped. Returns the rows applied.
+        """
+        if not rows:
+            return []
+        cur.execute('SAVEPOINT sync_batch')
+        try:
+            run(rows)
+            cur.execute('RELEASE SAVEPOINT sync_batch')
+            return rows
+        except dst.row_errors as e:
+            cur.execute('ROLLBACK TO SAVEPOINT sync_batch')
+            cur.execute('RELEASE SAVEPOINT sync_batch')
+            if len(rows) == 1:
+                print(f"[Sync] Skipped a row on {dst.name}: {e}")
+                stats['failed'] += 1
+                return []
+        applied = []
+        for row in rows:
+            applied += self._apply(dst, cur, run, [row], stats)
+        return applied
+
+    @staticmethod
+    def _log_applied(dst, cur, table, op, keys, changes):
+        # Logged with the original clock and origin, so a hub can pass the change on
+        dst.insert_many(cur, 'INSERT INTO change_log (table_name, row_key, op, clock, origin) VALUES',
+                        [(table, key, op) + changes[(table, key)][1:] for key in keys])
+
+    @staticmethod
+    def _shared_columns(src_cur, dst_cur, table):
+        names = []
+        for cur in (src_cur, dst_cur):
+            cur.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+            names.append([column[0] for column in cur.description])
+        return [column for column in names[0] if column in names[1] and column not in UNSYNCED_COLUMNS]
+
+    @staticmethod
+    def _refresh_available_copies(dst, cur, book_ids):
+        # Copies on loan are counted from the merged borrow_records, not taken from either side
+        for chunk in _chunks(book_ids, DEFAULT_BATCH_SIZE):
+            cur.execute(dst.sql(f'''
+                UPDATE books SET available_copies = total_copies - (
+                    SELECT COUNT(*) FROM borrow_records br
+                    WHERE br.book_id = books.book_id AND br.status = 'borrowed'
+                )
+                WHERE book_id IN ({_placeholders(len(chunk))})
+            '''), chunk)
+
+    @staticmethod
+    def _loan_days(dst, cur, sync_uids):
+        """Borrow and return dates the given loans currently have on dst"""
+        days = set()
+        for chunk in _chunks(sync_uids, DEFAULT_BATCH_SIZE):
+            cur.execute(dst.sql(f"SELECT borrow_date, return_date FROM borrow_records "
+                                f"WHERE sync_uid IN ({_placeholders(len(chunk))})"), chunk)
+            days.update(_day_text(day) for row in cur.fetchall() for day in row if day is not None)
+        return days
+
+    @staticmethod
+    def _recount_circulation_stats(dst, cur, days):
+        # Same counts as Database.rebuild_circulation_stats, limited to the given days
+        for chunk in _chunks(days, DEFAULT_BATCH_SIZE):
+            marks = _placeholders(len(chunk))
+            for table in CIRCULATION_TABLES:
+                cur.execute(dst.sql(f"DELETE FROM {table} WHERE day IN ({marks})"), chunk)
+            cur.execute(dst.sql(f'''
+                INSERT INTO daily_circulation_stats (day, borrowed, returned, late_returns, late_days)
+                SELECT day, SUM(borrowed), SUM(returned), SUM(late_returns), SUM(late_days) FROM (
+                    SELECT borrow_date AS day, 1 AS borrowed, 0 AS returned, 0 AS late_returns, 0 AS late_days
+                    FROM borrow_records WHERE borrow_date IN ({marks})
+                    UNION ALL
+                    SELECT return_date, 0, 1,
+                           CASE WHEN return_date > due_date THEN 1 ELSE 0 END,
+                           CASE WHEN return_date > due_date THEN {dst.late_days_sql} ELSE 0 END
+                    FROM borrow_records WHERE return_date IN ({marks})
+                ) t
+                GROUP BY day
+            '''), chunk + chunk)
+            cur.execute(dst.sql(f'''
+                INSERT INTO daily_book_circulation (day, book_id, borrowed)
+                SELECT borrow_date, book_id, COUNT(*) FROM borrow_records
+                WHERE borrow_date IN ({marks}) GROUP BY borrow_date, book_id
+            '''), chunk)
+            cur.execute(dst.sql(f'''
+                INSERT INTO daily_year_circulation (day, student_year, borrowed)
+                SELECT br.borrow_date, COALESCE(s.year, ''), COUNT(*)
+                FROM borrow_records br JOIN students s ON s.enrollment_no = br.enrollment_no
+                WHERE br.borrow_date IN ({marks})
+                GROUP BY br.borrow_date, COALESCE(s.year, '')
+            '''), chunk)
+
+    def _write_log(self, result):
+        """Record the outcome in the sync log; last_sync is the last successful sync"""
+        now = datetime.now().strftime(TIME_FORMAT)
+        log = self.last_status()
+        log.update({
+            'last_attempt': now,
+            'status': 'failed' if 'error' in result else 'success',
+            'direction': result.get('direction'),
+            'duration': result.get('duration'),
+        })
+        if 'error' in result:
+            log['error'] = result['error']
+        else:
+            log.pop('error', None)
+            log['last_sync'] = now
+            for key in ('records_synced', 'pushed', 'pulled', 'conflicts', 'failed'):
+                log[key] = result[key]
+        try:
+            temp_path = self.log_path + '.tmp'
+            with open(temp_path, 'w') as f:
+                json.dump(log, f, indent=4)
+            os.replace(temp_path, self.log_path)
+        except OSError as e:
+            print(f"[Sync] Could not write {self.log_path}: {e}")
+
+
+def create_sync_manager(db, remote=None, log_path=None, batch_size=DEFAULT_BATCH_SIZE):
+    """SyncManager between the app's SQLite database and `remote` (default: the SYNC_DATABASE_URL
+    environment variable; a postgres:// URL or another SQLite file). The sync log is kept next
+    to the database file.
+    """
+    remote = remote or os.getenv(SYNC_URL_ENV)
+    local = None if db.use_cloud else SqliteEndpoint(db.db_path)
+    if log_path is None and db.db_path:
+        log_path = os.path.join(os.path.dirname(os.path.abspath(db.db_path)), SYNC_LOG_NAME)
+    return SyncManager(local, endpoint_for(remote) if remote else None, db=db,
+                       log_path=log_path, batch_size=batch_size)
@@ -0,0 +1,267 @@
+"""
+Bounded background task runner for the desktop app
+All UI-triggered work (searches, refreshes, borrows/returns, analytics) runs on
+a small fixed pool of worker threads. Tasks are picked by priority lane, keyed
+tasks can supersede (latest wins) or coalesce with earlier ones, and every task
+records its queue wait and run time for diagnostics.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+# Priority lanes (lower runs first)
+PRIORITY_WRITE = 0        # Circulation writes: borrow, return
+PRIORITY_INTERACTIVE = 1  # Searches and lookups the user is waiting on
+PRIORITY_REFRESH = 2      # View and dashboard refreshes
+PRIORITY_BACKGROUND = 3   # Analytics, observability, imports, sync
+
+DEFAULT_MAX_WORKERS = 4
+# Workers never all run PRIORITY_BACKGROUND work; this many stay free for the other lanes
+RESERVED_WORKERS = 1
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class TaskHandle:
+    """A submitted task; cancel() stops it from starting or drops its result"""
+
+    def __init__(self, runner, name, target, kwargs, callback, key, priority):
+        self.runner = runner
+        self.name = name
+        self.target = target
+        self.kwargs = kwargs
+        self.callback = callback
+        self.key = key
+        self.priority = priority
+        self.state = PENDING
+        self.cancelled = False
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+
+    def cancel(self):
+        self.runner._cancel_handle(self)
+
+    @property
+    def wait_time(self):
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def run_time(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class TaskRunner:
+    """
+    Priority thread pool whose results are delivered through `dispatch`.
+
+    Parameters:
+    - dispatch: Function(fn) that runs fn on the UI thread (e.g. lambda fn: root.after(0, fn));
+      None calls the callback directly on the worker thread
+    - max_workers: Pool size; threads are started on demand and kept for reuse
+    - history_size: Finished tasks kept for recent_tasks()
+
+    Keys:
+    - submit(..., key=k) cancels any queued or running task with key k (latest wins);
+      a running task finishes but its callback is skipped
+    - submit(..., key=k, coalesce=True) returns the queued task with key k instead of
+      adding a duplicate; if the existing task is already running, a new one is queued
+      so the caller still sees data read after the request
+    """
+
+    def __init__(self, dispatch=None, max_workers=DEFAULT_MAX_WORKERS, history_size=200):
+        self.dispatch = dispatch
+        self.max_workers = max(1, max_workers)
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._idle = 0
+        self._running_background = 0
+        self._queued_by_key = {}
+        self._running_by_key = {}
+        self._history = deque(maxlen=history_size)
+        self._stats = {}
+        self._shutdown = False
+
+    def submit(self, target, callback=None, key=None, priority=PRIORITY_REFRESH,
+               coalesce=False, name=None, **kwargs):
+        """Queue target(**kwargs); callback(result or Exception) is dispatched when it finishes"""
+        name = name or key or getattr(target, '__name__', 'task')
+        with self._condition:
+            if key is not None:
+                queued = self._queued_by_key.get(key)
+                if coalesce and queued is not None and not queued.cancelled:
+                    queued.callback = callback or queued.callback
+                    if priority < queued.priority:
+                        # Re-queue in the higher lane; the old heap entry is now stale
+                        queued.priority = priority
+                        heapq.heappush(self._heap, (priority, next(self._sequence), queued))
+                        self._condition.notify()
+                    return queued
+                if not coalesce:
+                    if queued is not None:
+                        self._cancel_locked(queued)
+                    running = self._running_by_key.get(key)
+                    if running is not None:
+                        self._cancel_locked(running)
+            handle = TaskHandle(self, name, target, kwargs, callback, key, priority)
+            if key is not None:
+                self._queued_by_key[key] = handle
+            heapq.heappush(self._heap, (priority, next(self._sequence), handle))
+            self._ensure_worker_locked()
+            self._condition.notify()
+        return handle
+
+    def cancel(self, key):
+        """Cancel the queued and running task for key (their callbacks will not run)"""
+        with self._condition:
+            for handle in (self._queued_by_key.get(key), self._running_by_key.get(key)):
+                if handle is not None:
+                    self._cancel_locked(handle)
+
+    def shutdown(self):
+        """Stop the workers once the current tasks finish; queued tasks are dropped"""
+        with self._condition:
+            self._shutdown = True
+            for _priority, _seq, handle in self._heap:
+                handle.cancelled = True
+                handle.state = CANCELLED
+            self._heap = []
+            self._queued_by_key.clear()
+            self._condition.notify_all()
+
+    def _cancel_handle(self, handle):
+        with self._condition:
+            self._cancel_locked(handle)
+
+    def _cancel_locked(self, handle):
+        handle.cancelled = True
+        if handle.state == PENDING:
+            handle.state = CANCELLED
+            if self._queued_by_key.get(handle.key) is handle:
+                del self._queued_by_key[handle.key]
+            self._record_locked(handle)
+
+    def _ensure_worker_locked(self):
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        if self._idle == 0 and len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"TaskRunner-{len(self._workers) + 1}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_task_locked(self):
+        """Pop the best runnable task, or None if nothing may start right now"""
+        while self._heap:
+            priority, _seq, handle = self._heap[0]
+            # Cancelled, or superseded by a higher-priority entry when coalesced
+            if handle.cancelled or priority != handle.priority:
+                heapq.heappop(self._heap)
+                continue
+            if priority >= PRIORITY_BACKGROUND and \
+                    self._running_background >= self.max_workers - RESERVED_WORKERS:
+                return None
+            heapq.heappop(self._heap)
+            return handle
+        return None
+
+    def _work(self):
+        while True:
+            with self._condition:
+                handle = self._next_task_locked()
+                while handle is None:
+                    if self._shutdown:
+                        return
+                    self._idle += 1
+                    self._condition.wait()
+                    self._idle -= 1
+                    handle = self._next_task_locked()
+                if self._queued_by_key.get(handle.key) is handle:
+                    del self._queued_by_key[handle.key]
+                if handle.key is not None:
+                    self._running_by_key[handle.key] = handle
+                background = handle.priority >= PRIORITY_BACKGROUND
+                if background:
+                    self._running_background += 1
+                handle.state = RUNNING
+                handle.started_at = time.perf_counter()
+
+            try:
+                result = handle.target(**handle.kwargs)
+                state = DONE
+            except Exception as e:
+                print(f"Background task {handle.name} failed: {e}")
+                result = e
+                state = FAILED
+
+            with self._condition:
+                handle.finished_at = time.perf_counter()
+                handle.state = CANCELLED if handle.cancelled else state
+                if self._running_by_key.get(handle.key) is handle:
+                    del self._running_by_key[handle.key]
+                if background:
+                    self._running_background -= 1
+                    self._condition.notify()
+                self._record_locked(handle)
+                callback = None if handle.cancelled else handle.callback
+            if callback is not None:
+                self._deliver(handle, callback, result)
+
+    def _deliver(self, handle, callback, result):
+        def run():
+            if not handle.cancelled:
+                callback(result)
+        if self.dispatch is None:
+            run()
+            return
+        try:
+            self.dispatch(run)
+        except RuntimeError:
+            pass  # UI already closed
+
+    def _record_locked(self, handle):
+        self._history.append(handle)
+        stats = self._stats.setdefault(handle.name, {
+            'count': 0, 'failed': 0, 'cancelled': 0,
+            'total_run': 0.0, 'max_run': 0.0, 'total_wait': 0.0, 'max_wait': 0.0,
+        })
+        stats['count'] += 1
+        if handle.state == FAILED:
+            stats['failed'] += 1
+        elif handle.state == CANCELLED:
+            stats['cancelled'] += 1
+        if handle.run_time is not None:
+            stats['total_run'] += handle.run_time
+            stats['max_run'] = max(stats['max_run'], handle.run_time)
+        if handle.wait_time is not None:
+            stats['total_wait'] += handle.wait_time
+            stats['max_wait'] = max(stats['max_wait'], handle.wait_time)
+
+    def stats(self):
+        """Per task name: count, failed, cancelled, and run/wait totals and maxima in seconds"""
+        with self._condition:
+            return {name: dict(values) for name, values in self._stats.items()}
+
+    def recent_tasks(self):
+        """(name, state, wait seconds, run seconds) for the most recently finished tasks"""
+        with self._condition:
+            return [(h.name, h.state, h.wait_time, h.run_time) for h in self._history]
+
+    def status(self):
+        """Snapshot of pool usage: workers, queued, running"""
+        with self._condition:
+            queued = sum(1 for _p, _s, h in self._heap if not h.cancelled)
+            alive = sum(1 for worker in self._workers if worker.is_alive())
+            return {'workers': alive, 'idle': self._idle, 'queued': queued,
+                    'running': alive - self._idle}
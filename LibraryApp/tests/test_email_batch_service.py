@@ -0,0 +1,172 @@
+import base64
+import os
+import socketserver
+import sys
+import threading
+import time
+import unittest
+from collections import Counter
+
+# Ensure we can import from LibraryApp
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from email_batch_service import EmailBatchService
+
+PASSWORD = 'app-password'
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, QUIT.
+    Recipients starting with 'busy' get one 451 before being accepted, 'reject' gets 550."""
+
+    def reply(self, text):
+        self.wfile.write(text.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        recipients = []
+        self.reply('220 localhost test SMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().rstrip('\r\n')
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 AUTH PLAIN')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'AUTH':
+                _authzid, _user, password = base64.b64decode(command.split()[2]).split(b'\0')
+                with server.lock:
+                    server.logins += 1
+                if password.decode() == PASSWORD:
+                    self.reply('235 Authentication successful')
+                else:
+                    self.reply('535 Authentication credentials invalid')
+            elif verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip().strip('<>')
+                with server.lock:
+                    server.rcpt_attempts[address] += 1
+                    attempts = server.rcpt_attempts[address]
+                if address.startswith('reject'):
+                    self.reply('550 Mailbox unavailable')
+                elif address.startswith('busy') and attempts == 1:
+                    self.reply('451 Try again later')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with server.lock:
+                    server.delivered.extend(recipients)
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class _SmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SmtpHandler)
+        self.lock = threading.Lock()
+        self.logins = 0
+        self.rcpt_attempts = Counter()
+        self.delivered = []
+
+
+class TestEmailBatchService(unittest.TestCase):
+    def setUp(self):
+        self.server = _SmtpServer()
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.settings = {
+            'smtp_server': '127.0.0.1',
+            'smtp_port': self.server.server_address[1],
+            'sender_email': 'library@example.com',
+            'sender_password': PASSWORD,
+            'use_tls': False,
+            'rate_per_minute': 0,
+        }
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _emails(self, *recipients):
+        return [{'to': to, 'subject': f'Overdue {n}', 'body': 'Please return the book.'}
+                for n, to in enumerate(recipients)]
+
+    def test_one_login_per_worker_session(self):
+        service = EmailBatchService(max_workers=2, backoff_seconds=0.01)
+        result = service.send_batch_emails(self._emails(*[f'student{n}@example.com' for n in range(8)]), self.settings)
+        self.assertEqual(result['sent'], 8)
+        self.assertEqual(len(self.server.delivered), 8)
+        self.assertLessEqual(self.server.logins, 2)
+
+    def test_session_recycled_every_batch_size_messages(self):
+        service = EmailBatchService(max_workers=1, batch_size=2, backoff_seconds=0.01)
+        result = service.send_batch_emails(self._emails(*[f'student{n}@example.com' for n in range(5)]), self.settings)
+        self.assertEqual(result['sent'], 5)
+        self.assertEqual(self.server.logins, 3)
+
+    def test_rate_limit_spaces_sends(self):
+        service = EmailBatchService(max_workers=2, backoff_seconds=0.01)
+        settings = dict(self.settings, rate_per_minute=600)  # one send every 0.1s
+        started = time.monotonic()
+        result = service.send_batch_emails(self._emails(*[f'student{n}@example.com' for n in range(4)]), settings)
+        self.assertEqual(result['sent'], 4)
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+    def test_retries_after_451(self):
+        service = EmailBatchService(max_workers=1, backoff_seconds=0.01)
+        result = service.send_batch_emails(self._emails('busy@example.com'), self.settings)
+        self.assertEqual(result['results'], [True])
+        self.assertEqual(self.server.rcpt_attempts['busy@example.com'], 2)
+        self.assertEqual(self.server.delivered, ['busy@example.com'])
+
+    def test_no_retry_after_550(self):
+        service = EmailBatchService(max_workers=1, backoff_seconds=0.01)
+        result = service.send_batch_emails(self._emails('reject@example.com'), self.settings)
+        self.assertEqual(result['results'], [False])
+        self.assertIn('550', result['errors'][0])
+        self.assertEqual(self.server.rcpt_attempts['reject@example.com'], 1)
+        self.assertEqual(self.server.delivered, [])
+
+    def test_auth_failure_aborts_batch(self):
+        service = EmailBatchService(max_workers=1, backoff_seconds=0.01)
+        settings = dict(self.settings, sender_password='wrong')
+        result = service.send_batch_emails(self._emails(*[f'student{n}@example.com' for n in range(3)]), settings)
+        self.assertEqual(result['results'], [False, False, False])
+        self.assertIn('Authentication failed', result['errors'][0])
+        self.assertEqual(result['errors'][1:], ['Not sent: SMTP login failed'] * 2)
+        self.assertEqual(self.server.logins, 1)
+        self.assertEqual(self.server.delivered, [])
+
+    def test_results_in_input_order(self):
+        emails = self._emails('a@example.com', 'b@example.com', 'reject@example.com', 'c@example.com', 'd@example.com')
+        emails[1]['error'] = 'Letter could not be rendered'
+        service = EmailBatchService(max_workers=3, backoff_seconds=0.01)
+        result = service.send_batch_emails(iter(emails), self.settings, total=len(emails))
+        self.assertEqual(result['results'], [True, False, False, True, True])
+        self.assertEqual(result['errors'][0], '')
+        self.assertEqual(result['errors'][1], 'Letter could not be rendered')
+        self.assertIn('550', result['errors'][2])
+        self.assertEqual([email['to'] for email in result['emails']], [email['to'] for email in emails])
+        self.assertNotIn('b@example.com', self.server.delivered)
+
+
+if __name__ == '__main__':
+    unittest.main()
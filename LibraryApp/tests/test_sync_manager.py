@@ -0,0 +1,74 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+# Ensure we can import from LibraryApp
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from database import Database
+from sync_manager import SyncManager, SqliteEndpoint
+
+
+class PostgresLikeEndpoint(SqliteEndpoint):
+    """SQLite file that behaves like PostgresEndpoint where sync cares: DATE columns
+    come back as date objects and rows are written without adapting them to text"""
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES)
+
+    def adapt_rows(self, rows):
+        return rows
+
+
+class TestSyncToPostgres(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.local_path = os.path.join(self.tmp, 'local.db')
+        self.remote_path = os.path.join(self.tmp, 'remote.db')
+        self.db = Database(db_path=self.local_path)
+        self.db.add_student('S001', 'Test Student', year='2nd Year')
+        self.db.add_book('B001', 'Test Book', total_copies=2)
+        ok, message = self.db.borrow_book('S001', 'B001', '2026-10-01', '2026-10-08')
+        self.assertTrue(ok, message)
+        shutil.copy(self.local_path, self.remote_path)
+        self.sync = SyncManager(SqliteEndpoint(self.local_path), PostgresLikeEndpoint(self.remote_path),
+                                db=self.db, log_path=os.path.join(self.tmp, 'sync_log.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _remote(self, sql, params=()):
+        conn = sqlite3.connect(self.remote_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_identical_databases_have_no_conflicts(self):
+        result = self.sync.sync_now()
+        self.assertNotIn('error', result)
+        self.assertEqual((result['pushed'], result['pulled'], result['conflicts']), (0, 0, 0))
+
+    def test_push_updated_loan(self):
+        self.assertNotIn('error', self.sync.sync_now())
+        # The remote reads this loan's dates as date objects, the pushed row carries text
+        self.assertEqual(self._remote('SELECT borrow_date FROM borrow_records'), [(date(2026, 10, 1),)])
+        ok, message = self.db.return_book('S001', 'B001', '2026-10-10')
+        self.assertTrue(ok, message)
+
+        result = self.sync.sync_now(direction='push')
+        self.assertNotIn('error', result)
+        self.assertEqual(result['tables']['borrow_records']['pushed'], 1)
+        self.assertEqual(self._remote('SELECT status FROM borrow_records'), [('returned',)])
+        self.assertEqual(self._remote('SELECT available_copies FROM books'), [(2,)])
+        self.assertEqual(
+            self._remote('SELECT day, borrowed, returned, late_returns, late_days FROM daily_circulation_stats ORDER BY day'),
+            [(date(2026, 10, 1), 1, 0, 0, 0), (date(2026, 10, 10), 0, 1, 1, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
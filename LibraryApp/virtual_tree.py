@@ -0,0 +1,434 @@
+"""
+Treeview helpers: virtual list view and keyed row reconciliation
+VirtualTreeview keeps only the rows in the visible window (plus a small margin)
+as Tk items; everything else stays in a backing row source and is formatted on
+demand. KeyedTreeSync updates a plain Treeview by primary key, touching only the
+rows that were inserted, changed or removed since the previous snapshot.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class ListRowSource:
+    """
+    Array-backed row source.
+
+    Parameters:
+    - rows: Sequence of raw rows (tuples, sqlite3.Row, ...)
+    - formatter: Function raw_row -> (values, tags) used only for rows being shown
+    """
+
+    def __init__(self, rows, formatter=None):
+        self.rows = list(rows)
+        self.formatter = formatter
+
+    def __len__(self):
+        return len(self.rows)
+
+    def raw(self, index):
+        return self.rows[index]
+
+    def fetch(self, start, stop):
+        """Return [(values, tags)] for rows[start:stop]"""
+        if self.formatter is None:
+            return [(tuple(row), ()) for row in self.rows[start:stop]]
+        return [self.formatter(row) for row in self.rows[start:stop]]
+
+    def sort(self, key, reverse=False):
+        self.rows.sort(key=key, reverse=reverse)
+
+
+def natural_sort_key(value):
+    """Sort key that orders numbers (and digit-only strings) numerically, text case-insensitively"""
+    if value is None:
+        return (2, 0, '')
+    if isinstance(value, (int, float)):
+        return (0, value, '')
+    text = str(value).strip()
+    if text.isdigit():
+        return (0, int(text), '')
+    return (1, 0, text.lower())
+
+
+class VirtualTreeview:
+    """
+    Drives an existing ttk.Treeview + vertical Scrollbar as a virtual list.
+
+    Parameters:
+    - tree: The Treeview (show='headings') to render into
+    - vscrollbar: Its vertical Scrollbar; the view takes over its command
+    - column_keys: Optional list, one entry per display column, of the raw-row index
+      (or function raw_row -> value) used when that column heading is clicked to sort
+    - margin: Extra rows materialized below the visible window
+    - key: Optional function raw_row -> primary key; when given, selection follows
+      rows by key across set_rows() reloads instead of being cleared
+
+    Tk items are pooled and reused (item(values=...)) as the window scrolls, so
+    scrolling and sorting never insert or delete more than a screenful of items.
+    tree.selection() and tree.item() keep working for the visible rows.
+    """
+
+    DEFAULT_ROW_HEIGHT = 20
+    DEFAULT_HEADING_HEIGHT = 25
+
+    def __init__(self, tree, vscrollbar=None, column_keys=None, margin=2, key=None):
+        self.tree = tree
+        self.key = key
+        self.vscrollbar = vscrollbar
+        self.column_keys = column_keys
+        self.margin = margin
+        self.source = ListRowSource([])
+        self.offset = 0
+        self.visible_rows = int(str(tree.cget('height')) or 10)
+        self.sort_column = None
+        self.sort_reverse = False
+        self._column_position = None
+        self._pool = []
+        self._rendered = []
+        self._selected = set()
+        self._anchor = None
+        self._syncing_selection = False
+        self._headings = {}
+
+        tree.configure(yscrollcommand='')
+        if vscrollbar is not None:
+            vscrollbar.configure(command=self.yview)
+
+        tree.bind('<Configure>', self._on_configure, add='+')
+        tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        tree.bind('<MouseWheel>', self._on_mousewheel)
+        tree.bind('<Button-4>', lambda e: self._scroll_and_break(-3))
+        tree.bind('<Button-5>', lambda e: self._scroll_and_break(3))
+        for key, handler in (('<Up>', lambda e: self._move_selection(-1)),
+                             ('<Down>', lambda e: self._move_selection(1)),
+                             ('<Prior>', lambda e: self._move_selection(-self.visible_rows)),
+                             ('<Next>', lambda e: self._move_selection(self.visible_rows)),
+                             ('<Home>', lambda e: self._move_selection(-len(self.source))),
+                             ('<End>', lambda e: self._move_selection(len(self.source)))):
+            tree.bind(key, handler)
+
+        if column_keys is not None:
+            for position, column in enumerate(tree['columns']):
+                self._headings[column] = tree.heading(column, 'text')
+                tree.heading(column, command=lambda c=column, p=position: self.sort_by(c, p))
+
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+    def set_rows(self, rows, formatter=None, keep_position=True):
+        """Replace the backing rows; current sort and (clamped) scroll position are kept"""
+        self.set_source(ListRowSource(rows, formatter), keep_position=keep_position)
+
+    def set_source(self, source, keep_position=True):
+        selected_keys, anchor_key = set(), None
+        if self.key is not None and (self._selected or self._anchor is not None):
+            selected_keys = {self.key(self.source.raw(i)) for i in self._selected if i < len(self.source)}
+            if self._anchor is not None and self._anchor < len(self.source):
+                anchor_key = self.key(self.source.raw(self._anchor))
+        self.source = source
+        self._selected = set()
+        self._anchor = None
+        if self.sort_column is not None:
+            self._apply_sort()
+        if selected_keys or anchor_key is not None:
+            # Paged sources are only searched around the current window (no full read)
+            if isinstance(source, ListRowSource):
+                candidates = range(len(source))
+            else:
+                candidates = range(self.offset, min(len(source), self.offset + self.visible_rows + self.margin))
+            for index in candidates:
+                row_key = self.key(source.raw(index))
+                if row_key in selected_keys:
+                    self._selected.add(index)
+                if row_key == anchor_key:
+                    self._anchor = index
+        if not keep_position:
+            self.offset = 0
+        self.refresh()
+
+    def __len__(self):
+        return len(self.source)
+
+    def raw_row(self, item):
+        """Raw backing row for a materialized Tk item id (or None)"""
+        index = self._index_of(item)
+        return self.source.raw(index) if index is not None else None
+
+    def iter_values(self, chunk=1000):
+        """Yield display values for every row in current order (e.g. for export)"""
+        total = len(self.source)
+        for start in range(0, total, chunk):
+            for values, _tags in self.source.fetch(start, min(start + chunk, total)):
+                yield values
+
+    def export_values(self, chunk=1000):
+        """Like iter_values(), but pinned to the current rows and order so it can be
+        consumed on a worker thread while the view keeps changing. Paged sources are
+        streamed from one database cursor.
+        """
+        source = self.source
+        if hasattr(source, 'stream_values'):
+            return source.stream_values()
+        if isinstance(source, ListRowSource):
+            source = ListRowSource(source.rows, source.formatter)  # copy: later sorts don't move it
+        total = len(source)
+        return (values for start in range(0, total, chunk)
+                for values, _tags in source.fetch(start, min(start + chunk, total)))
+
+    def selected_indexes(self):
+        return sorted(self._selected)
+
+    # ------------------------------------------------------------------
+    # Sorting
+    # ------------------------------------------------------------------
+    def sort_by(self, column, position):
+        """Heading click: sort the backing rows by this column, toggling direction"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self._column_position = position
+        self._apply_sort()
+        self._selected.clear()
+        self._anchor = None
+        self.offset = 0
+        self.refresh()
+        for col, text in self._headings.items():
+            arrow = ''
+            if col == column:
+                arrow = ' ▼' if self.sort_reverse else ' ▲'
+            self.tree.heading(col, text=text + arrow)
+
+    def _apply_sort(self):
+        if self._column_position is None:
+            return
+        # Sources that sort themselves (e.g. ORDER BY in SQL) take the column position
+        if hasattr(self.source, 'sort_by_column'):
+            self.source.sort_by_column(self._column_position, self.sort_reverse)
+            return
+        if not hasattr(self.source, 'sort') or self.column_keys is None:
+            return
+        getter = self.column_keys[self._column_position]
+        if callable(getter):
+            key = lambda row: natural_sort_key(getter(row))
+        else:
+            key = lambda row: natural_sort_key(row[getter])
+        self.source.sort(key=key, reverse=self.sort_reverse)
+
+    # ------------------------------------------------------------------
+    # Scrolling
+    # ------------------------------------------------------------------
+    def yview(self, *args):
+        """Scrollbar command protocol ('moveto', f) / ('scroll', n, 'units'|'pages')"""
+        total = len(self.source)
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * total))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if len(args) > 2 and args[2] == 'pages':
+                amount *= max(1, self.visible_rows - 1)
+            self.scroll_to(self.offset + amount)
+
+    def scroll(self, units):
+        self.scroll_to(self.offset + units)
+
+    def scroll_to(self, offset):
+        max_offset = max(0, len(self.source) - self.visible_rows)
+        offset = max(0, min(int(offset), max_offset))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def see(self, index):
+        """Scroll so the row at model index is inside the visible window"""
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible_rows:
+            self.scroll_to(index - self.visible_rows + 1)
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+    def refresh(self):
+        """Materialize the current window into the pooled Tk items"""
+        total = len(self.source)
+        max_offset = max(0, total - self.visible_rows)
+        self.offset = max(0, min(self.offset, max_offset))
+        stop = min(total, self.offset + self.visible_rows + self.margin)
+        rows = self.source.fetch(self.offset, stop)
+
+        # Grow or shrink the item pool to the window size
+        while len(self._pool) < len(rows):
+            self._pool.append(self.tree.insert('', 'end'))
+            self._rendered.append(None)
+        while len(self._pool) > len(rows):
+            self.tree.delete(self._pool.pop())
+            self._rendered.pop()
+
+        # Only rewrite items whose content actually changed
+        for position, (item, row) in enumerate(zip(self._pool, rows)):
+            row = (tuple(row[0]), tuple(row[1]))
+            if self._rendered[position] != row:
+                self.tree.item(item, values=row[0], tags=row[1])
+                self._rendered[position] = row
+
+        self._sync_selection_to_tree()
+        try:
+            self.tree.yview_moveto(0)
+        except tk.TclError:
+            pass
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        if self.vscrollbar is None:
+            return
+        total = len(self.source)
+        if total <= 0 or total <= self.visible_rows:
+            self.vscrollbar.set(0.0, 1.0)
+        else:
+            self.vscrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_rows) / total))
+
+    def _on_configure(self, event):
+        row_height = self.DEFAULT_ROW_HEIGHT
+        try:
+            style_height = ttk.Style().lookup('Treeview', 'rowheight')
+            if style_height:
+                row_height = int(style_height)
+        except (tk.TclError, ValueError):
+            pass
+        heading = self.DEFAULT_HEADING_HEIGHT
+        if self._pool:
+            bbox = self.tree.bbox(self._pool[0])
+            if bbox:
+                heading = bbox[1]
+        rows = max(1, (event.height - heading) // max(1, row_height))
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
+
+    # ------------------------------------------------------------------
+    # Selection (kept in model indexes so it survives scrolling)
+    # ------------------------------------------------------------------
+    def _index_of(self, item):
+        try:
+            return self.offset + self._pool.index(item)
+        except ValueError:
+            return None
+
+    def _on_select(self, event=None):
+        if self._syncing_selection:
+            return
+        window = set(range(self.offset, self.offset + len(self._pool)))
+        self._selected -= window
+        for item in self.tree.selection():
+            index = self._index_of(item)
+            if index is not None:
+                self._selected.add(index)
+        focus = self._index_of(self.tree.focus())
+        if focus is not None:
+            self._anchor = focus
+
+    def _sync_selection_to_tree(self):
+        wanted = [item for position, item in enumerate(self._pool) if self.offset + position in self._selected]
+        self._syncing_selection = True
+        try:
+            self.tree.selection_set(wanted)
+            if self._anchor is not None:
+                position = self._anchor - self.offset
+                if 0 <= position < len(self._pool):
+                    self.tree.focus(self._pool[position])
+        finally:
+            self._syncing_selection = False
+
+    def _move_selection(self, delta):
+        total = len(self.source)
+        if not total:
+            return 'break'
+        current = self._anchor if self._anchor is not None else (self.offset - 1 if delta > 0 else self.offset)
+        index = max(0, min(total - 1, current + delta))
+        self._selected = {index}
+        self._anchor = index
+        self.see(index)
+        self._sync_selection_to_tree()
+        self.tree.event_generate('<<TreeviewSelect>>')
+        return 'break'
+
+    def _scroll_and_break(self, units):
+        self.scroll(units)
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        if event.delta:
+            self.scroll(-3 if event.delta > 0 else 3)
+        return 'break'
+
+
+class KeyedTreeSync:
+    """
+    Keyed reconciliation for a plain ttk.Treeview.
+
+    apply() takes the full list of rows as (key, values, tags) and diffs it against
+    the previous snapshot: new keys are inserted, changed rows are updated in place,
+    missing keys are deleted and rows are moved only if the order changed. Item ids
+    are derived from the keys, so selection and scroll position survive updates.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._rows = {}
+        self._order = []
+
+    @staticmethod
+    def item_id(key):
+        if isinstance(key, tuple):
+            return '|'.join(str(part) for part in key)
+        return str(key)
+
+    def apply(self, rows):
+        """Reconcile the tree with rows; returns (inserted, updated, deleted) counts"""
+        tree = self.tree
+        # Someone cleared or refilled the tree behind our back: start from scratch
+        if list(tree.get_children()) != self._order:
+            tree.delete(*tree.get_children())
+            self._rows = {}
+            self._order = []
+
+        new_rows = {}
+        order = []
+        for key, values, tags in rows:
+            iid = self.item_id(key)
+            if iid in new_rows:
+                continue
+            new_rows[iid] = (tuple(values), tuple(tags))
+            order.append(iid)
+
+        removed = [iid for iid in self._order if iid not in new_rows]
+        if removed:
+            tree.delete(*removed)
+
+        inserted = updated = 0
+        for iid in order:
+            values, tags = new_rows[iid]
+            previous = self._rows.get(iid)
+            if previous is None:
+                tree.insert('', 'end', iid=iid, values=values, tags=tags)
+                inserted += 1
+            elif previous != new_rows[iid]:
+                tree.item(iid, values=values, tags=tags)
+                updated += 1
+
+        current = list(tree.get_children())
+        if current != order:
+            for index, iid in enumerate(order):
+                if current[index] != iid:
+                    tree.move(iid, '', index)
+                    current.remove(iid)
+                    current.insert(index, iid)
+
+        self._rows = new_rows
+        self._order = order
+        return inserted, updated, len(removed)